@@ -0,0 +1,289 @@
+"""
+Microbenchmarks for the parse and render pipeline, run against synthetic 'zpool status' output (see synthetic.py).
+
+Each scenario generates a set of pools and reports the time (median and minimum over all runs) and peak memory allocated by each stage:
+
+ - json_decode:      Decode the complete 'zpool status' JSON document with json.loads().
+ - stream_decode:    Decode the same document incrementally (64KiB at a time) as done when reading the zpool pipe.
+ - model_build:      Construct a ZPool instance for every pool (raw fields only, renderables are built on first use).
+ - vdev_build:       Construct a VDEV instance for every leaf device and build its row (includes parsing the trim state).
+ - scan_status:      Construct a ScanStatus instance for every pool and build its Table.
+ - humanise:         Format the size of every leaf device.
+ - progress:         Create a progress bar renderable for every leaf device.
+ - renderables:      Construct a ZPool instance for every pool and build its summary, VDEVs and scan rich Tables.
+ - table_render:     Render the (memoised) rich Tables of every pool to a (discarded) console.
+ - textual_update:   Replace the ZPool displayed in a ZPoolPanel and wait for Textual to refresh the screen (only if Textual is installed).
+ - textual_refresh:  Apply a snapshot in which a single device's error count changed to the displayed ZPool in place (as the Monitor does on each
+                     refresh), update the ZPoolPanel and wait for Textual to refresh the screen (only if Textual is installed).
+
+The benchmark fails (non-zero exit status) if the median time of any stage regresses by more than the allowed tolerance over the stored baseline.
+
+Usage:
+
+    python benchmarks/bench_pipeline.py [--scenario NAME ...] [--runs N] [--tolerance FRACTION] [--update-baseline] [--no-textual]
+    python benchmarks/bench_pipeline.py --pools N --vdevs N --disks N [--layout LAYOUT] [--scan SCAN] [--trim TRIM]
+"""
+
+# Import System Libraries
+from typing import Any, Awaitable, Callable
+import argparse
+import asyncio
+import importlib.util
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'pipeline.json')
+
+sys.path.insert(0, REPO_ROOT)
+
+# Import Rich, zpool_monitor and the synthetic pool generator
+from rich.console import Console
+from zpool_monitor.zpool import ZPool, VDEV, ScanStatus, humanise, create_progress_renderable
+from zpool_monitor.systemzpool import _ZPoolsDecoder
+from synthetic import LAYOUTS, SCANS, TRIMS, generate_zpools_status
+
+# Predefined scenarios mapping name to generate_zpools_status() parameters. 'large' matches the 500 disk hosts the dashboard must keep up with
+SCENARIOS: dict[str, dict[str, Any]] = {
+    'small': {'pools': 2, 'vdevs': 1, 'disks': 4, 'layout': 'raidz1', 'scan': 'scrub-finished', 'trim': 'complete'},
+    'mirror-resilver': {'pools': 1, 'vdevs': 24, 'disks': 2, 'layout': 'mirror', 'scan': 'resilver', 'trim': 'untrimmed'},
+    'stripe': {'pools': 1, 'vdevs': 1, 'disks': 64, 'layout': 'stripe', 'scan': 'none', 'trim': 'none'},
+    'large': {'pools': 4, 'vdevs': 10, 'disks': 12, 'layout': 'raidz2', 'scan': 'scrub', 'trim': 'active'},
+}
+
+
+def _leaves(vdevs_data: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    :param vdevs_data: VDEVs within a pool or VDEV.
+    :return: All leaf devices below vdevs_data.
+    """
+    leaves = []
+    for data in vdevs_data.values():
+        leaves.extend(_leaves(data['vdevs']) if 'vdevs' in data else [data])
+
+    return leaves
+
+
+def measure(stage: Callable[[], Any], runs: int) -> dict[str, float]:
+    """
+    Time a benchmark stage, then run it once more with tracemalloc enabled to measure allocations.
+
+    :param stage: Function performing one run of the stage.
+    :param runs: Number of timed runs.
+    :return: Dictionary of median and minimum time (seconds) and peak memory allocated (bytes).
+    """
+    stage()
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        stage()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    stage()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'median': statistics.median(times), 'min': min(times), 'peak_bytes': peak}
+
+
+async def measure_async(stage: Callable[[], Awaitable[Any]], runs: int) -> dict[str, float]:
+    """
+    Asynchronous version of measure().
+    """
+    await stage()
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await stage()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    await stage()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'median': statistics.median(times), 'min': min(times), 'peak_bytes': peak}
+
+
+def build_renderables(pool: ZPool) -> None:
+    """
+    Build every rich renderable displayed for a pool.
+
+    :param pool: Instance of ZPool.
+    """
+    _ = pool.summary, pool.vdevs, pool.scan_stats
+
+
+def render_pools(pools: list[ZPool]) -> None:
+    """
+    Render the tables of every pool to a console writing to memory, as done by zpool_status.
+
+    :param pools: Instances of ZPool to render.
+    """
+    console = Console(file=io.StringIO(), width=160, force_terminal=True, color_system='truecolor')
+    for pool in pools:
+        console.print(pool.summary)
+        console.print(pool.vdevs)
+        console.print(pool.scan_stats)
+
+
+def stream_decode(document: bytes) -> None:
+    """
+    Decode document incrementally as it would be read from the zpool pipe.
+
+    :param document: Complete 'zpool status' JSON output.
+    """
+    decoder = _ZPoolsDecoder()
+    for offset in range(0, len(document), 65536):
+        decoder.feed(document[offset:offset + 65536])
+    decoder.feed(b'', final=True)
+
+
+def measure_textual(pools_status: dict[str, Any], runs: int) -> dict[str, dict[str, float]]:
+    """
+    Measure the time taken to update a ZPoolPanel with a new ZPool instance, and with a ZPool instance updated in place, and refresh the screen of a
+    headless Textual app.
+
+    :param pools_status: Dictionary mapping pool name to status, the first pool is displayed.
+    :param runs: Number of timed runs.
+    :return: Dictionary mapping stage name (textual_update, textual_refresh) to results as returned by measure().
+    """
+    from textual.app import App, ComposeResult
+    from zpool_monitor.textual.zpoolpanel import ZPoolPanel
+
+    pool_data = next(iter(pools_status.values()))
+
+    class PanelApp(App):
+        def compose(self) -> ComposeResult:
+            yield ZPoolPanel(ZPool(pool_data=pool_data), id='panel')
+
+    async def run() -> dict[str, dict[str, float]]:
+        app = PanelApp()
+        async with app.run_test(size=(200, 400)) as pilot:
+            panel = app.query_one('#panel', ZPoolPanel)
+
+            # A new instance is required for each update as the reactive variable is only watched when it changes. Instances are built up front so
+            # only the widget update is timed (measure_async() runs the stage twice more than the timed runs, one more is used by textual_refresh)
+            zpools = iter([ZPool(pool_data=pool_data) for _ in range(runs + 3)])
+
+            async def update() -> None:
+                panel.update_zpool_data(next(zpools))
+                await pilot.pause()
+
+            results = {'textual_update': await measure_async(update, runs=runs)}
+
+            # Snapshots alternate between the original status and one where a single device has a read error
+            zpool, leaf = next(zpools), _leaves(pool_data['vdevs'])[0]
+            panel.update_zpool_data(zpool)
+            await pilot.pause()
+
+            async def refresh() -> None:
+                leaf['read_errors'] ^= 1
+                zpool.update(pool_data=pool_data, events=[])
+                panel.update_zpool_data(zpool)
+                await pilot.pause()
+
+            results['textual_refresh'] = await measure_async(refresh, runs=runs)
+            leaf['read_errors'] = 0
+
+            return results
+
+    return asyncio.run(run())
+
+
+def run_scenario(params: dict[str, Any], runs: int, textual: bool) -> dict[str, dict[str, float]]:
+    """
+    Run every stage of the benchmark against a single scenario.
+
+    :param params: Parameters passed to generate_zpools_status().
+    :param runs: Number of timed runs per stage.
+    :param textual: True to include the Textual widget update stage.
+    :return: Dictionary mapping stage name to results as returned by measure().
+    """
+    document = json.dumps(generate_zpools_status(**params), indent=4).encode()
+    pools_status = json.loads(document)['pools']
+    pools = [ZPool(pool_data=pool_data) for pool_data in pools_status.values()]
+    leaves = [leaf for pool_data in pools_status.values() for leaf in _leaves(pool_data['vdevs'])]
+    scans = [pool_data['scan_stats'] for pool_data in pools_status.values() if 'scan_stats' in pool_data]
+
+    results = {'json_decode': measure(lambda: json.loads(document), runs=runs),
+               'stream_decode': measure(lambda: stream_decode(document), runs=runs),
+               'model_build': measure(lambda: [ZPool(pool_data=pool_data) for pool_data in pools_status.values()], runs=runs),
+               'vdev_build': measure(lambda: [VDEV(vdev_data=leaf, depth=2).row_data for leaf in leaves], runs=runs),
+               'scan_status': measure(lambda: [ScanStatus(scan_data=scan).status for scan in scans], runs=runs),
+               'humanise': measure(lambda: [humanise(leaf['phys_space']) for leaf in leaves], runs=runs),
+               'progress': measure(lambda: [create_progress_renderable('Trimming', ' trimmed', 33.3) for _ in leaves], runs=runs),
+               'renderables': measure(lambda: [build_renderables(ZPool(pool_data=pool_data)) for pool_data in pools_status.values()], runs=runs),
+               'table_render': measure(lambda: render_pools(pools), runs=runs)}
+
+    if textual: results |= measure_textual(pools_status=pools_status, runs=runs)
+
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='zpool_monitor parse/render pipeline microbenchmarks')
+    parser.add_argument('--scenario', nargs='+', choices=SCENARIOS.keys(), default=list(SCENARIOS), help='Predefined scenarios to run (default = all)')
+    parser.add_argument('--pools', type=int, help='Run a custom scenario with this number of pools instead of the predefined scenarios')
+    parser.add_argument('--vdevs', type=int, default=1, help='Custom scenario: top level VDEVs per pool (default = 1)')
+    parser.add_argument('--disks', type=int, default=4, help='Custom scenario: disks per top level VDEV (default = 4)')
+    parser.add_argument('--layout', choices=LAYOUTS, default='raidz2', help='Custom scenario: RAID layout (default = raidz2)')
+    parser.add_argument('--scan', choices=SCANS, default='scrub-finished', help='Custom scenario: scan state (default = scrub-finished)')
+    parser.add_argument('--trim', choices=TRIMS, default='complete', help='Custom scenario: trim state (default = complete)')
+    parser.add_argument('--runs', type=int, default=20, help='Number of timed runs per stage (default = 20)')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed regression over baseline as a fraction (default = 0.25)')
+    parser.add_argument('--update-baseline', action='store_true', help='Store the measured medians as the new baseline')
+    parser.add_argument('--no-textual', action='store_true', help='Skip the Textual widget update stage')
+    arguments = parser.parse_args()
+
+    if arguments.pools is not None:
+        scenarios = {'custom': {'pools': arguments.pools, 'vdevs': arguments.vdevs, 'disks': arguments.disks, 'layout': arguments.layout,
+                                'scan': arguments.scan, 'trim': arguments.trim}}
+    else:
+        scenarios = {name: SCENARIOS[name] for name in arguments.scenario}
+
+    use_textual = not arguments.no_textual and importlib.util.find_spec('textual') is not None
+    if not arguments.no_textual and not use_textual: print('Textual is not installed, skipping the textual_update stage')
+
+    baselines: dict[str, dict[str, float]] = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as baseline_file:
+            baselines = json.load(baseline_file)
+
+    failed = False
+    for name, params in scenarios.items():
+        print(f'\n{name}: {', '.join(f'{key}={value}' for key, value in params.items())}')
+        print(f'  {'stage':<16}{'median':>12}{'min':>12}{'peak alloc':>14}{'baseline':>12}')
+
+        results = run_scenario(params=params, runs=arguments.runs, textual=use_textual)
+        for stage, result in results.items():
+            baseline = baselines.get(name, {}).get(stage)
+            change = f'{(result['median'] / baseline - 1) * 100:+.1f}%' if baseline and not arguments.update_baseline else ''
+            print(f'  {stage:<16}{result['median'] * 1000:>10.3f}ms{result['min'] * 1000:>10.3f}ms{result['peak_bytes'] / 1024:>11.1f}KiB{change:>12}')
+
+            if change and result['median'] > baseline * (1 + arguments.tolerance):
+                print(f'  FAIL: {stage} regressed by more than {arguments.tolerance * 100:.0f}%')
+                failed = True
+
+        if arguments.update_baseline: baselines[name] = {stage: result['median'] for stage, result in results.items()}
+
+    if arguments.update_baseline:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, 'w') as baseline_file:
+            json.dump(baselines, baseline_file, indent=4)
+        print(f'\nBaseline updated: {BASELINE_FILE}')
+
+    elif not baselines:
+        print('\nNo baseline stored, run with --update-baseline to create one')
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
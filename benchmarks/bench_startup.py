@@ -0,0 +1,93 @@
+"""
+Startup time benchmark for the zpool_status application.
+
+Each run imports zpool_monitor.apps in a fresh interpreter and records the import time. The benchmark fails (non-zero exit status) if:
+
+ - Importing zpool_monitor imports Textual (zpool_status must never load Textual).
+ - Importing zpool_monitor requires the zpool command (runs are performed with a PATH that does not contain zpool).
+ - The median import time regresses by more than the allowed tolerance over the stored baseline.
+
+Usage:
+
+    python benchmarks/bench_startup.py [--runs N] [--tolerance FRACTION] [--update-baseline]
+"""
+
+# Import System Libraries
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'startup.json')
+
+# Code executed in each fresh interpreter, reports import time and whether Textual was loaded
+_PROBE: str = '''
+import json, sys, time
+start = time.perf_counter()
+import zpool_monitor.apps
+elapsed = time.perf_counter() - start
+print(json.dumps({'import_time': elapsed, 'textual_loaded': any(name.split('.')[0] == 'textual' for name in sys.modules), 'modules': len(sys.modules)}))
+'''
+
+
+def run_probe(empty_path: str) -> dict:
+    """
+    Import zpool_monitor.apps in a fresh interpreter.
+
+    :param empty_path: Directory to use as PATH so the zpool command cannot be found.
+    :return: Dictionary of results reported by the probe.
+    """
+    env = dict(os.environ, PATH=empty_path, PYTHONPATH=REPO_ROOT, PYTHONDONTWRITEBYTECODE='')
+    result = subprocess.run([sys.executable, '-c', _PROBE], capture_output=True, text=True, env=env, cwd=REPO_ROOT)
+    if result.returncode != 0: raise RuntimeError(f'Importing zpool_monitor.apps failed:\n{result.stderr}')
+
+    return json.loads(result.stdout)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='zpool_status startup time benchmark')
+    parser.add_argument('--runs', type=int, default=20, help='Number of fresh interpreters to run (default = 20)')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed regression over baseline as a fraction (default = 0.25)')
+    parser.add_argument('--update-baseline', action='store_true', help='Store the measured median as the new baseline')
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as empty_path:
+        # Warm up the bytecode cache so the first run is not penalised
+        run_probe(empty_path)
+        results = [run_probe(empty_path) for _ in range(arguments.runs)]
+
+    median = statistics.median(result['import_time'] for result in results)
+    print(f'import zpool_monitor.apps: median {median * 1000:.1f}ms over {arguments.runs} runs, {results[0]['modules']} modules loaded')
+
+    failed = False
+    if any(result['textual_loaded'] for result in results):
+        print('FAIL: Textual was imported by zpool_monitor.apps')
+        failed = True
+
+    if arguments.update_baseline:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, 'w') as baseline_file:
+            json.dump({'import_time': median}, baseline_file, indent=4)
+        print(f'Baseline updated: {BASELINE_FILE}')
+
+    elif os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as baseline_file:
+            baseline = json.load(baseline_file)['import_time']
+
+        print(f'baseline {baseline * 1000:.1f}ms ({(median / baseline - 1) * 100:+.1f}%)')
+        if median > baseline * (1 + arguments.tolerance):
+            print(f'FAIL: startup time regressed by more than {arguments.tolerance * 100:.0f}%')
+            failed = True
+
+    else:
+        print('No baseline stored, run with --update-baseline to create one')
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
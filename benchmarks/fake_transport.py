@@ -0,0 +1,54 @@
+"""
+Stand-in transport for testing 'zpool_monitor --host' without ssh access to real hosts. It is used in place of ssh as the transport command, and returns
+canned 'zpool status' output (see synthetic.py) for each host instead of running zpool:
+
+    zpool_monitor --transport 'python benchmarks/fake_transport.py {host}' --host nas01,nas02,down01,hung01
+
+The output for each host is deterministic: the number of pools (1 to 3) is derived from the host name, and the first pool of every third host has a scrub
+in progress. Hosts can be made to misbehave by their name:
+
+ - down*:  exits with status 255 and no output, as ssh does when the host cannot be reached.
+ - hung*:  never responds, as a host with a suspended pool does (the monitor's --timeout kills it).
+ - slow*:  responds after 2 seconds.
+
+Usage:
+
+    python benchmarks/fake_transport.py HOST zpool status -j --json-int -t [POOL ...]
+"""
+
+# Import System Libraries
+import json
+import sys
+import time
+import zlib
+
+# Import the synthetic pool generator
+from synthetic import generate_pool
+
+
+def main() -> int:
+    """
+    :return: Exit status, 1 (as returned by zpool) if the command is not supported or a requested pool does not exist.
+    """
+    if len(sys.argv) < 4 or sys.argv[2] != 'zpool' or sys.argv[3] != 'status': return 1
+    host = sys.argv[1]
+    requested = [argument for argument in sys.argv[4:] if not argument.startswith('-')]
+
+    if host.startswith('down'): return 255
+    if host.startswith('hung'): time.sleep(1e6)
+    if host.startswith('slow'): time.sleep(2)
+
+    seed = zlib.crc32(host.encode())
+    pools = {f'pool{pool:02}': generate_pool(name=f'pool{pool:02}', vdevs=2, disks=4, scan='scrub' if pool == 0 and seed % 3 == 0 else 'scrub-finished')
+             for pool in range(1 + seed % 3)}
+
+    if any(poolname not in pools for poolname in requested): return 1
+    if requested: pools = {poolname: pools[poolname] for poolname in requested}
+
+    json.dump({'output_version': {'command': 'zpool status', 'vers_major': 0, 'vers_minor': 1}, 'pools': pools}, sys.stdout)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Synthetic 'zpool status -j --json-int -t' output generator, and a status source returning it to the Monitor, used by the benchmarks and tests.
+
+Pools are generated with a configurable number of top level VDEVs, RAID layout, disks per VDEV, and active scrub/resilver/trim states so that the parse and
+render pipeline can be benchmarked against pool shapes found on large production hosts without requiring ZFS.
+"""
+
+# Import System Libraries
+from typing import Any, AsyncIterator, Iterator
+import copy
+import itertools
+import time
+
+# Supported RAID layouts. 'stripe' places disks directly under the root VDEV, all other layouts add a level of grouping VDEVs
+LAYOUTS: tuple[str, ...] = ('stripe', 'mirror', 'raidz1', 'raidz2', 'raidz3', 'draid2')
+
+# Supported scan and trim states
+SCANS: tuple[str, ...] = ('none', 'scrub-finished', 'scrub', 'resilver-finished', 'resilver')
+TRIMS: tuple[str, ...] = ('none', 'untrimmed', 'complete', 'active')
+
+_DISK_SIZE: int = 18 * 1000 ** 4
+
+
+def _vdev(name: str, vdev_type: str, guid: int, state: str = 'ONLINE') -> dict[str, Any]:
+    """
+    :return: Fields common to every VDEV in 'zpool status' JSON output.
+    """
+    return {'name': name, 'vdev_type': vdev_type, 'guid': str(guid), 'class': 'normal', 'state': state, 'alloc_space': 0, 'total_space': 0,
+            'def_space': 0, 'read_errors': 0, 'write_errors': 0, 'checksum_errors': 0}
+
+
+def _disk(name: str, guid: int, trim: str, now: int) -> dict[str, Any]:
+    """
+    :return: Leaf disk VDEV with the requested trim state.
+    """
+    disk = _vdev(name=name, vdev_type='disk', guid=guid) | {'path': f'/dev/disk/by-id/{name}-part1', 'devid': f'{name}-part1', 'phys_space': _DISK_SIZE,
+                                                            'rep_dev_size': _DISK_SIZE, 'slow_ios': 0}
+    match trim:
+        case 'none': disk['trim_notsup'] = 1
+        case 'untrimmed': disk |= {'trim_notsup': 0, 'trim_state': 'UNTRIMMED'}
+        case 'complete': disk |= {'trim_notsup': 0, 'trim_state': 'COMPLETE', 'trim_time': now - 86400}
+        case 'active': disk |= {'trim_notsup': 0, 'trim_state': 'ACTIVE', 'trimmed': _DISK_SIZE // 3, 'to_trim': _DISK_SIZE}
+
+    return disk
+
+
+def _scan_stats(scan: str, now: int) -> dict[str, Any] | None:
+    """
+    :return: Scan statistics for the requested scan state, or None if the pool has never been scanned.
+    """
+    if scan == 'none': return None
+
+    function, _, finished = scan.partition('-')
+    to_examine = 400 * 1000 ** 4
+    scanning = not finished
+
+    return {'function': function.upper(), 'state': 'SCANNING' if scanning else 'FINISHED', 'start_time': now - 7200, 'end_time': 0 if scanning else now - 600,
+            'to_examine': to_examine, 'examined': to_examine // 2 if scanning else to_examine, 'skipped': 0, 'processed': 1024 * 1024, 'errors': 0,
+            'bytes_per_scan': 0, 'pass_start': now - 7200, 'scrub_pause': 0, 'scrub_spent_paused': 0, 'issued_bytes_per_scan': 0,
+            'issued': to_examine // 3 if scanning else to_examine}
+
+
+def generate_pool(name: str, vdevs: int, disks: int, layout: str = 'raidz2', scan: str = 'scrub-finished', trim: str = 'complete',
+                  now: int | None = None) -> dict[str, Any]:
+    """
+    Generate the status of a single pool.
+
+    :param name: Name of the pool.
+    :param vdevs: Number of top level VDEVs (ignored for 'stripe').
+    :param disks: Number of disks per top level VDEV (total number of disks for 'stripe').
+    :param layout: RAID layout, one of LAYOUTS.
+    :param scan: Scan state, one of SCANS.
+    :param trim: Trim state of every disk, one of TRIMS.
+    :param now: Time (seconds since the epoch) used for timestamps, defaults to the current time.
+    :return: Dictionary matching the status of one pool in 'zpool status -j --json-int -t' output.
+    """
+    now = int(time.time()) if now is None else now
+    guids = itertools.count(1)
+
+    root = _vdev(name=name, vdev_type='root', guid=next(guids)) | {'vdevs': {}}
+    if layout == 'stripe':
+        for disk in range(disks):
+            root['vdevs'][f'{name}-d{disk}'] = _disk(name=f'{name}-d{disk}', guid=next(guids), trim=trim, now=now)
+    else:
+        for vdev in range(vdevs):
+            group = _vdev(name=f'{layout}-{vdev}', vdev_type=layout.rstrip('0123456789'), guid=next(guids)) | {'vdevs': {}}
+            for disk in range(disks):
+                group['vdevs'][f'{name}-v{vdev}d{disk}'] = _disk(name=f'{name}-v{vdev}d{disk}', guid=next(guids), trim=trim, now=now)
+            root['vdevs'][group['name']] = group
+
+    pool = {'name': name, 'state': 'ONLINE', 'pool_guid': str(next(guids)), 'txg': 1, 'spa_version': 5000, 'zpl_version': 5, 'error_count': 0,
+            'vdevs': {name: root}}
+
+    if (scan_stats := _scan_stats(scan=scan, now=now)) is not None: pool['scan_stats'] = scan_stats
+
+    return pool
+
+
+def generate_zpools_status(pools: int, vdevs: int, disks: int, layout: str = 'raidz2', scan: str = 'scrub-finished', trim: str = 'complete',
+                           now: int | None = None) -> dict[str, Any]:
+    """
+    Generate a complete 'zpool status -j --json-int -t' document.
+
+    :param pools: Number of pools.
+    :return: Dictionary matching the complete JSON document output by 'zpool status'. See generate_pool() for other parameters.
+    """
+    return {'output_version': {'command': 'zpool status', 'vers_major': 0, 'vers_minor': 1},
+            'pools': {f'pool{pool:02}': generate_pool(name=f'pool{pool:02}', vdevs=vdevs, disks=disks, layout=layout, scan=scan, trim=trim, now=now)
+                      for pool in range(pools)}}
+
+
+class SyntheticSource:
+    """
+    Status source for the Monitor (in place of ZPoolCommandSource) returning pools_status on every request, or raising error if it is set. Used to run the
+    Monitor, and the applications built on it, without ZFS.
+    """
+    snapshot_time: float | None = None
+    snapshot_label: str = ''
+
+    def __init__(self, pools_status: dict[str, Any]):
+        """
+        :param pools_status: Dictionary mapping pool name to status (see generate_pool()), may be changed between requests.
+        """
+        self.pools_status = pools_status
+        self.error: Exception | None = None
+        self.errors: dict[str, Exception] = {}
+
+    def iter_status(self, poolnames: list[str]) -> Iterator[tuple[str, dict[str, Any]]]:
+        """
+        :param poolnames: List of selected ZPool names to retrieve status for. An empty list means all pools are retrieved.
+        :return: Iterator yielding (pool name, copy of the status for that pool)
+        """
+        if self.error: raise self.error
+
+        return ((poolname, copy.deepcopy(pool_data)) for poolname, pool_data in list(self.pools_status.items()) if not poolnames or poolname in poolnames)
+
+    async def iter_status_async(self, poolnames: list[str]) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """
+        Asynchronous version of iter_status().
+        """
+        for poolname, pool_data in self.iter_status(poolnames=poolnames):
+            yield poolname, pool_data
@@ -0,0 +1,33 @@
+"""
+Test configuration: the benchmarks directory is added to the module search path so the tests can build pools with the synthetic 'zpool status' generator
+(benchmarks/synthetic.py) used by the benchmarks, and run the stand-in transport (benchmarks/fake_transport.py)
+"""
+
+# Import System Libraries
+from pathlib import Path
+from typing import Callable
+import itertools
+import os
+import sys
+import textwrap
+import pytest
+
+BENCHMARKS_DIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks')
+
+if BENCHMARKS_DIR not in sys.path: sys.path.insert(0, BENCHMARKS_DIR)
+
+
+@pytest.fixture
+def zpool_stub(tmp_path: Path) -> Callable[[str], list[str]]:
+    """
+    :return: Function writing a stand-in for the zpool command and returning the command prefix (transport) that runs it in place of zpool. The stand-in
+             is Python source, run with the zpool sub-command and its parameters in sys.argv[2:].
+    """
+    counter = itertools.count()
+
+    def write_stub(source: str) -> list[str]:
+        path = tmp_path / f'zpool_stub{next(counter)}.py'
+        path.write_text(textwrap.dedent(source))
+        return [sys.executable, str(path)]
+
+    return write_stub
@@ -0,0 +1,47 @@
+"""
+Tests for the scan rate alert rule (zpool_monitor.alerts.ScanRateRule), fed with scan statuses sampled by PoolProgress as the Monitor does
+"""
+
+# Import System Libraries
+from types import SimpleNamespace
+
+# Import zpool_monitor.alerts AlertEngine and ScanRateRule classes, and zpool_monitor.zpool PoolProgress and ScanStatus classes
+from zpool_monitor.alerts import AlertEngine, ScanRateRule
+from zpool_monitor.zpool import PoolProgress, ScanStatus
+
+GIB = 1 << 30
+START = 1_700_000_000
+
+
+def _pool(issued: int, now: float, progress: PoolProgress | None) -> SimpleNamespace:
+    """
+    :param issued: Bytes issued by the resilver.
+    :param now: Time (seconds since the epoch) the status was obtained.
+    :param progress: Progress history of the pool, None if no samples have been recorded.
+    :return: Stand-in for the ZPool 'tank' with a resilver of 2000 GiB in progress (only the attributes used by ScanRateRule).
+    """
+    scan_data = {'function': 'RESILVER', 'state': 'SCANNING', 'start_time': START, 'pass_start': START, 'to_examine': 2000 * GIB, 'examined': issued,
+                 'skipped': 0, 'issued': issued}
+    if progress: progress.record(pool_data={'scan_stats': scan_data, 'vdevs': {}}, timestamp=now)
+    return SimpleNamespace(poolname='tank', scan=ScanStatus(scan_data, now=now, progress=progress))
+
+
+def test_stalled_resilver_fires():
+    engine = AlertEngine(rules=[ScanRateRule(name='slow-resilver', for_seconds=60, rate=100 * (1 << 20))], sinks=[])
+    progress = PoolProgress(sample_period=1.0)
+
+    # Issue 1 GiB/s for 100 seconds, then nothing: 'issued' stays unchanged on every later refresh, while the pass average stays above 100 MiB/s
+    for second in range(1, 481):
+        pool = _pool(issued=min(second, 100) * GIB, now=START + second, progress=progress)
+        engine.evaluate(pools={'tank': pool}, changed_pools=['tank'], events=[], now=START + second)
+        if second == 100: assert not engine.firing
+
+    assert [(alert.rule, alert.poolname) for alert in engine.firing] == [('slow-resilver', 'tank')]
+    assert 'stalled' in engine.firing[0].summary
+
+
+def test_unmeasured_rate_is_below():
+    rule = ScanRateRule(name='slow-resilver', rate=100 * (1 << 20))
+    observation, = rule.observe_pool(pool=_pool(issued=50 * GIB, now=START + 100, progress=None), now=START + 100)
+
+    assert observation.active and 'not measured yet' in observation.summary
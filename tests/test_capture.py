@@ -0,0 +1,139 @@
+"""
+Tests for recording snapshots to a capture file and replaying them (zpool_monitor.capture), with synthetic pools (see benchmarks/synthetic.py)
+"""
+
+# Import System Libraries
+from typing import Any
+import os
+import pytest
+
+# Import the synthetic pool generator
+from synthetic import generate_pool
+
+# Import zpool_monitor.capture module, CaptureWriter, CaptureReader and CaptureReplaySource classes
+from zpool_monitor import capture
+from zpool_monitor.capture import CaptureWriter, CaptureReader, CaptureReplaySource
+
+START = 1_700_000_000
+
+# Time between snapshots (seconds)
+PERIOD = 10
+
+
+def _pools_status(item: int) -> dict[str, Any]:
+    """
+    :param item: Index of the snapshot.
+    :return: Status of the pool 'tank' in the snapshot, with the snapshot index as its error count to tell snapshots apart.
+    """
+    return {'tank': generate_pool(name='tank', vdevs=1, disks=2, now=START) | {'error_count': item}}
+
+
+def _record(path: str, count: int) -> None:
+    """
+    Append count snapshots to the capture file, taken every PERIOD seconds from START.
+    """
+    writer = CaptureWriter(path)
+    for item in range(count):
+        writer.record(pools_status=_pools_status(item), timestamp=START + item * PERIOD)
+    writer.close()
+
+
+def _record_offset(path: str, item: int) -> int:
+    """
+    :return: Offset of a record in the capture file, read from its index.
+    """
+    reader = CaptureReader(path)
+    offset = reader._CaptureReader__index[item][1]
+    reader.close()
+    return offset
+
+
+class _Clock:
+    """Stand-in for the time module used by the replay clock, time only advances when the test says so"""
+    def __init__(self):
+        self.now: float = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def test_seek_without_reading_earlier_snapshots(tmp_path):
+    path = str(tmp_path / 'capture.zpm')
+    _record(path, count=20)
+
+    # Overwrite the compressed snapshots before the 6th, so reading any of them fails
+    with open(path, 'r+b') as capture_file:
+        for item in range(5):
+            capture_file.seek(_record_offset(path, item) + capture._RECORD_HEADER.size)
+            capture_file.write(b'\xff' * 16)
+
+    reader = CaptureReader(path)
+    assert len(reader) == 20
+    assert [reader.find(START + seconds) for seconds in (-5, 0, 55, 59.9, 60, 1000)] == [0, 0, 5, 5, 6, 19]
+
+    timestamp, pools_status = reader.snapshot(reader.find(START + 55))
+    assert timestamp == START + 50 and pools_status == _pools_status(5)
+    reader.close()
+
+
+def test_missing_index_rebuilt(tmp_path):
+    path = str(tmp_path / 'capture.zpm')
+    _record(path, count=5)
+    os.remove(f'{path}.idx')
+
+    reader = CaptureReader(path)
+    assert [reader.timestamp(item) for item in range(len(reader))] == [START + item * PERIOD for item in range(5)]
+    assert reader.snapshot(3) == (START + 30, _pools_status(3))
+    reader.close()
+
+
+def test_replay_at_speed(tmp_path, monkeypatch):
+    path = str(tmp_path / 'capture.zpm')
+    _record(path, count=20)
+    clock = _Clock()
+    monkeypatch.setattr(capture, 'time', clock)
+
+    # The replay clock starts at the first request and advances 10 times faster than real time, the last snapshot is returned once the end is reached
+    source = CaptureReplaySource(CaptureReader(path), speed=10.0, start_time=START + 25)
+    error_counts = []
+    for elapsed in (0, 0.4, 3.5, 60):
+        clock.now = 1000.0 + elapsed
+        error_counts.append(dict(source.iter_status(poolnames=[]))['tank']['error_count'])
+        if elapsed == 3.5: assert source.snapshot_time == START + 60
+
+    assert error_counts == [2, 2, 6, 19]
+    assert dict(source.iter_status(poolnames=['backup'])) == {}
+
+
+@pytest.mark.parametrize('kept', [6, 100])
+def test_truncated_final_record(tmp_path, kept):
+    path = str(tmp_path / 'capture.zpm')
+    _record(path, count=3)
+
+    # The end of the last record (within its header, or within its snapshot) was lost, while its index entry was not
+    with open(path, 'r+b') as capture_file:
+        capture_file.truncate(_record_offset(path, 2) + kept)
+
+    reader = CaptureReader(path)
+    assert len(reader) == 2 and reader.snapshot(1) == (START + 10, _pools_status(1))
+    reader.close()
+
+    # Recording again discards the partial record, the next snapshot follows the last complete one
+    writer = CaptureWriter(path)
+    writer.record(pools_status=_pools_status(7), timestamp=START + 70)
+    writer.close()
+
+    reader = CaptureReader(path)
+    assert [reader.timestamp(item) for item in range(len(reader))] == [START, START + 10, START + 70]
+    assert reader.snapshot(2) == (START + 70, _pools_status(7))
+    reader.close()
+
+
+def test_not_a_capture_file(tmp_path):
+    path = tmp_path / 'status.json'
+    path.write_text('{}')
+
+    with pytest.raises(ValueError, match='is not a zpool_monitor capture file'):
+        CaptureReader(str(path))
+    with pytest.raises(ValueError, match='is not a zpool_monitor capture file'):
+        CaptureWriter(str(path))
@@ -0,0 +1,142 @@
+"""
+Tests for the change events (zpool_monitor.zpool.changes) reported when a new snapshot of a synthetic pool (see benchmarks/synthetic.py) is applied to an
+existing ZPool
+"""
+
+# Import System Libraries
+from typing import Any
+import copy
+
+# Import the synthetic pool generator
+from synthetic import generate_pool
+
+# Import zpool.ZPool class and change events
+from zpool_monitor.zpool import (ZPool, PoolStateChanged, VDEVAdded, VDEVRemoved, VDEVStateChanged, ErrorCountChanged, ScanStateChanged,
+                                 TrimStateChanged)
+
+START = 1_700_000_000
+
+
+def _pool_data(scan: str = 'scrub-finished', vdevs: int = 2) -> dict[str, Any]:
+    """
+    :return: Status of the pool 'tank' with vdevs raidz2 VDEVs of 3 disks each.
+    """
+    return generate_pool(name='tank', vdevs=vdevs, disks=3, scan=scan, now=START)
+
+
+def _disks(pool_data: dict[str, Any], vdev: int = 0) -> dict[str, Any]:
+    """
+    :return: Status of the disks of a raidz2 VDEV of the pool, keyed by disk name.
+    """
+    return pool_data['vdevs']['tank']['vdevs'][f'raidz2-{vdev}']['vdevs']
+
+
+def _update(pool: ZPool, pool_data: dict[str, Any]) -> tuple[bool, list]:
+    """
+    :return: Tuple of (whether anything displayed changed, change events) applying pool_data to pool.
+    """
+    events = []
+    return pool.update(pool_data=pool_data, events=events, now=START + 60), events
+
+
+def _instances(pool: ZPool) -> list:
+    """
+    :return: VDEV instances of the pool in tree order.
+    """
+    return [vdev for vdev, _ in pool.vdev_tree.rows()]
+
+
+def test_unchanged_snapshot():
+    pool_data = _pool_data()
+    pool = ZPool(copy.deepcopy(pool_data), now=START)
+    vdevs, scan = _instances(pool), pool.scan
+
+    assert _update(pool, copy.deepcopy(pool_data)) == (False, [])
+    assert all(new is old for new, old in zip(_instances(pool), vdevs, strict=True))
+    assert pool.scan is scan
+
+
+def test_pool_state():
+    pool_data = _pool_data()
+    pool = ZPool(copy.deepcopy(pool_data), now=START)
+
+    pool_data['state'] = 'DEGRADED'
+    assert _update(pool, pool_data) == (True, [PoolStateChanged(poolname='tank', old='ONLINE', new='DEGRADED')])
+
+
+def test_vdev_state():
+    pool_data = _pool_data()
+    pool = ZPool(copy.deepcopy(pool_data), now=START)
+    vdevs = _instances(pool)
+
+    _disks(pool_data)['tank-v0d1']['state'] = 'FAULTED'
+    assert _update(pool, pool_data) == (True, [VDEVStateChanged(poolname='tank', vdev='tank-v0d1', old='ONLINE', new='FAULTED')])
+
+    # The VDEV is updated in place
+    assert all(new is old for new, old in zip(_instances(pool), vdevs, strict=True))
+
+
+def test_error_deltas():
+    pool_data = _pool_data()
+    pool = ZPool(copy.deepcopy(pool_data), now=START)
+
+    pool_data['error_count'] = 3
+    _disks(pool_data)['tank-v0d2'] |= {'read_errors': 2, 'checksum_errors': 7}
+    changed, events = _update(pool, copy.deepcopy(pool_data))
+    assert changed and events == [ErrorCountChanged(poolname='tank', vdev=None, counter='data', old=0, new=3),
+                                  ErrorCountChanged(poolname='tank', vdev='tank-v0d2', counter='read', old=0, new=2),
+                                  ErrorCountChanged(poolname='tank', vdev='tank-v0d2', counter='checksum', old=0, new=7)]
+
+    # Clearing the errors ('zpool clear') gives negative deltas
+    _disks(pool_data)['tank-v0d2'] |= {'read_errors': 0, 'checksum_errors': 0}
+    _, events = _update(pool, pool_data)
+    assert [(event.counter, event.delta) for event in events] == [('read', -2), ('checksum', -7)]
+
+
+def test_scan_state():
+    pool = ZPool(_pool_data(scan='none'), now=START)
+
+    changed, events = _update(pool, _pool_data(scan='scrub'))
+    assert changed and events == [ScanStateChanged(poolname='tank', old_function=None, old_state=None, new_function='SCRUB', new_state='SCANNING')]
+
+    _, events = _update(pool, _pool_data(scan='scrub-finished'))
+    assert events == [ScanStateChanged(poolname='tank', old_function='SCRUB', old_state='SCANNING', new_function='SCRUB', new_state='FINISHED')]
+
+    _, events = _update(pool, _pool_data(scan='resilver'))
+    assert events == [ScanStateChanged(poolname='tank', old_function='SCRUB', old_state='FINISHED', new_function='RESILVER', new_state='SCANNING')]
+
+
+def test_trim_state():
+    pool = ZPool(generate_pool(name='tank', vdevs=1, disks=1, trim='complete', now=START), now=START)
+
+    changed, events = _update(pool, generate_pool(name='tank', vdevs=1, disks=1, trim='active', now=START))
+    assert changed and events == [TrimStateChanged(poolname='tank', vdev='tank-v0d0', old='COMPLETE', new='ACTIVE')]
+
+
+def test_vdev_added_and_removed():
+    pool = ZPool(_pool_data(vdevs=1), now=START)
+
+    # VDEVs are matched by GUID: the second raidz2 VDEV (and its disks) take new GUIDs, the pool GUID is not a VDEV
+    changed, events = _update(pool, _pool_data(vdevs=2))
+    assert changed and [type(event) for event in events] == [VDEVAdded] * 4
+    assert [event.vdev for event in events] == ['raidz2-1', 'tank-v1d0', 'tank-v1d1', 'tank-v1d2']
+
+    changed, events = _update(pool, _pool_data(vdevs=1))
+    assert changed and sorted(events) == sorted(VDEVRemoved(poolname='tank', vdev=vdev) for vdev in ('raidz2-1', 'tank-v1d0', 'tank-v1d1', 'tank-v1d2'))
+
+
+def test_reorder_without_change():
+    pool_data = _pool_data()
+    pool = ZPool(copy.deepcopy(pool_data), now=START)
+    vdevs = set(map(id, _instances(pool)))
+
+    # The disks of a VDEV are listed in a different order: the table is redrawn in the new order, but nothing changed so no events are reported
+    disks = _disks(pool_data)
+    reordered = dict(reversed(list(disks.items())))
+    disks.clear()
+    disks.update(reordered)
+    changed, events = _update(pool, pool_data)
+
+    assert changed and events == []
+    assert [vdev.name for vdev in _instances(pool)][2:5] == ['tank-v0d2', 'tank-v0d1', 'tank-v0d0']
+    assert set(map(id, _instances(pool))) == vdevs
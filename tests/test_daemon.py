@@ -0,0 +1,213 @@
+"""
+Tests for the daemon socket protocol (zpool_monitor.daemon), with a SnapshotDaemon publishing synthetic pools (see benchmarks/synthetic.py) on a socket in
+a temporary directory
+"""
+
+# Import System Libraries
+from typing import Any
+import asyncio
+import contextlib
+import json
+import os
+import pytest
+
+# Import the synthetic pool generator and status source
+from synthetic import generate_pool, SyntheticSource
+
+# Import zpool_monitor.daemon SnapshotDaemon and DaemonSource classes, and zpool_monitor.Monitor class
+from zpool_monitor.daemon import SnapshotDaemon, DaemonSource
+from zpool_monitor.monitor import Monitor
+
+START = 1_700_000_000
+
+# Time allowed for a message to arrive
+TIMEOUT = 5.0
+
+
+def _source() -> SyntheticSource:
+    """
+    :return: Status source returning the pools 'backup' and 'tank'.
+    """
+    return SyntheticSource({poolname: generate_pool(name=poolname, vdevs=1, disks=2, now=START) for poolname in ('backup', 'tank')})
+
+
+async def _start(source: SyntheticSource, socket_path: str) -> tuple[SnapshotDaemon, asyncio.Task]:
+    """
+    :param source: Status source of the daemon's Monitor.
+    :param socket_path: Path of the socket to serve on.
+    :return: Tuple of (SnapshotDaemon, task serving it) once the daemon is accepting clients. The daemon only refreshes when _refresh() is called.
+    """
+    daemon = SnapshotDaemon(monitor=Monitor(poolnames=[], source=source), socket_path=socket_path, refresh_period=3600)
+    task = asyncio.create_task(daemon.serve())
+    while not os.path.exists(socket_path): await asyncio.sleep(0.01)
+
+    return daemon, task
+
+
+async def _stop(task: asyncio.Task) -> None:
+    """
+    Stop a daemon started by _start(), disconnecting its clients.
+    """
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError): await task
+
+
+async def _refresh(daemon: SnapshotDaemon) -> None:
+    """
+    Refresh all pools and publish the result, as the daemon's serve loop does.
+    """
+    await daemon._SnapshotDaemon__refresh(poolnames=None)
+
+
+async def _read_message(reader: asyncio.StreamReader) -> dict[str, Any]:
+    """
+    :return: The next message sent by the daemon.
+    """
+    return json.loads(await asyncio.wait_for(reader.readline(), timeout=TIMEOUT))
+
+
+def test_snapshot_then_updates(tmp_path):
+    socket_path = str(tmp_path / 'daemon.sock')
+    source = _source()
+
+    async def run() -> list[dict[str, Any]]:
+        daemon, task = await _start(source=source, socket_path=socket_path)
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        messages = [await _read_message(reader)]
+
+        source.pools_status['tank']['state'] = 'DEGRADED'
+        await _refresh(daemon)
+        messages.append(await _read_message(reader))
+
+        del source.pools_status['backup']
+        await _refresh(daemon)
+        messages.append(await _read_message(reader))
+
+        source.error = TimeoutError('zpool status timed out')
+        await _refresh(daemon)
+        messages.append(await _read_message(reader))
+
+        writer.close()
+        await _stop(task)
+        return messages
+
+    snapshot, changed, removed, failed = asyncio.run(run())
+
+    # Each message has the next version. The snapshot contains every pool, updates only the pools that changed
+    assert [message['version'] for message in (snapshot, changed, removed, failed)] == [1, 2, 3, 4]
+    assert snapshot['type'] == 'snapshot' and sorted(snapshot['pools']) == ['backup', 'tank'] and snapshot['errors'] == {}
+    assert 'removed' not in snapshot
+
+    assert changed['type'] == 'update' and list(changed['pools']) == ['tank'] and changed['removed'] == []
+    assert changed['pools']['tank']['state'] == 'DEGRADED'
+
+    assert removed['pools'] == {} and removed['removed'] == ['backup']
+
+    # A failed refresh is published as an error for every pool, which keeps its last status
+    assert failed['pools'] == {} and failed['removed'] == [] and failed['errors'] == {'tank': 'zpool status timed out'}
+
+
+def test_source_follows_updates(tmp_path):
+    socket_path = str(tmp_path / 'daemon.sock')
+    source = _source()
+
+    async def run() -> tuple[int, dict[str, Any], int, int]:
+        daemon, task = await _start(source=source, socket_path=socket_path)
+        daemon_source = DaemonSource(socket_path=socket_path)
+        updated = asyncio.Event()
+        daemon_source.on_update = updated.set
+
+        # The first request connects and receives the snapshot
+        pools = {poolname: pool_data async for poolname, pool_data in daemon_source.iter_status_async(poolnames=[])}
+        assert sorted(pools) == ['backup', 'tank'] and daemon_source.version == 1 and not updated.is_set()
+
+        # Updates are applied as they are pushed, and reported through on_update
+        source.pools_status['tank']['state'] = 'DEGRADED'
+        await _refresh(daemon)
+        await asyncio.wait_for(updated.wait(), timeout=TIMEOUT)
+        pools = {poolname: pool_data async for poolname, pool_data in daemon_source.iter_status_async(poolnames=['tank'])}
+
+        client_count = daemon.client_count
+
+        # A synchronous request connects, reads the snapshot, and disconnects
+        sync_source = DaemonSource(socket_path=socket_path)
+        sync_pools = await asyncio.to_thread(lambda: dict(sync_source.iter_status(poolnames=[])))
+        assert sorted(sync_pools) == ['backup', 'tank'] and sync_pools['tank']['state'] == 'DEGRADED'
+
+        await _stop(task)
+        return daemon_source.version, pools, client_count, sync_source.version
+
+    version, pools, client_count, sync_version = asyncio.run(run())
+
+    assert version == 2 and sync_version == 2
+    assert list(pools) == ['tank'] and pools['tank']['state'] == 'DEGRADED'
+
+    # The update was received on the connection opened by the first request
+    assert client_count == 1
+
+
+def test_source_reconnects(tmp_path):
+    socket_path = str(tmp_path / 'daemon.sock')
+    source = _source()
+
+    async def run() -> None:
+        daemon, task = await _start(source=source, socket_path=socket_path)
+        await _refresh(daemon)
+        daemon_source = DaemonSource(socket_path=socket_path)
+        updated = asyncio.Event()
+        daemon_source.on_update = updated.set
+        assert len([pool async for pool in daemon_source.iter_status_async(poolnames=[])]) == 2
+        assert daemon_source.version == 2
+
+        # Losing the connection is reported through on_update, and the next request fails while the daemon is stopped
+        await _stop(task)
+        await asyncio.wait_for(updated.wait(), timeout=TIMEOUT)
+        with pytest.raises(ConnectionError, match='Unable to connect'):
+            _ = [pool async for pool in daemon_source.iter_status_async(poolnames=[])]
+
+        # Once the daemon is restarted, the next request reconnects and receives a new snapshot
+        del source.pools_status['backup']
+        _, task = await _start(source=source, socket_path=socket_path)
+        assert [poolname async for poolname, _ in daemon_source.iter_status_async(poolnames=[])] == ['tank']
+        assert daemon_source.version == 1
+
+        await _stop(task)
+
+    asyncio.run(run())
+
+
+def test_unreachable_daemon(tmp_path):
+    socket_path = str(tmp_path / 'missing.sock')
+
+    with pytest.raises(ConnectionError, match=f'Unable to connect to the zpool_monitor daemon at {socket_path}'):
+        DaemonSource(socket_path=socket_path).iter_status(poolnames=[])
+
+
+def test_dashboard_refreshes_on_update(tmp_path):
+    from zpool_monitor.textual import ZPoolDashboard
+
+    socket_path = str(tmp_path / 'daemon.sock')
+    source = _source()
+
+    async def run() -> list[str]:
+        daemon, task = await _start(source=source, socket_path=socket_path)
+        daemon_source = DaemonSource(socket_path=socket_path)
+        monitor = Monitor(poolnames=[], source=daemon_source)
+
+        # Pools are not due to be polled again within the test, so only an update pushed by the daemon refreshes the dashboard
+        app = ZPoolDashboard(monitor=monitor, initial_theme='textual-dark', initial_refresh=60, daemon_source=daemon_source)
+        states = []
+        async with app.run_test() as pilot:
+            states.append(monitor.status['tank']['state'])
+
+            source.pools_status['tank']['state'] = 'DEGRADED'
+            await _refresh(daemon)
+            for _ in range(int(TIMEOUT / 0.05)):
+                await pilot.pause(0.05)
+                if monitor.status['tank']['state'] != states[0]: break
+            states.append(monitor.status['tank']['state'])
+
+        await _stop(task)
+        return states
+
+    assert asyncio.run(run()) == ['ONLINE', 'DEGRADED']
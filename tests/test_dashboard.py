@@ -0,0 +1,65 @@
+"""
+Tests for the refresh handling of the dashboard (zpool_monitor.textual.ZPoolDashboard), run headless against synthetic pools (see benchmarks/synthetic.py)
+"""
+
+# Import System Libraries
+from typing import Any, AsyncIterator
+import asyncio
+
+# Import the synthetic pool generator and status source
+from synthetic import generate_pool, SyntheticSource
+
+# Import zpool_monitor.Monitor and zpool_monitor.textual.ZPoolDashboard classes
+from zpool_monitor.monitor import Monitor
+from zpool_monitor.textual import ZPoolDashboard
+
+START = 1_700_000_000
+
+
+class _GatedSource(SyntheticSource):
+    """
+    Status source counting its requests, each request waits until the gate is open.
+    """
+    def __init__(self, pools_status: dict[str, Any]):
+        super().__init__(pools_status)
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.requests: list[list[str]] = []
+
+    async def iter_status_async(self, poolnames: list[str]) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        self.requests.append(poolnames)
+        await self.gate.wait()
+        async for pool in super().iter_status_async(poolnames=poolnames):
+            yield pool
+
+
+def test_refreshes_are_coalesced():
+    async def run() -> list[list[str]]:
+        source = _GatedSource({poolname: generate_pool(name=poolname, vdevs=1, disks=2, now=START) for poolname in ('backup', 'tank')})
+
+        # Pools are not due to be polled again within the test, only the requested refreshes are run
+        app = ZPoolDashboard(monitor=Monitor(poolnames=[], source=source), initial_theme='textual-dark', initial_refresh=60)
+        async with app.run_test() as pilot:
+            await pilot.pause()
+            assert len(source.requests) == 1
+
+            # Hold a refresh in progress, while timer ticks and requests for all pools and for single pools arrive
+            source.gate.clear()
+            app.run_worker(app.refresh_panels(), group='refresh')
+            while len(source.requests) < 2: await pilot.pause(0.01)
+
+            for _ in range(3):
+                await app.refresh_due_panels()
+                await app.refresh_panels()
+                await app.refresh_panels(poolnames=['tank'])
+                await pilot.press('r')
+            assert len(source.requests) == 2
+
+            # Once the refresh completes, every request is merged into a single refresh of all pools
+            source.gate.set()
+            await app.workers.wait_for_complete()
+            await pilot.pause(0.1)
+
+        return source.requests
+
+    assert asyncio.run(run()) == [[], [], []]
@@ -0,0 +1,110 @@
+"""
+Tests for the parser of the 'zpool events -f -v -H' output (zpool_monitor.events.EventFollower), fed with recorded output line by line as it is read from
+the process
+"""
+
+# Import System Libraries
+import pytest
+
+# Import zpool_monitor.events EventFollower class
+from zpool_monitor.events import EventFollower
+
+START = 1_700_000_000
+
+# Recorded output of 'zpool events -f -v -H': an event buffered by ZFS from an hour before the process was started (START), then a scrub starting on
+# 'tank', history of a 'zfs snapshot' on 'tank', a checksum error on 'backup' whose embedded VDEV tree names another pool, and a config sync that does not
+# name a pool
+EVENTS: str = '''\
+Nov 14 2023 21:13:20.000000000 sysevent.fs.zfs.resilver_finish
+        version = 0x0
+        class = "sysevent.fs.zfs.resilver_finish"
+        pool = "archive"
+        pool_guid = 0x8f2f1d23c71e0a11
+        time = 0x6553e2f0 0x0
+        eid = 0x1
+
+Nov 14 2023 22:13:20.104861284 sysevent.fs.zfs.scrub_start
+        version = 0x0
+        class = "sysevent.fs.zfs.scrub_start"
+        pool = "tank"
+        pool_guid = 0x4f3c6a9b2d1e0f21
+        pool_state = 0x0
+        pool_context = 0x0
+        time = 0x6553f100 0x64002d4
+        eid = 0x2
+
+Nov 14 2023 22:13:21.000000000 sysevent.fs.zfs.history_event
+        version = 0x0
+        class = "sysevent.fs.zfs.history_event"
+        pool = "tank"
+        history_internal_str = "snapshot tank/data@hourly"
+        time = 0x6553f101 0x0
+        eid = 0x3
+
+Nov 14 2023 22:13:25.500000000 ereport.fs.zfs.checksum
+        class = "ereport.fs.zfs.checksum"
+        ena = 0x2cd8a8b3f8b00801
+        detector = (embedded nvlist)
+                version = 0x0
+                scheme = "zfs"
+                pool = 0x7a1c3e5d9b2f4a61
+                vdev = 0x5c1e0d2f3a4b6c71
+        (end detector)
+        pool = "backup"
+        pool_guid = 0x7a1c3e5d9b2f4a61
+        vdev_tree = (embedded nvlist)
+                pool = "tank"
+                type = "disk"
+        (end vdev_tree)
+        time = 0x6553f105 0x1dcd6500
+        eid = 0x4
+
+Nov 14 2023 22:13:30.000000000 sysevent.fs.zfs.config_sync
+        version = 0x0
+        class = "sysevent.fs.zfs.config_sync"
+        time = 0x6553f10a 0x0
+        eid = 0x5
+
+'''
+
+
+def _follower(poolnames: list[str]) -> EventFollower:
+    """
+    :param poolnames: Names of the pools to follow events for.
+    :return: EventFollower as if 'zpool events' was started at START, fed with the recorded output.
+    """
+    follower = EventFollower(poolnames=poolnames)
+    follower._EventFollower__since = START + 0.5
+
+    for line in EVENTS.splitlines():
+        follower.feed_line(line)
+
+    return follower
+
+
+def test_events_request_refresh():
+    follower = _follower(poolnames=[])
+
+    # The buffered event and the snapshot history are dropped, the checksum error requests 'backup' (not the pool in its embedded VDEV tree), and the
+    # config sync requests all pools
+    assert follower.take() == (True, ['backup', 'tank'])
+    assert follower.version == 3
+
+    # Requests are cleared once taken
+    assert follower.take() == (False, [])
+
+
+@pytest.mark.parametrize('poolnames, requested', [(['tank'], (True, ['tank'])), (['archive'], (True, []))])
+def test_poolnames_filter(poolnames, requested):
+    assert _follower(poolnames=poolnames).take() == requested
+
+
+def test_event_without_trailing_blank_line():
+    follower = EventFollower(poolnames=[])
+    for line in EVENTS.splitlines()[8:17]:
+        follower.feed_line(line)
+
+    # The scrub event is only complete once the next event starts (or the output ends)
+    assert follower.take() == (False, [])
+    follower.feed_line('Nov 14 2023 22:13:30.000000000 sysevent.fs.zfs.config_sync')
+    assert follower.take() == (False, ['tank'])
@@ -0,0 +1,188 @@
+"""
+Tests for the OpenMetrics exporter (zpool_monitor.exporter), serialising synthetic pools (see benchmarks/synthetic.py) as the exporter does after a refresh
+"""
+
+# Import System Libraries
+from typing import Any
+import asyncio
+
+# Import the synthetic pool generator and status source
+from synthetic import generate_pool, SyntheticSource
+
+# Import zpool_monitor.exporter MetricsExporter class and serialisation functions, zpool_monitor.Monitor, and zpool.ZPool classes
+from zpool_monitor.exporter import MetricsExporter, _POOL_FAMILIES, _pool_samples
+from zpool_monitor.monitor import Monitor
+from zpool_monitor.zpool import ZPool
+
+START = 1_700_000_000
+
+# Units of the metric families that have one
+_UNITS: dict[str, str] = {name: unit for name, _, unit, _ in _POOL_FAMILIES if unit}
+
+
+def _exporter(pools_status: dict[str, Any], max_devices: int = 32) -> tuple[MetricsExporter, SyntheticSource]:
+    """
+    :param pools_status: Status of the pools returned by every refresh.
+    :param max_devices: Maximum number of leaf devices of each pool exported individually.
+    :return: Tuple of (MetricsExporter monitoring the pools (not serving, see test_scrape_does_not_refresh()), its status source).
+    """
+    source = SyntheticSource(pools_status)
+    return MetricsExporter(monitor=Monitor(poolnames=[], source=source), address='127.0.0.1:9135', refresh_period=5.0, max_devices=max_devices), source
+
+
+def _refresh(exporter: MetricsExporter) -> None:
+    """
+    Run a refresh of all pools, as the exporter's serve loop does.
+    """
+    asyncio.run(exporter._MetricsExporter__refresh(poolnames=None))
+
+
+def _families(payload: str) -> dict[str, list[str]]:
+    """
+    :param payload: Metrics in exposition format.
+    :return: Dictionary mapping each metric family (in the order of their TYPE lines) to its samples, checking that no family is declared twice.
+    """
+    families: dict[str, list[str]] = {}
+    for line in payload.splitlines():
+        if line.startswith('# TYPE '):
+            name = line.split(' ')[2]
+            assert name not in families
+            families[name] = []
+        elif not line.startswith('#'):
+            families[list(families)[-1]].append(line)
+
+    return families
+
+
+def test_pool_samples_naming():
+    pool = ZPool(generate_pool(name='tank', vdevs=1, disks=4, scan='scrub', trim='active', now=START), now=START + 3600)
+    samples = _pool_samples(pool=pool, max_devices=32)
+
+    # zpool_up depends on the refresh, not the pool
+    assert samples['zpool_up'] == ''
+
+    # Statesets have one sample per state, labelled with the family name and 1 for the current state
+    assert samples['zpool_state'].splitlines()[:2] == ['zpool_state{pool="tank",zpool_state="ONLINE"} 1', 'zpool_state{pool="tank",zpool_state="DEGRADED"} 0']
+    assert all('zpool_vdev_state="' in line for line in samples['zpool_vdev_state'].splitlines())
+
+    # Info families have a single '_info' sample with the value 1
+    assert samples['zpool_scan'] == 'zpool_scan_info{pool="tank",function="SCRUB",state="SCANNING"} 1\n'
+
+    # Every sample is named after its family, and families with a unit end with the unit
+    for name, lines in samples.items():
+        if name in _UNITS: assert name.endswith(f'_{_UNITS[name]}')
+        assert all(line.partition('{')[0] == (f'{name}_info' if name == 'zpool_scan' else name) for line in lines.splitlines())
+
+    assert samples['zpool_scan_to_scan_bytes'] == 'zpool_scan_to_scan_bytes{pool="tank"} 400000000000000\n'
+    assert samples['zpool_vdev_trim_progress_ratio'].count('\n') == 4
+
+
+def test_pool_samples_max_devices():
+    pool_data = generate_pool(name='tank', vdevs=1, disks=6, now=START)
+    disks = pool_data['vdevs']['tank']['vdevs']['raidz2-0']['vdevs']
+    disks['tank-v0d4']['state'] = 'FAULTED'
+    disks['tank-v0d5']['checksum_errors'] = 3
+    samples = _pool_samples(pool=ZPool(pool_data, now=START), max_devices=3)
+
+    # Grouping VDEVs are always exported, the faulted device and the device with errors take 2 of the 3 leaf device slots
+    exported = {line.partition('vdev="')[2].partition('"')[0] for line in samples['zpool_vdev_state'].splitlines()}
+    assert exported == {'tank', 'raidz2-0', 'tank-v0d0', 'tank-v0d4', 'tank-v0d5'}
+    assert samples['zpool_devices_omitted'] == 'zpool_devices_omitted{pool="tank"} 3\n'
+
+    # Every device is counted by state
+    assert sorted(samples['zpool_devices'].splitlines()) == ['zpool_devices{pool="tank",state="FAULTED"} 1', 'zpool_devices{pool="tank",state="ONLINE"} 5']
+
+
+def test_payload_groups_families_across_pools():
+    exporter, _ = _exporter({poolname: generate_pool(name=poolname, vdevs=1, disks=2, scan='scrub', now=START) for poolname in ('tank', 'backup')})
+    _refresh(exporter)
+    payload = exporter.payload.decode()
+
+    assert payload.endswith('\n# EOF\n') and payload.count('# EOF') == 1
+
+    # Each family is declared once, followed by the samples of every pool (in pool name order)
+    families = _families(payload)
+    assert list(families)[:len(_POOL_FAMILIES)] == [name for name, _, _, _ in _POOL_FAMILIES]
+    assert families['zpool_up'] == ['zpool_up{pool="backup"} 1', 'zpool_up{pool="tank"} 1']
+    assert [line.partition(',')[0] for line in families['zpool_scan']] == ['zpool_scan_info{pool="backup"', 'zpool_scan_info{pool="tank"']
+    assert families['zpool_exporter_errors'] == ['zpool_exporter_errors 0']
+    assert families['zpool_exporter_refreshes'] == ['zpool_exporter_refreshes_total 1']
+
+    # Every UNIT line matches the end of its family name
+    for line in payload.splitlines():
+        if line.startswith('# UNIT '):
+            _, _, name, unit = line.split(' ')
+            assert name.endswith(f'_{unit}')
+
+
+def test_failed_first_refresh_is_counted():
+    exporter, source = _exporter({})
+    source.error = TimeoutError('zpool status timed out')
+    _refresh(exporter)
+
+    families = _families(exporter.payload.decode())
+    assert families['zpool_up'] == []
+    assert families['zpool_exporter_errors'] == ['zpool_exporter_errors 1']
+
+
+def test_failed_refresh_keeps_metrics():
+    exporter, source = _exporter({'tank': generate_pool(name='tank', vdevs=1, disks=2, now=START)})
+    _refresh(exporter)
+    source.error = TimeoutError('zpool status timed out')
+    _refresh(exporter)
+
+    families = _families(exporter.payload.decode())
+    assert families['zpool_up'] == ['zpool_up{pool="tank"} 0']
+    assert families['zpool_data_errors'] == ['zpool_data_errors{pool="tank"} 0']
+    assert families['zpool_exporter_errors'] == ['zpool_exporter_errors 1']
+
+
+async def _scrape(port: int, request: bytes) -> bytes:
+    """
+    :param port: Port the exporter is listening on.
+    :param request: HTTP request to send.
+    :return: Complete HTTP response.
+    """
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(request)
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+def test_scrape_does_not_refresh():
+    exporter, _ = _exporter({'tank': generate_pool(name='tank', vdevs=1, disks=2, now=START)})
+    _refresh(exporter)
+    monitor: Monitor = exporter._MetricsExporter__monitor
+
+    refreshes: list[list[str] | None] = []
+
+    async def refresh_stats_async(poolnames: list[str] | None = None):
+        refreshes.append(poolnames)
+        raise AssertionError('scrape refreshed the pools')
+
+    monitor.refresh_stats_async = refresh_stats_async
+
+    async def scrape_all() -> list[bytes]:
+        server = await asyncio.start_server(exporter._MetricsExporter__serve_request, host='127.0.0.1', port=0)
+        async with server:
+            port = server.sockets[0].getsockname()[1]
+            return [await _scrape(port, b'GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n') for _ in range(5)]
+
+    responses = asyncio.run(scrape_all())
+
+    assert refreshes == []
+    for response in responses:
+        head, _, body = response.partition(b'\r\n\r\n')
+        assert head.startswith(b'HTTP/1.1 200 OK') and b'Content-Type: application/openmetrics-text' in head
+        assert body == exporter.payload
+
+
+def test_pool_updates_counted():
+    exporter, _ = _exporter({'tank': generate_pool(name='tank', vdevs=1, disks=2, now=START)})
+    _refresh(exporter)
+    _refresh(exporter)
+
+    # The second refresh received the same status, which was not applied
+    assert _families(exporter.payload.decode())['zpool_exporter_pool_updates'] == ['zpool_exporter_pool_updates_total{result="unchanged"} 1',
+                                                                                    'zpool_exporter_pool_updates_total{result="applied"} 1']
@@ -0,0 +1,106 @@
+"""
+Tests for the machine-readable output formats (zpool_monitor.formats), written from synthetic pools (see benchmarks/synthetic.py) without building any of
+the renderables used for display
+"""
+
+# Import System Libraries
+from typing import Any
+import csv
+import io
+import json
+import pytest
+
+# Import the synthetic pool generator and status source
+from synthetic import generate_pool, SyntheticSource
+
+# Import zpool_monitor.formats functions, zpool_monitor.Monitor, and zpool VDEV, VDEVS and ZPool classes
+from zpool_monitor.formats import CSV_COLUMNS, write_pools
+from zpool_monitor.monitor import Monitor
+from zpool_monitor.zpool.vdev import VDEV
+from zpool_monitor.zpool.vdevs import VDEVS
+from zpool_monitor.zpool.zpool import ZPool
+
+START = 1_700_000_000
+
+
+def _tank() -> dict[str, Any]:
+    """
+    :return: Status of the pool 'tank', with two raidz2 VDEVs of four disks and a mirror of two disks (the mirror's GUIDs are renumbered to be unique).
+    """
+    pool_data = generate_pool(name='tank', vdevs=2, disks=4, scan='scrub', now=START)
+    mirror = generate_pool(name='tank', vdevs=1, disks=2, layout='mirror', now=START)['vdevs']['tank']['vdevs']['mirror-0']
+    for vdev in (mirror, *mirror['vdevs'].values()):
+        vdev['guid'] = str(int(vdev['guid']) + 1000)
+
+    pool_data['vdevs']['tank']['vdevs']['mirror-0'] = mirror
+    return pool_data
+
+
+def _write(output_format: str) -> tuple[str, dict[str, str]]:
+    """
+    :param output_format: One of OUTPUT_FORMATS.
+    :return: Tuple of (output written for the pools 'backup' and 'tank', and 'archive' whose status could not be obtained, errors returned).
+    """
+    source = SyntheticSource({'backup': generate_pool(name='backup', vdevs=1, disks=2, layout='mirror', now=START), 'tank': _tank()})
+    source.errors = {'archive': TimeoutError('zpool status timed out')}
+    stream = io.StringIO()
+    errors = write_pools(monitor=Monitor(poolnames=[], source=source), output_format=output_format, stream=stream)
+
+    return stream.getvalue(), errors
+
+
+def _fail(*_: Any) -> None:
+    """Stand-in for the properties building renderables"""
+    raise AssertionError('renderable built for a machine-readable format')
+
+
+@pytest.fixture(autouse=True)
+def no_renderables(monkeypatch):
+    """Fail any test that builds the renderables of a VDEV, the VDEVS table or the pool summary"""
+    monkeypatch.setattr(VDEV, 'row_data', property(_fail))
+    monkeypatch.setattr(VDEVS, 'status', property(_fail))
+    monkeypatch.setattr(ZPool, 'summary', property(_fail))
+
+
+def test_csv_rows_match_header():
+    output, errors = _write('csv')
+    header, *rows = list(csv.reader(io.StringIO(output)))
+
+    # One row per VDEV of each pool (the root, the grouping VDEVs and their disks), each as wide as the header
+    assert header == CSV_COLUMNS
+    assert all(len(row) == len(header) for row in rows)
+    assert [row[0] for row in rows] == ['backup'] * 4 + ['tank'] * 14
+
+    # Each VDEV names the VDEV containing it, at one more level of depth
+    vdevs = {(row[0], row[CSV_COLUMNS.index('vdev')]): row for row in rows}
+    parent, depth = CSV_COLUMNS.index('parent'), CSV_COLUMNS.index('depth')
+    assert [vdevs['tank', name][parent] for name in ('tank', 'raidz2-1', 'tank-v1d3', 'mirror-0', 'tank-v0d1')] == ['', 'tank', 'raidz2-1', 'tank', 'mirror-0']
+    assert [vdevs['tank', name][depth] for name in ('tank', 'mirror-0', 'tank-v0d1')] == ['0', '1', '2']
+
+    # The scan fields are repeated on every row of the pool, the failed pool has no rows
+    assert {row[CSV_COLUMNS.index('scan_state')] for row in rows if row[0] == 'tank'} == {'SCANNING'}
+    assert errors == {'archive': 'zpool status timed out'}
+
+
+def test_json_includes_errors():
+    output, errors = _write('json')
+    document = json.loads(output)
+
+    assert list(document['pools']) == ['backup', 'tank']
+    assert [vdev['name'] for vdev in document['pools']['tank']['vdevs']][:3] == ['tank', 'raidz2-0', 'tank-v0d0']
+    assert document['errors'] == errors == {'archive': 'zpool status timed out'}
+
+
+def test_ndjson_includes_errors():
+    output, _ = _write('ndjson')
+    records = [json.loads(line) for line in output.splitlines()]
+
+    # A line for each pool as it is received, followed by a line for each pool whose status could not be obtained
+    assert [record['name'] for record in records] == ['backup', 'tank', 'archive']
+    assert records[-1] == {'name': 'archive', 'error': 'zpool status timed out'}
+    assert 'error' not in records[0] and records[1]['scan']['state'] == 'SCANNING'
+
+
+def test_unsupported_format():
+    with pytest.raises(ValueError, match='Output format \\(xml\\) is not supported'):
+        _write('xml')
@@ -0,0 +1,104 @@
+"""
+Tests for the VDEV throughput collector (zpool_monitor.iostat.IOStatCollector): parsing the 'zpool iostat -v -H -p -y' output line by line, and restarting
+zpool iostat with a stand-in for zpool run as the transport (see the zpool_stub fixture)
+"""
+
+# Import System Libraries
+import asyncio
+import time
+
+# Import zpool_monitor.iostat IOStatCollector and VDEVIOStat classes
+from zpool_monitor.iostat import IOStatCollector, VDEVIOStat
+
+# Time allowed for the stand-in to produce output
+TIMEOUT = 5.0
+
+# Names of the VDEVs of each pool in _sample()
+VDEVNAMES: dict[str, set[str]] = {'data': {'data', 'sda'}, 'tank': {'tank', 'mirror-0', 'data', 'sdc', 'sdd'}}
+
+
+def _sample(scale: int) -> str:
+    """
+    :param scale: Multiplier of every value, to tell samples apart.
+    :return: A sample of 'zpool iostat -v -H -p -y' output for the pools 'data' (one disk) and 'tank' (a mirror containing a disk also named 'data', and a
+             log device).
+    """
+    lines = [('data', 1), ('sda', 1), ('tank', 4), ('mirror-0', 2), ('data', 1), ('sdc', 1), ('logs', None), ('sdd', 2)]
+
+    return ''.join(f'{name}\t1000\t9000\t' + ('\t'.join(str(ops * scale * column) for column in (1, 2, 3, 4)) if ops else '-\t-\t-\t-') + '\n'
+                   for name, ops in lines)
+
+
+def _stat(ops: int) -> VDEVIOStat:
+    """
+    :return: Throughput of a line of _sample() with the given number of operations.
+    """
+    return VDEVIOStat(ops, 2 * ops, 3 * ops, 4 * ops)
+
+
+def _feed(collector: IOStatCollector, output: str) -> None:
+    """
+    Parse the output line by line, as it is read from zpool iostat.
+    """
+    for line in output.splitlines():
+        collector.feed_line(line)
+
+
+def test_vdev_named_after_pool():
+    collector = IOStatCollector(poolnames=[])
+    collector.set_known_pools(['data', 'tank'], vdevnames=VDEVNAMES)
+
+    # The disk named 'data' belongs to 'tank', the next sample starts with the pool 'data' again. The 'logs' heading has no values
+    _feed(collector, _sample(scale=1) + _sample(scale=10))
+    assert collector.pool_stats('data') == {'data': _stat(10), 'sda': _stat(10)}
+    assert collector.pool_stats('tank') == {'tank': _stat(40), 'mirror-0': _stat(20), 'data': _stat(10), 'sdc': _stat(10), 'sdd': _stat(20)}
+
+
+def test_vdev_removed_from_sample():
+    collector = IOStatCollector(poolnames=['tank'])
+    _feed(collector, 'tank\t0\t0\t4\t8\t12\t16\nsdc\t0\t0\t1\t2\t3\t4\nsdd\t0\t0\t3\t6\t9\t12\n')
+    version = collector.version
+
+    # VDEVs not in the latest sample of the pool (eg. a device that was removed) are dropped once the next pool (or sample) starts
+    _feed(collector, 'tank\t0\t0\t1\t2\t3\t4\nsdc\t0\t0\t1\t2\t3\t4\ntank\t0\t0\t1\t2\t3\t4\n')
+    assert collector.pool_stats('tank') == {'tank': _stat(1), 'sdc': _stat(1)}
+    assert collector.version == version + 3
+    assert collector.pool_stats('other') == {}
+
+
+def test_restart_clears_stale_stats(tmp_path, zpool_stub):
+    (tmp_path / 'runs').write_text('')
+
+    # The first zpool iostat writes a sample and exits, the second writes a sample and keeps running
+    prefix = zpool_stub(f'''
+        import sys, time
+        runs = open({str(tmp_path / 'runs')!r}, 'a+')
+        runs.seek(0)
+        run = len(runs.read())
+        runs.write('.')
+        runs.close()
+        sys.stdout.write({_sample(scale=1)!r} if run == 0 else {_sample(scale=10)!r})
+        sys.stdout.flush()
+        time.sleep(0.5 if run == 0 else 60)
+    ''')
+
+    async def run() -> list[dict[str, VDEVIOStat]]:
+        collector = IOStatCollector(poolnames=['data', 'tank'], prefix=prefix, restart_delay=0.5)
+        collector.set_known_pools(['data', 'tank'], vdevnames=VDEVNAMES)
+        await collector.start()
+
+        async def stats(expected_running: bool) -> dict[str, VDEVIOStat]:
+            deadline = time.monotonic() + TIMEOUT
+            while collector.running != expected_running or ('sdd' in collector.pool_stats('tank')) != expected_running:
+                assert time.monotonic() < deadline
+                await asyncio.sleep(0.01)
+            return dict(collector.pool_stats('data'))
+
+        # Throughput from the first process (once its last line is received), cleared once it has exited, then throughput from the restarted process
+        samples = [await stats(expected_running=True), await stats(expected_running=False), await stats(expected_running=True)]
+
+        await collector.stop()
+        assert not collector.running
+        return samples
+
+    assert asyncio.run(run()) == [{'data': _stat(1), 'sda': _stat(1)}, {}, {'data': _stat(10), 'sda': _stat(10)}]
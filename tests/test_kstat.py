@@ -0,0 +1,73 @@
+"""
+Tests for the kstat data source (zpool_monitor.kstat), run against a fake kstat directory tree laid out like /proc/spl/kstat/zfs
+"""
+
+# Import System Libraries
+from pathlib import Path
+import shutil
+import pytest
+
+# Import zpool_monitor.kstat module
+from zpool_monitor import kstat
+
+
+def _write_named_kstat(path: Path, values: dict[str, int | str]) -> None:
+    """
+    Write a named kstat file: a header line, a column header line, and one 'name type data' line per value.
+
+    :param path: Path of the file to write.
+    :param values: Dictionary mapping kstat name to value. Strings are written with the string data type (7), integers as uint64 (4).
+    """
+    lines = ['13 1 0x01 7 2160 5834000000 6005000000', 'name                            type data']
+    lines += [f'{name:<32}{7 if isinstance(value, str) else 4}    {value}' for name, value in values.items()]
+    path.write_text('\n'.join(lines) + '\n')
+
+
+@pytest.fixture
+def kstat_root(tmp_path: Path) -> Path:
+    """
+    :return: Root of a fake kstat tree containing two pools ('tank' with two datasets, 'backup' with one) and global ZFS statistics.
+    """
+    _write_named_kstat(tmp_path / 'arcstats', {'hits': 100, 'misses': 10})
+
+    for poolname, state, objsets in (('tank', 'ONLINE', [(10, 20, 4096, 8192), (1, 2, 512, 1024)]), ('backup', 'DEGRADED', [(5, 6, 7, 8)])):
+        pool_dir = tmp_path / poolname
+        pool_dir.mkdir()
+        (pool_dir / 'state').write_text(f'{state}\n')
+        _write_named_kstat(pool_dir / 'iostats', {'trim_extents_written': 1})
+        for index, (reads, writes, nread, nwritten) in enumerate(objsets):
+            _write_named_kstat(pool_dir / f'objset-0x{index + 0x36:x}', {'dataset_name': f'{poolname}/fs{index}', 'writes': writes,
+                                                                          'nwritten': nwritten, 'reads': reads, 'nread': nread})
+
+    return tmp_path
+
+
+def test_reads_state_and_sums_objset_counters(kstat_root: Path):
+    pools = kstat.get_zpools_kstat(poolnames=[], kstat_root=str(kstat_root))
+
+    assert list(pools) == ['backup', 'tank']
+    assert pools['tank'] == {'name': 'tank', 'state': 'ONLINE', 'io_stats': {'reads': 11, 'writes': 22, 'nread': 4608, 'nwritten': 9216}}
+    assert pools['backup']['state'] == 'DEGRADED'
+
+
+def test_selected_pools_only(kstat_root: Path):
+    assert list(kstat.get_zpools_kstat(poolnames=['tank', 'missing'], kstat_root=str(kstat_root))) == ['tank']
+
+
+def test_pool_exported_while_reading_is_omitted(kstat_root: Path, monkeypatch: pytest.MonkeyPatch):
+    listdir = kstat.os.listdir
+
+    def exporting_listdir(path: str) -> list[str]:
+        """Export 'tank' (remove its kstat directory) after its entries were listed, so its objset files vanish before they are read"""
+        entries = listdir(path)
+        if path == str(kstat_root / 'tank'): shutil.rmtree(path)
+        return entries
+
+    monkeypatch.setattr(kstat.os, 'listdir', exporting_listdir)
+
+    assert list(kstat.get_zpools_kstat(poolnames=[], kstat_root=str(kstat_root))) == ['backup']
+
+
+def test_missing_kstat_root(tmp_path: Path):
+    assert not kstat.kstat_available(str(tmp_path / 'missing'))
+    assert kstat.get_zpools_kstat(poolnames=[], kstat_root=str(tmp_path / 'missing')) == {}
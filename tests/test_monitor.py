@@ -0,0 +1,63 @@
+"""
+Tests for the Monitor (zpool_monitor.monitor) applying successive snapshots of synthetic pools (see benchmarks/synthetic.py) to its ZPool instances
+"""
+
+# Import System Libraries
+import pytest
+
+# Import the synthetic pool generator and status source
+from synthetic import generate_pool, SyntheticSource
+
+# Import zpool_monitor.Monitor class and zpool.ZPool class
+from zpool_monitor.monitor import Monitor
+from zpool_monitor.zpool import ZPool
+
+START = 1_700_000_000
+
+
+def _monitor(**scans: str) -> tuple[Monitor, SyntheticSource]:
+    """
+    :param scans: Pool names mapped to the scan state of the pool (see synthetic.SCANS).
+    :return: Tuple of (Monitor of the pools, its status source).
+    """
+    source = SyntheticSource({poolname: generate_pool(name=poolname, vdevs=1, disks=2, scan=scan, now=START) for poolname, scan in scans.items()})
+    return Monitor(poolnames=[], source=source), source
+
+
+def test_unchanged_pool_is_skipped(monkeypatch):
+    monitor, _ = _monitor(tank='scrub-finished')
+    pool = monitor.refresh_stats().pools['tank']
+    assert (monitor.fingerprint_hits, monitor.fingerprint_misses) == (0, 1)
+
+    def update(*_args, **_kwargs):
+        raise AssertionError('unchanged pool was updated')
+
+    monkeypatch.setattr(ZPool, 'update', update)
+    changes = monitor.refresh_stats()
+
+    assert changes.pools['tank'] is pool
+    assert not changes.changed_pools and not changes.events and not changes
+    assert (monitor.fingerprint_hits, monitor.fingerprint_misses) == (1, 1)
+
+
+def test_changed_pool_is_updated():
+    monitor, source = _monitor(tank='scrub-finished')
+    pool = monitor.refresh_stats().pools['tank']
+
+    source.pools_status['tank']['error_count'] = 2
+    changes = monitor.refresh_stats()
+
+    assert changes.pools['tank'] is pool and pool.error_count == 2
+    assert changes.changed_pools == {'tank'}
+    assert (monitor.fingerprint_hits, monitor.fingerprint_misses) == (0, 2)
+
+
+@pytest.mark.parametrize('scan', ['scrub', 'resilver'])
+def test_scanning_pool_is_always_updated(scan):
+    monitor, _ = _monitor(tank=scan, backup='none')
+    pools = monitor.refresh_stats().pools
+    changes = monitor.refresh_stats()
+
+    # The scan rate and time remaining depend on the current time, so a scanning pool is updated even if its status is unchanged
+    assert changes.pools == pools
+    assert (monitor.fingerprint_hits, monitor.fingerprint_misses) == (1, 3)
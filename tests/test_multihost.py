@@ -0,0 +1,75 @@
+"""
+Tests for monitoring the pools of many hosts (zpool_monitor.multihost), with the stand-in transport (benchmarks/fake_transport.py) returning synthetic pools
+for each host, and hosts that are down, hung or slow according to their name
+"""
+
+# Import System Libraries
+import asyncio
+import os
+import shlex
+import sys
+import time
+
+# Import the benchmarks directory containing the stand-in transport
+from conftest import BENCHMARKS_DIR
+
+# Import zpool_monitor.multihost MultiHostSource class and functions, and zpool_monitor.Monitor class
+from zpool_monitor.multihost import MultiHostSource, split_poolname
+from zpool_monitor.monitor import Monitor
+
+# Transport running the stand-in in place of ssh
+TRANSPORT: str = shlex.join([sys.executable, os.path.join(BENCHMARKS_DIR, 'fake_transport.py')]) + ' {host}'
+
+
+def _refresh_async(monitor: Monitor) -> float:
+    """
+    :return: Time (seconds) taken by a refresh of all pools.
+    """
+    start = time.monotonic()
+    asyncio.run(monitor.refresh_stats_async())
+    return time.monotonic() - start
+
+
+def test_pools_named_and_grouped_by_host():
+    monitor = Monitor(poolnames=[], hosts=['nas02', 'nas01', 'nas03'], transport=TRANSPORT)
+    changes = monitor.refresh_stats()
+
+    # Each pool is named '<host>/<pool>', and the pools of each host are together (hosts and pools sorted by name)
+    assert list(changes.pools) == ['nas01/pool00', 'nas01/pool01', 'nas02/pool00', 'nas02/pool01', 'nas02/pool02', 'nas03/pool00']
+    assert all(pool.poolname == poolname for poolname, pool in changes.pools.items())
+    assert split_poolname('nas02/pool01') == ('nas02', 'pool01') and split_poolname('tank') == ('', 'tank')
+    assert changes.errors == {}
+
+    # Requesting a subset of the pools only fetches them from their hosts
+    source = MultiHostSource(hosts=['nas01', 'nas02'], transport=TRANSPORT)
+    assert [poolname for poolname, _ in source.iter_status(poolnames=['nas02/pool01', 'nas02/pool02', 'other/pool00'])] == ['nas02/pool01', 'nas02/pool02']
+
+
+def test_host_down():
+    monitor = Monitor(poolnames=[], hosts=['nas01', 'down01'], transport=TRANSPORT)
+    changes = monitor.refresh_stats()
+
+    # The pools of the host are not known, so the host is reported as failed
+    assert list(changes.pools) == ['nas01/pool00', 'nas01/pool01']
+    assert list(changes.errors) == ['down01'] and str(changes.errors['down01']) == '\'zpool status\' failed with exit status 255'
+
+
+def test_hung_host_timeout():
+    monitor = Monitor(poolnames=[], hosts=['hung01', 'nas01'], transport=TRANSPORT, timeout=1.0)
+
+    # The first request waits for the hung host until the timeout, later requests do not wait while it is fetched in the background
+    assert _refresh_async(monitor) < 5
+    changes = monitor.changes
+    assert list(changes.pools) == ['nas01/pool00', 'nas01/pool01']
+    assert list(changes.errors) == ['hung01'] and isinstance(changes.errors['hung01'], TimeoutError)
+
+    assert _refresh_async(monitor) < 1.0
+    assert list(monitor.changes.pools) == ['nas01/pool00', 'nas01/pool01'] and list(monitor.changes.errors) == ['hung01']
+
+
+def test_concurrency_bound():
+    monitor = Monitor(poolnames=[], hosts=['slow01', 'slow02', 'slow03'], transport=TRANSPORT, parallel=2)
+
+    # Each slow host takes 2 seconds: two are fetched concurrently, and the third once one of them has completed
+    assert 4.0 <= _refresh_async(monitor) < 6.0
+    assert [split_poolname(poolname)[0] for poolname in monitor.changes.pools] == ['slow01'] * 3 + ['slow02'] * 3 + ['slow03']
@@ -0,0 +1,63 @@
+"""
+Tests for the moving-window scan progress estimates (zpool_monitor.zpool.progress and ScanStatus.progress)
+"""
+
+# Import zpool_monitor.zpool PoolProgress and ScanStatus classes
+from zpool_monitor.zpool import PoolProgress, ScanStatus
+
+GIB = 1 << 30
+START = 1_700_000_000
+
+
+def _scan(issued: int) -> dict:
+    """
+    :param issued: Bytes issued by the resilver.
+    :return: Scan status of a resilver of 2000 GiB in progress, as reported by 'zpool status'.
+    """
+    return {'function': 'RESILVER', 'state': 'SCANNING', 'start_time': START, 'pass_start': START, 'to_examine': 2000 * GIB, 'examined': issued,
+            'skipped': 0, 'issued': issued}
+
+
+def _stalling_resilver(progress: PoolProgress, seconds: int) -> list[ScanStatus]:
+    """
+    Record a resilver refreshed every second that issues 1 GiB/s for 100 seconds, then stops issuing for the remaining seconds.
+
+    :param progress: Progress history to record the samples to.
+    :param seconds: Number of refreshes.
+    :return: ScanStatus of each refresh.
+    """
+    statuses = []
+    for second in range(1, seconds + 1):
+        scan_data = _scan(issued=min(second, 100) * GIB)
+        progress.record(pool_data={'scan_stats': scan_data, 'vdevs': {}}, timestamp=START + second)
+        statuses.append(ScanStatus(scan_data, now=START + second, progress=progress))
+
+    return statuses
+
+
+def test_window_spans_period_at_refresh_period():
+    progress = PoolProgress(sample_period=1.0)
+    _stalling_resilver(progress, seconds=400)
+    assert len(progress.issued.history) == 301
+
+    progress.sample_period = 10.0
+    assert len(progress.issued.history) == 31
+
+
+def test_stalled_scan_reports_zero_rate_and_no_eta():
+    statuses = _stalling_resilver(PoolProgress(sample_period=1.0), seconds=420)
+
+    # The rate only falls while the window still holds some progress, it never falls back to the whole pass average
+    rates = [status.progress.issue_rate for status in statuses[100:]]
+    assert all(later <= earlier for earlier, later in zip(rates, rates[1:]))
+
+    stalled = statuses[-1].progress
+    assert stalled.issue_rate == 0 and stalled.stalled and stalled.time_left is None
+    assert statuses[-1].record['issue_rate'] == 0 and statuses[-1].record['eta'] is None
+
+
+def test_scan_without_window_uses_pass_average():
+    status = ScanStatus(_scan(issued=50 * GIB), now=START + 100)
+
+    assert status.progress.issue_rate == GIB / 2
+    assert status.progress.time_left == 3900
@@ -0,0 +1,96 @@
+"""
+Tests for the activity-adaptive refresh scheduling (zpool_monitor.scheduler.RefreshScheduler), with stand-ins for the ZPool instances and EventFollower
+"""
+
+# Import System Libraries
+from types import SimpleNamespace
+
+# Import zpool_monitor.scheduler RefreshScheduler and RefreshDue classes
+from zpool_monitor.scheduler import RefreshDue, RefreshScheduler
+
+# Pools as seen by the scheduler: 'tank' is active (eg. scrubbing), 'backup' is idle
+POOLS = {'backup': SimpleNamespace(active=False), 'tank': SimpleNamespace(active=True)}
+
+
+class _Events:
+    """
+    Stand-in for EventFollower, returning the pools requested by request() on the next call to take().
+    """
+    def __init__(self, safety_period: float = 600.0):
+        self.running = True
+        self.safety_period = safety_period
+        self.__requested: tuple[bool, list[str]] = (False, [])
+
+    def request(self, all_pools: bool = False, poolnames: list[str] | None = None) -> None:
+        self.__requested = (all_pools, poolnames or [])
+
+    def take(self) -> tuple[bool, list[str]]:
+        requested, self.__requested = self.__requested, (False, [])
+        return requested
+
+
+def test_due():
+    scheduler = RefreshScheduler(active_period=10, idle_period=60)
+
+    # Every pool is refreshed first, then only the active pools every active period and all pools every idle period (due within the 0.5s tolerance)
+    assert scheduler.due(0) == RefreshDue(all_pools=True, poolnames=[])
+    scheduler.record(pools=POOLS, all_pools=True, latency=0.1, now=0)
+    assert scheduler.active_pools == ['tank']
+
+    assert scheduler.due(9.4) is None
+    assert scheduler.due(9.5) == RefreshDue(all_pools=False, poolnames=['tank'])
+    scheduler.record(pools=POOLS, all_pools=False, latency=0.1, now=9.5)
+
+    assert scheduler.due(19.0) == RefreshDue(all_pools=False, poolnames=['tank'])
+    assert scheduler.due(59.5) == RefreshDue(all_pools=True, poolnames=[])
+
+
+def test_failed_refresh_keeps_active_pools():
+    scheduler = RefreshScheduler(active_period=10, idle_period=60)
+    scheduler.record(pools=POOLS, all_pools=True, latency=0.1, now=0)
+
+    # A failed refresh is not retried before the pools are next due
+    scheduler.record(pools=None, all_pools=False, latency=0.1, now=10)
+    assert scheduler.active_pools == ['tank']
+    assert scheduler.due(15) is None
+    assert scheduler.due(20) == RefreshDue(all_pools=False, poolnames=['tank'])
+
+
+def test_latency_stretches_periods():
+    scheduler = RefreshScheduler(active_period=10, idle_period=60, latency_fraction=0.25, latency_smoothing=0.3)
+    assert scheduler.latency is None and scheduler.effective_active_period == 10
+
+    # A refresh may take at most a quarter of the period, the latency is a moving average
+    scheduler.record(pools=POOLS, all_pools=True, latency=5.0, now=0)
+    assert (scheduler.effective_active_period, scheduler.effective_idle_period) == (20.0, 60)
+
+    scheduler.record(pools=POOLS, all_pools=False, latency=1.0, now=20)
+    assert scheduler.latency == 0.3 * 1.0 + 0.7 * 5.0
+    assert scheduler.effective_active_period == scheduler.latency / 0.25
+
+    assert scheduler.due(30) is None
+    assert scheduler.due(20 + scheduler.effective_active_period) == RefreshDue(all_pools=False, poolnames=['tank'])
+
+
+def test_events_are_held_off():
+    events = _Events()
+    scheduler = RefreshScheduler(active_period=10, idle_period=60, events=events, event_holdoff=5.0)
+    scheduler.record(pools=POOLS, all_pools=True, latency=0.1, now=0)
+
+    # While events are followed, idle pools are only polled every safety period
+    assert scheduler.effective_idle_period == 600.0
+
+    # A pool named by an event is refreshed at the next check, along with the active pools
+    events.request(poolnames=['backup'])
+    assert scheduler.due(1) == RefreshDue(all_pools=False, poolnames=['backup', 'tank'])
+    scheduler.record(pools=POOLS, all_pools=False, latency=0.1, now=1)
+
+    # Another event within the holdoff is kept until the holdoff has passed
+    events.request(poolnames=['backup'])
+    assert scheduler.due(2) is None
+    assert scheduler.due(5.9) is None
+    assert scheduler.due(6.0) == RefreshDue(all_pools=False, poolnames=['backup', 'tank'])
+
+    # An event that cannot be attributed to a pool refreshes all pools
+    events.request(all_pools=True)
+    assert scheduler.due(11.0) == RefreshDue(all_pools=True, poolnames=[])
@@ -0,0 +1,21 @@
+"""
+Tests that importing the applications (as zpool_status does on every run) does not import Textual or the modules implementing the other modes, see
+benchmarks/bench_startup.py for the import time benchmark
+"""
+
+# Import System Libraries
+import json
+import subprocess
+import sys
+
+# Modules only imported by the mode (or application) using them
+_MODE_MODULES: list[str] = ['textual', 'zpool_monitor.daemon', 'zpool_monitor.exporter', 'zpool_monitor.alerts', 'zpool_monitor.capture',
+                            'zpool_monitor.multihost', 'zpool_monitor.events', 'zpool_monitor.iostat', 'zpool_monitor.watch', 'zpool_monitor.formats',
+                            'cProfile', 'tracemalloc', 'gzip', 'tomllib']
+
+
+def test_importing_apps_does_not_import_modes():
+    probe = 'import json, sys; import zpool_monitor.apps; print(json.dumps(sorted(sys.modules)))'
+    modules = json.loads(subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True).stdout)
+
+    assert [module for module in _MODE_MODULES if module in modules] == []
@@ -0,0 +1,256 @@
+"""
+Tests for running the zpool command (zpool_monitor.systemzpool): the incremental decoder of its JSON output, streaming each pool as it is received, killing
+zpool when it does not complete in time, and fetching each pool in parallel, with a stand-in for zpool run as the transport (see the zpool_stub fixture)
+"""
+
+# Import System Libraries
+from typing import Any
+import asyncio
+import json
+import os
+import shlex
+import time
+import pytest
+
+# Import the synthetic pool generator
+from synthetic import generate_zpools_status
+
+# Import zpool_monitor.systemzpool decoder and functions running 'zpool status', and zpool_monitor.Monitor class
+from zpool_monitor.systemzpool import _ZPoolsDecoder, iter_zpools_status, iter_zpools_status_async
+from zpool_monitor.monitor import Monitor
+
+START = 1_700_000_000
+
+
+def _document() -> tuple[bytes, list[tuple[str, Any]]]:
+    """
+    :return: Tuple of ('zpool status' output for two pools with escaped and non-ASCII strings and large numbers, the pools it contains in order).
+    """
+    status = generate_zpools_status(pools=2, vdevs=1, disks=2, scan='scrub', now=START)
+    status['pools']['pool00'] |= {'status': 'One or more devices has "experienced" an error\\\n\tresulting in data corruption', 'action': 'Restore ☃ é'}
+    status['pools']['pool01']['error_count'] = 12345678901234567890
+    return json.dumps(status, indent=4, ensure_ascii=False).encode(), list(status['pools'].items())
+
+
+def _decode(chunks: list[bytes]) -> list[tuple[str, Any]]:
+    """
+    :param chunks: Output of the zpool command, as read from the pipe.
+    :return: Pools returned by the decoder.
+    """
+    decoder = _ZPoolsDecoder()
+    pools = [pool for chunk in chunks for pool in decoder.feed(chunk)]
+    return pools + decoder.feed(b'', final=True)
+
+
+def test_every_chunk_boundary():
+    document, expected = _document()
+
+    # Splitting the output anywhere (including within strings, escapes, multi-byte characters and numbers) gives the same pools
+    for split in range(1, len(document)):
+        assert _decode([document[:split], document[split:]]) == expected, f'split at {split}: {document[split - 10:split + 10]!r}'
+
+
+def test_single_bytes():
+    document, expected = _document()
+
+    assert _decode([document[index:index + 1] for index in range(len(document))]) == expected
+
+
+def test_pool_returned_once_received():
+    document, expected = _document()
+    end_of_first_pool = document.index(b'"pool01"')
+
+    decoder = _ZPoolsDecoder()
+    assert decoder.feed(document[:end_of_first_pool]) == expected[:1]
+    assert decoder.feed(document[end_of_first_pool:]) == expected[1:]
+    assert decoder.feed(b'', final=True) == []
+
+
+@pytest.mark.parametrize('length', [0, 1, 100, -100, -2])
+def test_truncated_output(length):
+    document, _ = _document()
+
+    # Output ending before the document is complete is an error, even if every pool received before the end has been returned
+    with pytest.raises(ValueError):
+        _decode([document[:length]] if length else [b''])
+
+
+def test_invalid_output():
+    with pytest.raises(ValueError):
+        _decode([b'cannot open \'tank\': no such pool\n'])
+
+
+def test_iter_refresh_stats_streams_pools(tmp_path, zpool_stub):
+    document, expected = _document()
+    (tmp_path / 'status.json').write_bytes(document)
+    received = tmp_path / 'received'
+
+    # The stand-in writes the first pool, then waits for the test to receive it before writing the rest. If the first pool is only returned once the
+    # output is complete, the stand-in gives up and writes invalid output so the test fails
+    prefix = zpool_stub(f'''
+        import sys, time
+        document = open({str(tmp_path / 'status.json')!r}, 'rb').read()
+        split = document.index(b'"pool01"')
+        sys.stdout.buffer.write(document[:split])
+        sys.stdout.flush()
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            try:
+                open({str(received)!r}).close()
+                break
+            except FileNotFoundError:
+                time.sleep(0.01)
+        else:
+            sys.stdout.buffer.write(b'not received')
+            sys.exit(1)
+        sys.stdout.buffer.write(document[split:])
+    ''')
+    monitor = Monitor(poolnames=[], transport=shlex.join(prefix))
+
+    pools = monitor.iter_refresh_stats()
+    first = next(pools)
+    received.touch()
+    rest = list(pools)
+
+    assert [pool.poolname for pool in (first, *rest)] == [poolname for poolname, _ in expected]
+    assert list(monitor.changes.pools) == ['pool00', 'pool01']
+
+
+def _hanging_stub(tmp_path, zpool_stub) -> list[str]:
+    """
+    :return: Command prefix running a stand-in for zpool that writes part of its output and its process ID (to tmp_path/pid), then hangs.
+    """
+    return zpool_stub(f'''
+        import os, sys, time
+        open({str(tmp_path / 'pid')!r}, 'w').write(str(os.getpid()))
+        sys.stdout.write('{{"output_version": {{"command": "zpool status"}}, "pools": {{')
+        sys.stdout.flush()
+        time.sleep(60)
+    ''')
+
+
+def _assert_killed(tmp_path) -> None:
+    """
+    Check the process started by the stand-in from _hanging_stub() no longer exists.
+    """
+    with pytest.raises(ProcessLookupError):
+        os.kill(int((tmp_path / 'pid').read_text()), 0)
+
+
+def test_timeout_kills_zpool(tmp_path, zpool_stub):
+    prefix = _hanging_stub(tmp_path, zpool_stub)
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError, match='did not complete within 0.5 seconds'):
+        list(iter_zpools_status(poolnames=[], timeout=0.5, prefix=prefix))
+
+    assert time.monotonic() - start < 5
+    _assert_killed(tmp_path)
+
+
+def test_timeout_kills_zpool_async(tmp_path, zpool_stub):
+    prefix = _hanging_stub(tmp_path, zpool_stub)
+
+    async def refresh() -> list[tuple[str, Any]]:
+        return [pool async for pool in iter_zpools_status_async(poolnames=[], timeout=0.5, prefix=prefix)]
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError, match='did not complete within 0.5 seconds'):
+        asyncio.run(refresh())
+
+    assert time.monotonic() - start < 5
+    _assert_killed(tmp_path)
+
+
+def test_cancelled_refresh_kills_zpool(tmp_path, zpool_stub):
+    prefix = _hanging_stub(tmp_path, zpool_stub)
+
+    async def refresh() -> None:
+        task = asyncio.create_task(Monitor(poolnames=[], transport=shlex.join(prefix)).refresh_stats_async())
+        while not (tmp_path / 'pid').exists(): await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError): await task
+
+    asyncio.run(refresh())
+    _assert_killed(tmp_path)
+
+
+def _parallel_stub(tmp_path, zpool_stub) -> list[str]:
+    """
+    :return: Command prefix running a stand-in for zpool that returns the pools in tmp_path/status.json, one pool per 'zpool status <pool>'. Each command
+             is logged (to tmp_path/log), and 'zpool status' hangs for the pools listed in tmp_path/hang.
+    """
+    (tmp_path / 'status.json').write_text(json.dumps(generate_zpools_status(pools=3, vdevs=1, disks=2, now=START)))
+    (tmp_path / 'hang').write_text('')
+    (tmp_path / 'log').write_text('')
+
+    return zpool_stub(f'''
+        import json, sys, time
+        status = json.load(open({str(tmp_path / 'status.json')!r}))
+        command = sys.argv[2]
+        poolnames = [] if command == 'list' else [param for param in sys.argv[3:] if not param.startswith('-')]
+        open({str(tmp_path / 'log')!r}, 'a').write(' '.join([command, *poolnames]) + '\\n')
+        if set(poolnames) & set(open({str(tmp_path / 'hang')!r}).read().split()): time.sleep(60)
+        status['pools'] = {{poolname: pool_data for poolname, pool_data in status['pools'].items() if not poolnames or poolname in poolnames}}
+        json.dump(status, sys.stdout)
+    ''')
+
+
+def test_parallel_hung_pool_does_not_stall_others(tmp_path, zpool_stub):
+    prefix = _parallel_stub(tmp_path, zpool_stub)
+    monitor = Monitor(poolnames=[], transport=shlex.join(prefix), parallel=4, timeout=1.0)
+
+    async def refresh() -> tuple[float, Any]:
+        start = time.monotonic()
+        changes = await monitor.refresh_stats_async()
+        return time.monotonic() - start, changes
+
+    _, changes = asyncio.run(refresh())
+    assert list(changes.pools) == ['pool00', 'pool01', 'pool02'] and changes.errors == {}
+    pool01 = changes.pools['pool01']
+
+    # The request waits for the hung pool until it times out, the other pools are received (and timed) without waiting for it
+    (tmp_path / 'hang').write_text('pool01')
+    (tmp_path / 'status.json').write_text((tmp_path / 'status.json').read_text().replace('"ONLINE"', '"DEGRADED"'))
+    elapsed, changes = asyncio.run(refresh())
+    assert elapsed >= 1.0
+    assert list(changes.pools) == ['pool00', 'pool01', 'pool02'] and changes.pools['pool01'] is pool01
+    assert list(changes.errors) == ['pool01'] and isinstance(changes.errors['pool01'], TimeoutError)
+    assert sorted(changes.latencies) == ['pool00', 'pool02'] and max(changes.latencies.values()) < 1.0
+    assert changes.changed_pools == {'pool00', 'pool02'}
+
+    # Once the pool is failing, requests no longer wait for it
+    elapsed, changes = asyncio.run(refresh())
+    assert elapsed < 1.0 and list(changes.errors) == ['pool01'] and sorted(changes.latencies) == ['pool00', 'pool02']
+
+
+def test_parallel_failing_pool_retried_in_background(tmp_path, zpool_stub):
+    from zpool_monitor.systemzpool import ZPoolParallelSource
+
+    prefix = _parallel_stub(tmp_path, zpool_stub)
+    (tmp_path / 'hang').write_text('pool01')
+    source = ZPoolParallelSource(max_parallel=4, timeout=1.0, prefix=prefix)
+
+    def log() -> list[str]:
+        return (tmp_path / 'log').read_text().splitlines()
+
+    assert sorted(poolname for poolname, _ in source.iter_status(poolnames=[])) == ['pool00', 'pool02']
+    assert list(source.errors) == ['pool01']
+
+    # Requests while the pool is failing start a single fetch of the pool in the background, and do not wait for it
+    for _ in range(5):
+        start = time.monotonic()
+        assert sorted(poolname for poolname, _ in source.iter_status(poolnames=[])) == ['pool00', 'pool02']
+        assert time.monotonic() - start < 1.0 and list(source.errors) == ['pool01']
+
+    time.sleep(0.5)
+    assert log().count('status pool01') == 2
+
+    # Once the pool responds again, the next fetch started in the background returns its status to a later request
+    (tmp_path / 'hang').write_text('')
+    deadline = time.monotonic() + 10
+    while 'pool01' not in dict(source.iter_status(poolnames=[])):
+        assert time.monotonic() < deadline
+        time.sleep(0.1)
+
+    assert source.errors == {} and log().count('status pool01') == 3
@@ -0,0 +1,117 @@
+"""
+Tests for the keyed-row table displaying the VDEVs of a pool (zpool_monitor.textual.VDEVTable), run headless with synthetic pools (see
+benchmarks/synthetic.py)
+"""
+
+# Import System Libraries
+from types import SimpleNamespace
+from typing import Any
+import asyncio
+import copy
+
+# Import the synthetic pool generator
+from synthetic import generate_pool
+
+# Import Textual App class, zpool_monitor.textual.VDEVTable, and zpool.ZPool classes
+from textual.app import App, ComposeResult
+from zpool_monitor.textual.vdevtable import VDEVTable
+from zpool_monitor.zpool import ZPool
+
+START = 1_700_000_000
+
+
+class _TableApp(App):
+    """App displaying a single VDEVTable"""
+    def compose(self) -> ComposeResult:
+        yield VDEVTable(id='vdevs')
+
+
+def _row_keys(table: VDEVTable) -> list[str]:
+    """
+    :return: Keys of the rows displayed, in display order.
+    """
+    return [row_key.value for row_key in table.rows]
+
+
+def _guids(vdev_data: dict[str, Any]) -> dict[str, str]:
+    """
+    :param vdev_data: Status of a VDEV (the root VDEV for the whole pool).
+    :return: Dictionary mapping the name of the VDEV and every VDEV it contains to its GUID (the row key).
+    """
+    return {vdev_data['name']: vdev_data['guid']} | {name: guid for child in vdev_data.get('vdevs', {}).values() for name, guid in _guids(child).items()}
+
+
+def _select_header(table: VDEVTable, column: int) -> None:
+    """
+    Select a column header, as clicking it does.
+    """
+    table.on_data_table_header_selected(SimpleNamespace(column_index=column, stop=lambda: None))
+
+
+def test_update_only_changed_cells():
+    pool_data = generate_pool(name='tank', vdevs=2, disks=3, now=START)
+    disks: dict[str, Any] = pool_data['vdevs']['tank']['vdevs']['raidz2-1']['vdevs']
+    pool = ZPool(pool_data, now=START)
+    guid = _guids(pool_data['vdevs']['tank'])
+
+    async def run() -> dict[str, Any]:
+        results: dict[str, Any] = {}
+        app = _TableApp()
+        async with app.run_test() as pilot:
+            table = app.query_one(VDEVTable)
+            updates: list[tuple[str, str]] = []
+            update_cell = table.update_cell
+            table.update_cell = lambda row_key, column_key, value, **kwargs: (updates.append((row_key, column_key)),
+                                                                              update_cell(row_key, column_key, value, **kwargs))
+
+            table.update_vdevs(pool.vdev_tree)
+            await pilot.pause()
+            results['keys'] = _row_keys(table)
+
+            # A refresh with the same status updates no cells, a refresh with the read errors of one disk changed updates that cell only
+            pool.update(copy.deepcopy(pool_data), events=[], now=START)
+            table.update_vdevs(pool.vdev_tree)
+            results['unchanged'] = list(updates)
+
+            disks['tank-v1d2']['read_errors'] = 5
+            pool.update(copy.deepcopy(pool_data), events=[], now=START)
+            table.update_vdevs(pool.vdev_tree)
+            results['changed'] = list(updates)
+
+            # Collapsing the group removes the rows of its disks, expanding it restores the same rows
+            table.move_cursor(row=table.get_row_index(guid['raidz2-0']), animate=False)
+            await pilot.press('enter')
+            results['collapsed'] = _row_keys(table)
+            await pilot.press('enter')
+            results['expanded'] = _row_keys(table)
+
+            # Sorting by read errors (descending) moves the disk with errors first within its group, with the same row keys, and a later change of
+            # the same disk still only updates its cell
+            _select_header(table, column=4)
+            _select_header(table, column=4)
+            results['sorted'] = _row_keys(table)
+            del updates[:]
+            disks['tank-v1d2']['read_errors'] = 6
+            pool.update(copy.deepcopy(pool_data), events=[], now=START)
+            table.update_vdevs(pool.vdev_tree)
+            results['sorted_changed'] = list(updates)
+
+            _select_header(table, column=4)
+            results['restored'] = _row_keys(table)
+
+        return results
+
+    results = asyncio.run(run())
+
+    # Rows are keyed by GUID, in tree order
+    assert results['keys'] == list(guid.values())
+    assert results['unchanged'] == []
+    assert results['changed'] == [(guid['tank-v1d2'], 'Read')]
+
+    assert results['collapsed'] == [guid[name] for name in ('tank', 'raidz2-0', 'raidz2-1', 'tank-v1d0', 'tank-v1d1', 'tank-v1d2')]
+    assert results['expanded'] == results['keys']
+
+    assert sorted(results['sorted']) == sorted(results['keys'])
+    assert results['sorted'][6:] == [guid['tank-v1d2'], guid['tank-v1d0'], guid['tank-v1d1']]
+    assert results['sorted_changed'] == [(guid['tank-v1d2'], 'Read')]
+    assert results['restored'] == results['keys']
@@ -1,12 +1,8 @@
-# Try to import the system zpool commands, this will raise an exception if the zpool command does not exist so we need to catch it and exit gracefully
-try:
-    from .systemzpool import get_zpools, get_zpools_status
-
-except FileNotFoundError as e:
-    import rich
-    rich.print(f'[bold red]ERROR:[/] {e}')
-    exit(1)
+# Import the system zpool commands, the zpool command is located on first use so importing does not require it to exist on the system
+from .systemzpool import get_zpools, get_zpools_status, get_zpools_async, get_zpools_status_async
 
+# Import kstat functions used as a fork-free alternative to the zpool command
+from .kstat import get_zpools_kstat
 
 # Import all usable types from zpool sub-module
 from .zpool import humanise, warning_colour_number, create_progress_renderable, VDEV, VDEVS, ScanStatus, ZPool
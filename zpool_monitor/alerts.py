@@ -0,0 +1,666 @@
+"""
+This module provides the AlertEngine class which evaluates declarative alert rules against the changes made by every refresh of a Monitor, and notifies
+local sinks (a command or a file) when an alert starts firing or is resolved.
+
+Rules are evaluated incrementally. Each rule only observes the change events it is interested in (eg. the pool state rule only observes PoolAdded and
+PoolStateChanged events) or the pools that changed, and conditions that change with time alone (a scrub becoming overdue, an error increase ageing out of
+its window) are re-evaluated from a timer queue when they fall due. The VDEV tree is only walked when a pool or VDEV is first seen, so the cost of each
+refresh depends on what changed rather than on the number of pools, VDEVs and rules.
+
+Each alert is a rule applied to a pool, or to a VDEV of a pool, and is debounced and has hysteresis:
+
+ - for:        The condition must hold for this long before the alert fires (default 0, fire immediately).
+ - clear_for:  The condition must have cleared for this long before a firing alert is resolved (default 0, resolve immediately).
+
+Rules and sinks are read from a TOML file by load_alert_config(). Durations are given in seconds or with a unit (eg. '90s', '10m', '1h', '35d'), and rates
+in bytes per second or with a unit (eg. '50M'):
+
+    [[sink]]
+    type = "command"                 # Run the command for every notification, the alert is written to its stdin as JSON and set in ZPOOL_ALERT_* variables
+    command = "/usr/local/bin/notify-admin --zfs"
+
+    [[sink]]
+    type = "file"                    # Append every notification to the file as a JSON line
+    path = "/var/log/zpool_alerts.jsonl"
+
+    [[rule]]
+    name = "pool-not-online"
+    type = "pool_state"              # The pool state is not one of ok_states (default ["ONLINE"])
+    clear_for = "5m"
+
+    [[rule]]
+    name = "vdev-not-online"
+    type = "vdev_state"              # The VDEV state is not one of ok_states (default ["ONLINE"])
+
+    [[rule]]
+    name = "checksum-errors"
+    type = "errors_increasing"       # Any of the counters (default ["checksum"], or "read", "write", "data") of a VDEV increased within window (default 1h)
+    window = "1h"
+
+    [[rule]]
+    name = "slow-resilver"
+    type = "scan_rate_below"         # A scan of the function (default "RESILVER") in progress is issuing below rate (windowed), until it exceeds clear_rate
+    rate = "50M"
+    clear_rate = "80M"
+    for = "10m"
+
+    [[rule]]
+    name = "scrub-overdue"
+    type = "scrub_age"               # No scrub finished within max_age (default 35d), derived from the end time of the last scrub
+    max_age = "35d"
+"""
+
+# Import System Libraries
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterable, NamedTuple
+import heapq
+import itertools
+import json
+import os
+import re
+import shlex
+import subprocess
+import tomllib
+
+# Import zpool.ZPool class, change events and formatting functions
+from .zpool import humanise, ZPool, ChangeEvent, PoolAdded, PoolRemoved, PoolStateChanged, VDEVAdded, VDEVRemoved, VDEVStateChanged, ErrorCountChanged
+from .zpool import ScanStateChanged
+
+
+# Multipliers of the units accepted by parse_duration() and parse_rate()
+_DURATION_UNITS: dict[str, int] = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+_RATE_UNITS: dict[str, int] = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_duration(value: Any) -> float:
+    """
+    :param value: Number of seconds, or a string of a number followed by a unit (s, m, h or d, eg. '35d').
+    :return: Duration in seconds.
+    :raises: ValueError if the duration is not valid.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0: return float(value)
+
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smhd]?)', value.strip()) if isinstance(value, str) else None
+    if match is None: raise ValueError(f'Invalid duration ({value}), expected seconds or a number followed by s, m, h or d')
+
+    return float(match[1]) * _DURATION_UNITS[match[2] or 's']
+
+
+def parse_rate(value: Any) -> float:
+    """
+    :param value: Number of bytes per second, or a string of a number followed by a unit (K, M, G or T, eg. '50M').
+    :return: Rate in bytes per second.
+    :raises: ValueError if the rate is not valid.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0: return float(value)
+
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([KMGT]?)B?(?:/s)?', value.strip()) if isinstance(value, str) else None
+    if match is None: raise ValueError(f'Invalid rate ({value}), expected bytes per second or a number followed by K, M, G or T')
+
+    return float(match[1]) * _RATE_UNITS[match[2]]
+
+
+def _string_list(value: Any) -> list[str]:
+    """
+    :param value: List of strings from the configuration file.
+    :return: The list of strings.
+    :raises: ValueError if value is not a list of strings.
+    """
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value): raise ValueError(f'Invalid list ({value}), expected strings')
+
+    return value
+
+
+class Alert(NamedTuple):
+    """A notification that an alert started firing or was resolved"""
+    rule: str
+    status: str             # 'firing' or 'resolved'
+    poolname: str
+    vdev: str | None        # None for an alert of the pool
+    summary: str            # Description of the condition when it was last evaluated
+    since: float            # Time (seconds since the epoch) the condition started (firing) or cleared (resolved)
+    timestamp: float        # Time (seconds since the epoch) of the notification
+
+    @property
+    def description(self) -> str:
+        """
+        :return: Description of the notification as a single line of text.
+        """
+        return f'[{self.status.upper()}] {self.rule}: {self.summary}'
+
+
+class Observation(NamedTuple):
+    """The condition of a rule for a single pool or VDEV, as observed by the rule"""
+    poolname: str
+    vdev: str | None        # None for a condition of the pool
+    active: bool            # True if the condition holds
+    summary: str            # Description of the condition
+    recheck: float | None = None    # Time to observe the condition again, for conditions that change with time alone
+
+
+class AlertRule:
+    """
+    Base class of the alert rules. A rule observes the condition of the pools or VDEVs affected by the change events and changed pools of a refresh, see
+    the module documentation.
+    """
+    # Rule type in the configuration file
+    kind: str = ''
+
+    # Change event types observed by the rule (see observe_event()), and True if the rule observes every changed pool (see observe_pool())
+    events: tuple[type, ...] = ()
+    observes_changed_pools: bool = False
+
+    # Options of the rule type in the configuration file, mapped to the keyword argument of the constructor and the function converting the value
+    options: dict[str, tuple[str, Callable[[Any], Any]]] = {}
+
+    def __init__(self, name: str, for_seconds: float = 0.0, clear_for: float = 0.0):
+        """
+        Construct the rule
+
+        :param name: Name of the rule, reported with each notification.
+        :param for_seconds: Time (seconds) the condition must hold before an alert fires.
+        :param clear_for: Time (seconds) the condition must have cleared before a firing alert is resolved.
+        """
+        self.name = name
+        self.for_seconds = for_seconds
+        self.clear_for = clear_for
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> 'AlertRule':
+        """
+        :param config: Table of the rule in the configuration file.
+        :return: Instance of the rule.
+        :raises: ValueError if the rule has an unknown or invalid option.
+        """
+        options = {'for': ('for_seconds', parse_duration), 'clear_for': ('clear_for', parse_duration)} | cls.options
+        unknown = config.keys() - options.keys() - {'name', 'type'}
+        if unknown: raise ValueError(f'Rule {config['name']} has unknown option(s) {', '.join(sorted(unknown))}')
+
+        return cls(name=config['name'], **{keyword: convert(config[option]) for option, (keyword, convert) in options.items() if option in config})
+
+    def observe_event(self, event: ChangeEvent, pools: dict[str, ZPool], now: float) -> list[Observation]:
+        """
+        :param event: Change event of one of the types in events.
+        :param pools: Dictionary mapping pool name to ZPool instance for every pool.
+        :param now: Time (seconds since the epoch) the status was obtained.
+        :return: Conditions observed from the event.
+        """
+        return []
+
+    def observe_pool(self, pool: ZPool, now: float) -> list[Observation]:
+        """
+        :param pool: Instance of ZPool for a pool whose status changed (only called if observes_changed_pools).
+        :param now: Time (seconds since the epoch) the status was obtained.
+        :return: Conditions observed for the pool.
+        """
+        return []
+
+    def recheck(self, poolname: str, vdev: str | None, now: float) -> Observation | None:
+        """
+        :param poolname: Name of the pool.
+        :param vdev: Name of the VDEV, None for a condition of the pool.
+        :param now: Time (seconds since the epoch), when the recheck requested by an observation fell due.
+        :return: Condition observed again, or None if the condition is no longer known.
+        """
+        return None
+
+    def forget(self, poolname: str, vdev: str | None = None) -> None:
+        """
+        Discard anything the rule remembers about a pool (or a VDEV of the pool) that was removed.
+
+        :param poolname: Name of the pool.
+        :param vdev: Name of the VDEV, None if the pool was removed.
+        """
+
+
+class PoolStateRule(AlertRule):
+    """Fires while the state of a pool is not one of ok_states"""
+    kind = 'pool_state'
+    events = (PoolAdded, PoolStateChanged)
+    options = {'ok_states': ('ok_states', _string_list)}
+
+    def __init__(self, name: str, for_seconds: float = 0.0, clear_for: float = 0.0, ok_states: Iterable[str] = ('ONLINE',)):
+        """
+        :param ok_states: States of the pool that do not fire the alert.
+        """
+        super().__init__(name=name, for_seconds=for_seconds, clear_for=clear_for)
+        self.__ok_states = frozenset(ok_states)
+
+    def observe_event(self, event: PoolAdded | PoolStateChanged, pools: dict[str, ZPool], now: float) -> list[Observation]:
+        if (pool := pools.get(event.poolname)) is None: return []
+
+        return [Observation(poolname=pool.poolname, vdev=None, active=pool.state not in self.__ok_states, summary=f'{pool.poolname}: state {pool.state}')]
+
+
+class VDEVStateRule(AlertRule):
+    """Fires while the state of a VDEV is not one of ok_states"""
+    kind = 'vdev_state'
+    events = (PoolAdded, VDEVAdded, VDEVStateChanged)
+    options = {'ok_states': ('ok_states', _string_list)}
+
+    def __init__(self, name: str, for_seconds: float = 0.0, clear_for: float = 0.0, ok_states: Iterable[str] = ('ONLINE',)):
+        """
+        :param ok_states: States of the VDEV that do not fire the alert.
+        """
+        super().__init__(name=name, for_seconds=for_seconds, clear_for=clear_for)
+        self.__ok_states = frozenset(ok_states)
+
+    def observe_event(self, event: PoolAdded | VDEVAdded | VDEVStateChanged, pools: dict[str, ZPool], now: float) -> list[Observation]:
+        if isinstance(event, VDEVStateChanged):
+            return [Observation(poolname=event.poolname, vdev=event.vdev, active=event.new not in self.__ok_states,
+                                summary=f'{event.poolname}: VDEV {event.vdev} state {event.new}')]
+
+        # The VDEVs of a new pool (or a new VDEV) are walked once, only VDEVs that are not OK need to be observed
+        if (pool := pools.get(event.poolname)) is None: return []
+
+        return [Observation(poolname=event.poolname, vdev=vdev.name, active=True, summary=f'{event.poolname}: VDEV {vdev.name} state {vdev.state}')
+                for vdev, _ in pool.vdev_tree.rows() if vdev.state not in self.__ok_states and (isinstance(event, PoolAdded) or vdev.name == event.vdev)]
+
+
+class ErrorsIncreasingRule(AlertRule):
+    """Fires when an error counter of a VDEV (or the data error count of the pool) increases, until window passes without a further increase"""
+    kind = 'errors_increasing'
+    events = (ErrorCountChanged,)
+    options = {'counters': ('counters', _string_list), 'window': ('window', parse_duration)}
+
+    def __init__(self, name: str, for_seconds: float = 0.0, clear_for: float = 0.0, counters: Iterable[str] = ('checksum',), window: float = 3600.0):
+        """
+        :param counters: Error counters observed, any of 'read', 'write', 'checksum' (of a VDEV) and 'data' (of the pool).
+        :param window: Time (seconds) without an increase after which the condition clears.
+        :raises: ValueError if a counter is not known.
+        """
+        super().__init__(name=name, for_seconds=for_seconds, clear_for=clear_for)
+        self.__counters = frozenset(counters)
+        self.__window = window
+        if self.__counters - {'read', 'write', 'checksum', 'data'}: raise ValueError(f'Rule {name} has unknown counter(s) {sorted(self.__counters)}')
+
+        # Time and description of the last increase of each pool or VDEV with an increase within the window
+        self.__increases: dict[tuple[str, str | None], tuple[float, str]] = {}
+
+    def observe_event(self, event: ErrorCountChanged, pools: dict[str, ZPool], now: float) -> list[Observation]:
+        if event.counter not in self.__counters or event.delta <= 0: return []
+
+        self.__increases[(event.poolname, event.vdev)] = (now, event.description)
+        return [Observation(poolname=event.poolname, vdev=event.vdev, active=True, summary=event.description, recheck=now + self.__window)]
+
+    def recheck(self, poolname: str, vdev: str | None, now: float) -> Observation | None:
+        if (increase := self.__increases.get((poolname, vdev))) is None: return None
+
+        last_increase, summary = increase
+        if now < last_increase + self.__window:
+            return Observation(poolname=poolname, vdev=vdev, active=True, summary=summary, recheck=last_increase + self.__window)
+
+        del self.__increases[(poolname, vdev)]
+        return Observation(poolname=poolname, vdev=vdev, active=False,
+                           summary=f'{poolname}: {f'VDEV {vdev} ' if vdev is not None else ''}no increase in errors for {timedelta(seconds=self.__window)}')
+
+    def forget(self, poolname: str, vdev: str | None = None) -> None:
+        for key in [key for key in self.__increases if key[0] == poolname and (vdev is None or key[1] == vdev)]:
+            del self.__increases[key]
+
+
+class ScanRateRule(AlertRule):
+    """
+    Fires while a scan of the given function is in progress and issuing below rate over the recent moving window, the condition only clears once the rate
+    reaches clear_rate. A scan that has stalled, or whose rate has not been measured yet, is below any rate
+    """
+    kind = 'scan_rate_below'
+    observes_changed_pools = True
+    options = {'function': ('function', lambda value: str(value).upper()), 'rate': ('rate', parse_rate), 'clear_rate': ('clear_rate', parse_rate)}
+
+    def __init__(self, name: str, for_seconds: float = 0.0, clear_for: float = 0.0, function: str = 'RESILVER', rate: float = 0.0,
+                 clear_rate: float | None = None):
+        """
+        :param function: Scan function observed (eg. 'RESILVER', 'SCRUB').
+        :param rate: Issue rate (bytes per second) below which the condition holds.
+        :param clear_rate: Issue rate (bytes per second) the scan must reach for the condition to clear, defaults to rate.
+        """
+        super().__init__(name=name, for_seconds=for_seconds, clear_for=clear_for)
+        self.__function = function
+        self.__rate = rate
+        self.__clear_rate = max(clear_rate or rate, rate)
+
+        # Pools whose scan was last observed to be slow
+        self.__slow: set[str] = set()
+
+    def observe_pool(self, pool: ZPool, now: float) -> list[Observation]:
+        # Pools with a scan in progress change on every refresh, so the rate is observed every time it is recalculated. The windowed rate is used rather
+        # than the average over the whole pass, which stays high long after a scan has stalled
+        if pool.scan is None or pool.scan.function != self.__function or pool.scan.progress is None:
+            self.__slow.discard(pool.poolname)
+            return [Observation(poolname=pool.poolname, vdev=None, active=False, summary=f'{pool.poolname}: no {self.__function.lower()} in progress')]
+
+        rate = pool.scan.window_issue_rate
+        threshold = self.__clear_rate if pool.poolname in self.__slow else self.__rate
+        below = rate is None or rate < 1 or rate < threshold
+        if below: self.__slow.add(pool.poolname)
+        else: self.__slow.discard(pool.poolname)
+
+        issuing = 'issue rate not measured yet' if rate is None else 'stalled' if rate < 1 else f'issuing at {humanise(rate)}/s'
+        return [Observation(poolname=pool.poolname, vdev=None, active=pool.poolname in self.__slow,
+                            summary=f'{pool.poolname}: {self.__function.lower()} {issuing} ({'below' if below else 'above'} {humanise(threshold)}/s)')]
+
+    def forget(self, poolname: str, vdev: str | None = None) -> None:
+        if vdev is None: self.__slow.discard(poolname)
+
+
+class ScrubAgeRule(AlertRule):
+    """Fires when no scrub of a pool has finished within max_age, derived from the end time of the last scrub reported by the scan status"""
+    kind = 'scrub_age'
+    events = (PoolAdded, ScanStateChanged)
+    options = {'max_age': ('max_age', parse_duration)}
+
+    def __init__(self, name: str, for_seconds: float = 0.0, clear_for: float = 0.0, max_age: float = 35 * 24 * 60 * 60):
+        """
+        :param max_age: Time (seconds) since the last scrub finished after which the alert fires.
+        """
+        super().__init__(name=name, for_seconds=for_seconds, clear_for=clear_for)
+        self.__max_age = max_age
+
+        # Time the last scrub of each pool finished (0 if the pool has never been scanned), None while a scrub is in progress. A pool is not present if
+        # its last scan was not a scrub (eg. a resilver) and the time of its last scrub is not known
+        self.__last_scrub: dict[str, float | None] = {}
+
+    def __observe(self, poolname: str, now: float) -> Observation:
+        """
+        :param poolname: Name of the pool, present in self.__last_scrub.
+        :param now: Time (seconds since the epoch).
+        :return: Condition of the pool, rechecked when the last scrub becomes older than max_age.
+        """
+        end_time = self.__last_scrub[poolname]
+        if end_time is None: return Observation(poolname=poolname, vdev=None, active=False, summary=f'{poolname}: scrub in progress')
+
+        summary = f'{poolname}: {f'last scrub finished {datetime.fromtimestamp(end_time):%Y-%m-%d %H:%M}' if end_time else 'never scrubbed'}'
+        if now >= end_time + self.__max_age: return Observation(poolname=poolname, vdev=None, active=True, summary=summary)
+
+        return Observation(poolname=poolname, vdev=None, active=False, summary=summary, recheck=end_time + self.__max_age)
+
+    def observe_event(self, event: PoolAdded | ScanStateChanged, pools: dict[str, ZPool], now: float) -> list[Observation]:
+        if (pool := pools.get(event.poolname)) is None: return []
+
+        scan = pool.scan
+        if scan is None: self.__last_scrub[pool.poolname] = 0
+        elif scan.function == 'SCRUB' and scan.state == 'SCANNING': self.__last_scrub[pool.poolname] = None
+        elif scan.function == 'SCRUB' and scan.state == 'FINISHED': self.__last_scrub[pool.poolname] = scan.end_time
+        elif self.__last_scrub.get(pool.poolname, 0) is None: del self.__last_scrub[pool.poolname]
+
+        if pool.poolname not in self.__last_scrub:
+            return [Observation(poolname=pool.poolname, vdev=None, active=False, summary=f'{pool.poolname}: time of last scrub not known')]
+
+        return [self.__observe(poolname=pool.poolname, now=now)]
+
+    def recheck(self, poolname: str, vdev: str | None, now: float) -> Observation | None:
+        return self.__observe(poolname=poolname, now=now) if poolname in self.__last_scrub else None
+
+    def forget(self, poolname: str, vdev: str | None = None) -> None:
+        if vdev is None: self.__last_scrub.pop(poolname, None)
+
+
+class CommandSink:
+    """Runs a command for every notification, the alert is written to its stdin as JSON and set in ZPOOL_ALERT_<FIELD> environment variables"""
+    def __init__(self, command: str):
+        """
+        :param command: Command to run, split into arguments as by a shell (no shell is run).
+        :raises: ValueError if the command is empty.
+        """
+        self.__arguments = shlex.split(command)
+        if not self.__arguments: raise ValueError('Command sink has an empty command')
+
+        # Commands that may still be running, they are not waited for so a slow command does not delay the refresh
+        self.__processes: list[subprocess.Popen] = []
+
+    def send(self, alert: Alert) -> None:
+        """
+        :param alert: The notification to send.
+        :raises: OSError if the command cannot be run.
+        """
+        self.__processes = [process for process in self.__processes if process.poll() is None]
+
+        environment = os.environ | {f'ZPOOL_ALERT_{field.upper()}': '' if value is None else str(value) for field, value in alert._asdict().items()}
+        process = subprocess.Popen(self.__arguments, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=environment,
+                                   start_new_session=True)
+        self.__processes.append(process)
+
+        try:
+            process.stdin.write(json.dumps(alert._asdict()).encode() + b'\n')
+            process.stdin.close()
+        except BrokenPipeError:
+            # The command does not read its stdin
+            pass
+
+
+class FileSink:
+    """Appends every notification to a file as a JSON line, the file is reopened for each notification so it can be rotated"""
+    def __init__(self, path: str):
+        """
+        :param path: Path of the file.
+        """
+        self.__path = path
+
+    def send(self, alert: Alert) -> None:
+        """
+        :param alert: The notification to send.
+        :raises: OSError if the file cannot be written.
+        """
+        with open(self.__path, 'a') as file:
+            file.write(json.dumps(alert._asdict(), separators=(',', ':')) + '\n')
+
+
+# Rule and sink types in the configuration file
+RULE_TYPES: dict[str, type[AlertRule]] = {rule.kind: rule for rule in (PoolStateRule, VDEVStateRule, ErrorsIncreasingRule, ScanRateRule, ScrubAgeRule)}
+SINK_TYPES: dict[str, tuple[type, str]] = {'command': (CommandSink, 'command'), 'file': (FileSink, 'path')}
+
+
+class _AlertState:
+    """Condition and firing state of a single alert (a rule applied to a pool or VDEV)"""
+    __slots__ = ('active', 'since', 'firing', 'summary', 'due')
+
+    def __init__(self, since: float):
+        self.active: bool = True
+        self.since: float = since
+        self.firing: bool = False
+        self.summary: str = ''
+
+        # Time the pending debounce or hysteresis timer of the alert falls due
+        self.due: float | None = None
+
+
+class AlertEngine:
+    """
+    Evaluates alert rules against the changes made by every refresh and sends notifications to the sinks, see the module documentation.
+    """
+    def __init__(self, rules: list[AlertRule], sinks: list[CommandSink | FileSink]):
+        """
+        Construct the engine
+
+        :param rules: Alert rules to evaluate, each with a unique name.
+        :param sinks: Sinks every notification is sent to.
+        :raises: ValueError if two rules have the same name.
+        """
+        self.__rules: dict[str, AlertRule] = {rule.name: rule for rule in rules}
+        if len(self.__rules) != len(rules): raise ValueError('Alert rule names must be unique')
+        self.__sinks = sinks
+
+        # Rules indexed by the change event types they observe, and the rules that observe every changed pool
+        self.__event_rules: dict[type, list[AlertRule]] = {}
+        for rule in rules:
+            for event_type in rule.events:
+                self.__event_rules.setdefault(event_type, []).append(rule)
+        self.__pool_rules: list[AlertRule] = [rule for rule in rules if rule.observes_changed_pools]
+
+        # State of every alert whose condition holds or that is firing, keyed by (rule name, pool name, VDEV name)
+        self.__alerts: dict[tuple[str, str, str | None], _AlertState] = {}
+
+        # Timer queue of (due time, sequence, key of the alert, True if the rule rechecks the condition or False if the debounce or hysteresis of the
+        # alert falls due). A timer is stale (and ignored) if a later timer of the same kind replaced it
+        self.__timers: list[tuple[float, int, tuple[str, str, str | None], bool]] = []
+        self.__rechecks: dict[tuple[str, str, str | None], float] = {}
+        self.__sequence = itertools.count()
+
+        # Error message of the last notification that could not be sent, None if none has failed
+        self.sink_error: str | None = None
+
+    @property
+    def firing(self) -> list[Alert]:
+        """
+        :return: The alerts currently firing, as 'firing' notifications.
+        """
+        return [Alert(rule=key[0], status='firing', poolname=key[1], vdev=key[2], summary=state.summary, since=state.since, timestamp=state.since)
+                for key, state in self.__alerts.items() if state.firing]
+
+    def __schedule(self, due: float, key: tuple[str, str, str | None], recheck: bool) -> None:
+        """
+        :param due: Time (seconds since the epoch) the timer falls due.
+        :param key: Key of the alert.
+        :param recheck: True to recheck the condition, False to check the debounce or hysteresis of the alert.
+        """
+        heapq.heappush(self.__timers, (due, next(self.__sequence), key, recheck))
+
+    def __transition(self, rule: AlertRule, key: tuple[str, str, str | None], state: _AlertState, now: float, notifications: list[Alert]) -> None:
+        """
+        Fire or resolve an alert once its condition has held or cleared for long enough, otherwise schedule a timer for when it will have.
+
+        :param rule: The rule of the alert.
+        :param key: Key of the alert.
+        :param state: State of the alert.
+        :param now: Time (seconds since the epoch).
+        :param notifications: List to append any notification to.
+        """
+        if state.active == state.firing:
+            state.due = None
+            return
+        if not state.active and not state.firing:
+            # The condition cleared before the alert fired
+            del self.__alerts[key]
+            return
+
+        due = state.since + (rule.for_seconds if state.active else rule.clear_for)
+        if now < due:
+            if state.due != due: self.__schedule(due=due, key=key, recheck=False)
+            state.due = due
+            return
+
+        state.firing, state.due = state.active, None
+        notifications.append(Alert(rule=key[0], status='firing' if state.firing else 'resolved', poolname=key[1], vdev=key[2], summary=state.summary,
+                                   since=state.since, timestamp=now))
+        if not state.firing: del self.__alerts[key]
+
+    def __apply(self, rule: AlertRule, observation: Observation, now: float, notifications: list[Alert]) -> None:
+        """
+        Apply an observed condition to its alert.
+
+        :param rule: The rule that made the observation.
+        :param observation: The observed condition.
+        :param now: Time (seconds since the epoch).
+        :param notifications: List to append any notification to.
+        """
+        key = (rule.name, observation.poolname, observation.vdev)
+        if observation.recheck is not None and observation.recheck > now and self.__rechecks.get(key) != observation.recheck:
+            self.__rechecks[key] = observation.recheck
+            self.__schedule(due=observation.recheck, key=key, recheck=True)
+
+        state = self.__alerts.get(key)
+        if state is None:
+            # Conditions that do not hold are only tracked while their alert is pending or firing
+            if not observation.active: return
+            state = self.__alerts[key] = _AlertState(since=now)
+        elif state.active != observation.active:
+            state.active, state.since = observation.active, now
+
+        state.summary = observation.summary
+        self.__transition(rule=rule, key=key, state=state, now=now, notifications=notifications)
+
+    def __forget(self, poolname: str, vdev: str | None, now: float, notifications: list[Alert]) -> None:
+        """
+        Clear the alerts of a pool (or a VDEV of the pool) that was removed, firing alerts are resolved after their hysteresis.
+
+        :param poolname: Name of the pool.
+        :param vdev: Name of the VDEV, None if the pool was removed.
+        :param now: Time (seconds since the epoch).
+        :param notifications: List to append any notification to.
+        """
+        for rule in self.__rules.values():
+            rule.forget(poolname=poolname, vdev=vdev)
+        for key in [key for key in self.__rechecks if key[1] == poolname and (vdev is None or key[2] == vdev)]:
+            del self.__rechecks[key]
+
+        for key in [key for key in self.__alerts if key[1] == poolname and (vdev is None or key[2] == vdev)]:
+            self.__apply(rule=self.__rules[key[0]], observation=Observation(poolname=poolname, vdev=key[2], active=False,
+                                                                            summary=f'{poolname}: {f'VDEV {vdev} ' if vdev is not None else 'pool '}removed'),
+                         now=now, notifications=notifications)
+
+    def evaluate(self, pools: dict[str, ZPool], changed_pools: Iterable[str], events: Iterable[ChangeEvent], now: float) -> list[Alert]:
+        """
+        Evaluate the rules against the changes made by a refresh and any timers that have fallen due, and send the notifications to the sinks.
+
+        :param pools: Dictionary mapping pool name to ZPool instance for every pool.
+        :param changed_pools: Names of the pools whose status changed.
+        :param events: Change events generated by the refresh.
+        :param now: Time (seconds since the epoch) the status was obtained.
+        :return: The notifications sent, in the order they were generated.
+        """
+        notifications: list[Alert] = []
+
+        for event in events:
+            if isinstance(event, (PoolRemoved, VDEVRemoved)):
+                self.__forget(poolname=event.poolname, vdev=getattr(event, 'vdev', None), now=now, notifications=notifications)
+            for rule in self.__event_rules.get(type(event), ()):
+                for observation in rule.observe_event(event=event, pools=pools, now=now):
+                    self.__apply(rule=rule, observation=observation, now=now, notifications=notifications)
+
+        if self.__pool_rules:
+            for poolname in changed_pools:
+                if (pool := pools.get(poolname)) is None: continue
+                for rule in self.__pool_rules:
+                    for observation in rule.observe_pool(pool=pool, now=now):
+                        self.__apply(rule=rule, observation=observation, now=now, notifications=notifications)
+
+        while self.__timers and self.__timers[0][0] <= now:
+            due, _, key, recheck = heapq.heappop(self.__timers)
+            rule = self.__rules[key[0]]
+
+            if recheck and self.__rechecks.get(key) == due:
+                del self.__rechecks[key]
+                if (observation := rule.recheck(poolname=key[1], vdev=key[2], now=now)) is not None:
+                    self.__apply(rule=rule, observation=observation, now=now, notifications=notifications)
+            elif not recheck and (state := self.__alerts.get(key)) is not None and state.due == due:
+                self.__transition(rule=rule, key=key, state=state, now=now, notifications=notifications)
+
+        for alert in notifications:
+            for sink in self.__sinks:
+                try:
+                    sink.send(alert)
+                except OSError as error:
+                    self.sink_error = f'{type(sink).__name__}: {error}'
+
+        return notifications
+
+
+def load_alert_config(path: str) -> AlertEngine:
+    """
+    :param path: Path of the TOML file containing the rules and sinks, see the module documentation.
+    :return: Instance of AlertEngine evaluating the rules.
+    :raises: OSError if the file cannot be read, ValueError if it is not valid.
+    """
+    with open(path, 'rb') as file:
+        config = tomllib.load(file)
+
+    unknown = config.keys() - {'rule', 'sink'}
+    if unknown: raise ValueError(f'Unknown section(s) {', '.join(sorted(unknown))}, expected [[rule]] and [[sink]]')
+
+    rules: list[AlertRule] = []
+    for rule_config in config.get('rule', []):
+        if not isinstance(rule_config.get('name'), str) or rule_config.get('type') not in RULE_TYPES:
+            raise ValueError(f'Every rule needs a name and a type, one of {', '.join(RULE_TYPES)}')
+        rules.append(RULE_TYPES[rule_config['type']].from_config(rule_config))
+
+    sinks: list[CommandSink | FileSink] = []
+    for sink_config in config.get('sink', []):
+        sink_type, option = SINK_TYPES.get(sink_config.get('type'), (None, ''))
+        if sink_type is None or not isinstance(sink_config.get(option), str) or len(sink_config) != 2:
+            raise ValueError(f'Every sink needs a type and its option, one of {', '.join(f'{kind} ({option})' for kind, (_, option) in SINK_TYPES.items())}')
+        sinks.append(sink_type(sink_config[option]))
+
+    if not rules: raise ValueError('No alert rules are defined')
+
+    return AlertEngine(rules=rules, sinks=sinks)
@@ -3,13 +3,19 @@ This module provides the zpool_mon() function to run the application. This funct
 """
 
 # Import System Libraries
+from datetime import datetime
 import argparse
+import asyncio
+import sys
 import rich
 import rich.console
 
-# Import zpool_monitor CLI Validators, Monitor Class, and zpool_monitor.textual ZPoolDashboard App
+# Import zpool_monitor CLI Validators, Monitor Class, and kstat location. The zpool_monitor.textual ZPoolDashboard App and the modules implementing each mode
+# (daemon, exporter, capture, alerts, events, iostat, ...) are imported by the application (or mode) using them only, so that zpool_status never imports
+# Textual and only pays to import what the requested mode needs
 from . import ValidPool, ValidTheme, Monitor
-from .textual import ZPoolDashboard
+from .cliargs import ValidAddress
+from .kstat import KSTAT_ROOT
 
 
 # ---------- APPLICATION: zpool_status ----------
@@ -17,41 +23,91 @@ def zpool_status_argparse() -> argparse.Namespace:
     """
     Parses and returns the command-line arguments for the zpool_status application.
 
-        usage: zpool_status [-h] [poolname ...]
+        usage: zpool_status [-h] [--connect [SOCKET]] [--watch SECONDS] [--format {text,json,ndjson,csv}] [poolname ...]
 
     :returns: argparse.Namespace: A Namespace object containing the parsed command-line arguments.
 
     :raises: This function will raise errors related to incorrect command-line argument parsing using argparse.ArgumentParser.
     """
+    from .daemon import DEFAULT_SOCKET, DaemonSource
+    from .formats import OUTPUT_FORMATS
+
     parser = argparse.ArgumentParser(description='🔍 ZPool Status Monitor\n\nA \'pretty\' replacement for the \'zpool status\' command',
                                      formatter_class=argparse.RawTextHelpFormatter,
                                      allow_abbrev=False
                                      )
 
-    parser.add_argument('poolname', nargs='*', type=ValidPool(), help='ZPool name to monitor (default is all pools)')
+    parser.add_argument('--connect', metavar='SOCKET', nargs='?', const=DEFAULT_SOCKET, default=None,
+                        help=f'Read the pool status from a \'zpool_monitor --daemon\' serving on SOCKET instead of running \'zpool status\'\n(default SOCKET = {DEFAULT_SOCKET})')
+
+    parser.add_argument('--watch', metavar='SECONDS', type=float, default=None,
+                        help='Display the status, then refresh every SECONDS and print only a timestamped line for each change and scan/trim progress tick')
+
+    parser.add_argument('--format', choices=['text', *OUTPUT_FORMATS], default='text',
+                        help='Output format, the machine-readable formats are written without building any display tables (default = text)\n'
+                             ' o json:   a single document containing every pool\n'
+                             ' o ndjson: one line per pool, written as soon as each pool is received\n'
+                             ' o csv:    one row per VDEV, including the pool and scan fields, pools that failed are listed on stderr\n'
+                             'The exit status is 1 if the status of any pool could not be obtained')
+
+    parser.add_argument('poolname', nargs='*', help='ZPool name to monitor (default is all pools)')
+
+    arguments = parser.parse_args()
+    if arguments.watch and arguments.format != 'text': parser.error('argument --watch: not allowed with argument --format')
+
+    # Pool names are validated against the daemon's snapshot when connecting to a daemon, so the local system is not required to have ZFS
+    ValidPool(source=DaemonSource(socket_path=arguments.connect) if arguments.connect else None).validate(parser=parser, poolnames=arguments.poolname)
 
-    return parser.parse_args()
+    return arguments
 
 
 def zpool_status() -> None:
     """
     Function executed when installed application zpool_status is executed
 
-    Reads current ZPool status information, displays to screen, and exits.
+    Reads current ZPool status information, displays to screen, and exits (or with --watch, keeps printing the changes until interrupted).
     """
     console = rich.console.Console()
 
     try:
         arguments = zpool_status_argparse()
 
-        # ZPool status is retrieved from the Monitor class. We need to refresh the status before displaying them
-        monitor = Monitor(poolnames=arguments.poolname)
-        monitor.refresh_stats()
-        monitor.display(console=console)
+        # ZPool status is retrieved from the Monitor class. Each pool is displayed as soon as its status has been received. If pool names were validated,
+        # the status obtained during validation is reused rather than running 'zpool status' again. When connecting to a daemon, the daemon's latest
+        # snapshot is displayed instead
+        if arguments.connect:
+            from .daemon import DaemonSource
+            monitor = Monitor(poolnames=arguments.poolname, source=DaemonSource(socket_path=arguments.connect))
+            pools_status = None
+        else:
+            # When watching, a 'zpool status' that does not complete is killed so the next refresh is not blocked
+            monitor = Monitor(poolnames=arguments.poolname, timeout=DEFAULT_TIMEOUT if arguments.watch else None)
+            pools_status = ValidPool.pools_status
+
+        # When watching, the same Monitor is refreshed every period and only the changes are printed after the first display. Machine-readable formats
+        # are written to stdout, so errors are displayed on stderr instead. The csv format has no place for the pools that failed, so they are listed on
+        # stderr, and the exit status is non-zero if any pool failed so scripts do not mistake a partial output for the full status
+        if arguments.format != 'text':
+            from .formats import write_pools
+            console = rich.console.Console(stderr=True)
+            errors = write_pools(monitor=monitor, output_format=arguments.format, stream=sys.stdout, pools_status=pools_status)
+            if arguments.format == 'csv':
+                for poolname, error in errors.items(): console.print(f'[bold red]ERROR:[/] {poolname}: {error}')
+            if errors: exit(1)
+        elif arguments.watch:
+            from .watch import ChangeWatcher
+            ChangeWatcher(monitor=monitor, console=console, interval=arguments.watch).run(pools_status=pools_status)
+        else:
+            monitor.refresh_and_display(console=console, pools_status=pools_status)
 
     except KeyboardInterrupt:
         pass
 
+    except (FileNotFoundError, ConnectionError) as e:
+        # The zpool command does not exist on this system, or the daemon could not be reached
+        console.print(f'[bold red]ERROR:[/] {e}')
+        exit(1)
+
     except (Exception,):
         # Use the rich console to display any other exceptions
         console.print_exception()
@@ -59,31 +115,119 @@ def zpool_status() -> None:
 
 # ---------- APPLICATION: zpool_monitor ----------
 DEFAULT_REFRESH = 10  # default polling interval
+DEFAULT_TIMEOUT = 30  # zpool status is killed if it has not completed within DEFAULT_TIMEOUT seconds
 
 
 def zpool_monitor_argparse() -> argparse.Namespace:
     """
     Parses and returns the command-line arguments for the zpool_status application.
 
-        usage: zpool_monitor [-h] [-r REFRESH] [-t THEME] [poolname ...]
+        usage: zpool_monitor [-h] [-r REFRESH] [--idle-backoff FACTOR] [--timeout SECONDS] [--parallel N] [--host HOST[,HOST...]] [--transport COMMAND]
+                             [-f FULL_REFRESH] [-i IOSTAT] [--events [SECONDS]] [--record FILE | --replay FILE | --connect [SOCKET]] [--daemon [SOCKET]] [--exporter [ADDRESS]]
+                             [--exporter-devices N] [--alerts FILE] [--replay-speed SPEED] [--replay-start TIME] [--timings] [--timings-log FILE] [--profile-dir DIR] [-t THEME] [poolname ...]
 
     :returns: argparse.Namespace: A Namespace object containing the parsed command-line arguments.
 
     :raises: This function will raise errors related to incorrect command-line argument parsing using argparse.ArgumentParser.
     """
+    from .daemon import DEFAULT_SOCKET, DaemonSource
+    from .exporter import DEFAULT_ADDRESS, DEFAULT_MAX_DEVICES
+    from .events import DEFAULT_SAFETY_PERIOD
+    from .multihost import SSH_TRANSPORT
+    from .scheduler import DEFAULT_IDLE_BACKOFF
+
     parser = argparse.ArgumentParser(description='🔍 ZPool Status Monitor\n\nA \'pretty\' replacement for the \'zpool status\' command',
                                      formatter_class=argparse.RawTextHelpFormatter,
                                      allow_abbrev=False
                                      )
 
     parser.add_argument('-r', '--refresh', type=int, default=DEFAULT_REFRESH, help=f'Monitor update refresh period (default = {DEFAULT_REFRESH})')
+    parser.add_argument('--idle-backoff', metavar='FACTOR', type=float, default=DEFAULT_IDLE_BACKOFF,
+                        help=f'Refresh idle pools (ONLINE, no scrub/resilver/trim running) every FACTOR refresh periods\n(default = {DEFAULT_IDLE_BACKOFF}, 1 = refresh all pools every refresh period)')
+    parser.add_argument('--timeout', metavar='SECONDS', type=float, default=DEFAULT_TIMEOUT,
+                        help=f'Kill \'zpool status\' if it has not completed within SECONDS and display the last status as stale (default = {DEFAULT_TIMEOUT})')
+    parser.add_argument('--parallel', metavar='N', type=int, default=0,
+                        help='Run \'zpool status <pool>\' for up to N pools concurrently, so a pool that is not responding does not delay the others\n(default = run a single \'zpool status\' for all pools)')
 
-    parser.add_argument('-t', '--theme', type=ValidTheme(), default=ValidTheme.default_theme(),
-                        help=f'Select application theme (default={ValidTheme.default_theme()})\nValid Themes:\n o {'\n o '.join(ValidTheme.valid_themes)}\n')
+    parser.add_argument('--host', metavar='HOST[,HOST...]', action='append',
+                        help='Monitor the pools of HOST (may be repeated) instead of the local system, pools are named HOST/POOL\n(--parallel sets the number of hosts polled concurrently, default = 8)')
+    parser.add_argument('--transport', metavar='COMMAND',
+                        help=f'Run \'zpool\' via COMMAND (eg. \'sudo\'), {{host}} is replaced by the host name\n(default = run \'zpool\' directly, with --host: \'{SSH_TRANSPORT.replace('%', '%%')}\')')
+
+    parser.add_argument('-f', '--full-refresh', type=int, default=None,
+                        help=f'Refresh pool state and I/O counters from kstat ({KSTAT_ROOT}) and only run \'zpool status\'\nevery FULL_REFRESH seconds (default = always run \'zpool status\')')
+
+    parser.add_argument('-i', '--iostat', type=int, default=None,
+                        help='Display VDEV throughput sampled every IOSTAT seconds by a single \'zpool iostat\' process (default = not displayed)')
 
-    parser.add_argument('poolname', nargs='*', type=ValidPool(), help='ZPool name to monitor (default is all pools)')
+    parser.add_argument('--events', metavar='SECONDS', nargs='?', type=float, const=DEFAULT_SAFETY_PERIOD, default=None,
+                        help=f'Follow \'zpool events\' with a single process and refresh a pool as soon as an event reports a change to it, idle pools are\nonly polled every SECONDS as a safety net (default SECONDS = {DEFAULT_SAFETY_PERIOD:g})')
 
-    return parser.parse_args()
+    capture = parser.add_mutually_exclusive_group()
+    capture.add_argument('--record', metavar='FILE', help='Record every \'zpool status\' snapshot to a capture FILE (appended if it exists)')
+    capture.add_argument('--replay', metavar='FILE', help='Replay snapshots from a capture FILE instead of running \'zpool status\'')
+    capture.add_argument('--connect', metavar='SOCKET', nargs='?', const=DEFAULT_SOCKET, default=None,
+                         help=f'Display the pool status published by a \'zpool_monitor --daemon\' serving on SOCKET instead of running \'zpool status\'\n(default SOCKET = {DEFAULT_SOCKET})')
+
+    parser.add_argument('--daemon', metavar='SOCKET', nargs='?', const=DEFAULT_SOCKET, default=None,
+                        help=f'Run without a display, polling the pools and publishing their status to clients connected to SOCKET\n(default SOCKET = {DEFAULT_SOCKET})')
+
+    parser.add_argument('--exporter', metavar='ADDRESS', nargs='?', const=DEFAULT_ADDRESS, default=None, type=ValidAddress(),
+                        help=f'Run without a display, polling the pools and serving their status as OpenMetrics (for Prometheus) at http://ADDRESS/metrics\n(ADDRESS = [HOST]:PORT, default ADDRESS = {DEFAULT_ADDRESS})')
+    parser.add_argument('--exporter-devices', metavar='N', type=int, default=DEFAULT_MAX_DEVICES,
+                        help=f'Export the metrics of at most N leaf devices of each pool individually, devices that are not ONLINE or have errors first\n(default = {DEFAULT_MAX_DEVICES})')
+
+    parser.add_argument('--alerts', metavar='FILE',
+                        help='Evaluate the alert rules in the TOML FILE after every refresh and send notifications to its command/file sinks\n(see the README for the rule types)')
+
+    parser.add_argument('--replay-speed', metavar='SPEED', type=float, default=1.0, help='Replay speed as a multiple of real time (default = 1.0)')
+    parser.add_argument('--replay-start', metavar='TIME', type=datetime.fromisoformat, default=None,
+                        help='Start replaying from the snapshot taken at TIME (eg. \'2025-01-31 23:00\', default = start of capture)')
+
+    parser.add_argument('--timings', action='store_true', help='Display rolling percentiles of the time taken by each stage of a refresh, and the number of unchanged pools skipped, in the header')
+    parser.add_argument('--timings-log', metavar='FILE', help='Append the time taken by each stage of every refresh to FILE as JSON lines')
+    parser.add_argument('--profile-dir', metavar='DIR',
+                        help='Enable the \'p\' key binding to start/stop capturing a cProfile profile and tracemalloc snapshot to DIR')
+
+    parser.add_argument('-t', '--theme', type=ValidTheme(), default=ValidTheme.default_theme(),
+                        help=f'Select application theme (default={ValidTheme.default_theme()})\nValid Themes:\n o {'\n o '.join(ValidTheme.valid_themes())}\n')
+
+    parser.add_argument('poolname', nargs='*', help='ZPool name to monitor (default is all pools)')
+
+    arguments = parser.parse_args()
+    if arguments.daemon and arguments.connect: parser.error('argument --daemon: not allowed with argument --connect')
+    if arguments.exporter and arguments.daemon: parser.error('argument --exporter: not allowed with argument --daemon')
+
+    # The alert rules are loaded here so an invalid rules file is reported as a usage error
+    if arguments.alerts:
+        from .alerts import load_alert_config
+        try:
+            arguments.alerts = load_alert_config(arguments.alerts)
+        except (OSError, ValueError) as e:
+            parser.error(f'argument --alerts: {e}')
+
+    # Pools of remote hosts are fetched via the transport, kstat, 'zpool iostat' and 'zpool events' are only available for the local system
+    arguments.host = [host for hosts in arguments.host or [] for host in hosts.split(',') if host]
+    for option, value in (('-f/--full-refresh', arguments.full_refresh), ('-i/--iostat', arguments.iostat), ('--events', arguments.events),
+                          ('--replay', arguments.replay), ('--connect', arguments.connect)):
+        if arguments.host and value: parser.error(f'argument --host: not allowed with argument {option}')
+
+    # Events are only followed when the status is obtained by running 'zpool status'
+    for option, value in (('--replay', arguments.replay), ('--connect', arguments.connect)):
+        if arguments.events and value: parser.error(f'argument --events: not allowed with argument {option}')
+
+    # Pool names are validated against the daemon's snapshot when connecting to a daemon, and against the pools of the remote hosts (HOST/POOL) when
+    # monitoring hosts, so the local system is not required to have ZFS. Pool names are not validated when replaying, the capture holds the pools
+    if arguments.connect:
+        ValidPool(source=DaemonSource(socket_path=arguments.connect)).validate(parser=parser, poolnames=arguments.poolname)
+    elif arguments.host:
+        from .multihost import MultiHostSource
+        ValidPool(source=MultiHostSource(hosts=arguments.host, transport=arguments.transport or SSH_TRANSPORT, max_parallel=arguments.parallel or 8,
+                                         timeout=arguments.timeout)).validate(parser=parser, poolnames=arguments.poolname)
+    elif not arguments.replay:
+        ValidPool().validate(parser=parser, poolnames=arguments.poolname)
+
+    return arguments
 
 
 def zpool_monitor() -> None:
@@ -95,14 +239,74 @@ def zpool_monitor() -> None:
     console = rich.console.Console()
 
     try:
+        from .textual import ZPoolDashboard
+
         arguments = zpool_monitor_argparse()
 
+        # Refresh stages are only timed if the timings are displayed or logged
+        from .instrumentation import PipelineTimings, ProfileCapture
+        timings = PipelineTimings(log_path=arguments.timings_log) if arguments.timings or arguments.timings_log else None
+
         # ZPool status is retrieved from the Monitor class which is passed to the Textual ZPoolDashboard app for management.
-        ZPoolDashboard(monitor=Monitor(poolnames=arguments.poolname), initial_theme=arguments.theme, initial_refresh=arguments.refresh).run()
+        # If a full refresh period is requested, the Monitor will use kstat between each run of 'zpool status'. When replaying a capture file, the capture
+        # replaces 'zpool status' and kstat is not used. When connecting to a daemon, the daemon's snapshots replace 'zpool status' and the dashboard is
+        # refreshed as the daemon pushes each update (the daemon schedules its own refreshes)
+        daemon_source = None
+        if arguments.connect:
+            from .daemon import DaemonSource
+            daemon_source = DaemonSource(socket_path=arguments.connect)
+            monitor = Monitor(poolnames=arguments.poolname, source=daemon_source, timings=timings, alerts=arguments.alerts)
+        elif arguments.replay:
+            from .capture import CaptureReader, CaptureReplaySource
+            source = CaptureReplaySource(reader=CaptureReader(arguments.replay), speed=arguments.replay_speed,
+                                         start_time=arguments.replay_start.timestamp() if arguments.replay_start else None)
+            monitor = Monitor(poolnames=arguments.poolname, source=source, timings=timings, alerts=arguments.alerts)
+        else:
+            from .capture import CaptureWriter
+            monitor = Monitor(poolnames=arguments.poolname, kstat_root=KSTAT_ROOT if arguments.full_refresh else None,
+                              full_refresh_period=arguments.full_refresh or 0, capture=CaptureWriter(arguments.record) if arguments.record else None,
+                              timings=timings, timeout=arguments.timeout, parallel=arguments.parallel, hosts=arguments.host, transport=arguments.transport,
+                              alerts=arguments.alerts)
+
+        # If events are followed, a single 'zpool events' process is run to refresh pools as soon as they change
+        from .systemzpool import transport_prefix
+        from .events import EventFollower
+        event_follower = EventFollower(poolnames=arguments.poolname, prefix=transport_prefix(arguments.transport) if arguments.transport else None,
+                                       safety_period=arguments.events) if arguments.events else None
+
+        # In daemon mode the Monitor is polled and its status published to the connected clients until interrupted, no dashboard is displayed
+        if arguments.daemon:
+            from .daemon import SnapshotDaemon
+            console.print(f'🔍 ZPool Status Monitor publishing to [green]{arguments.daemon}[/] (Ctrl+C to stop)')
+            asyncio.run(SnapshotDaemon(monitor=monitor, socket_path=arguments.daemon, refresh_period=arguments.refresh,
+                                       idle_backoff=arguments.idle_backoff, event_follower=event_follower).serve())
+            return
+
+        # In exporter mode the Monitor is polled and its status served to scrapers until interrupted, no dashboard is displayed
+        if arguments.exporter:
+            from .exporter import MetricsExporter
+            console.print(f'🔍 ZPool Status Monitor serving metrics at [green]http://{arguments.exporter}/metrics[/] (Ctrl+C to stop)')
+            asyncio.run(MetricsExporter(monitor=monitor, address=arguments.exporter, refresh_period=arguments.refresh, idle_backoff=arguments.idle_backoff,
+                                        max_devices=arguments.exporter_devices, event_follower=event_follower).serve())
+            return
+
+        # If an iostat interval is requested, a single 'zpool iostat' process is run by the dashboard to collect VDEV throughput
+        from .iostat import IOStatCollector
+        iostat_collector = IOStatCollector(poolnames=arguments.poolname, interval=arguments.iostat,
+                                           prefix=transport_prefix(arguments.transport) if arguments.transport else None) if arguments.iostat else None
+
+        ZPoolDashboard(monitor=monitor, initial_theme=arguments.theme, initial_refresh=arguments.refresh, iostat_collector=iostat_collector,
+                       timings=timings, show_timings=arguments.timings, idle_backoff=arguments.idle_backoff, event_follower=event_follower,
+                       daemon_source=daemon_source, profile_capture=ProfileCapture(arguments.profile_dir) if arguments.profile_dir else None).run()
 
     except KeyboardInterrupt:
         pass
 
+    except OSError as e:
+        # The zpool command does not exist on this system, another daemon is already serving on the socket, or the exporter cannot listen on its address
+        console.print(f'[bold red]ERROR:[/] {e}')
+        exit(1)
+
     except (Exception,):
         # Use the rich console to display any other exceptions
         console.print_exception()
@@ -0,0 +1,281 @@
+"""
+This module implements recording of 'zpool status' snapshots to a capture file, and a replay source that feeds recorded snapshots back to the Monitor.
+
+A capture file is append-only. It starts with a magic number followed by one record per snapshot:
+
+    <timestamp: float64> <length: uint32> <zlib compressed JSON of the 'pools' object: length bytes>
+
+Each record is compressed independently so a snapshot can be read without decompressing anything before it. A sidecar index file ('<capture>.idx') holds a
+fixed size entry per record:
+
+    <timestamp: float64> <offset of record in capture file: uint64>
+
+As index entries have a fixed size, the record for any timestamp is located with a binary search over the index file without reading the whole capture. If
+the index is missing or is shorter than the capture (eg. recording was interrupted), the missing entries are rebuilt by scanning the record headers. Entries
+for records that are not complete in the capture are discarded.
+"""
+
+# Import System Libraries
+from typing import Any, AsyncIterator, BinaryIO, Iterator
+import bisect
+import json
+import os
+import struct
+import time
+import zlib
+
+
+# Magic number at the start of every capture file
+CAPTURE_MAGIC: bytes = b'ZPMCAP01'
+
+# Record header and index entry layouts
+_RECORD_HEADER = struct.Struct('<dI')
+_INDEX_ENTRY = struct.Struct('<dQ')
+
+
+def _index_path(path: str) -> str:
+    """
+    :param path: Path to the capture file.
+    :return: Path to the index file for the capture file.
+    """
+    return f'{path}.idx'
+
+
+def _complete_record(capture: BinaryIO, offset: int, capture_size: int) -> tuple[float, int] | None:
+    """
+    :param capture: Capture file open for reading.
+    :param offset: Offset of a record in the capture file.
+    :param capture_size: Size of the capture file.
+    :return: Tuple of (time the snapshot was taken, offset of the end of the record), or None if the record is not complete.
+    """
+    if offset + _RECORD_HEADER.size > capture_size: return None
+
+    capture.seek(offset)
+    timestamp, length = _RECORD_HEADER.unpack(capture.read(_RECORD_HEADER.size))
+    if offset + _RECORD_HEADER.size + length > capture_size: return None
+
+    return timestamp, offset + _RECORD_HEADER.size + length
+
+
+class CaptureWriter:
+    """
+    Appends 'zpool status' snapshots to a capture file and its index.
+    """
+    def __init__(self, path: str):
+        """
+        Open (or create) a capture file for appending
+
+        :param path: Path to the capture file.
+        :raises: ValueError if the file exists and is not a capture file.
+        """
+        with open(path, 'ab+') as capture:
+            capture.seek(0)
+            magic = capture.read(len(CAPTURE_MAGIC))
+
+            if not magic: capture.write(CAPTURE_MAGIC)
+            elif magic != CAPTURE_MAGIC: raise ValueError(f'{path} is not a zpool_monitor capture file')
+
+        # Bring the index up to date with the capture, and discard any partially written record, before appending to either
+        index = _CaptureIndex(path)
+        index.close()
+        os.truncate(path, index.end_offset)
+
+        self.__capture = open(path, 'ab')
+        self.__index = open(_index_path(path), 'ab')
+
+    def record(self, pools_status: dict[str, Any], timestamp: float | None = None) -> None:
+        """
+        Append a snapshot to the capture file.
+
+        :param pools_status: Dictionary mapping pool name to status for that pool as returned by 'zpool status'.
+        :param timestamp: Time the snapshot was taken (seconds since the epoch), defaults to now.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        payload = zlib.compress(json.dumps(pools_status, separators=(',', ':')).encode())
+
+        offset = self.__capture.tell()
+        self.__capture.write(_RECORD_HEADER.pack(timestamp, len(payload)) + payload)
+        self.__capture.flush()
+
+        # The index entry is only written once the record is complete
+        self.__index.write(_INDEX_ENTRY.pack(timestamp, offset))
+        self.__index.flush()
+
+    def close(self) -> None:
+        """Close the capture and index files"""
+        self.__capture.close()
+        self.__index.close()
+
+
+class _CaptureIndex:
+    """
+    Read access to the index of a capture file as a sequence of (timestamp, offset) entries, read from the index file on demand.
+    """
+    def __init__(self, path: str):
+        """
+        Open the index for a capture file, rebuilding any entries missing from the index file
+
+        :param path: Path to the capture file.
+        """
+        capture_size = os.path.getsize(path)
+        with open(_index_path(path), 'ab+') as index, open(path, 'rb') as capture:
+            # Discard any partially written entry, and entries for records that are not complete in the capture (the index may have reached the disk before
+            # the end of the capture, eg. if the system crashed while recording)
+            index.seek(0, os.SEEK_END)
+            count = index.tell() // _INDEX_ENTRY.size
+            offset = len(CAPTURE_MAGIC)
+            while count:
+                index.seek((count - 1) * _INDEX_ENTRY.size)
+                _, last_offset = _INDEX_ENTRY.unpack(index.read(_INDEX_ENTRY.size))
+                if (record := _complete_record(capture=capture, offset=last_offset, capture_size=capture_size)) is not None:
+                    offset = record[1]
+                    break
+                count -= 1
+            index.truncate(count * _INDEX_ENTRY.size)
+
+            # Rebuild entries for records that follow the last indexed record
+            while (record := _complete_record(capture=capture, offset=offset, capture_size=capture_size)) is not None:
+                index.seek(0, os.SEEK_END)
+                index.write(_INDEX_ENTRY.pack(record[0], offset))
+                offset = record[1]
+
+        # Offset of the end of the last complete record
+        self.end_offset: int = offset
+
+        self.__index = open(_index_path(path), 'rb')
+        self.__index.seek(0, os.SEEK_END)
+        self.__count = self.__index.tell() // _INDEX_ENTRY.size
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __getitem__(self, item: int) -> tuple[float, int]:
+        if not 0 <= item < self.__count: raise IndexError(item)
+
+        self.__index.seek(item * _INDEX_ENTRY.size)
+        return _INDEX_ENTRY.unpack(self.__index.read(_INDEX_ENTRY.size))
+
+    def close(self) -> None:
+        """Close the index file"""
+        self.__index.close()
+
+
+class CaptureReader:
+    """
+    Random access to the snapshots stored in a capture file.
+    """
+    def __init__(self, path: str):
+        """
+        Open a capture file for reading
+
+        :param path: Path to the capture file.
+        :raises: ValueError if the file is not a capture file.
+        """
+        self.__capture = open(path, 'rb')
+        if self.__capture.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            self.__capture.close()
+            raise ValueError(f'{path} is not a zpool_monitor capture file')
+
+        self.__index = _CaptureIndex(path)
+
+    def __len__(self) -> int:
+        """
+        :return: Number of snapshots in the capture.
+        """
+        return len(self.__index)
+
+    def timestamp(self, item: int) -> float:
+        """
+        :param item: Index of the snapshot.
+        :return: Time the snapshot was taken (seconds since the epoch).
+        """
+        return self.__index[item][0]
+
+    def find(self, timestamp: float) -> int:
+        """
+        Binary search the index for the last snapshot taken at or before timestamp.
+
+        :param timestamp: Time (seconds since the epoch).
+        :return: Index of the snapshot, 0 if timestamp is before the first snapshot.
+        """
+        return max(bisect.bisect_right(self.__index, timestamp, key=lambda entry: entry[0]) - 1, 0)
+
+    def snapshot(self, item: int) -> tuple[float, dict[str, Any]]:
+        """
+        Read a single snapshot from the capture.
+
+        :param item: Index of the snapshot.
+        :return: Tuple of the time the snapshot was taken, and the dictionary mapping pool name to status for that pool.
+        """
+        timestamp, offset = self.__index[item]
+        self.__capture.seek(offset)
+        _, length = _RECORD_HEADER.unpack(self.__capture.read(_RECORD_HEADER.size))
+
+        return timestamp, json.loads(zlib.decompress(self.__capture.read(length)))
+
+    def close(self) -> None:
+        """Close the capture and index files"""
+        self.__capture.close()
+        self.__index.close()
+
+
+class CaptureReplaySource:
+    """
+    Status source for the Monitor that replays the snapshots in a capture file instead of running 'zpool status'.
+
+    A replay clock starts at the time of the first requested snapshot (or start_time) and advances at speed times real time. Each request for the pool status
+    returns the latest snapshot taken at or before the replay clock. Once the end of the capture is reached, the last snapshot is returned.
+    """
+    # Label displayed with snapshot_time
+    snapshot_label: str = 'Replay'
+
+    def __init__(self, reader: CaptureReader, speed: float = 1.0, start_time: float | None = None):
+        """
+        Construct a replay source
+
+        :param reader: Instance of CaptureReader for the capture file to replay.
+        :param speed: Replay speed as a multiple of real time.
+        :param start_time: Time (seconds since the epoch) to start replaying from, defaults to the first snapshot.
+        :raises: ValueError if the capture contains no snapshots.
+        """
+        if not len(reader): raise ValueError('Capture file contains no snapshots')
+
+        self.__reader = reader
+        self.__speed = speed
+        self.__start_time: float = reader.timestamp(0) if start_time is None else start_time
+        self.__wall_start: float | None = None
+
+        # Time the last returned snapshot was taken
+        self.snapshot_time: float | None = None
+
+        # Pools whose status could not be obtained by the last request, always empty as every snapshot is complete
+        self.errors: dict[str, Exception] = {}
+
+    def __current_snapshot(self, poolnames: list[str]) -> dict[str, Any]:
+        """
+        :param poolnames: List of selected ZPool names to retrieve status for. An empty list means all pools are retrieved.
+        :return: Dictionary mapping pool name to status for that pool for the snapshot at the current replay clock.
+        """
+        if self.__wall_start is None: self.__wall_start = time.monotonic()
+        replay_time = self.__start_time + (time.monotonic() - self.__wall_start) * self.__speed
+
+        self.snapshot_time, pools_status = self.__reader.snapshot(self.__reader.find(replay_time))
+
+        return {poolname: pool_data for poolname, pool_data in pools_status.items() if not poolnames or poolname in poolnames}
+
+    def iter_status(self, poolnames: list[str]) -> Iterator[tuple[str, dict[str, Any]]]:
+        """
+        :param poolnames: List of selected ZPool names to retrieve status for. An empty list means all pools are retrieved.
+        :return: Iterator yielding (pool name, status for that pool as a dictionary)
+        """
+        return iter(self.__current_snapshot(poolnames=poolnames).items())
+
+    async def iter_status_async(self, poolnames: list[str]) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """
+        Asynchronous version of iter_status().
+
+        :param poolnames: List of selected ZPool names to retrieve status for. An empty list means all pools are retrieved.
+        :return: Async iterator yielding (pool name, status for that pool as a dictionary)
+        """
+        for poolname, pool_data in self.__current_snapshot(poolnames=poolnames).items():
+            yield poolname, pool_data
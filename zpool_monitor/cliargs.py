@@ -4,37 +4,107 @@ This module implements a series of ArgParse Validators used by applications with
 All Validators are implemented as Classes designed to be used in the context of command-line parsing. Upon failure to validate the command line parameter,
 the validators raise a suitable argparse.ArgumentTypeError for the calling argument parsing utilities.
 
-All ArgParse Validator classes implement the __call__(arg) parameter and return the parameter if validation is successful.
+All ArgParse Validator classes implement the __call__(arg) parameter and return the parameter if validation is successful. ValidPool is the exception as it
+depends on other arguments, it is applied by calling ValidPool.validate() after parsing.
 """
 
 # Import System Libraries
+from typing import Any
 import argparse
-from textual.theme import BUILTIN_THEMES
 
-# Import zpool_monitor CLI Validators, Monitor Class, and zpool_monitor.textual ZPoolDashboard App
-from .systemzpool import get_zpools
+# Import zpool_monitor system zpool functions. The exporter and multihost modules are imported only by the validators that need them, so zpool_status does
+# not pay to import them
+from .systemzpool import get_zpools_status
 
 
 class ValidPool:
-    """ArgParse Validator to validate if the provided ZPool name exists."""
-    # Obtain the list of available pools once to save re-running zpool 'list' command repeatedly
-    valid_pools: list[str] = get_zpools()
+    """
+    ArgParse Validator to validate if the provided ZPool name exists.
+
+    Where the pools are obtained from depends on other command line arguments (eg. the pools of a daemon with --connect, or of remote hosts with --host),
+    so the pool names are parsed as plain strings and validated by validate() once all arguments have been parsed.
+    """
+    # Status of all pools is obtained on first use by running 'zpool status' once (or requesting it from the source). The status is kept so the Monitor can
+    # reuse it instead of running 'zpool status' again, see Monitor.refresh_stats()
+    pools_status: dict[str, Any] | None = None
+
+    def __init__(self, source: Any = None):
+        """
+        :param source: Optional status source (eg. DaemonSource, MultiHostSource) providing iter_status() and errors to validate the pool names against,
+                       instead of running 'zpool status' on the local system.
+        """
+        self.__source = source
+
+    def valid_pools(self) -> list[str]:
+        """
+        :return: List of ZPool names on the system (or provided by the source).
+        """
+        if ValidPool.pools_status is None:
+            ValidPool.pools_status = dict(self.__source.iter_status(poolnames=[])) if self.__source else get_zpools_status(poolnames=[])
+
+        return list(ValidPool.pools_status.keys())
 
     def __call__(self, pool) -> str:
         """
-        :param pool: Command line argument specifying a ZPool name.
+        :param pool: Command line argument specifying a ZPool name. Pools (or pools of a remote host, HOST/POOL) whose status the source could not obtain
+                     are not validated.
         :return: Parameter pool if validation is successful.
         :raises: Exception argparse.ArgumentTypeError if validation fails.
         """
-        if pool in ValidPool.valid_pools: return pool
+        if pool in self.valid_pools(): return pool
+
+        if self.__source:
+            from .multihost import split_poolname
+            if {pool, split_poolname(pool)[0]} & self.__source.errors.keys(): return pool
+
+        raise argparse.ArgumentTypeError(f'{pool} is not a valid pool name. ZPools on system: {', '.join(self.valid_pools())}')
+
+    def validate(self, parser: argparse.ArgumentParser, poolnames: list[str]) -> None:
+        """
+        Validate every pool name, an invalid pool name is reported as a usage error (exiting the application).
+
+        :param parser: The ArgumentParser the pool names were parsed by.
+        :param poolnames: Parsed pool names.
+        """
+        for pool in poolnames:
+            try:
+                self(pool)
+            except argparse.ArgumentTypeError as e:
+                parser.error(f'argument poolname: {e}')
 
-        raise argparse.ArgumentTypeError(f'{pool} is not a valid pool name. ZPools on system: {', '.join(ValidPool.valid_pools)}')
+
+class ValidAddress:
+    """ArgParse Validator to validate if the provided address to listen on is of the form [HOST]:PORT."""
+
+    def __call__(self, address) -> str:
+        """
+        :param address: Command line argument specifying an address to listen on.
+        :return: Parameter address if validation is successful.
+        :raises: Exception argparse.ArgumentTypeError if validation fails.
+        """
+        from .exporter import parse_address
+
+        try:
+            parse_address(address)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e))
+
+        return address
 
 
 class ValidTheme:
     """ArgParse Validator to validate if the provided Textual Theme name is valid."""
-    # List of themes are extracted from Textual BUILTIN_THEMES
-    valid_themes: list[str] = list(BUILTIN_THEMES.keys())
+
+    @staticmethod
+    def valid_themes() -> list[str]:
+        """
+        List of themes are extracted from Textual BUILTIN_THEMES. Textual is imported here so applications that do not use it never pay to import it.
+
+        :return: List of valid Textual theme names.
+        """
+        from textual.theme import BUILTIN_THEMES
+
+        return list(BUILTIN_THEMES.keys())
 
     def __call__(self, theme) -> str:
         """
@@ -42,13 +112,13 @@ class ValidTheme:
         :return: Parameter theme if validation is successful.
         :raises: Exception argparse.ArgumentTypeError if validation fails.
         """
-        if theme in ValidTheme.valid_themes: return theme
+        if theme in ValidTheme.valid_themes(): return theme
 
-        raise argparse.ArgumentTypeError(f'{theme} is not a valid theme name, please choose from one of: {', '.join(ValidTheme.valid_themes)}')
+        raise argparse.ArgumentTypeError(f'{theme} is not a valid theme name, please choose from one of: {', '.join(ValidTheme.valid_themes())}')
 
     @staticmethod
     def default_theme() -> str:
         """
         :return: First theme listed in Textual Theme pool.
         """
-        return ValidTheme.valid_themes[0]
+        return ValidTheme.valid_themes()[0]
@@ -0,0 +1,365 @@
+"""
+This module provides the SnapshotDaemon class which shares a single Monitor between many viewers, and the DaemonSource class used by viewers to subscribe
+to it.
+
+Rather than every zpool_monitor dashboard and zpool_status script running 'zpool status' on its own timer, 'zpool_monitor --daemon' runs one Monitor poll
+loop (with the same activity-adaptive scheduling as the dashboard) and publishes versioned snapshots over a local Unix socket. Viewers use DaemonSource as
+the status source of their Monitor, so the load on the zpool command does not depend on the number of viewers.
+
+The daemon writes newline-delimited JSON messages, each with a 'version' (incremented by every message), the 'timestamp' the status was obtained, and the
+'errors' (mapping pool name to error message) of pools whose status could not be obtained:
+
+ - {"type": "snapshot", "version": ..., "timestamp": ..., "pools": {...}, "errors": {...}}
+     Sent once when a client connects, "pools" maps pool name to status (as returned by 'zpool status') for every pool.
+ - {"type": "update", "version": ..., "timestamp": ..., "pools": {...}, "removed": [...], "errors": {...}}
+     Pushed after every refresh, "pools" contains only the pools whose status changed since the previous message and "removed" lists pools that no longer
+     exist.
+
+Clients never write to the socket. A client that does not keep up with the updates is disconnected, and receives a new snapshot when it reconnects.
+"""
+
+# Import System Libraries
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Iterator
+import asyncio
+import json
+import os
+import socket
+import time
+
+# Import zpool_monitor.Monitor, zpool_monitor.RefreshScheduler and zpool_monitor.EventFollower classes. EventFollower is only used for type annotations, so
+# zpool_status --connect (which only uses DaemonSource) does not import it
+from .monitor import Monitor
+from .scheduler import RefreshScheduler
+
+if TYPE_CHECKING: from .events import EventFollower
+
+
+# Default location of the daemon socket
+DEFAULT_SOCKET: str = '/run/zpool_monitor.sock'
+
+# Maximum length of a single message, a snapshot of every pool on the system is sent as one line
+_LINE_LIMIT: int = 64 * 1024 * 1024
+
+
+class SnapshotDaemon:
+    """
+    Runs a Monitor poll loop and publishes the status obtained by every refresh to all clients connected to a Unix socket.
+    """
+    def __init__(self, monitor: Monitor, socket_path: str, refresh_period: float, idle_backoff: float = 1.0, max_queued: int = 16,
+                 event_follower: 'EventFollower | None' = None):
+        """
+        Construct the daemon
+
+        :param monitor: Instance of Monitor used to fetch the ZPool status.
+        :param socket_path: Path of the Unix socket clients connect to.
+        :param refresh_period: Period (seconds) between refreshes of active pools.
+        :param idle_backoff: Idle pools are refreshed every idle_backoff times the refresh period.
+        :param max_queued: Maximum number of messages queued for a client before it is disconnected.
+        :param event_follower: Optional instance of EventFollower, pools are refreshed as soon as an event reports a change to them.
+        """
+        self.__monitor = monitor
+        self.__socket_path = socket_path
+        self.__monitor.sample_period = refresh_period
+        self.__event_follower = event_follower
+        self.__scheduler = RefreshScheduler(active_period=refresh_period, idle_period=refresh_period * max(idle_backoff, 1.0), events=event_follower)
+        self.__max_queued = max_queued
+
+        # Version and timestamp of the last message, and the status and error message of each pool as last published
+        self.__version: int = 0
+        self.__timestamp: float | None = None
+        self.__published: dict[str, dict[str, Any]] = {}
+        self.__errors: dict[str, str] = {}
+
+        # Queue of encoded messages for each connected client, None is queued to disconnect the client
+        self.__clients: set[asyncio.Queue[bytes | None]] = set()
+
+    @property
+    def version(self) -> int:
+        """
+        :return: Version of the last message published.
+        """
+        return self.__version
+
+    @property
+    def client_count(self) -> int:
+        """
+        :return: Number of clients currently connected.
+        """
+        return len(self.__clients)
+
+    def __message(self, message_type: str, pools: dict[str, Any], removed: list[str] | None = None) -> bytes:
+        """
+        :param message_type: 'snapshot' or 'update'.
+        :param pools: Dictionary mapping pool name to status for the pools included in the message.
+        :param removed: Names of pools removed since the previous message (update messages only).
+        :return: The message encoded as a single line of JSON.
+        """
+        message = {'type': message_type, 'version': self.__version, 'timestamp': self.__timestamp, 'pools': pools, 'errors': self.__errors}
+        if removed is not None: message['removed'] = removed
+
+        return (json.dumps(message, separators=(',', ':')) + '\n').encode()
+
+    def __publish(self, poolnames: list[str] | None, errors: dict[str, Exception]) -> None:
+        """
+        Push the pools whose status changed since the last message to every client. The message is encoded once, regardless of the number of clients.
+
+        :param poolnames: Names of the pools that were refreshed, None if all pools were refreshed.
+        :param errors: Pools whose status could not be obtained by the refresh mapped to the exception raised.
+        """
+        status = self.__monitor.status
+        changed = {poolname: pool_data for poolname, pool_data in status.items() if self.__published.get(poolname) != pool_data}
+        removed = sorted(self.__published.keys() - status.keys())
+        self.__published = dict(status)
+
+        # Errors of pools that were not refreshed are still current
+        self.__errors = {poolname: error for poolname, error in self.__errors.items() if poolnames is not None and poolname not in poolnames
+                         and poolname in status}
+        self.__errors |= {poolname: str(error) or type(error).__name__ for poolname, error in errors.items()}
+
+        self.__version += 1
+        self.__timestamp = self.__monitor.snapshot_time or time.time()
+
+        data = self.__message('update', pools=changed, removed=removed)
+        for queue in list(self.__clients):
+            try:
+                queue.put_nowait(data)
+
+            except asyncio.QueueFull:
+                # The client is not reading its messages, drop them and disconnect it
+                self.__disconnect(queue)
+
+    def __disconnect(self, queue: asyncio.Queue[bytes | None]) -> None:
+        """
+        Discard the messages queued for a client and disconnect it.
+
+        :param queue: Message queue of the client.
+        """
+        while not queue.empty(): queue.get_nowait()
+        queue.put_nowait(None)
+        self.__clients.discard(queue)
+
+    async def __refresh(self, poolnames: list[str] | None) -> None:
+        """
+        Refresh the pools and publish the result. If the status cannot be obtained, the refreshed pools are published with an error. This includes a
+        failure to run zpool (eg. EAGAIN/EMFILE, or the binary briefly missing during an upgrade), so a transient error does not disconnect every client.
+
+        :param poolnames: Optional names of the (active) pools to refresh, None to refresh all pools.
+        :raises: OSError if zpool cannot be run by the first refresh (eg. it is not installed), before any status has been published.
+        """
+        start = time.monotonic()
+        try:
+            changes = await self.__monitor.refresh_stats_async(poolnames=poolnames)
+
+        except (TimeoutError, ConnectionError, ValueError, OSError) as error:
+            if self.__version == 0 and isinstance(error, OSError) and not isinstance(error, TimeoutError): raise
+
+            # If no pools are known yet (eg. the first refresh failed), the error is reported against 'zpool status' so clients display it
+            self.__scheduler.record(pools=None, all_pools=poolnames is None, latency=time.monotonic() - start, now=start)
+            self.__publish(poolnames=poolnames, errors=dict.fromkeys(poolnames or self.__published or ['zpool status'], error))
+            return
+
+        self.__scheduler.record(pools=changes.pools, all_pools=poolnames is None, latency=time.monotonic() - start, now=start)
+        self.__publish(poolnames=poolnames, errors=changes.errors)
+
+    async def __serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Send a snapshot of every pool to a newly connected client, followed by every update until the client disconnects.
+
+        :param reader: Stream reader of the client connection (unused, clients never write).
+        :param writer: Stream writer of the client connection.
+        """
+        queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=self.__max_queued)
+        queue.put_nowait(self.__message('snapshot', pools=self.__published))
+        self.__clients.add(queue)
+
+        try:
+            while (data := await queue.get()) is not None:
+                writer.write(data)
+                await writer.drain()
+
+        except OSError:
+            # The client disconnected
+            pass
+
+        finally:
+            self.__clients.discard(queue)
+            writer.close()
+
+    def __remove_stale_socket(self) -> None:
+        """
+        Remove the socket file left behind by a daemon that is no longer running.
+
+        :raises: FileExistsError if another daemon is serving on the socket.
+        """
+        if not os.path.exists(self.__socket_path): return
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            try:
+                client.connect(self.__socket_path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.__socket_path)
+                return
+
+        raise FileExistsError(f'A zpool_monitor daemon is already serving on [green]{self.__socket_path}[/]')
+
+    async def serve(self) -> None:
+        """
+        Refresh all pools, then accept clients on the socket and publish every refresh until cancelled. The socket is readable by all users, as is the
+        output of 'zpool status'.
+
+        :raises: FileExistsError if another daemon is serving on the socket.
+        """
+        self.__remove_stale_socket()
+        if self.__event_follower: await self.__event_follower.start()
+        await self.__refresh(poolnames=None)
+
+        server = await asyncio.start_unix_server(self.__serve_client, path=self.__socket_path)
+        os.chmod(self.__socket_path, 0o666)
+
+        try:
+            async with server:
+                try:
+                    while True:
+                        if due := self.__scheduler.due(time.monotonic()): await self.__refresh(poolnames=None if due.all_pools else due.poolnames)
+                        await asyncio.sleep(1)
+
+                finally:
+                    # Disconnect the clients so the server can close
+                    for queue in list(self.__clients):
+                        self.__disconnect(queue)
+
+        finally:
+            if os.path.exists(self.__socket_path): os.unlink(self.__socket_path)
+            if self.__event_follower: await self.__event_follower.stop()
+
+
+class DaemonSource:
+    """
+    Status source for the Monitor that subscribes to the snapshots published by a SnapshotDaemon instead of running 'zpool status'.
+
+    When used asynchronously, the source stays connected and the updates pushed by the daemon are applied in the background, so each request returns the
+    latest status without contacting the daemon. The on_update callback is called as each update is applied (and when the connection is lost) so the viewer
+    can refresh immediately rather than polling the source. If the connection is lost, the next request reconnects. When used synchronously (eg. by
+    zpool_status), each request connects, reads the snapshot, and disconnects.
+    """
+    # Label displayed with snapshot_time
+    snapshot_label: str = 'Daemon'
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET):
+        """
+        Construct the status source
+
+        :param socket_path: Path of the Unix socket the daemon is serving on.
+        """
+        self.__socket_path = socket_path
+
+        # Time the daemon obtained the latest status, and the version of the latest message received (None until connected)
+        self.snapshot_time: float | None = None
+        self.version: int | None = None
+
+        # Pools whose status could not be obtained by the daemon, mapped to an exception containing the error message
+        self.errors: dict[str, Exception] = {}
+
+        # Optional function called (without arguments) after each update pushed by the daemon is applied, and when the connection is lost
+        self.on_update: Callable[[], None] | None = None
+
+        # Latest status of every pool, and the task applying the updates pushed by the daemon (None if not connected)
+        self.__pools: dict[str, dict[str, Any]] = {}
+        self.__follower: asyncio.Task | None = None
+
+    def __apply(self, line: bytes) -> None:
+        """
+        Apply a snapshot or update message received from the daemon.
+
+        :param line: The encoded message.
+        :raises: ConnectionError if the daemon closed the connection before sending the message.
+        """
+        if not line: raise ConnectionError(f'The zpool_monitor daemon at {self.__socket_path} closed the connection')
+
+        message = json.loads(line)
+        if message['type'] == 'snapshot': self.__pools = {}
+
+        self.__pools.update(message['pools'])
+        for poolname in message.get('removed', []):
+            self.__pools.pop(poolname, None)
+
+        self.version, self.snapshot_time = message['version'], message['timestamp']
+        self.errors = {poolname: RuntimeError(error) for poolname, error in message['errors'].items()}
+
+    def __connection_error(self, error: OSError) -> ConnectionError:
+        """
+        :param error: Exception raised connecting to the socket.
+        :return: Exception to raise when the daemon cannot be reached.
+        """
+        return ConnectionError(f'Unable to connect to the zpool_monitor daemon at {self.__socket_path} ({error.strerror or error})')
+
+    def __iter_pools(self, poolnames: list[str]) -> Iterator[tuple[str, dict[str, Any]]]:
+        """
+        :param poolnames: List of selected ZPool names to retrieve status for. An empty list means all pools are retrieved.
+        :return: Iterator yielding (pool name, status for that pool as a dictionary) from the latest status received.
+        """
+        return ((poolname, pool_data) for poolname, pool_data in list(self.__pools.items()) if not poolnames or poolname in poolnames)
+
+    def iter_status(self, poolnames: list[str]) -> Iterator[tuple[str, dict[str, Any]]]:
+        """
+        :param poolnames: List of selected ZPool names to retrieve status for. An empty list means all pools are retrieved.
+        :return: Iterator yielding (pool name, status for that pool as a dictionary)
+        :raises: ConnectionError if the daemon cannot be reached.
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            try:
+                client.connect(self.__socket_path)
+            except OSError as error:
+                raise self.__connection_error(error) from error
+
+            with client.makefile('rb') as stream: self.__apply(stream.readline(_LINE_LIMIT))
+
+        return self.__iter_pools(poolnames=poolnames)
+
+    async def __follow(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Apply every update pushed by the daemon until the connection is lost, calling on_update after each.
+
+        :param reader: Stream reader of the connection.
+        :param writer: Stream writer of the connection.
+        """
+        try:
+            while line := await reader.readline():
+                self.__apply(line)
+                if self.on_update: self.on_update()
+
+        except (OSError, ValueError):
+            # Connection lost or an invalid message was received, the next request reconnects
+            pass
+
+        finally:
+            writer.close()
+            self.__follower = None
+
+        # Let the viewer request the status now, so it reconnects (or reports that the daemon cannot be reached) without waiting for its next poll
+        if self.on_update: self.on_update()
+
+    async def iter_status_async(self, poolnames: list[str]) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """
+        Asynchronous version of iter_status(). Connects to the daemon (and receives a snapshot) if not connected, otherwise returns the latest status.
+
+        :param poolnames: List of selected ZPool names to retrieve status for. An empty list means all pools are retrieved.
+        :return: Async iterator yielding (pool name, status for that pool as a dictionary)
+        :raises: ConnectionError if the daemon cannot be reached.
+        """
+        if self.__follower is None:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.__socket_path, limit=_LINE_LIMIT)
+            except OSError as error:
+                raise self.__connection_error(error) from error
+
+            try:
+                self.__apply(await reader.readline())
+            except BaseException:
+                writer.close()
+                raise
+
+            self.__follower = asyncio.create_task(self.__follow(reader, writer))
+
+        for poolname, pool_data in self.__iter_pools(poolnames=poolnames):
+            yield poolname, pool_data
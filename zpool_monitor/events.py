@@ -0,0 +1,184 @@
+"""
+This module provides the EventFollower class which runs a single long-running 'zpool events -f' process and records the pools affected by each event, so
+the pools can be refreshed as soon as something happens to them rather than waiting for the next poll.
+
+The verbose scripted output ('zpool events -f -v -H') is parsed line by line as each event arrives. Each event is a line containing its time and class,
+followed by indented 'name = value' lines (including 'class', 'pool' and 'time'), and is ended by a blank line. Events that change what 'zpool status'
+reports (VDEV state changes, scrubs/resilvers/trims starting or finishing, I/O and checksum errors, pools imported/exported/destroyed) request a refresh of
+the pool named by the event, or of all pools if the event does not name a pool.
+
+The RefreshScheduler takes the requested pools on each check for due refreshes (see RefreshScheduler.due()). While the follower is running, idle pools are
+only polled every safety_period as a safety net, as any change to them is reported by an event. If 'zpool events' exits (eg. ZFS does not support
+following events) it is restarted after a delay, and idle pools are polled as normal until it is running again.
+"""
+
+# Import System Libraries
+import asyncio
+import contextlib
+import time
+
+# Import system zpool functions
+from .systemzpool import start_zpool_process_async
+
+
+# Default time (seconds) between polls of idle pools while events are followed
+DEFAULT_SAFETY_PERIOD: float = 600.0
+
+# Event classes that report changes to the pool status. Events that are frequent but do not change the status are ignored: the history of every command
+# run against a pool (eg. every 'zfs snapshot') and delayed (slow) I/Os
+_REFRESH_CLASSES: tuple[str, ...] = ('sysevent.fs.zfs.', 'resource.fs.zfs.', 'ereport.fs.zfs.')
+_IGNORED_CLASSES: frozenset[str] = frozenset({'sysevent.fs.zfs.history_event', 'ereport.fs.zfs.delay'})
+
+
+class EventFollower:
+    """
+    Runs 'zpool events -f -v -H' and parses each event as it arrives to record the pools to refresh, see the module documentation.
+    """
+    def __init__(self, poolnames: list[str], prefix: list[str] | None = None, safety_period: float = DEFAULT_SAFETY_PERIOD, restart_delay: float = 60.0):
+        """
+        Construct instance of class to follow pool events
+
+        :param poolnames: List of selected ZPool names to follow events for. An empty list means events of all pools are followed.
+        :param prefix: Optional command prefix (transport) used to run zpool.
+        :param safety_period: Period (seconds) idle pools are polled at while events are followed.
+        :param restart_delay: Time (seconds) to wait before restarting 'zpool events' if it exits.
+        """
+        self.__poolnames: set[str] = set(poolnames)
+        self.__prefix = prefix
+        self.__safety_period = safety_period
+        self.__restart_delay = restart_delay
+
+        # Pools requested to be refreshed since they were last taken, and True if all pools are requested (an event that does not name a pool)
+        self.__requested: set[str] = set()
+        self.__requested_all: bool = False
+
+        # Fields of the event being received and the indentation of its fields. 'zpool events -f' first prints the events still buffered by ZFS, events
+        # that occurred before the process was started are ignored. Event times are compared in whole seconds (the nanoseconds of the event time are not
+        # parsed), so an event in the second the process was started is never dropped, at the cost of a spurious refresh for a buffered one
+        self.__event: dict[str, str] = {}
+        self.__indent: int | None = None
+        self.__since: float = 0.0
+
+        # Incremented for each event that requested a refresh
+        self.__version: int = 0
+
+        self.__process: asyncio.subprocess.Process | None = None
+        self.__follower: asyncio.Task | None = None
+
+    @property
+    def safety_period(self) -> float:
+        """
+        :return: Period (seconds) idle pools are polled at while events are followed.
+        """
+        return self.__safety_period
+
+    @property
+    def running(self) -> bool:
+        """
+        :return: True if 'zpool events' is running, so changes to the pools are reported by events.
+        """
+        return self.__process is not None and self.__process.returncode is None
+
+    @property
+    def version(self) -> int:
+        """
+        :return: Counter incremented every time an event requested a refresh.
+        """
+        return self.__version
+
+    def take(self) -> tuple[bool, list[str]]:
+        """
+        Take the pools requested to be refreshed, the requests are cleared.
+
+        :return: Tuple of (True if all pools are requested, names of the requested pools).
+        """
+        requested = (self.__requested_all, sorted(self.__requested))
+        self.__requested, self.__requested_all = set(), False
+
+        return requested
+
+    @staticmethod
+    def __value(value: str) -> str:
+        """
+        :param value: Value of an event field, strings are quoted and numbers are hexadecimal (eg. '"tank"', '0x5e30e3ec 0x1298e100').
+        :return: The string without quotes, or the first number of a numeric field in decimal.
+        """
+        if value.startswith('"'): return value[1:-1] if value.endswith('"') else value[1:]
+
+        with contextlib.suppress(ValueError, IndexError):
+            return str(int(value.split()[0], 0))
+
+        return value
+
+    def __finish_event(self) -> None:
+        """Request a refresh of the pool named by the event just received (or all pools), if the event reports a change to the pool status"""
+        event, self.__event = self.__event, {}
+
+        eventclass = event.get('class', '')
+        if not eventclass.startswith(_REFRESH_CLASSES) or eventclass in _IGNORED_CLASSES: return
+        if event.get('time', '').isdigit() and int(event['time']) < int(self.__since): return
+
+        poolname = event.get('pool')
+        if poolname is None: self.__requested_all = True
+        elif self.__poolnames and poolname not in self.__poolnames: return
+        else: self.__requested.add(poolname)
+
+        self.__version += 1
+
+    def feed_line(self, line: str) -> None:
+        """
+        Parse a single line of 'zpool events -v -H' output. An unindented line starts a new event, indented 'name = value' lines are fields of the event
+        (lines indented further are fields of an embedded list, eg. a VDEV tree, and are ignored), and a blank line ends the event.
+
+        :param line: Line of output (without trailing newline).
+        """
+        if not line.strip():
+            if self.__event: self.__finish_event()
+            return
+
+        if not line[0].isspace():
+            if self.__event: self.__finish_event()
+            self.__event, self.__indent = {'class': line.split()[-1]}, None
+            return
+
+        indent = len(line) - len(line.lstrip())
+        if self.__indent is None: self.__indent = indent
+        if indent != self.__indent: return
+
+        name, separator, value = line.strip().partition(' = ')
+        if separator: self.__event[name] = self.__value(value)
+
+    async def __follow(self) -> None:
+        """Run 'zpool events' and parse its output, restarting it after restart_delay each time it exits"""
+        while True:
+            self.__since = time.time()
+            try:
+                self.__process = await start_zpool_process_async(command='events', params=['-f', '-v', '-H'], prefix=self.__prefix)
+            except OSError:
+                self.__process = None
+            else:
+                while line := await self.__process.stdout.readline():
+                    self.feed_line(line.decode(errors='replace').rstrip('\n'))
+                if self.__event: self.__finish_event()
+                await self.__process.wait()
+
+            await asyncio.sleep(self.__restart_delay)
+
+    async def start(self) -> None:
+        """Start a task running the 'zpool events' process and reading its output"""
+        if self.__follower: return
+
+        self.__follower = asyncio.create_task(self.__follow())
+
+    async def stop(self) -> None:
+        """Terminate the 'zpool events' process and the task reading its output"""
+        if self.__follower:
+            self.__follower.cancel()
+            with contextlib.suppress(asyncio.CancelledError): await self.__follower
+
+        if self.__process:
+            if self.__process.returncode is None: self.__process.kill()
+            await self.__process.wait()
+
+        self.__process = None
+        self.__follower = None
@@ -0,0 +1,376 @@
+"""
+This module provides the MetricsExporter class which serves the status of the monitored pools as OpenMetrics over HTTP, to be scraped by Prometheus.
+
+'zpool_monitor --exporter' runs one Monitor poll loop (with the same activity-adaptive scheduling as the dashboard) and serialises the metrics after every
+refresh. Scrapes are answered from the serialised payload and never run 'zpool status', so the cost of a scrape does not depend on the number of scrapers or
+how often they scrape. Only the pools whose status changed are serialised again after a refresh.
+
+The metrics are taken from the same ZPool, VDEV, and ScanStatus data displayed by the dashboard:
+
+ - zpool_up, zpool_state, zpool_data_errors:            Whether the status of the pool was obtained by the last refresh, pool state, and data errors.
+ - zpool_devices, zpool_devices_omitted:                Number of leaf devices of the pool in each state, and the number not exported individually.
+ - zpool_vdev_state, zpool_vdev_errors:                 State and read/write/checksum error counters of each VDEV.
+ - zpool_vdev_trim_*, zpool_trim_progress_ratio:        Progress, rate, and time remaining of each trim in progress, and the progress across the pool.
+ - zpool_scan_info, zpool_scan_*:                       Function and state of the last scrub/resilver, and the progress, rate, and time remaining of one in
+                                                        progress.
+
+Labels are limited to the host (pools monitored with --host), pool, VDEV name, and a fixed set of values (state, error type, scan function), so the number
+of series is bounded by the number of VDEVs exported. Top level and grouping VDEVs (eg. raidz, mirror) are always exported, but at most max_devices leaf
+devices of each pool are exported individually, devices that are not ONLINE or have errors first. Every device is counted in zpool_devices.
+"""
+
+# Import System Libraries
+from collections import Counter
+import asyncio
+import gzip
+import math
+import time
+
+# Import zpool_monitor.Monitor, zpool_monitor.RefreshScheduler and zpool.ZPool classes
+from .monitor import Monitor
+from .scheduler import RefreshScheduler
+from .events import EventFollower
+from .multihost import split_poolname
+from .zpool import ZPool
+
+
+# Default address to serve the metrics on, all interfaces
+DEFAULT_ADDRESS: str = ':9135'
+
+# Default maximum number of leaf devices of each pool exported individually
+DEFAULT_MAX_DEVICES: int = 32
+
+# Content type of the metrics
+CONTENT_TYPE: str = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Time allowed for a client to send its request
+_REQUEST_TIMEOUT: float = 10.0
+
+# States of the pool and VDEV statesets, a state not listed is added to the stateset while it is reported
+_POOL_STATES: tuple[str, ...] = ('ONLINE', 'DEGRADED', 'FAULTED', 'OFFLINE', 'UNAVAIL', 'REMOVED', 'SUSPENDED')
+_VDEV_STATES: tuple[str, ...] = ('ONLINE', 'DEGRADED', 'FAULTED', 'OFFLINE', 'UNAVAIL', 'REMOVED')
+
+# Metric families of each pool as (name, OpenMetrics type, unit, help), in the order they are exposed
+_POOL_FAMILIES: tuple[tuple[str, str, str, str], ...] = (
+    ('zpool_up', 'gauge', '', 'Whether the status of the pool was obtained by the last refresh, the other metrics of the pool are stale if 0'),
+    ('zpool_state', 'stateset', '', 'State of the pool'),
+    ('zpool_data_errors', 'gauge', '', 'Number of data errors detected in the pool'),
+    ('zpool_devices', 'gauge', '', 'Number of leaf devices of the pool in each state'),
+    ('zpool_devices_omitted', 'gauge', '', 'Number of leaf devices of the pool not exported individually'),
+    ('zpool_vdev_state', 'stateset', '', 'State of the VDEV'),
+    ('zpool_vdev_errors', 'gauge', '', 'Error counters of the VDEV, reset by \'zpool clear\''),
+    ('zpool_vdev_trim_progress_ratio', 'gauge', 'ratio', 'Progress of the trim of the VDEV in progress'),
+    ('zpool_vdev_trim_rate_bytes_per_second', 'gauge', 'bytes_per_second', 'Trim rate of the VDEV over the recent moving window'),
+    ('zpool_vdev_trim_eta_seconds', 'gauge', 'seconds', 'Estimated time remaining for the trim of the VDEV'),
+    ('zpool_trim_progress_ratio', 'gauge', 'ratio', 'Progress of the trims in progress across all devices of the pool'),
+    ('zpool_scan', 'info', '', 'Function and state of the last or current scrub/resilver'),
+    ('zpool_scan_errors', 'gauge', '', 'Number of errors encountered by the last or current scrub/resilver'),
+    ('zpool_scan_end_timestamp_seconds', 'gauge', 'seconds', 'Time the last scrub/resilver finished'),
+    ('zpool_scan_progress_ratio', 'gauge', 'ratio', 'Progress (bytes issued) of the scrub/resilver in progress'),
+    ('zpool_scan_examined_bytes', 'gauge', 'bytes', 'Bytes examined by the scrub/resilver in progress'),
+    ('zpool_scan_issued_bytes', 'gauge', 'bytes', 'Bytes issued by the scrub/resilver in progress'),
+    ('zpool_scan_to_scan_bytes', 'gauge', 'bytes', 'Bytes to scan by the scrub/resilver in progress'),
+    ('zpool_scan_rate_bytes_per_second', 'gauge', 'bytes_per_second', 'Issue rate of the scrub/resilver in progress'),
+    ('zpool_scan_eta_seconds', 'gauge', 'seconds', 'Estimated time remaining for the scrub/resilver in progress, not exported while stalled'),
+)
+
+
+def parse_address(address: str) -> tuple[str | None, int]:
+    """
+    :param address: Address to listen on as '[HOST]:PORT' or 'PORT', an IPv6 HOST is enclosed in brackets (eg. '[::1]:9135').
+    :return: Tuple of (host name or address, None for all interfaces, port number).
+    :raises: ValueError if the address is not valid.
+    """
+    host, _, port = address.rpartition(':')
+    host = host.removeprefix('[').removesuffix(']')
+    if not port.isdigit() or not 0 < int(port) < 65536: raise ValueError(f'{address} is not a valid address, expected [HOST]:PORT')
+
+    return host or None, int(port)
+
+
+def _labels(**labels: str) -> str:
+    """
+    :param labels: Label names mapped to values.
+    :return: The labels of a sample in exposition format, with the values escaped.
+    """
+    return '{' + ','.join(f'{name}="{value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')}"' for name, value in labels.items()) + '}'
+
+
+def _sample(name: str, labels: str, value: int | float) -> str:
+    """
+    :param name: Name of the sample.
+    :param labels: Labels of the sample, as returned by _labels().
+    :param value: Value of the sample.
+    :return: The sample as a line in exposition format.
+    """
+    return f'{name}{labels} {value if isinstance(value, int) or math.isfinite(value) else ('+Inf' if value > 0 else 'NaN')}\n'
+
+
+def _stateset(name: str, pool_labels: dict[str, str], states: tuple[str, ...], state: str) -> list[str]:
+    """
+    :param name: Name of the stateset.
+    :param pool_labels: Labels identifying the pool or VDEV.
+    :param states: Known states.
+    :param state: Current state, added to the known states if not listed.
+    :return: List of samples of the stateset, 1 for the current state and 0 for the others.
+    """
+    return [_sample(name, _labels(**pool_labels, **{name: known}), int(known == state)) for known in (states if state in states else (*states, state))]
+
+
+def _pool_samples(pool: ZPool, max_devices: int) -> dict[str, str]:
+    """
+    Serialise the metrics of a single pool (except zpool_up, which depends on the refresh rather than the status of the pool).
+
+    :param pool: Instance of ZPool.
+    :param max_devices: Maximum number of leaf devices exported individually.
+    :return: Dictionary mapping metric family name to the samples of the pool in exposition format.
+    """
+    host, poolname = split_poolname(pool.poolname)
+    pool_labels = {'host': host, 'pool': poolname} if host else {'pool': poolname}
+    labels = _labels(**pool_labels)
+    samples: dict[str, list[str]] = {name: [] for name, _, _, _ in _POOL_FAMILIES}
+
+    samples['zpool_state'] = _stateset('zpool_state', pool_labels=pool_labels, states=_POOL_STATES, state=pool.state)
+    samples['zpool_data_errors'].append(_sample('zpool_data_errors', labels, pool.error_count))
+
+    # Grouping VDEVs are always exported. Leaf devices are exported up to max_devices, devices that are not ONLINE or have errors first (sorted is stable,
+    # so devices are otherwise exported in tree order)
+    rows = pool.vdev_tree.rows()
+    devices = [vdev for vdev, has_children in rows if not has_children]
+    exported = {vdev.key for vdev in sorted(devices, key=lambda vdev: vdev.state == 'ONLINE' and not any(vdev.error_counts))[:max_devices]}
+
+    for state, count in Counter(vdev.state for vdev in devices).items():
+        samples['zpool_devices'].append(_sample('zpool_devices', _labels(**pool_labels, state=state), count))
+    samples['zpool_devices_omitted'].append(_sample('zpool_devices_omitted', labels, len(devices) - len(exported)))
+
+    for vdev, has_children in rows:
+        if not has_children and vdev.key not in exported: continue
+
+        vdev_labels = pool_labels | {'vdev': vdev.name}
+        samples['zpool_vdev_state'] += _stateset('zpool_vdev_state', pool_labels=vdev_labels, states=_VDEV_STATES, state=vdev.state)
+        for error_type, count in zip(('read', 'write', 'checksum'), vdev.error_counts):
+            samples['zpool_vdev_errors'].append(_sample('zpool_vdev_errors', _labels(**vdev_labels, type=error_type), count))
+
+        if (trim := vdev.trim_progress) is None: continue
+
+        trimmed, to_trim, rate, eta = trim
+        vdev_sample_labels = _labels(**vdev_labels)
+        if to_trim: samples['zpool_vdev_trim_progress_ratio'].append(_sample('zpool_vdev_trim_progress_ratio', vdev_sample_labels, trimmed / to_trim))
+        if rate is not None: samples['zpool_vdev_trim_rate_bytes_per_second'].append(_sample('zpool_vdev_trim_rate_bytes_per_second', vdev_sample_labels, rate))
+        if eta is not None: samples['zpool_vdev_trim_eta_seconds'].append(_sample('zpool_vdev_trim_eta_seconds', vdev_sample_labels, eta))
+
+    # Progress across every device being trimmed, including devices not exported individually
+    if (trim := pool.vdev_tree.trim_progress) is not None and trim[1]:
+        samples['zpool_trim_progress_ratio'].append(_sample('zpool_trim_progress_ratio', labels, trim[0] / trim[1]))
+
+    if (scan := pool.scan) is not None:
+        samples['zpool_scan'].append(_sample('zpool_scan_info', _labels(**pool_labels, function=scan.function, state=scan.state), 1))
+        samples['zpool_scan_errors'].append(_sample('zpool_scan_errors', labels, scan.errors))
+        if scan.end_time: samples['zpool_scan_end_timestamp_seconds'].append(_sample('zpool_scan_end_timestamp_seconds', labels, scan.end_time))
+
+        if (progress := scan.progress) is not None:
+            if progress.to_scan: samples['zpool_scan_progress_ratio'].append(_sample('zpool_scan_progress_ratio', labels, progress.issued / progress.to_scan))
+            samples['zpool_scan_examined_bytes'].append(_sample('zpool_scan_examined_bytes', labels, progress.examined))
+            samples['zpool_scan_issued_bytes'].append(_sample('zpool_scan_issued_bytes', labels, progress.issued))
+            samples['zpool_scan_to_scan_bytes'].append(_sample('zpool_scan_to_scan_bytes', labels, progress.to_scan))
+            samples['zpool_scan_rate_bytes_per_second'].append(_sample('zpool_scan_rate_bytes_per_second', labels, progress.issue_rate))
+            if progress.time_left is not None: samples['zpool_scan_eta_seconds'].append(_sample('zpool_scan_eta_seconds', labels, progress.time_left))
+
+    return {name: ''.join(lines) for name, lines in samples.items()}
+
+
+def _family_header(name: str, metric_type: str, unit: str, help_text: str) -> str:
+    """
+    :param name: Name of the metric family.
+    :param metric_type: OpenMetrics type of the family.
+    :param unit: Unit of the family, empty if it has no unit.
+    :param help_text: Description of the family.
+    :return: The TYPE, UNIT, and HELP lines of the family in exposition format.
+    """
+    return f'# TYPE {name} {metric_type}\n' + (f'# UNIT {name} {unit}\n' if unit else '') + f'# HELP {name} {help_text}\n'
+
+
+class MetricsExporter:
+    """
+    Runs a Monitor poll loop and serves the status obtained by the last refresh as OpenMetrics over HTTP, see the module documentation.
+    """
+    def __init__(self, monitor: Monitor, address: str, refresh_period: float, idle_backoff: float = 1.0, max_devices: int = DEFAULT_MAX_DEVICES,
+                 event_follower: EventFollower | None = None):
+        """
+        Construct the exporter
+
+        :param monitor: Instance of Monitor used to fetch the ZPool status.
+        :param address: Address to serve the metrics on as '[HOST]:PORT' (see parse_address()).
+        :param refresh_period: Period (seconds) between refreshes of active pools.
+        :param idle_backoff: Idle pools are refreshed every idle_backoff times the refresh period.
+        :param max_devices: Maximum number of leaf devices of each pool exported individually.
+        :param event_follower: Optional instance of EventFollower, pools are refreshed as soon as an event reports a change to them.
+        :raises: ValueError if the address is not valid.
+        """
+        self.__monitor = monitor
+        self.__host, self.__port = parse_address(address)
+        self.__monitor.sample_period = refresh_period
+        self.__event_follower = event_follower
+        self.__scheduler = RefreshScheduler(active_period=refresh_period, idle_period=refresh_period * max(idle_backoff, 1.0), events=event_follower)
+        self.__max_devices = max_devices
+
+        # ZPool instance and serialised samples (by metric family) of each pool as last published, and the error message of each pool whose status could not be obtained
+        self.__pools: dict[str, ZPool] = {}
+        self.__samples: dict[str, dict[str, str]] = {}
+        self.__errors: dict[str, str] = {}
+
+        # Number of refreshes, time the last refresh completed and how long it took
+        self.__refreshes: int = 0
+        self.__refresh_time: float = 0.0
+        self.__refresh_duration: float = 0.0
+
+        # Serialised metrics served to every scrape, and the same compressed with gzip (compressed on first request)
+        self.__payload: bytes = b'# EOF\n'
+        self.__gzipped: bytes | None = None
+
+        self.__headers: list[str] = [_family_header(*family) for family in _POOL_FAMILIES]
+
+    @property
+    def payload(self) -> bytes:
+        """
+        :return: Metrics as served to scrapes, serialised by the last refresh.
+        """
+        return self.__payload
+
+    def __publish(self, pools: dict[str, ZPool], changed: set[str], poolnames: list[str] | None, errors: dict[str, Exception]) -> None:
+        """
+        Serialise the metrics of the pools whose status changed and rebuild the payload served to scrapes.
+
+        :param pools: Dictionary mapping pool name to ZPool instance for every pool.
+        :param changed: Names of the pools whose status changed.
+        :param poolnames: Names of the pools that were refreshed, None if all pools were refreshed.
+        :param errors: Pools whose status could not be obtained by the refresh mapped to the exception raised.
+        """
+        self.__samples = {poolname: self.__samples[poolname] if poolname in self.__samples and poolname not in changed
+                          else _pool_samples(pool=pool, max_devices=self.__max_devices) for poolname, pool in pools.items()}
+        self.__pools = pools
+
+        # Errors of pools that were not refreshed are still current
+        self.__errors = {poolname: error for poolname, error in self.__errors.items() if poolnames is not None and poolname not in poolnames}
+        self.__errors |= {poolname: str(error) or type(error).__name__ for poolname, error in errors.items()}
+
+        chunks: list[str] = []
+        for header, (name, _, _, _) in zip(self.__headers, _POOL_FAMILIES):
+            chunks.append(header)
+            if name == 'zpool_up':
+                for poolname in self.__samples:
+                    host, pool = split_poolname(poolname)
+                    chunks.append(_sample('zpool_up', _labels(host=host, pool=pool) if host else _labels(pool=pool), int(poolname not in self.__errors)))
+            else:
+                chunks += (samples[name] for samples in self.__samples.values())
+
+        # Pools (or hosts) whose status could not be obtained include those not yet known, which have no other metrics
+        chunks.append(_family_header('zpool_exporter_errors', 'gauge', '', 'Number of pools (or hosts) whose status could not be obtained'))
+        chunks.append(_sample('zpool_exporter_errors', '', len(self.__errors)))
+        chunks.append(_family_header('zpool_exporter_refreshes', 'counter', '', 'Number of refreshes of the pool status'))
+        chunks.append(_sample('zpool_exporter_refreshes_total', '', self.__refreshes))
+        chunks.append(_family_header('zpool_exporter_refresh_timestamp_seconds', 'gauge', 'seconds', 'Time the last refresh completed'))
+        chunks.append(_sample('zpool_exporter_refresh_timestamp_seconds', '', self.__refresh_time))
+        chunks.append(_family_header('zpool_exporter_refresh_duration_seconds', 'gauge', 'seconds', 'Time taken by the last refresh'))
+        chunks.append(_sample('zpool_exporter_refresh_duration_seconds', '', self.__refresh_duration))
+        chunks.append(_family_header('zpool_exporter_pool_updates', 'counter', '',
+                                     'Number of pool statuses received by refreshes, by whether the status was unchanged (and not applied) or applied'))
+        chunks.append(_sample('zpool_exporter_pool_updates_total', _labels(result='unchanged'), self.__monitor.fingerprint_hits))
+        chunks.append(_sample('zpool_exporter_pool_updates_total', _labels(result='applied'), self.__monitor.fingerprint_misses))
+        chunks.append('# EOF\n')
+
+        self.__payload, self.__gzipped = ''.join(chunks).encode(), None
+
+    async def __refresh(self, poolnames: list[str] | None) -> None:
+        """
+        Refresh the pools and serialise the result. If the status cannot be obtained, the refreshed pools keep their last metrics and are reported as down.
+        This includes a failure to run zpool (eg. EAGAIN/EMFILE, or the binary briefly missing during an upgrade), so a transient error does not stop the
+        exporter.
+
+        :param poolnames: Optional names of the (active) pools to refresh, None to refresh all pools.
+        :raises: OSError if zpool cannot be run by the first refresh (eg. it is not installed).
+        """
+        start = time.monotonic()
+        try:
+            changes = await self.__monitor.refresh_stats_async(poolnames=poolnames)
+
+        except (TimeoutError, ConnectionError, ValueError, OSError) as error:
+            if self.__refreshes == 0 and isinstance(error, OSError) and not isinstance(error, TimeoutError): raise
+
+            # If no pools are known yet (eg. the first refresh failed), the error is reported against 'zpool status' so it is still counted
+            self.__record_refresh(pools=None, poolnames=poolnames, start=start)
+            self.__publish(pools=self.__pools, changed=set(), poolnames=poolnames, errors=dict.fromkeys(poolnames or self.__pools or ['zpool status'], error))
+            return
+
+        self.__record_refresh(pools=changes.pools, poolnames=poolnames, start=start)
+        self.__publish(pools=changes.pools, changed=changes.changed_pools, poolnames=poolnames, errors=changes.errors)
+
+    def __record_refresh(self, pools: dict[str, ZPool] | None, poolnames: list[str] | None, start: float) -> None:
+        """
+        Record the completion of a refresh for the scheduler and the exporter metrics.
+
+        :param pools: Dictionary mapping pool name to ZPool instance for every pool, None if the refresh failed.
+        :param poolnames: Names of the pools that were refreshed, None if all pools were refreshed.
+        :param start: Time (time.monotonic()) the refresh started.
+        """
+        self.__refreshes += 1
+        self.__refresh_time, self.__refresh_duration = time.time(), time.monotonic() - start
+        self.__scheduler.record(pools=pools, all_pools=poolnames is None, latency=self.__refresh_duration, now=start)
+
+    async def __serve_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Answer a single HTTP request with the serialised metrics, the connection is closed after the response.
+
+        :param reader: Stream reader of the client connection.
+        :param writer: Stream writer of the client connection.
+        """
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout=_REQUEST_TIMEOUT)
+            request_line, *header_lines = request.decode('latin-1').split('\r\n')
+            method, target, _ = (request_line.split(' ') + ['', ''])[:3]
+            headers = {name.strip().lower(): value.strip() for name, _, value in (line.partition(':') for line in header_lines)}
+
+            content_type, encoding = 'text/plain; charset=utf-8', None
+            if method not in ('GET', 'HEAD'):
+                status, body = '405 Method Not Allowed', b'Method not allowed\n'
+            elif target.partition('?')[0] == '/metrics':
+                status, body, content_type = '200 OK', self.__payload, CONTENT_TYPE
+                if 'gzip' in headers.get('accept-encoding', ''):
+                    if self.__gzipped is None: self.__gzipped = gzip.compress(self.__payload)
+                    body, encoding = self.__gzipped, 'gzip'
+            elif target == '/':
+                status, body = '200 OK', b'ZPool Monitor exporter, metrics are served at /metrics\n'
+            else:
+                status, body = '404 Not Found', b'Not found\n'
+
+            response = f'HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n'
+            if encoding: response += f'Content-Encoding: {encoding}\r\n'
+
+            writer.write(f'{response}\r\n'.encode() + (body if method != 'HEAD' else b''))
+            await writer.drain()
+
+        except (TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, OSError):
+            # The client did not send a complete request in time, or disconnected
+            pass
+
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        """
+        Refresh all pools, then serve the metrics and refresh the pools on schedule until cancelled.
+
+        :raises: OSError if the address cannot be listened on (eg. it is in use).
+        """
+        if self.__event_follower: await self.__event_follower.start()
+        try:
+            await self.__refresh(poolnames=None)
+
+            server = await asyncio.start_server(self.__serve_request, host=self.__host, port=self.__port)
+            async with server:
+                while True:
+                    if due := self.__scheduler.due(time.monotonic()): await self.__refresh(poolnames=None if due.all_pools else due.poolnames)
+                    await asyncio.sleep(1)
+
+        finally:
+            if self.__event_follower: await self.__event_follower.stop()
@@ -0,0 +1,76 @@
+"""
+This module provides write_pools() which writes the status of the pools in a machine-readable format (used by 'zpool_status --format'), as an alternative to
+displaying them. The output is generated from the records of the ZPool, VDEV and ScanStatus classes (see ZPool.record), so no renderables are built:
+
+ - json:    A single document, {"pools": {name: record, ...}, "errors": {name: message, ...}}, written once all pools have been received.
+ - ndjson:  One line per pool containing its record, written as soon as the pool has been received. A pool whose status could not be obtained is written as
+            {"name": ..., "error": ...}.
+ - csv:     A header row followed by one row per VDEV (see CSV_COLUMNS), with the pool and scan fields repeated on every row of the pool, written as soon as
+            the pool has been received. A pool whose status could not be obtained has no rows, the caller reports the errors returned by write_pools().
+"""
+
+# Import System Libraries
+from typing import Any, TextIO
+import csv
+import json
+
+# Import zpool_monitor.Monitor class
+from .monitor import Monitor
+
+
+# Output formats supported by write_pools()
+OUTPUT_FORMATS: list[str] = ['json', 'ndjson', 'csv']
+
+# Columns of the csv format, pool and scan fields followed by the VDEV name and the other fields of the VDEV (see VDEV.record and VDEVS.records)
+CSV_COLUMNS: list[str] = ['pool', 'pool_state', 'pool_error_count', 'scan_function', 'scan_state', 'scan_issued_percent', 'scan_issue_rate', 'scan_eta',
+                          'vdev', 'parent', 'depth', 'state', 'size', 'device', 'read_errors', 'write_errors', 'checksum_errors', 'trim_state',
+                          'trim_percent', 'trim_rate', 'trim_eta']
+
+
+def _csv_rows(record: dict[str, Any]) -> list[list[Any]]:
+    """
+    :param record: Record of a single pool, see ZPool.record.
+    :return: List of csv rows (in CSV_COLUMNS order), one for each VDEV of the pool.
+    """
+    scan = record['scan'] or {}
+    pool_fields = [record['name'], record['state'], record['error_count'], scan.get('function'), scan.get('state'), scan.get('issued_percent'),
+                   scan.get('issue_rate'), scan.get('eta')]
+
+    return [pool_fields + [vdev['name']] + [vdev[column] for column in CSV_COLUMNS[len(pool_fields) + 1:]] for vdev in record['vdevs']]
+
+
+def write_pools(monitor: Monitor, output_format: str, stream: TextIO, pools_status: dict[str, Any] | None = None) -> dict[str, str]:
+    """
+    Refresh the statistics for all pools and write them to stream in a machine-readable format. The ndjson and csv formats write each pool as soon as its
+    status has been received.
+
+    :param monitor: Instance of Monitor used to fetch the ZPool status.
+    :param output_format: One of OUTPUT_FORMATS.
+    :param stream: Text stream to write to (eg. sys.stdout).
+    :param pools_status: Optional output of 'zpool status' already obtained by the caller, see Monitor.iter_refresh_stats().
+    :return: Dictionary mapping pool name to error message for each pool whose status could not be obtained (empty if all pools were written).
+    :raises: ValueError if output_format is not supported.
+    """
+    if output_format not in OUTPUT_FORMATS: raise ValueError(f'Output format ({output_format}) is not supported, expected one of {OUTPUT_FORMATS}')
+
+    pools: dict[str, Any] = {}
+    writer = csv.writer(stream, lineterminator='\n') if output_format == 'csv' else None
+    if writer: writer.writerow(CSV_COLUMNS)
+
+    for pool in monitor.iter_refresh_stats(pools_status=pools_status):
+        record = pool.record
+        match output_format:
+            case 'json': pools[record['name']] = record
+            case 'ndjson': stream.write(json.dumps(record, separators=(',', ':')) + '\n')
+            case 'csv': writer.writerows(_csv_rows(record))
+
+    errors = {poolname: str(error) or type(error).__name__ for poolname, error in monitor.changes.errors.items()}
+    match output_format:
+        case 'json':
+            json.dump({'pools': pools, 'errors': errors}, stream, separators=(',', ':'))
+            stream.write('\n')
+        case 'ndjson':
+            for poolname, error in errors.items():
+                stream.write(json.dumps({'name': poolname, 'error': error}, separators=(',', ':')) + '\n')
+
+    return errors
@@ -0,0 +1,207 @@
+"""
+This module provides instrumentation used to find where the time is spent during each refresh of the dashboard.
+
+PipelineTimings times each stage of a refresh, keeps a rolling window of recent refreshes to calculate percentiles, and optionally writes every refresh as a
+JSON line to a log file. The stages of a refresh are:
+
+ - fetch:   Running 'zpool status' (or reading kstat) and waiting for its output, excluding decoding.
+ - decode:  Decoding the JSON output of 'zpool status'.
+ - build:   Constructing ZPool instances from the decoded status.
+ - render:  Updating the dashboard panels until Textual has refreshed the screen.
+
+ProfileCapture captures a cProfile profile and tracemalloc allocation snapshot between start() and stop() for deeper investigation.
+"""
+
+# Import System Libraries
+from collections import deque
+from typing import TYPE_CHECKING, Any, ContextManager, Iterator, TextIO
+import contextlib
+import json
+import math
+import os
+import time
+
+# cProfile and tracemalloc are only imported when a capture is started, so applications that never profile do not pay to import them
+if TYPE_CHECKING: import cProfile
+
+
+class PipelineTimings:
+    """
+    Records the duration of each stage of every refresh and keeps rolling percentiles over the most recent refreshes.
+    """
+    STAGES: tuple[str, ...] = ('fetch', 'decode', 'build', 'render')
+
+    def __init__(self, window: int = 100, log_path: str | None = None):
+        """
+        Construct instance of class to time refreshes
+
+        :param window: Number of most recent refreshes used to calculate percentiles.
+        :param log_path: Optional path of a file to append each refresh to as a JSON line.
+        """
+        # Rolling window of durations (seconds) for each stage and the total of each refresh
+        self.__history: dict[str, deque[float]] = {stage: deque(maxlen=window) for stage in (*self.STAGES, 'total')}
+
+        # Durations accumulated for the refresh in progress, and the time it started
+        self.__current: dict[str, float] = {}
+        self.__start: float | None = None
+
+        self.__log: TextIO | None = open(log_path, 'a') if log_path else None
+
+    def begin(self) -> None:
+        """Start timing a new refresh"""
+        self.__current = dict.fromkeys(self.STAGES, 0.0)
+        self.__start = time.perf_counter()
+
+    def cancel(self) -> None:
+        """Discard the refresh in progress without adding it to the rolling window (eg. the refresh failed)"""
+        self.__start = None
+
+    @property
+    def active(self) -> bool:
+        """
+        :return: True if a refresh is being timed (begin() has been called without a matching end()).
+        """
+        return self.__start is not None
+
+    def add(self, stage: str, seconds: float) -> None:
+        """
+        Add time to a stage of the refresh in progress. Ignored if no refresh is being timed.
+
+        :param stage: Name of the stage, one of STAGES.
+        :param seconds: Duration to add.
+        """
+        if self.__start is not None: self.__current[stage] += seconds
+
+    def current(self, stage: str) -> float:
+        """
+        :param stage: Name of the stage, one of STAGES.
+        :return: Time accumulated by the stage during the refresh in progress.
+        """
+        return self.__current.get(stage, 0.0)
+
+    @contextlib.contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """
+        Context manager adding the time spent within the context to a stage of the refresh in progress.
+
+        :param stage: Name of the stage, one of STAGES.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def end(self, **extra: Any) -> dict[str, Any] | None:
+        """
+        Finish timing the refresh in progress, add its durations to the rolling window and write it to the log file.
+
+        :param extra: Additional fields written to the log entry (eg. number of pools).
+        :return: Dictionary of stage durations (seconds) for the refresh, or None if no refresh was being timed.
+        """
+        if self.__start is None: return None
+
+        entry = self.__current | {'total': time.perf_counter() - self.__start}
+        self.__start = None
+
+        for stage, seconds in entry.items():
+            self.__history[stage].append(seconds)
+
+        if self.__log:
+            self.__log.write(json.dumps({'timestamp': time.time(), **entry, **extra}) + '\n')
+            self.__log.flush()
+
+        return entry
+
+    def percentile(self, stage: str, percent: float) -> float | None:
+        """
+        :param stage: Name of the stage, one of STAGES or 'total'.
+        :param percent: Percentile to calculate (0-100).
+        :return: Percentile (nearest rank) of the stage duration over the rolling window, or None if no refreshes have been recorded.
+        """
+        if not self.__history[stage]: return None
+
+        durations = sorted(self.__history[stage])
+        return durations[max(math.ceil(percent / 100 * len(durations)) - 1, 0)]
+
+    def summary(self) -> str:
+        """
+        :return: Short summary of the rolling percentiles for display, empty if no refreshes have been recorded.
+        """
+        if not self.__history['total']: return ''
+
+        stages = ' '.join(f'{stage} {self.percentile(stage, 50) * 1000:.0f}' for stage in self.STAGES)
+        return f'p50 {self.percentile('total', 50) * 1000:.0f}ms p95 {self.percentile('total', 95) * 1000:.0f}ms ({stages} ms p50)'
+
+    def close(self) -> None:
+        """Close the log file"""
+        if self.__log: self.__log.close()
+        self.__log = None
+
+
+def timed(timings: PipelineTimings | None, stage: str) -> ContextManager[None]:
+    """
+    :param timings: Optional instance of PipelineTimings.
+    :param stage: Name of the stage.
+    :return: Context manager timing the stage if timings is provided, otherwise a context manager that does nothing.
+    """
+    return timings.stage(stage) if timings else contextlib.nullcontext()
+
+
+class ProfileCapture:
+    """
+    Captures a cProfile profile and tracemalloc allocation snapshot of the running application. The profile is written in pstats format (view with
+    'python -m pstats <file>'), the allocation snapshot as the top allocating source lines.
+    """
+    def __init__(self, directory: str):
+        """
+        Construct instance of class to capture profiles
+
+        :param directory: Directory to write captures to.
+        """
+        self.__directory = directory
+        self.__profile: 'cProfile.Profile | None' = None
+
+    @property
+    def active(self) -> bool:
+        """
+        :return: True if a capture is in progress.
+        """
+        return self.__profile is not None
+
+    def start(self) -> None:
+        """Start profiling and tracing memory allocations"""
+        if self.__profile: return
+
+        import cProfile
+        import tracemalloc
+
+        tracemalloc.start()
+        self.__profile = cProfile.Profile()
+        self.__profile.enable()
+
+    def stop(self) -> list[str]:
+        """
+        Stop the capture in progress and write the results.
+
+        :return: Paths of the files written.
+        """
+        if not self.__profile: return []
+
+        import tracemalloc
+
+        self.__profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        os.makedirs(self.__directory, exist_ok=True)
+        prefix = os.path.join(self.__directory, f'zpool_monitor-{time.strftime('%Y%m%d-%H%M%S')}')
+
+        self.__profile.dump_stats(f'{prefix}.pstats')
+        self.__profile = None
+
+        with open(f'{prefix}-tracemalloc.txt', 'w') as allocations:
+            for statistic in snapshot.statistics('lineno')[:50]:
+                allocations.write(f'{statistic}\n')
+
+        return [f'{prefix}.pstats', f'{prefix}-tracemalloc.txt']
@@ -0,0 +1,180 @@
+"""
+This module provides the IOStatCollector class which runs a single long-running 'zpool iostat' process and keeps the latest per-VDEV throughput for display.
+
+Rather than running 'zpool iostat' for every sample, one process is started with a sampling interval and its scripted (tab separated, exact values) output
+is parsed line by line as each sample arrives. If 'zpool iostat' exits (eg. a named pool was exported) the throughput is cleared, so stale values are not
+displayed, and the process is restarted after a delay.
+"""
+
+# Import System Libraries
+from typing import Iterable, NamedTuple
+import asyncio
+import contextlib
+
+# Import system zpool functions
+from .systemzpool import start_zpool_process_async
+
+
+class VDEVIOStat(NamedTuple):
+    """Throughput for a single VDEV over the last sample interval"""
+    read_ops: int
+    write_ops: int
+    read_bw: int
+    write_bw: int
+
+
+class IOStatCollector:
+    """
+    Runs 'zpool iostat -v -H -p -y <interval>' and parses each sample as it arrives to keep the latest throughput for every VDEV in every pool.
+    """
+    def __init__(self, poolnames: list[str], interval: int = 1, prefix: list[str] | None = None, restart_delay: float = 60.0):
+        """
+        Construct instance of class to collect VDEV throughput
+
+        :param poolnames: List of selected ZPool names to collect throughput for. An empty list means all pools are collected.
+        :param interval: Sampling interval in seconds passed to 'zpool iostat'.
+        :param prefix: Optional command prefix (transport) used to run zpool.
+        :param restart_delay: Time (seconds) to wait before restarting 'zpool iostat' if it exits.
+        """
+        self.__poolnames = poolnames
+        self.__interval = interval
+        self.__prefix = prefix
+        self.__restart_delay = restart_delay
+
+        # Pools are identified in the output by name, VDEV lines follow the line for their pool. When all pools are collected, the set of pool names is
+        # provided by the caller via set_known_pools(), along with the VDEV names of each pool so a VDEV named after another pool is not taken for that pool
+        self.__known_pools: set[str] = set(poolnames)
+        self.__vdevnames: dict[str, set[str]] = {}
+
+        # Latest throughput for each pool, mapping pool name to a dictionary mapping VDEV name to throughput. Values are updated in place as each line
+        # arrives so a partially received sample never hides VDEVs
+        self.__stats: dict[str, dict[str, VDEVIOStat]] = {}
+
+        # Pool currently being received and the VDEVs seen in the current sample, VDEVs not seen are removed when the sample for the pool is complete
+        self.__current_pool: str | None = None
+        self.__seen: set[str] = set()
+
+        # Incremented each time new throughput values are received so consumers can cheaply detect new data
+        self.__version: int = 0
+
+        self.__process: asyncio.subprocess.Process | None = None
+        self.__reader: asyncio.Task | None = None
+
+    @property
+    def interval(self) -> int:
+        """
+        :return: Sampling interval in seconds.
+        """
+        return self.__interval
+
+    @property
+    def running(self) -> bool:
+        """
+        :return: True if 'zpool iostat' is running, so the throughput is current.
+        """
+        return self.__process is not None and self.__process.returncode is None
+
+    @property
+    def version(self) -> int:
+        """
+        :return: Counter incremented every time new throughput values have been received.
+        """
+        return self.__version
+
+    def pool_stats(self, poolname: str) -> dict[str, VDEVIOStat]:
+        """
+        :param poolname: Name of the pool.
+        :return: Dictionary mapping VDEV name to the latest throughput for that VDEV. Empty if no sample has been received for the pool.
+        """
+        return self.__stats.get(poolname, {})
+
+    def set_known_pools(self, poolnames: Iterable[str], vdevnames: dict[str, set[str]] | None = None) -> None:
+        """
+        Update the set of pool names used to identify the start of each pool in the 'zpool iostat' output.
+
+        :param poolnames: Names of all pools currently on the system.
+        :param vdevnames: Optional dictionary mapping pool name to the names of the VDEVs in the pool. A line naming a VDEV of the pool being received
+                          (that has not been received yet in the sample) is a VDEV of the pool, even if another pool has the same name.
+        """
+        self.__known_pools = set(poolnames) | set(self.__poolnames)
+        self.__vdevnames = vdevnames or {}
+
+    def __finish_pool(self) -> None:
+        """Remove VDEVs that were not present in the sample just received for the current pool"""
+        if self.__current_pool is not None:
+            stats = self.__stats[self.__current_pool]
+            for name in stats.keys() - self.__seen:
+                del stats[name]
+
+        self.__seen = set()
+
+    def feed_line(self, line: str) -> None:
+        """
+        Parse a single line of 'zpool iostat -v -H -p' output. Each line is tab separated as: name, alloc, free, read ops, write ops, read bw, write bw.
+
+        A line naming a pool (the first line of output is always a pool) starts a new sample for that pool, all following lines are VDEVs within that pool.
+        Names are not indented in the scripted output, a VDEV of the current pool with the same name as another pool is recognised from the VDEV names
+        given to set_known_pools().
+
+        :param line: Line of output (without trailing newline).
+        """
+        fields = line.split('\t')
+        if len(fields) < 7: return
+
+        name = fields[0]
+        vdev_of_current = name in self.__vdevnames.get(self.__current_pool, ()) and name not in self.__seen
+        if (name in self.__known_pools and not vdev_of_current) or self.__current_pool is None:
+            self.__finish_pool()
+            self.__current_pool = name
+            self.__stats.setdefault(name, {})
+
+        # Allocation class headings (eg. 'logs', 'cache') have no values
+        try:
+            stat = VDEVIOStat(*(int(value) for value in fields[3:7]))
+        except ValueError:
+            return
+
+        self.__stats[self.__current_pool][name] = stat
+        self.__seen.add(name)
+        self.__version += 1
+
+    def __clear(self) -> None:
+        """Discard the throughput of every pool, 'zpool iostat' has exited so the values are no longer current"""
+        self.__finish_pool()
+        self.__stats, self.__current_pool = {}, None
+        self.__version += 1
+
+    async def __collect(self) -> None:
+        """Run 'zpool iostat' and parse its output, clearing the throughput and restarting it after restart_delay each time it exits"""
+        while True:
+            try:
+                self.__process = await start_zpool_process_async(command='iostat', params=['-v', '-H', '-p', '-y'] + self.__poolnames + [str(self.__interval)],
+                                                                 prefix=self.__prefix)
+            except OSError:
+                self.__process = None
+            else:
+                while line := await self.__process.stdout.readline():
+                    self.feed_line(line.decode().rstrip('\n'))
+                await self.__process.wait()
+
+            self.__clear()
+            await asyncio.sleep(self.__restart_delay)
+
+    async def start(self) -> None:
+        """Start a task running the 'zpool iostat' process and reading its output"""
+        if self.__reader: return
+
+        self.__reader = asyncio.create_task(self.__collect())
+
+    async def stop(self) -> None:
+        """Terminate the 'zpool iostat' process and the task reading its output"""
+        if self.__reader:
+            self.__reader.cancel()
+            with contextlib.suppress(asyncio.CancelledError): await self.__reader
+
+        if self.__process:
+            if self.__process.returncode is None: self.__process.kill()
+            await self.__process.wait()
+
+        self.__process = None
+        self.__reader = None
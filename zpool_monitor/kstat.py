@@ -0,0 +1,109 @@
+"""
+This module implements a set of functions to read ZPool state and I/O counters directly from the ZFS kstat files exported by the kernel module.
+
+Reading kstat files does not require forking the zpool command, making it suitable for fast refresh periods. kstat does not expose the VDEV tree or scan
+statistics so the zpool command is still required to periodically obtain the full pool status.
+
+The kstat root directory is a parameter of every function, so the functions can be used against a fake directory tree (see tests/test_kstat.py).
+"""
+
+# Import System Libraries
+from typing import Any
+import os
+
+
+"""
+Default location of the ZFS kstat files on Linux
+"""
+KSTAT_ROOT: str = '/proc/spl/kstat/zfs'
+
+# kstat data type used for strings in a named kstat file, all other types are numeric
+_KSTAT_DATA_TYPE_STRING: str = '7'
+
+# Counters summed across all objset-* kstat files to provide I/O statistics for the pool
+_OBJSET_COUNTERS: tuple[str, ...] = ('reads', 'writes', 'nread', 'nwritten')
+
+
+def kstat_available(kstat_root: str = KSTAT_ROOT) -> bool:
+    """
+    :param kstat_root: Directory containing the ZFS kstat files.
+    :return: True if the kstat directory exists and can be used as a data source.
+    """
+    return os.path.isdir(kstat_root)
+
+
+def _read_named_kstat(path: str) -> dict[str, int | str]:
+    """
+    Parse a named kstat file into a dictionary. Named kstat files have a header line, a column header line ('name type data'), and one line per value.
+
+    :param path: Path to the named kstat file.
+    :return: Dictionary mapping kstat name to value. String values are returned as strings, all other values are converted to integers.
+    """
+    with open(path) as kstat_file:
+        lines = kstat_file.read().splitlines()[2:]
+
+    kstat: dict[str, int | str] = {}
+    for line in lines:
+        fields = line.split(maxsplit=2)
+        if len(fields) < 3: continue
+
+        name, data_type, data = fields
+        kstat[name] = data if data_type == _KSTAT_DATA_TYPE_STRING else int(data)
+
+    return kstat
+
+
+def _read_pool_kstat(pool_dir: str, poolname: str) -> dict[str, Any]:
+    """
+    Read the kstat files for a single pool.
+
+    :param pool_dir: Directory containing the kstat files for the pool.
+    :param poolname: Name of the pool.
+    :return: Dictionary containing the pool 'name', 'state' and 'io_stats' (counters summed across all datasets).
+    :raises: OSError if the kstat files of the pool cannot be read (eg. the pool was exported while it was being read).
+    """
+    with open(os.path.join(pool_dir, 'state')) as state_file:
+        state = state_file.read().strip()
+
+    io_stats: dict[str, int] = dict.fromkeys(_OBJSET_COUNTERS, 0)
+
+    for entry in os.listdir(pool_dir):
+        if not entry.startswith('objset-'): continue
+
+        objset = _read_named_kstat(os.path.join(pool_dir, entry))
+        for counter in _OBJSET_COUNTERS:
+            io_stats[counter] += objset.get(counter, 0)
+
+    return {'name': poolname, 'state': state, 'io_stats': io_stats}
+
+
+def get_zpools_kstat(poolnames: list[str], kstat_root: str = KSTAT_ROOT) -> dict[str, Any]:
+    """
+    Read the kstat files to obtain the current state and I/O counters of the nominated zpools as a dict
+
+    :param poolnames: List of selected ZPool names to retrieve kstat data for. An empty list means all pools are retrieved.
+    :param kstat_root: Directory containing the ZFS kstat files.
+    :return: Dictionary mapping pool name to kstat data for that pool as a dictionary, pools are sorted by name to match the output of 'zpool status'. Pools
+             whose kstat files could not be read (eg. exported while being read) are omitted, so the set of pools differs from that of 'zpool status' and the
+             caller runs a full refresh to find out what happened. An empty dictionary is returned if kstat_root cannot be read.
+    """
+    pools: dict[str, Any] = {}
+
+    try:
+        entries = sorted(os.listdir(kstat_root))
+    except OSError:
+        return pools
+
+    for poolname in entries:
+        pool_dir = os.path.join(kstat_root, poolname)
+
+        # Each pool has a directory containing a 'state' file, other entries in kstat_root are global ZFS statistics
+        if poolnames and poolname not in poolnames: continue
+        if not os.path.isfile(os.path.join(pool_dir, 'state')): continue
+
+        try:
+            pools[poolname] = _read_pool_kstat(pool_dir=pool_dir, poolname=poolname)
+        except OSError:
+            continue
+
+    return pools
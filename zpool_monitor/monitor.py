@@ -1,35 +1,492 @@
 """
 This module provides the Monitor class which can track multiple ZPools and output their status for display.
+
+The Monitor keeps a persistent ZPool instance for each pool. Each refresh applies the new 'zpool status' snapshot to the existing instances, and returns a
+ChangeSet listing the pools that changed and typed change events (state transitions, error counter deltas, scan state changes, VDEVs added/removed).
+
+If the status of some pools could not be obtained (eg. 'zpool status <pool>' timed out when fetching each pool in parallel), the refresh returns the
+partial result: failed pools keep their current ZPool instance and are listed with the error in the ChangeSet, along with the latency of every pool.
 """
 
 # Import System Libraries
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterable, Iterator
+import hashlib
+import json
+import time
 import rich.console
 
-# Import zpool.ZPool class
-from .zpool import ZPool
-from .systemzpool import get_zpools_status
+# Import zpool.ZPool class and change events, status sources, and instrumentation. The multihost source is imported only when hosts are monitored, and the
+# capture writer and alert engine are only passed in by the applications using them, so zpool_status does not pay to import them
+from .zpool import ZPool, PoolProgress, DEFAULT_SAMPLE_PERIOD, ChangeEvent, PoolAdded, PoolRemoved
+from .systemzpool import ZPoolCommandSource, ZPoolParallelSource, transport_prefix
+from .kstat import get_zpools_kstat, kstat_available
+from .instrumentation import PipelineTimings, timed
+
+if TYPE_CHECKING:
+    from .capture import CaptureWriter
+    from .alerts import AlertEngine
+
+
+class ChangeSet:
+    """
+    Result of a refresh: the current ZPool instance for every pool, the names of pools whose displayed status changed, and the change events generated.
+    """
+    def __init__(self):
+        # Dictionary mapping pool name to ZPool instance for every pool in the snapshot
+        self.pools: dict[str, ZPool] = {}
+
+        # Names of pools that were added, or whose displayed status changed (including changes that generate no event, eg. scan progress)
+        self.changed_pools: set[str] = set()
+
+        # Change events in the order they were detected
+        self.events: list[ChangeEvent] = []
+
+        # Pools whose status could not be obtained by the refresh mapped to the exception raised. Their previous ZPool instance (if any) is kept in pools
+        self.errors: dict[str, Exception] = {}
+
+        # Time (seconds) from the start of the refresh until the status of each pool was received
+        self.latencies: dict[str, float] = {}
+
+    def pool_events(self, poolname: str) -> list[ChangeEvent]:
+        """
+        :param poolname: Name of the pool.
+        :return: Change events for a single pool.
+        """
+        return [event for event in self.events if event.poolname == poolname]
+
+    def __bool__(self) -> bool:
+        """
+        :return: True if anything changed.
+        """
+        return bool(self.changed_pools or self.events)
 
 
 class Monitor:
-    def __init__(self, poolnames: list[str]):
+    def __init__(self, poolnames: list[str], kstat_root: str | None = None, full_refresh_period: float = 0.0, source: Any = None,
+                 capture: 'CaptureWriter | None' = None, timings: PipelineTimings | None = None, timeout: float | None = None, parallel: int = 0,
+                 hosts: list[str] | None = None, transport: str | None = None, alerts: 'AlertEngine | None' = None):
         """
         Construct instance of class to monitor multipl ZPool instances
 
         :param poolnames: List of selected ZPool names to monitor. An empty list means all pools are monitored.
+        :param kstat_root: Directory containing the ZFS kstat files. If provided (and it exists), kstat is used to refresh pool state and I/O counters without
+                           running 'zpool status'.
+        :param full_refresh_period: When kstat is in use, the minimum number of seconds between running 'zpool status' to refresh the full pool status.
+        :param source: Source of the full pool status (eg. CaptureReplaySource), defaults to running 'zpool status' via ZPoolCommandSource.
+        :param capture: Optional instance of CaptureWriter, every full pool status obtained from the source is recorded to the capture file.
+        :param timings: Optional instance of PipelineTimings, the fetch, decode and build stages of refresh_stats_async() are timed if the caller has started
+                        timing a refresh.
+        :param timeout: Optional time (seconds) allowed for 'zpool status' to complete when using the default source. If it expires the refresh raises
+                        TimeoutError and the current ZPool instances are kept.
+        :param parallel: When using the default source, run 'zpool status <pool>' for up to this many pools concurrently (ZPoolParallelSource) so a pool
+                         that is not responding does not delay the others. Defaults to running a single 'zpool status' for all pools. When monitoring
+                         hosts, the maximum number of hosts polled concurrently (default 8).
+        :param hosts: Optional names of hosts to monitor instead of the local system (MultiHostSource). Pools are named '<host>/<pool>'.
+        :param transport: Optional command used to run zpool (eg. 'sudo'), '{host}' is replaced by the host name. Defaults to running zpool directly, or
+                          SSH_TRANSPORT when monitoring hosts.
+        :param alerts: Optional instance of AlertEngine, its rules are evaluated against the changes made by every refresh.
         """
         self.__poolnames = poolnames
+        self.__timings = timings
+        prefix = transport_prefix(transport=transport) if transport else None
+        if source is None and hosts:
+            from .multihost import MultiHostSource, SSH_TRANSPORT
+            source = MultiHostSource(hosts=hosts, transport=transport or SSH_TRANSPORT, max_parallel=parallel or 8, timings=timings, timeout=timeout)
+        elif source is None and parallel:
+            source = ZPoolParallelSource(max_parallel=parallel, timings=timings, timeout=timeout, prefix=prefix)
+        elif source is None:
+            source = ZPoolCommandSource(timings=timings, timeout=timeout, prefix=prefix)
+        self.__source = source
+        self.__capture = capture
+        self.__alerts = alerts
 
         # List containing statistics for all pools scanned
         self.__pools: dict[str, ZPool] = {}
 
-    def refresh_stats(self) -> dict[str, ZPool]:
+        # Optional kstat data source. The last full 'zpool status' output is kept so kstat values can be merged into it between full refreshes
+        self.__kstat_root: str | None = kstat_root if kstat_root and kstat_available(kstat_root) else None
+        self.__full_refresh_period = full_refresh_period
+        self.__last_full_refresh: float | None = None
+        self.__pools_status: dict[str, Any] = {}
+
+        # Status last applied to each ZPool in self.__pools (including kstat I/O counters), published by the daemon
+        self.__status: dict[str, dict[str, Any]] = {}
+
+        # Fingerprint of the status last applied to each ZPool in self.__pools. If a pool's status is unchanged, the update is skipped entirely
+        self.__fingerprints: dict[str, bytes] = {}
+        self.__fingerprint_hits: int = 0
+        self.__fingerprint_misses: int = 0
+
+        # Changes detected by the last refresh
+        self.__changes: ChangeSet = ChangeSet()
+
+        # Scan and trim progress of each pool across full refreshes, used to estimate throughput and time remaining over a moving window. The number of
+        # samples kept depends on the period the pools are refreshed at, see sample_period
+        self.__progress: dict[str, PoolProgress] = {}
+        self.__sample_period: float = DEFAULT_SAMPLE_PERIOD
+
+    @property
+    def sample_period(self) -> float:
+        """
+        :return: Period (seconds) the pools with a scan or trim in progress are refreshed at, see PoolProgress.
+        """
+        return self.__sample_period
+
+    @sample_period.setter
+    def sample_period(self, sample_period: float) -> None:
+        """
+        :param sample_period: Period (seconds) the pools with a scan or trim in progress are refreshed at, set by the caller scheduling the refreshes so the
+                              progress history of each pool spans its moving window.
+        """
+        self.__sample_period = sample_period
+        for progress in self.__progress.values():
+            progress.sample_period = sample_period
+
+    @property
+    def snapshot_time(self) -> float | None:
+        """
+        :return: Time (seconds since the epoch) the last full pool status was taken if it is not current (eg. when replaying a capture file), otherwise None.
+        """
+        return self.__source.snapshot_time
+
+    @property
+    def snapshot_label(self) -> str:
+        """
+        :return: Label describing where the pool status at snapshot_time came from (eg. 'Replay').
+        """
+        return self.__source.snapshot_label
+
+    @property
+    def status(self) -> dict[str, dict[str, Any]]:
+        """
+        :return: Dictionary mapping pool name to the status (as returned by 'zpool status', with kstat I/O counters merged) last applied to each pool.
+        """
+        return self.__status
+
+    @property
+    def changes(self) -> ChangeSet:
+        """
+        :return: ChangeSet returned by the last refresh (including one performed by iter_refresh_stats()).
         """
-        Refresh the data stored in self.__pools by running 'zpool status' and parsing the output
+        return self.__changes
+
+    @property
+    def fingerprint_hits(self) -> int:
+        """
+        :return: Number of times a pool's status was unchanged and applying the snapshot was skipped.
+        """
+        return self.__fingerprint_hits
+
+    @property
+    def fingerprint_misses(self) -> int:
+        """
+        :return: Number of times a pool's status had changed (or was new) and the snapshot was applied to the ZPool instance.
+        """
+        return self.__fingerprint_misses
+
+    @staticmethod
+    def __fingerprint(pool_data: dict[str, Any]) -> bytes:
+        """
+        :param pool_data: Status for a single pool.
+        :return: Hash of the canonical (sorted keys, no whitespace) JSON encoding of pool_data.
+        """
+        return hashlib.blake2b(json.dumps(pool_data, sort_keys=True, separators=(',', ':')).encode(), digest_size=16).digest()
+
+    def __apply_pool(self, poolname: str, pool_data: dict[str, Any], fingerprints: dict[str, bytes], changes: ChangeSet) -> ZPool:
+        """
+        Apply the status of a single pool to its persistent ZPool instance, creating the instance if the pool is new. If the status is unchanged since the
+        last refresh, the update is skipped.
+
+        Pools with a scan in progress are always updated as the scan rate and time remaining are calculated against the current time.
+
+        :param poolname: Name of the pool.
+        :param pool_data: Status for the pool.
+        :param fingerprints: Dictionary to store the fingerprint of the pool status in for the next refresh.
+        :param changes: ChangeSet to record the pool and any changes in.
+        :return: Instance of ZPool for the pool.
+        """
+        with timed(self.__timings, 'build'):
+            self.__status[poolname] = pool_data
+            fingerprints[poolname] = self.__fingerprint(pool_data)
+            pool = self.__pools.get(poolname)
+
+            if pool is not None and fingerprints[poolname] == self.__fingerprints.get(poolname) and pool_data.get('scan_stats', {}).get('state') != 'SCANNING':
+                self.__fingerprint_hits += 1
+
+            elif pool is None:
+                self.__fingerprint_misses += 1
+                pool = ZPool(pool_data=pool_data, now=self.__source.snapshot_time, progress=self.__progress.get(poolname))
+                changes.events.append(PoolAdded(poolname=poolname))
+                changes.changed_pools.add(poolname)
+
+            else:
+                self.__fingerprint_misses += 1
+                if pool.update(pool_data=pool_data, events=changes.events, now=self.__source.snapshot_time): changes.changed_pools.add(poolname)
+
+            changes.pools[poolname] = pool
+            return pool
+
+    def __keep_failed_pools(self, changes: ChangeSet, fingerprints: dict[str, bytes]) -> None:
+        """
+        Record the pools whose status could not be obtained by the source, they keep their current ZPool instance (rather than being reported as removed).
+
+        :param changes: ChangeSet for the refresh.
+        :param fingerprints: Fingerprints of the status applied to each pool.
+        """
+        for poolname, error in self.__source.errors.items():
+            changes.errors[poolname] = error
+            if poolname in self.__pools and poolname not in changes.pools:
+                changes.pools[poolname] = self.__pools[poolname]
+                fingerprints[poolname] = self.__fingerprints[poolname]
+
+    def __finish_refresh(self, changes: ChangeSet, fingerprints: dict[str, bytes]) -> ChangeSet:
+        """
+        All pools have been applied, record pools that no longer exist and store the new set of pools (sorted by name, as the status of each pool may not
+        be received in order).
+
+        :param changes: ChangeSet for the refresh.
+        :param fingerprints: Fingerprints of the status applied to each pool.
+        :return: The completed ChangeSet.
+        """
+        changes.pools = dict(sorted(changes.pools.items()))
+
+        for poolname in self.__pools.keys() - changes.pools.keys():
+            changes.events.append(PoolRemoved(poolname=poolname))
+
+        for poolname in self.__progress.keys() - changes.pools.keys():
+            del self.__progress[poolname]
+
+        self.__status = {poolname: self.__status[poolname] for poolname in changes.pools if poolname in self.__status}
+
+        self.__pools = changes.pools
+        self.__fingerprints = fingerprints
+        self.__changes = changes
+
+        if self.__alerts is not None:
+            self.__alerts.evaluate(pools=changes.pools, changed_pools=changes.changed_pools, events=changes.events,
+                                   now=self.__source.snapshot_time or time.time())
+
+        return changes
+
+    def __kstat_status(self) -> dict[str, Any] | None:
+        """
+        Build the status of all monitored pools by merging kstat data into the last full 'zpool status' output.
+
+        :return: Dictionary mapping pool name to status for that pool as a dictionary, or None if a full refresh using 'zpool status' is required.
         """
-        # Retrieve current status for all ZPools listed in self.__poolnames and convert to instances of ZPool
-        self.__pools = {poolname: ZPool(pool_data=pool_data) for poolname, pool_data in get_zpools_status(poolnames=self.__poolnames).items()}
+        if not self.__kstat_root or self.__last_full_refresh is None: return None
+        if time.monotonic() - self.__last_full_refresh >= self.__full_refresh_period: return None
 
-        return self.__pools
+        kstats = get_zpools_kstat(poolnames=self.__poolnames, kstat_root=self.__kstat_root)
+
+        # Pools added/removed or a change in pool state means the VDEV tree is likely to have changed, we need the full status
+        if kstats.keys() != self.__pools_status.keys(): return None
+        if any(kstat['state'] != self.__pools_status[poolname]['state'] for poolname, kstat in kstats.items()): return None
+
+        return {poolname: self.__pools_status[poolname] | {'io_stats': kstat['io_stats']} for poolname, kstat in kstats.items()}
+
+    def __start_full_status(self) -> tuple[dict[str, Any], dict[str, Any]]:
+        """
+        Prepare to store the output of a full 'zpool status' for use by later kstat refreshes.
+
+        :return: Tuple of the current kstat data to merge into each pool status (empty if kstat is not in use), and the previously stored pool status.
+        """
+        previous_status, self.__pools_status = self.__pools_status, {}
+
+        return get_zpools_kstat(poolnames=self.__poolnames, kstat_root=self.__kstat_root) if self.__kstat_root else {}, previous_status
+
+    def __store_pool_status(self, poolname: str, pool_data: dict[str, Any], kstats: dict[str, Any]) -> dict[str, Any]:
+        """
+        Store the full 'zpool status' output for a single pool, and return it with the current kstat I/O counters merged in if kstat is in use. Scan and
+        trim progress is sampled here, so only fresh 'zpool status' output (not the stored status reused between kstat refreshes) is recorded.
+
+        :param poolname: Name of the pool.
+        :param pool_data: Status for the pool as returned by 'zpool status'.
+        :param kstats: Current kstat data as returned by __start_full_status().
+        :return: The pool status with kstat I/O counters added.
+        """
+        self.__pools_status[poolname] = pool_data
+        progress = self.__progress.setdefault(poolname, PoolProgress(sample_period=self.__sample_period))
+        progress.record(pool_data=pool_data, timestamp=self.__source.snapshot_time or time.time())
+
+        return pool_data | {'io_stats': kstats[poolname]['io_stats']} if poolname in kstats else pool_data
+
+    def __finish_full_status(self, previous_status: dict[str, Any]) -> None:
+        """
+        All pools from a full 'zpool status' have been received, record the time of the refresh and write the pool status to the capture file (if recording).
+        Pools whose status could not be obtained keep their previous status.
+
+        :param previous_status: The stored pool status before this 'zpool status'.
+        """
+        self.__last_full_refresh = time.monotonic()
+        for poolname in self.__source.errors.keys() & previous_status.keys():
+            self.__pools_status[poolname] = previous_status[poolname]
+
+        if self.__capture: self.__capture.record(pools_status=self.__pools_status, timestamp=self.__source.snapshot_time)
+
+    def __iter_full_status(self, pools_status: Iterable[tuple[str, dict[str, Any]]]) -> Iterator[tuple[str, dict[str, Any]]]:
+        """
+        Store each pool from a full 'zpool status' as it is received.
+
+        :param pools_status: Iterable of (pool name, pool status) as returned by 'zpool status'.
+        :return: Iterator yielding (pool name, pool status) with kstat I/O counters added.
+        """
+        kstats, previous_status = self.__start_full_status()
+        for poolname, pool_data in pools_status:
+            yield poolname, self.__store_pool_status(poolname=poolname, pool_data=pool_data, kstats=kstats)
+
+        self.__finish_full_status(previous_status=previous_status)
+
+    async def __iter_full_status_async(self, pools_status: AsyncIterator[tuple[str, dict[str, Any]]]) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """
+        Asynchronous version of __iter_full_status().
+
+        :param pools_status: Async iterator of (pool name, pool status) as returned by 'zpool status'.
+        :return: Async iterator yielding (pool name, pool status) with kstat I/O counters added.
+        """
+        kstats, previous_status = self.__start_full_status()
+        async for poolname, pool_data in pools_status:
+            yield poolname, self.__store_pool_status(poolname=poolname, pool_data=pool_data, kstats=kstats)
+
+        self.__finish_full_status(previous_status=previous_status)
+
+    def iter_refresh_stats(self, pools_status: dict[str, Any] | None = None) -> Iterator[ZPool]:
+        """
+        Refresh the data stored in self.__pools by running 'zpool status' (or reading kstat) and parsing the output. Each ZPool is yielded as soon as its
+        status has been received from 'zpool status' and applied, self.__pools and the ChangeSet are updated once all pools have been received.
+
+        :param pools_status: Optional output of 'zpool status' already obtained by the caller (eg. while validating command-line pool names). If provided,
+                             it is used instead of running 'zpool status' again. Only the pools being monitored are kept.
+        :return: Iterator yielding an instance of ZPool for each pool.
+        """
+        # Retrieve current status for all ZPools listed in self.__poolnames
+        from_source = False
+        if pools_status is not None:
+            pools_iter = self.__iter_full_status((poolname, pool_data) for poolname, pool_data in pools_status.items()
+                                                 if not self.__poolnames or poolname in self.__poolnames)
+        elif (kstat_status := self.__kstat_status()) is not None:
+            pools_iter = iter(kstat_status.items())
+        else:
+            pools_iter = self.__iter_full_status(self.__source.iter_status(poolnames=self.__poolnames))
+            from_source = True
+
+        # Apply to the persistent instances of ZPool as each pool is received
+        changes = ChangeSet()
+        fingerprints: dict[str, bytes] = {}
+        start = time.perf_counter()
+        for poolname, pool_data in pools_iter:
+            changes.latencies[poolname] = time.perf_counter() - start
+            yield self.__apply_pool(poolname=poolname, pool_data=pool_data, fingerprints=fingerprints, changes=changes)
+
+        if from_source: self.__keep_failed_pools(changes=changes, fingerprints=fingerprints)
+        self.__finish_refresh(changes=changes, fingerprints=fingerprints)
+
+    def refresh_stats(self, pools_status: dict[str, Any] | None = None) -> ChangeSet:
+        """
+        Refresh the data stored in self.__pools by running 'zpool status' (or reading kstat) and parsing the output
+
+        :param pools_status: Optional output of 'zpool status' already obtained by the caller, see iter_refresh_stats().
+        :return: ChangeSet containing every pool and the changes since the previous refresh.
+        """
+        for _ in self.iter_refresh_stats(pools_status=pools_status): pass
+
+        return self.__changes
+
+    async def refresh_stats_async(self, poolnames: list[str] | None = None) -> ChangeSet:
+        """
+        Asynchronous version of refresh_stats(). The 'zpool status' command is run as an asyncio subprocess so the caller's event loop is not blocked.
+
+        :param poolnames: Optional names of a subset of the pools found by the previous refresh to refresh (eg. only pools with a scrub in progress). Other
+                          pools keep their current ZPool instance and are reported unchanged. If the status of a pool in the subset cannot be obtained
+                          (eg. the pool was exported), all pools are refreshed instead. Defaults to refreshing all monitored pools.
+        :return: ChangeSet containing every pool and the changes since the previous refresh.
+        :raises: TimeoutError if 'zpool status' did not complete within the timeout. The previous ZPool instances are kept, and are returned by the next
+                 successful refresh.
+        """
+        if poolnames is not None: return await self.__refresh_subset_async(poolnames=poolnames)
+
+        changes = ChangeSet()
+        fingerprints: dict[str, bytes] = {}
+        start = time.perf_counter()
+
+        # Retrieve current status for all ZPools listed in self.__poolnames and apply to the instances of ZPool as each pool is received
+        if (kstat_status := self.__kstat_status()) is not None:
+            for poolname, pool_data in kstat_status.items():
+                changes.latencies[poolname] = time.perf_counter() - start
+                self.__apply_pool(poolname=poolname, pool_data=pool_data, fingerprints=fingerprints, changes=changes)
+        else:
+            async for poolname, pool_data in self.__iter_full_status_async(self.__source.iter_status_async(poolnames=self.__poolnames)):
+                changes.latencies[poolname] = time.perf_counter() - start
+                self.__apply_pool(poolname=poolname, pool_data=pool_data, fingerprints=fingerprints, changes=changes)
+
+            self.__keep_failed_pools(changes=changes, fingerprints=fingerprints)
+
+        # Time spent fetching the status is the time not spent decoding or building
+        if self.__timings:
+            self.__timings.add('fetch', time.perf_counter() - start - self.__timings.current('decode') - self.__timings.current('build'))
+
+        return self.__finish_refresh(changes=changes, fingerprints=fingerprints)
+
+    async def __refresh_subset_async(self, poolnames: list[str]) -> ChangeSet:
+        """
+        Refresh a subset of the pools found by the previous refresh using 'zpool status <pools>', see refresh_stats_async().
+
+        :param poolnames: Names of the pools to refresh.
+        :return: ChangeSet containing every pool and the changes since the previous refresh.
+        """
+        requested = [poolname for poolname in poolnames if poolname in self.__pools]
+        if not requested: return await self.refresh_stats_async()
+
+        fetched = ChangeSet()
+        fingerprints: dict[str, bytes] = {}
+        start = time.perf_counter()
+
+        try:
+            kstats = get_zpools_kstat(poolnames=requested, kstat_root=self.__kstat_root) if self.__kstat_root else {}
+            async for poolname, pool_data in self.__source.iter_status_async(poolnames=requested):
+                fetched.latencies[poolname] = time.perf_counter() - start
+                pool_data = self.__store_pool_status(poolname=poolname, pool_data=pool_data, kstats=kstats)
+                self.__apply_pool(poolname=poolname, pool_data=pool_data, fingerprints=fingerprints, changes=fetched)
+
+        except ValueError:
+            # 'zpool status' fails (and produces no output) if any of the pools no longer exists, refresh all pools to find out which
+            return await self.refresh_stats_async()
+
+        if self.__timings:
+            self.__timings.add('fetch', time.perf_counter() - start - self.__timings.current('decode') - self.__timings.current('build'))
+
+        if self.__capture: self.__capture.record(pools_status=self.__pools_status, timestamp=self.__source.snapshot_time)
+
+        # Pools that were not requested, or whose status could not be obtained, are carried over unchanged (in their current order). Other requested
+        # pools that were not returned have been removed
+        changes = ChangeSet()
+        changes.changed_pools, changes.events, changes.latencies = fetched.changed_pools, fetched.events, fetched.latencies
+        changes.errors = dict(self.__source.errors)
+        for poolname, pool in self.__pools.items():
+            if poolname in fetched.pools:
+                changes.pools[poolname] = fetched.pools[poolname]
+            elif poolname not in requested or poolname in changes.errors:
+                changes.pools[poolname] = pool
+                fingerprints[poolname] = self.__fingerprints[poolname]
+            else:
+                self.__pools_status.pop(poolname, None)
+
+        return self.__finish_refresh(changes=changes, fingerprints=fingerprints)
+
+    @staticmethod
+    def display_pool(console: rich.console.Console, pool: ZPool) -> None:
+        """
+        Display the statistics for a single pool
+
+        :param console: The application instance of the Rich Console class to use to output data
+        :param pool: Instance of ZPool to display
+        """
+        console.rule(f'ZPool - {pool.poolname}')
+        console.print(pool.summary)
+        console.print(pool.vdevs)
+        console.print()
+
+        console.print(pool.scan_stats)
 
     def display(self, console: rich.console.Console) -> None:
         """
@@ -38,10 +495,15 @@ class Monitor:
         :param console: The application instance of the Rich Console class to use to output data
         """
         # For each pool, display the stored state to screen
-        for poolname, pool in self.__pools.items():
-            console.rule(f'ZPool - {poolname}')
-            console.print(pool.summary)
-            console.print(pool.vdevs)
-            console.print()
+        for pool in self.__pools.values():
+            self.display_pool(console=console, pool=pool)
 
-            console.print(pool.scan_stats)
+    def refresh_and_display(self, console: rich.console.Console, pools_status: dict[str, Any] | None = None) -> None:
+        """
+        Refresh the statistics for all pools, displaying each pool as soon as its status has been received rather than waiting for all pools
+
+        :param console: The application instance of the Rich Console class to use to output data
+        :param pools_status: Optional output of 'zpool status' already obtained by the caller, see iter_refresh_stats().
+        """
+        for pool in self.iter_refresh_stats(pools_status=pools_status):
+            self.display_pool(console=console, pool=pool)
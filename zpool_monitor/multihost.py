@@ -0,0 +1,247 @@
+"""
+This module provides the MultiHostSource class which monitors the pools of many hosts with a single Monitor.
+
+'zpool status' is run on each host through a transport (by default ssh, see SSH_TRANSPORT) and the hosts are polled concurrently, with at most max_parallel
+commands running at once. Each pool is identified as '<host>/<pool>' (pool names cannot contain '/'), so the pools of every host are monitored, displayed,
+and sorted (grouped by host) as if they were pools of a single system.
+
+A host that is not responding (its command fails or does not complete within the timeout) does not delay the others. Its pools are reported as failed and
+keep their last status, while the next fetch of all its pools continues in the background and is collected by the first request after it completes.
+"""
+
+# Import System Libraries
+from typing import Any, AsyncIterator, Iterator
+import asyncio
+import concurrent.futures
+
+# Import zpool_monitor system zpool functions and instrumentation
+from .systemzpool import iter_zpools_status, iter_zpools_status_async, transport_prefix, _retrieve_exception
+from .instrumentation import PipelineTimings
+
+
+# Default transport, ssh with a persistent multiplexed master connection to each host (kept open for 10 minutes after last use) so each refresh does not
+# repeat the ssh handshake. BatchMode prevents ssh prompting for a password on the dashboard terminal
+SSH_TRANSPORT: str = 'ssh -o BatchMode=yes -o ControlMaster=auto -o ControlPath=~/.ssh/zpool_monitor-%C -o ControlPersist=10m {host}'
+
+# Separates the host name from the pool name
+HOST_SEPARATOR: str = '/'
+
+
+def split_poolname(poolname: str) -> tuple[str, str]:
+    """
+    :param poolname: Name of a pool, as '<host>/<pool>' for a pool monitored by MultiHostSource.
+    :return: Tuple of (host name, pool name). The host name is empty for a pool on the local system.
+    """
+    host, _, pool = poolname.rpartition(HOST_SEPARATOR)
+
+    return host, pool
+
+
+class MultiHostSource:
+    """
+    Status source for the Monitor that runs 'zpool status' on many hosts concurrently through a transport, see the module documentation.
+    """
+    # Time the returned status was obtained, None means the status is current
+    snapshot_time: float | None = None
+
+    # Label displayed with snapshot_time (eg. in the dashboard title) when the status is not current
+    snapshot_label: str = ''
+
+    def __init__(self, hosts: list[str], transport: str = SSH_TRANSPORT, max_parallel: int = 8, timings: PipelineTimings | None = None,
+                 timeout: float | None = None):
+        """
+        Construct the status source
+
+        :param hosts: Names of the hosts to monitor.
+        :param transport: Command used to run zpool on a host, '{host}' is replaced by the host name (see systemzpool.transport_prefix()).
+        :param max_parallel: Maximum number of hosts fetched concurrently.
+        :param timings: Optional instance of PipelineTimings, time spent decoding the 'zpool status' output is added to the 'decode' stage.
+        :param timeout: Optional time (seconds) allowed for 'zpool status' to complete on each host, after which it is killed and the pools of the host are
+                        recorded as failed.
+        """
+        self.__hosts: list[str] = list(dict.fromkeys(hosts))
+        self.__prefixes: dict[str, list[str]] = {host: transport_prefix(transport=transport, host=host) for host in self.__hosts}
+        self.__max_parallel = max_parallel
+        self.__timings = timings
+        self.__timeout = timeout
+
+        # Pools whose status could not be obtained by the last request mapped to the exception raised. A failed host whose pools are not yet known is
+        # recorded by host name
+        self.errors: dict[str, Exception] = {}
+
+        # Names of the pools last received from each host (used to report the pools of a failed host), and every host whose last fetch failed
+        self.__host_pools: dict[str, list[str]] = {host: [] for host in self.__hosts}
+        self.__failing: dict[str, Exception] = {}
+
+        # Fetches (of all pools) of failing hosts still running from a previous request, mapping host to asyncio Task (async) or Future (synchronous)
+        self.__background_tasks: dict[str, asyncio.Task] = {}
+        self.__background_futures: dict[str, concurrent.futures.Future] = {}
+
+        # Limits concurrent commands, created on first use. The executor is kept between requests so background fetches outlive the request
+        self.__semaphore: asyncio.Semaphore | None = None
+        self.__executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+    @property
+    def hosts(self) -> list[str]:
+        """
+        :return: Names of the hosts monitored.
+        """
+        return list(self.__hosts)
+
+    def __requests(self, poolnames: list[str]) -> dict[str, list[str]]:
+        """
+        :param poolnames: List of selected pool names ('<host>/<pool>') to retrieve status for. An empty list means all pools of all hosts are retrieved.
+        :return: Dictionary mapping host name to the pools requested from the host, an empty list requests all pools of the host.
+        """
+        if not poolnames: return {host: [] for host in self.__hosts}
+
+        requests: dict[str, list[str]] = {}
+        for poolname in poolnames:
+            host, pool = split_poolname(poolname)
+            if host in self.__prefixes: requests.setdefault(host, []).append(pool)
+
+        return requests
+
+    def __failed_pools(self, host: str, pools: list[str]) -> list[str]:
+        """
+        :param host: Name of the failed host.
+        :param pools: Pools requested from the host, an empty list requests all pools of the host.
+        :return: Names ('<host>/<pool>') of the requested pools, or the host name if the pools of the host are not known.
+        """
+        return [f'{host}{HOST_SEPARATOR}{pool}' for pool in pools or self.__host_pools[host]] or [host]
+
+    def __failed(self, host: str, pools: list[str], error: Exception) -> None:
+        """
+        Record that the status of a host could not be obtained.
+
+        :param host: Name of the host.
+        :param pools: Pools requested from the host, an empty list requests all pools of the host.
+        :param error: Exception raised fetching the status.
+        """
+        self.__failing[host] = error
+        self.errors |= dict.fromkeys(self.__failed_pools(host=host, pools=pools), error)
+
+    def __received(self, host: str, pools: list[str], fetched_all: bool, pools_status: dict[str, Any]) -> list[tuple[str, dict[str, Any]]]:
+        """
+        Record the status received from a host, and rename its pools to '<host>/<pool>'.
+
+        :param host: Name of the host.
+        :param pools: Pools requested from the host, an empty list requests all pools of the host.
+        :param fetched_all: True if the status of all pools of the host was fetched (a failing host is always fetched in full).
+        :param pools_status: Dictionary mapping pool name to status received from the host.
+        :return: List of (pool name, status for that pool as a dictionary) for the requested pools.
+        """
+        for poolname in self.__failed_pools(host=host, pools=pools):
+            self.errors.pop(poolname, None)
+        self.__failing.pop(host, None)
+        if fetched_all: self.__host_pools[host] = list(pools_status)
+
+        received: list[tuple[str, dict[str, Any]]] = []
+        for pool, pool_data in pools_status.items():
+            if pools and pool not in pools: continue
+
+            poolname = pool_data['name'] = f'{host}{HOST_SEPARATOR}{pool}'
+            received.append((poolname, pool_data))
+
+        return received
+
+    async def __fetch_async(self, host: str, pools: list[str]) -> dict[str, Any]:
+        """
+        :param host: Name of the host.
+        :param pools: Pools to fetch, an empty list fetches all pools of the host.
+        :return: Dictionary mapping pool name to status, obtained by running 'zpool status' on the host once a concurrent command slot is available.
+        """
+        async with self.__semaphore:
+            return {pool: pool_data async for pool, pool_data in iter_zpools_status_async(poolnames=pools, timings=self.__timings, timeout=self.__timeout,
+                                                                                           prefix=self.__prefixes[host])}
+
+    def __fetch(self, host: str, pools: list[str]) -> dict[str, Any]:
+        """
+        Synchronous version of __fetch_async(), run on a worker thread.
+
+        :param host: Name of the host.
+        :param pools: Pools to fetch, an empty list fetches all pools of the host.
+        :return: Dictionary mapping pool name to status, obtained by running 'zpool status' on the host.
+        """
+        return dict(iter_zpools_status(poolnames=pools, timings=self.__timings, timeout=self.__timeout, prefix=self.__prefixes[host]))
+
+    def iter_status(self, poolnames: list[str]) -> Iterator[tuple[str, dict[str, Any]]]:
+        """
+        :param poolnames: List of selected pool names ('<host>/<pool>') to retrieve status for. An empty list means all pools of all hosts are retrieved.
+        :return: Iterator yielding (pool name, status for that pool as a dictionary) in the order the status of each host is received.
+        """
+        if self.__executor is None: self.__executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.__max_parallel, thread_name_prefix='zpool')
+        requests = self.__requests(poolnames=poolnames)
+
+        # Start fetching every host not already being fetched in the background, the request only waits for hosts that are not failing
+        fetch_all = {host: not pools or host in self.__failing for host, pools in requests.items()}
+        futures = {self.__background_futures.pop(host, None) or self.__executor.submit(self.__fetch, host, [] if fetch_all[host] else pools): host
+                   for host, pools in requests.items()}
+
+        waiting = {future for future, host in futures.items() if host not in self.__failing or future.done()}
+        self.errors = {}
+        for host in requests.keys() & self.__failing.keys():
+            self.errors |= dict.fromkeys(self.__failed_pools(host=host, pools=requests[host]), self.__failing[host])
+
+        for future in concurrent.futures.as_completed(waiting):
+            host = futures[future]
+            try:
+                pools_status = future.result()
+
+            except (TimeoutError, ValueError, OSError) as error:
+                self.__failed(host=host, pools=requests[host], error=error)
+                continue
+
+            yield from self.__received(host=host, pools=requests[host], fetched_all=fetch_all[host], pools_status=pools_status)
+
+        # Fetches of failing hosts that have not completed continue in the background, the host stays failing until a result is received
+        for future, host in futures.items():
+            if future not in waiting: self.__background_futures[host] = future
+
+    async def iter_status_async(self, poolnames: list[str]) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """
+        Asynchronous version of iter_status().
+
+        :param poolnames: List of selected pool names ('<host>/<pool>') to retrieve status for. An empty list means all pools of all hosts are retrieved.
+        :return: Async iterator yielding (pool name, status for that pool as a dictionary) in the order the status of each host is received.
+        """
+        if self.__semaphore is None: self.__semaphore = asyncio.Semaphore(self.__max_parallel)
+        requests = self.__requests(poolnames=poolnames)
+
+        # Start fetching every host not already being fetched in the background, the request only waits for hosts that are not failing
+        fetch_all = {host: not pools or host in self.__failing for host, pools in requests.items()}
+        tasks = {self.__background_tasks.pop(host, None) or asyncio.create_task(self.__fetch_async(host=host, pools=[] if fetch_all[host] else pools)): host
+                 for host, pools in requests.items()}
+
+        waiting = {task for task, host in tasks.items() if host not in self.__failing or task.done()}
+        self.errors = {}
+        for host in requests.keys() & self.__failing.keys():
+            self.errors |= dict.fromkeys(self.__failed_pools(host=host, pools=requests[host]), self.__failing[host])
+
+        try:
+            pending = waiting
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    host = tasks[task]
+                    try:
+                        pools_status = task.result()
+
+                    except (TimeoutError, ValueError, OSError) as error:
+                        self.__failed(host=host, pools=requests[host], error=error)
+                        continue
+
+                    for poolname, pool_data in self.__received(host=host, pools=requests[host], fetched_all=fetch_all[host], pools_status=pools_status):
+                        yield poolname, pool_data
+
+        except BaseException:
+            # The request was cancelled or iteration stopped early, cancelling the fetches kills their zpool processes
+            for task in tasks:
+                task.cancel()
+            raise
+
+        # Fetches of failing hosts that have not completed continue in the background, the host stays failing until a result is received
+        for task, host in tasks.items():
+            if task not in waiting:
+                task.add_done_callback(_retrieve_exception)
+                self.__background_tasks[host] = task
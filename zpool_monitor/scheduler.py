@@ -0,0 +1,153 @@
+"""
+This module provides the RefreshScheduler class which decides when the dashboard refreshes each pool.
+
+Rather than refreshing every pool at a single fixed period, pools are polled at a cadence matching their activity:
+
+ - Active pools (not ONLINE, or a scrub/resilver or trim is in progress) are refreshed every active period.
+ - All pools (including idle healthy pools, and to discover new or removed pools) are refreshed every idle period.
+
+Both periods are stretched if the 'zpool' command takes longer than a fraction of the period to respond, so a slow system is not continuously polled.
+
+If pool events are followed (see EventFollower), the pools named by each event are refreshed (along with the active pools) at the next check rather than
+waiting for their next poll, and while the follower is running the idle period is stretched to its safety period as changes are reported by events.
+"""
+
+# Import System Libraries
+from typing import TYPE_CHECKING, NamedTuple
+
+# Import zpool_monitor.zpool.ZPool and zpool_monitor.EventFollower classes. EventFollower is only used for type annotations, the follower is passed in by the
+# applications following events
+from .zpool import ZPool
+
+if TYPE_CHECKING: from .events import EventFollower
+
+
+# Default number of refresh periods between refreshes of idle pools
+DEFAULT_IDLE_BACKOFF: int = 6
+
+class RefreshDue(NamedTuple):
+    """Pools due to be refreshed: either all pools, or only the named active pools"""
+    all_pools: bool
+    poolnames: list[str]
+
+
+class RefreshScheduler:
+    """
+    Tracks the activity of each pool and the latency of refreshes to decide which pools are due to be refreshed.
+    """
+    def __init__(self, active_period: float, idle_period: float, latency_fraction: float = 0.25, latency_smoothing: float = 0.3, tolerance: float = 0.5,
+                 events: 'EventFollower | None' = None, event_holdoff: float = 5.0):
+        """
+        Construct instance of class to schedule refreshes
+
+        :param active_period: Minimum period (seconds) between refreshes of active pools.
+        :param idle_period: Minimum period (seconds) between refreshes of all pools. Must not be less than active_period.
+        :param latency_fraction: Periods are stretched so that a refresh takes at most this fraction of the period.
+        :param latency_smoothing: Weight of the most recent refresh in the moving average of the refresh latency.
+        :param tolerance: Refreshes due within this many seconds are due now, so checking for due refreshes on a timer does not add a tick of delay.
+        :param events: Optional instance of EventFollower, pools named by events are refreshed at the next check.
+        :param event_holdoff: Minimum period (seconds) between refreshes requested by events, events arriving within the period (eg. a burst of errors
+                              from a failing disk) are refreshed together once it has passed.
+        """
+        self.active_period = active_period
+        self.idle_period = idle_period
+        self.__latency_fraction = latency_fraction
+        self.__latency_smoothing = latency_smoothing
+        self.__tolerance = tolerance
+        self.__events = events
+        self.__event_holdoff = event_holdoff
+
+        # Exponentially weighted moving average of the refresh latency (seconds), None until the first refresh
+        self.__latency: float | None = None
+
+        # Names of the pools found to be active by the last refresh, and the time (time.monotonic()) all pools and active pools were last refreshed
+        self.__active: list[str] = []
+        self.__last_all: float | None = None
+        self.__last_active: float | None = None
+
+        # Pools requested by events that have not been refreshed yet (True if all pools are requested), and the time (time.monotonic()) of the last
+        # refresh requested by events
+        self.__requested: set[str] = set()
+        self.__requested_all: bool = False
+        self.__last_requested: float | None = None
+
+    def __stretch(self, period: float) -> float:
+        """
+        :param period: Requested period (seconds).
+        :return: The period, stretched if the refresh latency exceeds the allowed fraction of the period.
+        """
+        if self.__latency is None: return period
+
+        return max(period, self.__latency / self.__latency_fraction)
+
+    @property
+    def effective_active_period(self) -> float:
+        """
+        :return: Period (seconds) active pools are refreshed at, after stretching for latency.
+        """
+        return self.__stretch(self.active_period)
+
+    @property
+    def effective_idle_period(self) -> float:
+        """
+        :return: Period (seconds) all pools are refreshed at, after stretching for latency. While events are followed, the safety period of the follower.
+        """
+        period = max(self.idle_period, self.active_period)
+        if self.__events is not None and self.__events.running: period = max(period, self.__events.safety_period)
+
+        return self.__stretch(period)
+
+    @property
+    def latency(self) -> float | None:
+        """
+        :return: Moving average of the time (seconds) taken to refresh, or None if no refresh has been recorded.
+        """
+        return self.__latency
+
+    @property
+    def active_pools(self) -> list[str]:
+        """
+        :return: Names of the pools found to be active by the last refresh.
+        """
+        return list(self.__active)
+
+    def due(self, now: float) -> RefreshDue | None:
+        """
+        :param now: Current time (time.monotonic()).
+        :return: The pools due to be refreshed, or None if no refresh is due.
+        """
+        now += self.__tolerance
+        if self.__events is not None:
+            requested_all, requested = self.__events.take()
+            self.__requested_all |= requested_all
+            self.__requested.update(requested)
+
+        # Refreshes requested by events are held off if the previous one was recent, and also refresh the active pools
+        event_due = (self.__requested_all or self.__requested) and (self.__last_requested is None or now - self.__last_requested >= self.__event_holdoff)
+        if event_due: self.__last_requested = now
+
+        if self.__last_all is None or now - self.__last_all >= self.effective_idle_period or event_due and self.__requested_all:
+            self.__requested, self.__requested_all = set(), False
+            return RefreshDue(all_pools=True, poolnames=[])
+
+        if event_due or self.__active and now - self.__last_active >= self.effective_active_period:
+            poolnames, self.__requested = sorted(self.__requested.union(self.__active)), set()
+            return RefreshDue(all_pools=False, poolnames=poolnames)
+
+        return None
+
+    def record(self, pools: dict[str, ZPool] | None, all_pools: bool, latency: float, now: float) -> None:
+        """
+        Record a completed refresh. A failed refresh (eg. 'zpool status' timed out) is also recorded so the periods are stretched by its latency and it is not
+        retried until the pools are next due.
+
+        :param pools: Dictionary mapping pool name to the current ZPool instance for every pool, or None if the refresh failed (active pools are unchanged).
+        :param all_pools: True if all pools were refreshed, False if only the active pools were refreshed.
+        :param latency: Time (seconds) taken by the refresh.
+        :param now: Time (time.monotonic()) the refresh started.
+        """
+        self.__latency = latency if self.__latency is None else self.__latency_smoothing * latency + (1 - self.__latency_smoothing) * self.__latency
+        if pools is not None: self.__active = [poolname for poolname, pool in pools.items() if pool.active]
+
+        if all_pools: self.__last_all = now
+        self.__last_active = now
@@ -1,48 +1,636 @@
 """
 This module implements a set of functions to run the zpool command and return the output as a dictionary that can be used.
 
-On first import we will try to locate the zpool command and raise an exception if it is not found on the system.
+The zpool command is located on first use (not on import) and an exception is raised if it is not found on the system.
+
+Output from the zpool command is decoded incrementally as it is read from the pipe. Each pool is decoded as soon as its JSON subtree has been received, so
+callers iterating over the pools can process the first pool while zpool is still writing the remaining pools.
+
+Each zpool command can be given a timeout. The zpool command can block indefinitely (eg. when a pool is suspended or a disk is not responding), if it has
+not completed within the timeout the process is killed and TimeoutError is raised.
+
+A single 'zpool status' covering every pool is blocked if any one pool is not responding. ZPoolParallelSource instead runs 'zpool status <pool>' for each
+pool concurrently, so the status of healthy pools is obtained even while another pool is in trouble.
+
+Each zpool command can be given a command prefix (the transport) used to run zpool, for example 'sudo' or 'ssh <host>' to run zpool on another host. With
+a prefix, 'zpool' is found on the PATH of the transport (eg. of the remote shell) rather than on the local system.
 """
 
 # Import System Libraries
-from typing import Any
+from typing import Any, AsyncIterator, Iterator
+import asyncio
+import codecs
+import concurrent.futures
+import functools
+import re
+import shlex
 import shutil
 import subprocess
+import threading
 import json
 
+# Import instrumentation used to time decoding
+from .instrumentation import PipelineTimings, timed
 
-"""
-Find the zpool binary during importing
-"""
-_zpool_binary: str | None = shutil.which("zpool")
-if not _zpool_binary: raise FileNotFoundError('Executable ([green]zpool[/]) executable not found on system')
 
+# Size of each read from the zpool stdout pipe
+_READ_SIZE: int = 64 * 1024
+
+# Matches JSON whitespace, used to skip between tokens in the zpool output
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+@functools.cache
+def _zpool_binary() -> str:
+    """
+    Find the zpool binary on first use. The location is cached so the search is only performed once.
+
+    :return: Path to the zpool executable.
+    :raises: FileNotFoundError if the zpool command does not exist on the system.
+    """
+    zpool_binary: str | None = shutil.which("zpool")
+    if not zpool_binary: raise FileNotFoundError('Executable ([green]zpool[/]) executable not found on system')
+
+    return zpool_binary
+
+
+def transport_prefix(transport: str, host: str = '') -> list[str]:
+    """
+    :param transport: Command used to run zpool (eg. 'sudo', 'ssh {host}'), split into arguments as by a shell. '{host}' is replaced by the host name.
+    :param host: Name of the host zpool is run on.
+    :return: Command prefix to run zpool with.
+    """
+    return [argument.replace('{host}', host) for argument in shlex.split(transport)]
+
+
+def _zpool_argv(command: str, params: list[str], prefix: list[str] | None) -> list[str]:
+    """
+    :param command: The zpool sub-command to execute.
+    :param params: Parameters to pass to the zpool sub-command.
+    :param prefix: Optional command prefix (transport) used to run zpool, otherwise the local zpool binary is run directly.
+    :return: Arguments of the zpool command.
+    :raises: FileNotFoundError if no prefix is given and the zpool command does not exist on the system.
+    """
+    return [*prefix, 'zpool', command, *params] if prefix else [_zpool_binary(), command, *params]
+
+
+def _failed_error(command: str, returncode: int) -> ValueError:
+    """
+    :param command: The zpool sub-command that failed.
+    :param returncode: Exit status of the zpool command (or of the transport used to run it, eg. 255 if ssh could not connect).
+    :return: Exception to raise when the zpool command exited with an error without producing any output.
+    """
+    return ValueError(f'\'zpool {command}\' failed with exit status {returncode}')
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    """
+    Done callback of a fetch left running in the background. Its exception is retrieved so asyncio does not report it as never retrieved if the result of the
+    fetch is not collected (eg. the pool was removed or the monitor exits first).
+
+    :param task: The completed task.
+    """
+    if not task.cancelled(): task.exception()
+
+
+def _timeout_error(command: str, timeout: float) -> TimeoutError:
+    """
+    :param command: The zpool sub-command that timed out.
+    :param timeout: The timeout (seconds) that expired.
+    :return: Exception to raise when the zpool command has been killed after the timeout expired.
+    """
+    return TimeoutError(f'\'zpool {command}\' did not complete within {timeout} seconds and was killed')
+
+
+class _ZPoolsDecoder:
+    """
+    Incremental decoder for the JSON output of the zpool command. Output is fed to the decoder as it is read from the pipe, and each member of the top level
+    'pools' object is returned as soon as it has been completely received. Data for pools already returned is released from the buffer, so at most one pool
+    is held as text at any time.
+    """
+    def __init__(self):
+        self.__decoder = json.JSONDecoder()
+        self.__utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.__buffer: str = ''
+        self.__pos: int = 0
+
+        # Parser state: 'document' (expecting top level '{'), 'key' (expecting a key or end of object), 'value' (expecting a value), and 'done'
+        self.__state: str = 'document'
+        self.__key: str = ''
+        self.__in_pools: bool = False
+
+        # A value is only re-decoded once the buffer has doubled since the last incomplete attempt, keeping decoding linear in the size of the output
+        self.__retry_size: int = 0
+
+    def feed(self, data: bytes, final: bool = False) -> list[tuple[str, dict[str, Any]]]:
+        """
+        Add output read from the zpool command to the decoder.
+
+        :param data: Bytes read from the zpool stdout pipe.
+        :param final: True if this is the last data (end of output has been reached).
+        :return: List of (pool name, pool data) tuples for every pool completely received by this call.
+        :raises: json.JSONDecodeError (ValueError) if the output is not valid JSON, or ends before the document is complete.
+        """
+        self.__buffer += self.__utf8.decode(data, final)
+        pools: list[tuple[str, dict[str, Any]]] = []
+
+        while self.__state != 'done':
+            self.__pos = _WHITESPACE.match(self.__buffer, self.__pos).end()
+            if self.__pos == len(self.__buffer): break
 
-def _run_zpool_binary(command: str, params: list[str]) -> dict[str, Any]:
+            match self.__state:
+                case 'document':
+                    if self.__buffer[self.__pos] != '{': raise json.JSONDecodeError('Expecting \'{\'', self.__buffer, self.__pos)
+                    self.__pos += 1
+                    self.__state = 'key'
+
+                case 'key':
+                    if self.__buffer[self.__pos] == ',':
+                        self.__pos += 1
+                        continue
+
+                    if self.__buffer[self.__pos] == '}':
+                        # End of 'pools' object continues the top level object, otherwise this is the end of the document
+                        self.__pos += 1
+                        self.__state = 'key' if self.__in_pools else 'done'
+                        self.__in_pools = False
+                        continue
+
+                    # Keys and their ':' separator are short, if not completely received wait for more data
+                    try:
+                        key, end = self.__decoder.raw_decode(self.__buffer, self.__pos)
+
+                    except json.JSONDecodeError:
+                        if final: raise
+                        break
+
+                    if not isinstance(key, str): raise json.JSONDecodeError('Expecting property name', self.__buffer, self.__pos)
+
+                    end = _WHITESPACE.match(self.__buffer, end).end()
+                    if end == len(self.__buffer): break
+                    if self.__buffer[end] != ':': raise json.JSONDecodeError('Expecting \':\' delimiter', self.__buffer, end)
+
+                    self.__key = key
+                    self.__pos = end + 1
+                    self.__state = 'value'
+
+                case 'value':
+                    # The top level 'pools' object is entered rather than decoded so each pool can be decoded individually
+                    if not self.__in_pools and self.__key == 'pools' and self.__buffer[self.__pos] == '{':
+                        self.__pos += 1
+                        self.__in_pools = True
+                        self.__state = 'key'
+                        continue
+
+                    if not final and len(self.__buffer) - self.__pos < self.__retry_size: break
+
+                    try:
+                        value, end = self.__decoder.raw_decode(self.__buffer, self.__pos)
+
+                    except json.JSONDecodeError:
+                        if final: raise
+                        self.__retry_size = 2 * (len(self.__buffer) - self.__pos)
+                        break
+
+                    # A number ending at the end of the buffer may have been truncated, wait for more data
+                    if not final and end == len(self.__buffer) and not isinstance(value, (dict, list, str)): break
+
+                    self.__pos = end
+                    self.__retry_size = 0
+                    self.__state = 'key'
+                    if self.__in_pools: pools.append((self.__key, value))
+
+        # Release data that has already been decoded
+        self.__buffer = self.__buffer[self.__pos:]
+        self.__pos = 0
+
+        if final and self.__state != 'done': raise json.JSONDecodeError('Incomplete zpool output', self.__buffer, self.__pos)
+
+        return pools
+
+
+def _iter_zpool_binary(command: str, params: list[str], timings: PipelineTimings | None = None, timeout: float | None = None,
+                       prefix: list[str] | None = None) -> Iterator[tuple[str, dict[str, Any]]]:
+    """
+    Run the zpool program with the nominated command and parameters. We always run zpool to output in JSON format and decode each pool as it is received.
+
+    :param command: The zpool sub-command to execute.
+    :param params: Extra parameters to pass to the zpool sub-command.
+    :param timings: Optional instance of PipelineTimings, time spent decoding the output is added to the 'decode' stage.
+    :param timeout: Optional time (seconds) allowed for the zpool command to complete, after which it is killed.
+    :param prefix: Optional command prefix (transport) used to run zpool.
+    :return: Iterator yielding (pool name, pool data) for each member of the 'pools' key of the JSON output.
+    :raises: TimeoutError if the zpool command did not complete within the timeout.
+    :raises: ValueError if the zpool command failed without producing any output, or the output is not valid JSON.
     """
-    Run the zpool program with the nominated command and parameters. We always run zpool to output in JSON format and convert to a dictionary to return.
+    process = subprocess.Popen(_zpool_argv(command=command, params=['-j', '--json-int'] + params, prefix=prefix), stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL)
+    decoder = _ZPoolsDecoder()
+
+    # Blocking reads cannot be interrupted, so a watchdog thread kills the zpool process if the timeout expires which ends the output
+    expired = threading.Event()
+    watchdog = threading.Timer(timeout, lambda: (expired.set(), process.kill())) if timeout else None
+    if watchdog: watchdog.start()
+
+    try:
+        received = False
+        while data := process.stdout.read1(_READ_SIZE):
+            received = True
+            with timed(timings, 'decode'): pools = decoder.feed(data)
+            yield from pools
+
+        if expired.is_set(): raise _timeout_error(command=command, timeout=timeout)
+        if not received and process.wait(): raise _failed_error(command=command, returncode=process.returncode)
+
+        with timed(timings, 'decode'): pools = decoder.feed(b'', final=True)
+        yield from pools
+
+    except BaseException:
+        # Don't leave an orphaned zpool process behind if the caller stops iterating early or the output cannot be decoded
+        if process.poll() is None: process.kill()
+        raise
+
+    finally:
+        if watchdog: watchdog.cancel()
+        process.stdout.close()
+        process.wait()
+
+
+async def _iter_zpool_binary_async(command: str, params: list[str], timings: PipelineTimings | None = None, timeout: float | None = None,
+                                   prefix: list[str] | None = None) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """
+    Asynchronous version of _iter_zpool_binary(). The zpool program is run as an asyncio subprocess so that the caller's event loop is not blocked and no
+    worker thread is required. If the iterating task is cancelled, the zpool process is killed before the cancellation is propagated.
 
     :param command: The zpool sub-command to execute.
     :param params: Extra parameters to pass to the zpool sub-command.
+    :param timings: Optional instance of PipelineTimings, time spent decoding the output is added to the 'decode' stage.
+    :param timeout: Optional time (seconds) allowed for the zpool command to complete, after which it is killed.
+    :param prefix: Optional command prefix (transport) used to run zpool.
+    :return: Async iterator yielding (pool name, pool data) for each member of the 'pools' key of the JSON output.
+    :raises: TimeoutError if the zpool command did not complete within the timeout.
+    :raises: ValueError if the zpool command failed without producing any output, or the output is not valid JSON.
+    """
+    process = await asyncio.create_subprocess_exec(*_zpool_argv(command=command, params=['-j', '--json-int'] + params, prefix=prefix),
+                                                   stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+    decoder = _ZPoolsDecoder()
+
+    # Each read must complete before the deadline, time spent by the caller processing yielded pools counts towards the timeout
+    deadline = asyncio.get_running_loop().time() + timeout if timeout else None
+
+    try:
+        received = False
+        while True:
+            try:
+                async with asyncio.timeout_at(deadline): data = await process.stdout.read(_READ_SIZE)
+            except TimeoutError:
+                raise _timeout_error(command=command, timeout=timeout) from None
+
+            if not data: break
+            received = True
+
+            with timed(timings, 'decode'): pools = decoder.feed(data)
+            for pool in pools:
+                yield pool
+
+        if not received and await process.wait(): raise _failed_error(command=command, returncode=process.returncode)
+
+        with timed(timings, 'decode'): pools = decoder.feed(b'', final=True)
+        for pool in pools:
+            yield pool
+
+    except BaseException:
+        # Don't leave an orphaned zpool process behind when the refresh is cancelled, iteration stops early, or the output cannot be decoded
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+        raise
+
+    finally:
+        await process.wait()
+
+
+def _run_zpool_binary(command: str, params: list[str], timeout: float | None = None, prefix: list[str] | None = None) -> dict[str, Any]:
+    """
+    Run the zpool program with the nominated command and parameters and collect the decoded output.
+
+    :param command: The zpool sub-command to execute.
+    :param params: Extra parameters to pass to the zpool sub-command.
+    :param timeout: Optional time (seconds) allowed for the zpool command to complete, after which it is killed and TimeoutError is raised.
+    :param prefix: Optional command prefix (transport) used to run zpool.
     :return: JSON Output is converted to a dictionary, and the 'pools' key is returned.
     """
-    return json.loads(subprocess.run([_zpool_binary, command, '-j', '--json-int'] + params, capture_output=True, text=True).stdout)['pools']
+    return dict(_iter_zpool_binary(command=command, params=params, timeout=timeout, prefix=prefix))
 
 
-def get_zpools() -> list[str]:
+async def _run_zpool_binary_async(command: str, params: list[str], timeout: float | None = None, prefix: list[str] | None = None) -> dict[str, Any]:
+    """
+    Asynchronous version of _run_zpool_binary().
+
+    :param command: The zpool sub-command to execute.
+    :param params: Extra parameters to pass to the zpool sub-command.
+    :param timeout: Optional time (seconds) allowed for the zpool command to complete, after which it is killed and TimeoutError is raised.
+    :param prefix: Optional command prefix (transport) used to run zpool.
+    :return: JSON Output is converted to a dictionary, and the 'pools' key is returned.
+    """
+    return {poolname: pool_data async for poolname, pool_data in _iter_zpool_binary_async(command=command, params=params, timeout=timeout, prefix=prefix)}
+
+
+def get_zpools(timeout: float | None = None, prefix: list[str] | None = None) -> list[str]:
     """
     Run 'zpool list' to obtain a list of all available ZPools on the system to return.
 
+    :param timeout: Optional time (seconds) allowed for 'zpool list' to complete, after which it is killed and TimeoutError is raised.
+    :param prefix: Optional command prefix (transport) used to run zpool.
     :return: List of available ZPools
     """
-    return list(_run_zpool_binary(command='list', params=['-H', '-o', 'name']).keys())
+    return list(_run_zpool_binary(command='list', params=['-H', '-o', 'name'], timeout=timeout, prefix=prefix).keys())
 
 
-def get_zpools_status(poolnames: list[str]) -> dict[str, Any]:
+def get_zpools_status(poolnames: list[str], timeout: float | None = None, prefix: list[str] | None = None) -> dict[str, Any]:
     """
     Run 'zpool status' to obtain the current status of the nominated zpools as a dict
 
     :param poolnames: List of selected ZPool names to retrieve status for. An empty list means all pools are retrieved.
+    :param timeout: Optional time (seconds) allowed for 'zpool status' to complete, after which it is killed and TimeoutError is raised.
+    :param prefix: Optional command prefix (transport) used to run zpool.
+    :return: Dictionary mapping pool name to status for that pool as a dictionary
+    """
+    return _run_zpool_binary(command='status', params=['-t'] + poolnames, timeout=timeout, prefix=prefix)
+
+
+def iter_zpools_status(poolnames: list[str], timings: PipelineTimings | None = None, timeout: float | None = None,
+                       prefix: list[str] | None = None) -> Iterator[tuple[str, dict[str, Any]]]:
+    """
+    Run 'zpool status' to obtain the current status of the nominated zpools, yielding each pool as soon as it has been received
+
+    :param poolnames: List of selected ZPool names to retrieve status for. An empty list means all pools are retrieved.
+    :param timings: Optional instance of PipelineTimings, time spent decoding the output is added to the 'decode' stage.
+    :param timeout: Optional time (seconds) allowed for 'zpool status' to complete, after which it is killed and TimeoutError is raised.
+    :param prefix: Optional command prefix (transport) used to run zpool.
+    :return: Iterator yielding (pool name, status for that pool as a dictionary)
+    """
+    return _iter_zpool_binary(command='status', params=['-t'] + poolnames, timings=timings, timeout=timeout, prefix=prefix)
+
+
+async def get_zpools_async(timeout: float | None = None, prefix: list[str] | None = None) -> list[str]:
+    """
+    Asynchronous version of get_zpools(), run 'zpool list' without blocking the event loop.
+
+    :param timeout: Optional time (seconds) allowed for 'zpool list' to complete, after which it is killed and TimeoutError is raised.
+    :param prefix: Optional command prefix (transport) used to run zpool.
+    :return: List of available ZPools
+    """
+    return list((await _run_zpool_binary_async(command='list', params=['-H', '-o', 'name'], timeout=timeout, prefix=prefix)).keys())
+
+
+async def get_zpools_status_async(poolnames: list[str], timeout: float | None = None, prefix: list[str] | None = None) -> dict[str, Any]:
+    """
+    Asynchronous version of get_zpools_status(), run 'zpool status' without blocking the event loop.
+
+    :param poolnames: List of selected ZPool names to retrieve status for. An empty list means all pools are retrieved.
+    :param timeout: Optional time (seconds) allowed for 'zpool status' to complete, after which it is killed and TimeoutError is raised.
+    :param prefix: Optional command prefix (transport) used to run zpool.
     :return: Dictionary mapping pool name to status for that pool as a dictionary
     """
-    return dict(_run_zpool_binary(command='status', params=['-t'] + poolnames).items())
+    return await _run_zpool_binary_async(command='status', params=['-t'] + poolnames, timeout=timeout, prefix=prefix)
+
+
+def iter_zpools_status_async(poolnames: list[str], timings: PipelineTimings | None = None, timeout: float | None = None,
+                             prefix: list[str] | None = None) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """
+    Asynchronous version of iter_zpools_status(), run 'zpool status' without blocking the event loop.
+
+    :param poolnames: List of selected ZPool names to retrieve status for. An empty list means all pools are retrieved.
+    :param timings: Optional instance of PipelineTimings, time spent decoding the output is added to the 'decode' stage.
+    :param timeout: Optional time (seconds) allowed for 'zpool status' to complete, after which it is killed and TimeoutError is raised.
+    :param prefix: Optional command prefix (transport) used to run zpool.
+    :return: Async iterator yielding (pool name, status for that pool as a dictionary)
+    """
+    return _iter_zpool_binary_async(command='status', params=['-t'] + poolnames, timings=timings, timeout=timeout, prefix=prefix)
+
+
+async def start_zpool_process_async(command: str, params: list[str], prefix: list[str] | None = None) -> asyncio.subprocess.Process:
+    """
+    Start a long-running zpool command (eg. 'zpool iostat <interval>') as an asyncio subprocess. Output is not requested in JSON format, the caller reads and
+    parses the line-oriented output from the stdout pipe of the returned process as it is produced.
+
+    :param command: The zpool sub-command to execute.
+    :param params: Extra parameters to pass to the zpool sub-command.
+    :param prefix: Optional command prefix (transport) used to run zpool.
+    :return: The running process, the caller is responsible for terminating it.
+    """
+    return await asyncio.create_subprocess_exec(*_zpool_argv(command=command, params=params, prefix=prefix), stdout=asyncio.subprocess.PIPE,
+                                                stderr=asyncio.subprocess.DEVNULL)
+
+
+class ZPoolCommandSource:
+    """
+    Status source for the Monitor that runs 'zpool status' on the local system (or through a transport). This is the default source, alternative sources
+    (eg. replaying a capture file) provide the same methods and attributes.
+    """
+    # Time the returned status was obtained, None means the status is current
+    snapshot_time: float | None = None
+
+    # Label displayed with snapshot_time (eg. in the dashboard title) when the status is not current
+    snapshot_label: str = ''
+
+    def __init__(self, timings: PipelineTimings | None = None, timeout: float | None = None, prefix: list[str] | None = None):
+        """
+        Construct the status source
+
+        :param timings: Optional instance of PipelineTimings, time spent decoding the 'zpool status' output is added to the 'decode' stage.
+        :param timeout: Optional time (seconds) allowed for 'zpool status' to complete, after which it is killed and TimeoutError is raised.
+        :param prefix: Optional command prefix (transport) used to run zpool.
+        """
+        self.__timings = timings
+        self.__timeout = timeout
+        self.__prefix = prefix
+
+        # Pools whose status could not be obtained by the last request, a single 'zpool status' either succeeds or raises so this is always empty
+        self.errors: dict[str, Exception] = {}
+
+    def iter_status(self, poolnames: list[str]) -> Iterator[tuple[str, dict[str, Any]]]:
+        """
+        :param poolnames: List of selected ZPool names to retrieve status for. An empty list means all pools are retrieved.
+        :return: Iterator yielding (pool name, status for that pool as a dictionary)
+        """
+        return iter_zpools_status(poolnames=poolnames, timings=self.__timings, timeout=self.__timeout, prefix=self.__prefix)
+
+    def iter_status_async(self, poolnames: list[str]) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """
+        :param poolnames: List of selected ZPool names to retrieve status for. An empty list means all pools are retrieved.
+        :return: Async iterator yielding (pool name, status for that pool as a dictionary)
+        """
+        return iter_zpools_status_async(poolnames=poolnames, timings=self.__timings, timeout=self.__timeout, prefix=self.__prefix)
+
+
+class ZPoolParallelSource:
+    """
+    Status source for the Monitor that runs 'zpool status <pool>' for each pool concurrently (as asyncio subprocesses, or on a pool of worker threads when
+    used synchronously) and yields each pool as soon as its status is received. If all pools are requested, 'zpool list' is run first to find them.
+
+    Pools whose status could not be obtained (the command failed or timed out) are omitted and recorded in errors rather than failing the whole request. The
+    next status of a failing pool is fetched in the background: requests do not wait for it, and its result is collected by the first request after it is
+    received. Healthy pools are therefore refreshed at full speed while another pool is not responding.
+    """
+    # Time the returned status was obtained, None means the status is current
+    snapshot_time: float | None = None
+
+    # Label displayed with snapshot_time (eg. in the dashboard title) when the status is not current
+    snapshot_label: str = ''
+
+    def __init__(self, max_parallel: int = 4, timings: PipelineTimings | None = None, timeout: float | None = None, prefix: list[str] | None = None):
+        """
+        Construct the status source
+
+        :param max_parallel: Maximum number of 'zpool status' commands run concurrently.
+        :param timings: Optional instance of PipelineTimings, time spent decoding the 'zpool status' output is added to the 'decode' stage.
+        :param timeout: Optional time (seconds) allowed for each zpool command to complete, after which it is killed and the pool is recorded as failed.
+        :param prefix: Optional command prefix (transport) used to run zpool.
+        """
+        self.__max_parallel = max_parallel
+        self.__timings = timings
+        self.__timeout = timeout
+        self.__prefix = prefix
+
+        # Pools whose status could not be obtained by the last request mapped to the exception raised, and every pool whose last fetch failed (including
+        # pools not in the last request)
+        self.errors: dict[str, Exception] = {}
+        self.__failing: dict[str, Exception] = {}
+
+        # Fetches of failing pools still running from a previous request, mapping pool name to asyncio Task (async) or Future (synchronous)
+        self.__background_tasks: dict[str, asyncio.Task] = {}
+        self.__background_futures: dict[str, concurrent.futures.Future] = {}
+
+        # Limits concurrent commands, created on first use. The executor is kept between requests so background fetches outlive the request
+        self.__semaphore: asyncio.Semaphore | None = None
+        self.__executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+    def __pool_status(self, poolname: str, pools_status: dict[str, Any]) -> dict[str, Any]:
+        """
+        :param poolname: Name of the pool requested.
+        :param pools_status: Output of 'zpool status <pool>'.
+        :return: Status of the pool.
+        :raises: ValueError if the output does not contain the pool.
+        """
+        if poolname not in pools_status: raise ValueError(f'\'zpool status {poolname}\' did not return the status of the pool')
+
+        return pools_status[poolname]
+
+    def __forget_removed(self, poolnames: list[str]) -> list[str]:
+        """
+        Forget the failures and background fetches of pools that no longer exist.
+
+        :param poolnames: Names of all pools on the system, as returned by 'zpool list'.
+        :return: poolnames
+        """
+        for poolname in self.__failing.keys() - set(poolnames):
+            del self.__failing[poolname]
+        for poolname in self.__background_tasks.keys() - set(poolnames):
+            self.__background_tasks.pop(poolname).cancel()
+        for poolname in self.__background_futures.keys() - set(poolnames):
+            del self.__background_futures[poolname]
+
+        return poolnames
+
+    async def __fetch_async(self, poolname: str) -> dict[str, Any]:
+        """
+        :param poolname: Name of the pool.
+        :return: Status of the pool, obtained by running 'zpool status <pool>' once a concurrent command slot is available.
+        """
+        async with self.__semaphore:
+            pools_status = {name: data async for name, data in _iter_zpool_binary_async(command='status', params=['-t', poolname], timings=self.__timings,
+                                                                                          timeout=self.__timeout, prefix=self.__prefix)}
+
+        return self.__pool_status(poolname=poolname, pools_status=pools_status)
+
+    def __fetch(self, poolname: str) -> dict[str, Any]:
+        """
+        Synchronous version of __fetch_async(), run on a worker thread.
+
+        :param poolname: Name of the pool.
+        :return: Status of the pool, obtained by running 'zpool status <pool>'.
+        """
+        pools_status = dict(_iter_zpool_binary(command='status', params=['-t', poolname], timings=self.__timings, timeout=self.__timeout,
+                                               prefix=self.__prefix))
+
+        return self.__pool_status(poolname=poolname, pools_status=pools_status)
+
+    def iter_status(self, poolnames: list[str]) -> Iterator[tuple[str, dict[str, Any]]]:
+        """
+        :param poolnames: List of selected ZPool names to retrieve status for. An empty list means all pools are retrieved.
+        :return: Iterator yielding (pool name, status for that pool as a dictionary) in the order the status of each pool is received.
+        :raises: TimeoutError (or ValueError) if 'zpool list' could not obtain the list of pools.
+        """
+        if self.__executor is None: self.__executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.__max_parallel, thread_name_prefix='zpool')
+        if not poolnames: poolnames = self.__forget_removed(get_zpools(timeout=self.__timeout, prefix=self.__prefix))
+
+        # Start fetching every pool not already being fetched in the background, the request only waits for pools that are not failing
+        futures = {self.__background_futures.pop(poolname, None) or self.__executor.submit(self.__fetch, poolname): poolname for poolname in poolnames}
+        waiting = {future for future, poolname in futures.items() if poolname not in self.__failing or future.done()}
+        self.errors = {poolname: self.__failing[poolname] for poolname in futures.values() if poolname in self.__failing}
+
+        for future in concurrent.futures.as_completed(waiting):
+            poolname = futures[future]
+            try:
+                pool_data = future.result()
+
+            except (TimeoutError, ValueError, OSError) as error:
+                self.errors[poolname] = self.__failing[poolname] = error
+                continue
+
+            self.errors.pop(poolname, None)
+            self.__failing.pop(poolname, None)
+            yield poolname, pool_data
+
+        # Fetches of failing pools that have not completed continue in the background, the pool stays failing until a result is received
+        for future, poolname in futures.items():
+            if future not in waiting: self.__background_futures[poolname] = future
+
+    async def iter_status_async(self, poolnames: list[str]) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """
+        Asynchronous version of iter_status().
+
+        :param poolnames: List of selected ZPool names to retrieve status for. An empty list means all pools are retrieved.
+        :return: Async iterator yielding (pool name, status for that pool as a dictionary) in the order the status of each pool is received.
+        :raises: TimeoutError (or ValueError) if 'zpool list' could not obtain the list of pools.
+        """
+        if self.__semaphore is None: self.__semaphore = asyncio.Semaphore(self.__max_parallel)
+        if not poolnames: poolnames = self.__forget_removed(await get_zpools_async(timeout=self.__timeout, prefix=self.__prefix))
+
+        # Start fetching every pool not already being fetched in the background, the request only waits for pools that are not failing
+        tasks = {self.__background_tasks.pop(poolname, None) or asyncio.create_task(self.__fetch_async(poolname)): poolname for poolname in poolnames}
+        waiting = {task for task, poolname in tasks.items() if poolname not in self.__failing or task.done()}
+        self.errors = {poolname: self.__failing[poolname] for poolname in tasks.values() if poolname in self.__failing}
+
+        try:
+            pending = waiting
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    poolname = tasks[task]
+                    try:
+                        pool_data = task.result()
+
+                    except (TimeoutError, ValueError, OSError) as error:
+                        self.errors[poolname] = self.__failing[poolname] = error
+                        continue
+
+                    self.errors.pop(poolname, None)
+                    self.__failing.pop(poolname, None)
+                    yield poolname, pool_data
+
+        except BaseException:
+            # The request was cancelled or iteration stopped early, cancelling the fetches kills their zpool processes
+            for task in tasks:
+                task.cancel()
+            raise
+
+        # Fetches of failing pools that have not completed continue in the background, the pool stays failing until a result is received
+        for task, poolname in tasks.items():
+            if task not in waiting:
+                task.add_done_callback(_retrieve_exception)
+                self.__background_tasks[poolname] = task
@@ -1,3 +1,4 @@
+from .vdevtable import VDEVTable
 from .zpoolpanel import ZPoolPanel
 
 from .dashboard import ZPoolDashboard
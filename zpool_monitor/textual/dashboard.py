@@ -4,30 +4,47 @@ display current ZPool status.
 """
 
 # Import System Libraries
-import asyncio
-from typing import Dict
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict
+import re
+import time
 from textual.app import App, ComposeResult
 from textual.containers import VerticalScroll, Grid, Vertical, VerticalGroup
 from textual.widgets import Header, Footer
 from textual.reactive import reactive
 from textual.timer import Timer
 
-# Import zpool_monitor.zpool.ZPool, zpool_monitor.Monitor, and zpool.textual.ZPoolPanel classes
+# Import zpool_monitor.zpool.ZPool, zpool_monitor.Monitor, zpool_monitor.IOStatCollector, zpool_monitor.EventFollower, instrumentation, scheduler, and zpool.textual.ZPoolPanel classes.
+# DaemonSource is only used for type annotations, it is passed in when connected to a daemon
 from . import ZPoolPanel
 from .. import Monitor
+from ..monitor import ChangeSet
+from ..iostat import IOStatCollector
+from ..events import EventFollower
+from ..instrumentation import PipelineTimings, ProfileCapture
+from ..scheduler import DEFAULT_IDLE_BACKOFF, RefreshScheduler
 from ..zpool import ZPool
 
+if TYPE_CHECKING: from ..daemon import DaemonSource
+
 
 class ZPoolDashboard(App):
     """
     Textual app that manages a Dashboard of ZPoolPanels to monitor the ongoing status of selected ZPools on the system. Features include:
 
-    - Panel contents are refreshed using a timer.
-    - Timer period can be manually changed via '+'/'-' key-bindings and mouse on UI.
+    - Panel contents are refreshed using a timer. Active pools (not ONLINE, scrub/resilver/trim in progress) are refreshed every refresh period, idle
+      pools back off to a multiple of the refresh period, and both are stretched if the 'zpool' command is slow to respond.
+    - Optionally, 'zpool events' is followed and pools are refreshed as soon as an event reports a change to them, idle pools are then only polled as a
+      safety net.
+    - When connected to a daemon, pools are refreshed as soon as the daemon pushes an update, the timer only reconnects if the connection is lost.
+    - At most one refresh is in progress at a time. If 'zpool status' fails or times out, panels keep displaying the last good status marked as stale.
+    - Refresh period can be manually changed via '+'/'-' key-bindings and mouse on UI.
+    - Idle backoff (the number of refresh periods between refreshes of idle pools) can be manually changed via ']'/'[' key-bindings and mouse on UI.
     - Immediate refresh can be manually triggered via 'r' key-binding and mouse on UI.
     - Theme light/dark mode can be toggled via 'd' key-binding and mouse on UI.
     - Theme can be selected via 't' key-binding and mouse on UI.
     - Help available via ^p key binding and mouse on UI.
+    - Refresh stage timings optionally displayed in the subtitle, and profiling toggled via 'p' key-binding if a profile directory is provided.
     - Panels are scrollable if all data cannot fit within panel
     """
     # ---------- App CSS Style Sheet ----------
@@ -38,20 +55,33 @@ class ZPoolDashboard(App):
         ('r', 'refresh_now', 'Refresh now'),
         ('+', 'increase_refresh', 'Increase refresh period'),
         ('-', 'decrease_refresh', 'Decrease refresh period'),
+        (']', 'increase_idle_backoff', 'Increase idle backoff'),
+        ('[', 'decrease_idle_backoff', 'Decrease idle backoff'),
         ('d', 'app.toggle_dark', 'Toggle dark mode'),
         ('t', 'app.change_theme', 'Select new Theme'),
+        ('p', 'toggle_profile', 'Toggle profiler'),
         ('q', 'quit', 'Quit')
     ]
 
     # Refresh timer parameters
     refresh_period: reactive[int | None] = reactive(None)
 
-    def __init__(self, monitor: Monitor, initial_theme: str, initial_refresh: int, **kwargs):
+    def __init__(self, monitor: Monitor, initial_theme: str, initial_refresh: int, iostat_collector: IOStatCollector | None = None,
+                 timings: PipelineTimings | None = None, show_timings: bool = False, profile_capture: ProfileCapture | None = None,
+                 idle_backoff: float = DEFAULT_IDLE_BACKOFF, event_follower: EventFollower | None = None, daemon_source: 'DaemonSource | None' = None, **kwargs):
         """
         Construct the Application class by initialising internal variables.
 
         :param monitor: Instance of Monitor to be used to fetch updated ZPool data.
         :param initial_refresh: Initial refresh period for App.
+        :param iostat_collector: Optional instance of IOStatCollector, if provided VDEV throughput is displayed and updated every sampling interval.
+        :param timings: Optional instance of PipelineTimings (also passed to the Monitor) used to time each stage of every refresh.
+        :param show_timings: Display rolling percentiles of the refresh timings in the subtitle.
+        :param profile_capture: Optional instance of ProfileCapture, if provided profiling is started/stopped with the 'p' key-binding.
+        :param idle_backoff: Idle pools are refreshed every idle_backoff times the refresh period (1.0 = all pools are refreshed every refresh period).
+        :param event_follower: Optional instance of EventFollower, pools are refreshed as soon as an event reports a change to them and idle pools are only
+                               polled every safety period of the follower.
+        :param daemon_source: Optional instance of DaemonSource used by the Monitor, pools are refreshed as soon as the daemon pushes an update.
         :param kwargs: Arguments to pass to superclass App().
         """
         super().__init__(**kwargs)
@@ -60,6 +90,33 @@ class ZPoolDashboard(App):
         self.__initial_refresh = initial_refresh
         self.__timer: Timer | None = None
 
+        # Decides which pools are due to be refreshed on each tick of the timer
+        self.__idle_backoff = max(idle_backoff, 1.0)
+        self.__event_follower = event_follower
+        self.__daemon_source = daemon_source
+        self.__scheduler = RefreshScheduler(active_period=initial_refresh, idle_period=initial_refresh * self.__idle_backoff, events=event_follower)
+
+        # At most one refresh is in progress, refreshes requested while in progress are merged into a single refresh of all the requested pools (or all
+        # pools) which starts once the refresh in progress completes
+        self.__refreshing: bool = False
+        self.__pending_all: bool = False
+        self.__pending_pools: set[str] = set()
+
+        # Time (seconds since the epoch) the status of each pool was last refreshed successfully, displayed if the panel is marked as stale
+        self.__refreshed: dict[str, float] = {}
+
+        # Failed pools without a panel (eg. a host that could not be reached before any of its pools were received), notified once until they recover
+        self.__failed_unknown: set[str] = set()
+
+        # VDEV throughput collector and the collector version last displayed
+        self.__iostat_collector = iostat_collector
+        self.__iostat_version: int = -1
+
+        # Refresh instrumentation
+        self.__timings = timings
+        self.__show_timings = show_timings and timings is not None
+        self.__profile_capture = profile_capture
+
     # ---------- UI Composition ----------
     def compose(self) -> ComposeResult:
         """
@@ -84,9 +141,32 @@ class ZPoolDashboard(App):
         Initial population of the display and install timer for periodic updates
         """
         self.title = 'ZPool Monitor'
+
+        # Start following pool events before the first refresh, so no change is missed between the refresh and the start of the 'zpool events' process
+        if self.__event_follower: await self.__event_follower.start()
+        if self.__daemon_source: self.__daemon_source.on_update = self.__daemon_updated
         await self.refresh_panels()
         self.refresh_period = self.__initial_refresh
 
+        # Check every second whether any pools are due to be refreshed
+        self.__timer = self.set_interval(1, self.refresh_due_panels)
+
+        # Start the single 'zpool iostat' process and update VDEV throughput every sampling interval
+        if self.__iostat_collector:
+            await self.__iostat_collector.start()
+            self.set_interval(self.__iostat_collector.interval, self.refresh_iostats)
+
+    async def on_unmount(self) -> None:
+        """
+        Stop the 'zpool iostat' and 'zpool events' processes, and finish any profile capture and timings log when the application exits
+        """
+        if self.__iostat_collector: await self.__iostat_collector.stop()
+        if self.__event_follower: await self.__event_follower.stop()
+        if self.__daemon_source: self.__daemon_source.on_update = None
+
+        if self.__profile_capture: self.__profile_capture.stop()
+        if self.__timings: self.__timings.close()
+
     # ---------- Refresh Timer related methods ----------
     def action_increase_refresh(self) -> None:
         """Increase the refresh period by one second up to a maximum of 60 seconds"""
@@ -96,53 +176,255 @@ class ZPoolDashboard(App):
         """Decrease the refresh period by one second down to a maximum of 1 second"""
         self.refresh_period = max(self.refresh_period - 1, 1)
 
+    def action_increase_idle_backoff(self) -> None:
+        """Increase the number of refresh periods between refreshes of idle pools by one up to a maximum of 60"""
+        self.__set_idle_backoff(min(self.__idle_backoff + 1, 60))
+
+    def action_decrease_idle_backoff(self) -> None:
+        """Decrease the number of refresh periods between refreshes of idle pools by one down to a minimum of 1 (all pools refreshed every period)"""
+        self.__set_idle_backoff(max(self.__idle_backoff - 1, 1.0))
+
+    def __set_idle_backoff(self, idle_backoff: float) -> None:
+        """
+        Set the idle backoff, taking effect from the next tick of the timer, and update the application subtitle to display the idle refresh period
+
+        :param idle_backoff: Number of refresh periods between refreshes of idle pools.
+        """
+        self.__idle_backoff = idle_backoff
+        self.__scheduler.idle_period = self.__scheduler.active_period * self.__idle_backoff
+        self.__update_sub_title()
+
     def watch_refresh_period(self, ) -> None:
         """
         Automatically called when internal refresh_period Reactive variable is changed
 
-        1) Delete current timer (if it exists)
+        1) Set the refresh periods of active and idle pools, taking effect from the next tick of the timer, and the period scan/trim progress is sampled at
         2) Update application subtitle to display the refresh period on screen
-        3) Recreate timer with the new refresh period to call refresh_panels() every refresh_period seconds
         """
-        if self.__timer: self.__timer.stop()
-        self.sub_title = f'Refresh period: (⏱️ {self.refresh_period} seconds)'
-        self.__timer = self.set_interval(self.refresh_period, self.refresh_panels)
+        if self.refresh_period is None: return
+
+        self.__scheduler.active_period = self.refresh_period
+        self.__scheduler.idle_period = self.refresh_period * self.__idle_backoff
+        self.__monitor.sample_period = self.refresh_period
+        self.__update_sub_title()
+
+    def __update_sub_title(self) -> None:
+        """
+        Display the effective refresh periods (stretched if the 'zpool' command is slow), and the refresh timings if requested, in the application subtitle.
+        The timings are followed by the number of pool statuses received that were unchanged (so not applied), out of all pool statuses received
+        """
+        if self.refresh_period is None: return
+
+        active, idle = round(self.__scheduler.effective_active_period), round(self.__scheduler.effective_idle_period)
+        self.sub_title = f'Refresh period: (⏱️ {active} seconds{f', {idle} seconds idle' if idle != active else ''})'
+        if self.__show_timings and (summary := self.__timings.summary()):
+            hits, misses = self.__monitor.fingerprint_hits, self.__monitor.fingerprint_misses
+            self.sub_title += f'  Refresh: {summary}  Unchanged: {hits}/{hits + misses} pools'
 
     # ---------- Manual refresh related methods ----------
     # Manual refresh related methods
     async def action_refresh_now(self) -> None:
         """
-        Activated when user presses "r" to implement an immediate refresh. Call refresh_panels() to update the display
+        Activated when user presses "r" to implement an immediate refresh. Call refresh_panels() to update the display. The refresh runs as a worker so
+        key-bindings remain responsive if 'zpool status' is slow to respond
         """
-        await self.refresh_panels()
+        self.run_worker(self.refresh_panels(), group='refresh')
+
+    # ---------- Profiling related methods ----------
+    def check_action(self, action: str, parameters: tuple[object, ...]) -> bool | None:
+        """
+        The profiler key-binding is only available (and displayed) if a profile directory was provided
+        """
+        if action == 'toggle_profile': return self.__profile_capture is not None
+
+        return True
+
+    def action_toggle_profile(self) -> None:
+        """
+        Activated when user presses "p" to start profiling, or to stop profiling and write the profile and allocation snapshot
+        """
+        if self.__profile_capture.active:
+            self.notify(f'Profile written to {', '.join(self.__profile_capture.stop())}', title='Profiler stopped')
+        else:
+            self.__profile_capture.start()
+            self.notify('Press p again to stop profiling and write the results', title='Profiler started')
 
     # ---------- Refreshing dashboard related methods ----------
-    async def refresh_panels(self) -> None:
+    async def refresh_due_panels(self) -> None:
+        """
+        Called every second by the timer, refresh all pools or only the active pools if they are due to be refreshed. A tick while a refresh is in progress
+        is dropped, the scheduler decides what is due once the refresh has completed.
+        """
+        if self.__refreshing: return
+
+        if due := self.__scheduler.due(time.monotonic()): await self.refresh_panels(poolnames=None if due.all_pools else due.poolnames)
+
+    def __daemon_updated(self) -> None:
+        """
+        Called by the DaemonSource when the daemon pushes an update (or the connection is lost), refresh all pools from the latest status. The refresh runs
+        as a worker, and is merged with any refresh in progress
+        """
+        self.run_worker(self.refresh_panels(), group='refresh')
+
+    async def refresh_panels(self, poolnames: list[str] | None = None) -> None:
+        """
+        Refresh the ZPool status and update the display. If a refresh is already in progress, the request is merged with any other pending requests and
+        performed by the caller of the refresh in progress once it completes, so this returns immediately.
+
+        :param poolnames: Optional names of the (active) pools to rescan, defaults to rescanning all pools.
+        """
+        if poolnames is None:
+            self.__pending_all = True
+        else:
+            self.__pending_pools.update(poolnames)
+
+        if self.__refreshing: return
+
+        self.__refreshing = True
+        try:
+            while self.__pending_all or self.__pending_pools:
+                poolnames = None if self.__pending_all else sorted(self.__pending_pools)
+                self.__pending_all, self.__pending_pools = False, set()
+                await self.__refresh_panels(poolnames=poolnames)
+
+        finally:
+            self.__refreshing = False
+
+    async def __refresh_panels(self, poolnames: list[str] | None) -> None:
         """
         Use the inbuilt Monitor instance to rescan and update the ZPool status. Then update the ZPoolPanel instances with the new data.
 
-        If a new pool is discovered, it must be added to the set of panels, destroyed pools must be removed.
+        If a new pool is discovered, its panel is inserted at its sorted position, destroyed pools have their panels removed. Other panels are untouched.
+        If the status cannot be obtained, the panels of the pools being rescanned keep their current data and are marked as stale.
+
+        :param poolnames: Optional names of the (active) pools to rescan, None to rescan all pools.
         """
-        # Re-scan all pools on the system
-        scanned_pools: Dict[str, ZPool] = await asyncio.to_thread(lambda: self.__monitor.refresh_stats())
+        # Time the stages of this refresh, fetch/decode/build are timed by the Monitor and render is timed until Textual has refreshed the screen
+        if self.__timings: self.__timings.begin()
+
+        # Re-scan the pools, the Monitor applies the new status to its persistent ZPool instances and reports which pools changed. The time taken is
+        # recorded by the scheduler to stretch the refresh periods if the 'zpool' command is slow
+        refresh_start = time.monotonic()
+        try:
+            changes: ChangeSet = await self.__monitor.refresh_stats_async(poolnames=poolnames)
+
+        except (TimeoutError, ConnectionError, ValueError) as error:
+            # 'zpool status' timed out (and was killed), failed without producing valid output, or the daemon could not be reached
+            if self.__timings: self.__timings.cancel()
+            self.__scheduler.record(pools=None, all_pools=poolnames is None, latency=time.monotonic() - refresh_start, now=refresh_start)
+            self.__update_sub_title()
+            self.__mark_stale(poolnames=poolnames, error=error)
+            return
+
+        self.__scheduler.record(pools=changes.pools, all_pools=poolnames is None, latency=time.monotonic() - refresh_start, now=refresh_start)
+        self.__update_sub_title()
+
+        scanned_pools: Dict[str, ZPool] = changes.pools
+        render_start = time.perf_counter()
+        if self.__iostat_collector:
+            self.__iostat_collector.set_known_pools(scanned_pools.keys(), vdevnames={poolname: {vdev.name for vdev, _ in pool.vdev_tree.rows()}
+                                                                                     for poolname, pool in scanned_pools.items()})
+
+        # When replaying a capture file or connected to a daemon, display the time the snapshot was taken
+        if self.__monitor.snapshot_time is not None: self.title = f'ZPool Monitor ({self.__monitor.snapshot_label}: {datetime.fromtimestamp(self.__monitor.snapshot_time).strftime('%c')})'
 
         # Retrieve all panels currently monitoring a pool
-        current_panels: Dict[str, ZPoolPanel] = {panel.zpool_data.poolname: panel for panel in self._body.children if isinstance(panel, ZPoolPanel) and panel.zpool_data.poolname}
+        current_panels: Dict[str, ZPoolPanel] = self.__current_panels()
+
+        # Panels of the pools that were rescanned are now displaying current data, except pools whose status could not be obtained
+        refreshed = time.time()
+        for poolname in (scanned_pools.keys() if poolnames is None else scanned_pools.keys() & set(poolnames)) - changes.errors.keys():
+            self.__refreshed[poolname] = refreshed
+            if poolname in current_panels: current_panels[poolname].set_stale(None)
 
         # 1) Remove panels for ZPools that no longer exist (all pool names that have panels but are no longer on the system)
         for poolname in (current_panels.keys() - scanned_pools.keys()):
             await current_panels[poolname].remove()
 
-        # 2) Update display for existing panels (all pool names that both exist and have an existing panel in the UI)
+        # 2) Update display for existing panels (all pool names that both exist and have an existing panel in the UI). Panels for pools whose displayed
+        #    status is unchanged are skipped to avoid re-rendering
         for poolname in (scanned_pools.keys() & current_panels.keys()):
-            current_panels[poolname].update_zpool_data((scanned_pools[poolname]))
+            if poolname in changes.changed_pools or current_panels[poolname].zpool_data is not scanned_pools[poolname]:
+                current_panels[poolname].update_zpool_data((scanned_pools[poolname]))
+
+        # 3) Add new panels to the system (all pool names that do not already have a panel) at their sorted position (scanned_pools already sorted).
+        #    Consecutive new panels are mounted together before the next existing panel, existing panels (and their scroll position) are never recreated
+        new_panels: list[ZPoolPanel] = []
+        for poolname, pool in scanned_pools.items():
+            if poolname not in current_panels:
+                new_panels.append(ZPoolPanel(pool, id=self.__panel_id(poolname)))
+            elif new_panels:
+                await self._body.mount(*new_panels, before=current_panels[poolname])
+                new_panels = []
+
+        if new_panels: await self._body.mount(*new_panels)
+
+        for poolname in self.__refreshed.keys() - scanned_pools.keys():
+            del self.__refreshed[poolname]
+
+        # Pools whose status could not be obtained (when fetching each pool or host in parallel) keep displaying their previous status
+        for poolname, error in changes.errors.items():
+            if poolname in scanned_pools:
+                self.__mark_stale(poolnames=[poolname], error=error, title=f'Refresh of {poolname} failed')
+            elif poolname not in self.__failed_unknown:
+                self.notify(str(error) or type(error).__name__, title=f'Refresh of {poolname} failed', severity='warning')
+
+        # A refresh of a subset of the pools does not show that other failed pools recovered
+        failed_unknown = changes.errors.keys() - scanned_pools.keys()
+        self.__failed_unknown = failed_unknown if poolnames is None else self.__failed_unknown | failed_unknown
 
-        # 3) Add new panels to the system (all pool names that do not already have a panel) ONLY IF there are panels to insert
-        if scanned_pools.keys() - current_panels.keys():
-            # Construct list of all panels in sorted order (scanned_pools already sorted)
-            # - If poolname exists, copy it from current_panels, otherwise provide default of a new ZPoolPanel initialised with the ZPool instance in scanned_pools
-            sorted_panels: list[ZPoolPanel] = [current_panels.get(poolname, ZPoolPanel(pool, id=f'panel_{poolname}')) for poolname, pool in scanned_pools.items()]
+        if self.__timings: self.call_after_refresh(self.__finish_timings, render_start, len(scanned_pools))
+
+    @staticmethod
+    def __panel_id(poolname: str) -> str:
+        """
+        :param poolname: Name of the pool.
+        :return: ID of the panel for the pool. Characters not allowed in an ID (eg. the '/' separating the host name of a remote pool) are escaped so each
+                 pool has a unique ID.
+        """
+        return 'panel_' + re.sub(r'[^A-Za-z0-9_]', lambda match: f'-{ord(match[0]):x}-', poolname)
+
+    def __current_panels(self) -> Dict[str, ZPoolPanel]:
+        """
+        :return: Dictionary mapping pool name to the ZPoolPanel displaying the pool for every panel currently displayed.
+        """
+        return {panel.zpool_data.poolname: panel for panel in self._body.children if isinstance(panel, ZPoolPanel) and panel.zpool_data.poolname}
+
+    def __mark_stale(self, poolnames: list[str] | None, error: Exception, title: str = 'Refresh failed') -> None:
+        """
+        A refresh failed, mark the panels of the pools that were being rescanned as stale and notify the user if they were not already stale.
+
+        :param poolnames: Names of the pools that were being rescanned, None for all pools.
+        :param error: The exception raised by the refresh.
+        :param title: Title of the notification.
+        """
+        newly_stale = False
+        for poolname, panel in self.__current_panels().items():
+            if poolnames is not None and poolname not in poolnames: continue
+
+            newly_stale |= not panel.has_class('stale')
+            panel.set_stale(self.__refreshed.get(poolname))
+
+        if newly_stale or not self.__refreshed: self.notify(str(error) or type(error).__name__, title=title, severity='warning')
+
+    def __finish_timings(self, render_start: float, pool_count: int) -> None:
+        """
+        Called once Textual has refreshed the screen following refresh_panels(), completing the timings for the refresh.
+
+        :param render_start: Time (time.perf_counter()) the panels started to be updated.
+        :param pool_count: Number of pools refreshed.
+        """
+        self.__timings.add('render', time.perf_counter() - render_start)
+        self.__timings.end(pools=pool_count, fingerprint_hits=self.__monitor.fingerprint_hits, fingerprint_misses=self.__monitor.fingerprint_misses)
+        self.__update_sub_title()
+
+    def refresh_iostats(self) -> None:
+        """
+        Update the VDEV throughput displayed in each ZPoolPanel if new samples have been received by the IOStatCollector.
+        """
+        if self.__iostat_collector.version == self.__iostat_version: return
+        self.__iostat_version = self.__iostat_collector.version
 
-            # As we are inserting panels and we don't know where they belong, we remove all panels from the display and remount all those in new_panels
-            await self._body.remove_children(self._body.children)
-            await self._body.mount(*sorted_panels)
+        for panel in self._body.children:
+            if isinstance(panel, ZPoolPanel) and panel.zpool_data:
+                panel.update_iostats(self.__iostat_collector.pool_stats(panel.zpool_data.poolname))
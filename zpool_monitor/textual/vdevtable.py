@@ -0,0 +1,167 @@
+"""
+This module provides the VDEVTable class which subclasses the Textual DataTable class to display the VDEVs of a single pool within a ZPoolPanel. Rows are
+keyed by VDEV GUID, so each refresh only updates the cells whose values changed rather than replacing the whole table, and the DataTable only renders the
+rows that are visible. This keeps refreshing and scrolling responsive for pools with hundreds of disks.
+
+ - Selecting a row (enter or mouse click) of a VDEV containing other VDEVs (eg. a raidz or mirror group) collapses/expands the group.
+ - Selecting a column header sorts the VDEVs by that column within each group, selecting it again reverses the order, and a third time restores pool order.
+"""
+
+# Import System Libraries
+from typing import Any
+from rich.console import RenderableType
+from rich.text import Text
+from textual.render import measure
+from textual.widgets import DataTable
+
+# Import zpool_monitor.zpool.VDEV and zpool_monitor.zpool.VDEVS classes
+from ..zpool import VDEV, VDEVS
+
+
+class VDEVTable(DataTable):
+    """
+    Implements a keyed-row DataTable displaying the VDEVs of a single ZPool, updated in place from the VDEVS instance of the pool
+    """
+    def __init__(self, *, id: str | None = None) -> None:
+        """
+        Initialise an empty table, rows are added by update_vdevs()
+
+        :param id: The ID of the widget in the DOM.
+        """
+        super().__init__(id=id, cursor_type='row', zebra_stripes=False)
+
+        self.__vdevs: VDEVS | None = None
+
+        # Column labels, and the cells of each row (keyed by row key) currently displayed
+        self.__labels: list[str] = []
+        self.__cells: dict[str, list[RenderableType]] = {}
+
+        # Signature of each row currently displayed (raw VDEV fields, collapse/expand marker and throughput cells). Rows whose signature is unchanged
+        # are skipped without building or comparing their cells
+        self.__signatures: dict[str, tuple] = {}
+
+        # Mapping of row key to (VDEV instance, True if the VDEV contains other VDEVs) for each row currently displayed
+        self.__row_vdevs: dict[str, tuple[VDEV, bool]] = {}
+
+        # Keys of collapsed VDEV groups, and the column (index into labels) and direction the VDEVs are sorted by (None for pool order)
+        self.__collapsed: set[Any] = set()
+        self.__sort_column: int | None = None
+        self.__sort_reverse: bool = False
+
+    # ---------- Internal Methods ----------
+    def __marker(self, vdev: VDEV, has_children: bool) -> str:
+        """
+        :param vdev: Instance of VDEV.
+        :param has_children: True if the VDEV contains other VDEVs.
+        :return: Marker displayed before the name of a VDEV group indicating whether it is collapsed or expanded, empty for other VDEVs.
+        """
+        if not has_children: return ''
+
+        return '▸ ' if vdev.key in self.__collapsed else '▾ '
+
+    def __row_cells(self, vdev: VDEV, marker: str, iostat_row: list[str]) -> list[RenderableType]:
+        """
+        :param vdev: Instance of VDEV.
+        :param marker: Collapse/expand marker displayed before the name.
+        :param iostat_row: Throughput cells for the VDEV.
+        :return: List of cells to display for the VDEV.
+        """
+        row = vdev.row_data
+
+        return [vdev.name_cell(marker=marker) if marker else row[0], *row[1:], *iostat_row]
+
+    def __wider_than_column(self, label: str, cell: RenderableType) -> bool:
+        """
+        :param label: Label (key) of the column.
+        :param cell: New value of a cell in the column.
+        :return: True if the cell is wider than the content of the column, so the column width must be recalculated to display it. Columns do not shrink
+                 when their widest cell narrows, as recalculating the width measures every cell of the column.
+        """
+        renderable = Text.from_markup(cell) if isinstance(cell, str) else cell
+
+        return measure(self.app.console, renderable, 1) > self.columns[label].content_width
+
+    def __sync(self) -> None:
+        """
+        Synchronise the table with the VDEVS instance. Columns are only rebuilt if the labels changed (eg. throughput columns were added), and rows are
+        only rebuilt if the set or order of displayed VDEVs changed. Otherwise only cells whose values changed are updated.
+        """
+        if self.__vdevs is None: return
+
+        labels = self.__vdevs.labels
+        if labels != self.__labels:
+            self.clear(columns=True)
+            for label in labels:
+                self.add_column(label, key=label)
+            self.__labels, self.__cells = labels, {}
+
+        rows = self.__vdevs.rows(collapsed=self.__collapsed, sort_column=self.__sort_column, reverse=self.__sort_reverse)
+        row_vdevs = {str(vdev.key): (vdev, has_children) for vdev, has_children in rows}
+
+        if list(row_vdevs) != list(self.__cells):
+            # VDEVs were added, removed, reordered, collapsed or expanded: rebuild the rows, keeping the cursor on the same VDEV
+            cursor_key = self.coordinate_to_cell_key(self.cursor_coordinate).row_key.value if self.row_count else None
+
+            self.clear()
+            self.__cells, self.__signatures = {}, {}
+            for row_key, (vdev, has_children) in row_vdevs.items():
+                marker, iostat_row = self.__marker(vdev, has_children), self.__vdevs.iostat_row(vdev.name)
+                self.__cells[row_key] = self.__row_cells(vdev=vdev, marker=marker, iostat_row=iostat_row)
+                self.__signatures[row_key] = (vdev.fields, marker, iostat_row)
+                self.add_row(*self.__cells[row_key], key=row_key)
+
+            if cursor_key in row_vdevs: self.move_cursor(row=self.get_row_index(cursor_key), animate=False)
+        else:
+            # Same rows in the same order: update only the cells that changed in rows whose signature changed
+            for row_key, (vdev, has_children) in row_vdevs.items():
+                marker, iostat_row = self.__marker(vdev, has_children), self.__vdevs.iostat_row(vdev.name)
+                signature = (vdev.fields, marker, iostat_row)
+                previous = self.__signatures[row_key]
+                if signature == previous: continue
+
+                # The name cell is a Padding (which does not compare by value), it is only replaced if the name, depth, state or marker changed
+                row = self.__row_cells(vdev=vdev, marker=marker, iostat_row=iostat_row)
+                if (vdev.fields[:3], marker) == (previous[0][:3], previous[1]): row[0] = self.__cells[row_key][0]
+                for label, old, new in zip(self.__labels, self.__cells[row_key], row):
+                    if new is not old and new != old: self.update_cell(row_key, label, new, update_width=self.__wider_than_column(label, new))
+
+                self.__cells[row_key], self.__signatures[row_key] = row, signature
+
+        self.__row_vdevs = row_vdevs
+
+    # ---------- Event handlers ----------
+    def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
+        """
+        Collapse or expand the selected VDEV if it contains other VDEVs
+        """
+        vdev, has_children = self.__row_vdevs.get(event.row_key.value, (None, False))
+        if not has_children: return
+
+        event.stop()
+        self.__collapsed ^= {vdev.key}
+        self.__sync()
+
+    def on_data_table_header_selected(self, event: DataTable.HeaderSelected) -> None:
+        """
+        Sort by the selected column, reverse the sort if already sorted by the column, and restore pool order if already reversed
+        """
+        event.stop()
+
+        if self.__sort_column != event.column_index:
+            self.__sort_column, self.__sort_reverse = event.column_index, False
+        elif not self.__sort_reverse:
+            self.__sort_reverse = True
+        else:
+            self.__sort_column, self.__sort_reverse = None, False
+
+        self.__sync()
+
+    # ---------- Public Methods ----------
+    def update_vdevs(self, vdevs: VDEVS) -> None:
+        """
+        Display the VDEVs of a (possibly updated) VDEVS instance, updating only the cells that changed.
+
+        :param vdevs: Instance of VDEVS for the pool.
+        """
+        self.__vdevs = vdevs
+        self.__sync()
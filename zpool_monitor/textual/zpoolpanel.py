@@ -2,25 +2,36 @@
 This module provides the ZPoolPanel class which subclasses the Textual Static class to create a Panel that can be displayed in the dashboard. A single
 ZPoolPanel widget represents the current status of a single zpool on the system. The Widget contains a reactive member variable to allow a regular refresh
 and update of the data being displayed in the Panel.
+
+The VDEVs are displayed by a VDEVTable (a keyed-row DataTable) which is updated cell by cell, the pool summary and scan status are displayed as rich Tables.
+Each section is only updated if its content version (from the ZPool instance) changed since it was last displayed, and a layout pass is only requested if the
+number of rows in the summary or scan status changed, so refreshes where a pool is unchanged do no work in the compositor.
 """
 
 # Import System Libraries
+from datetime import datetime
+from typing import Any
 from rich.table import Table
+from rich.text import Text
 from textual.app import ComposeResult
 from textual.reactive import reactive
 from textual.widgets import Static
 from textual.containers import VerticalScroll
 
-# Import zpool_monitor.zpool.ZPool class
+# Import zpool_monitor.zpool.ZPool and zpool_monitor.textual.VDEVTable classes, and the pool name parser for pools of remote hosts
 from ..zpool import ZPool
+from ..multihost import split_poolname
+from .vdevtable import VDEVTable
 
 
 class ZPoolPanel(Static):
     """
     Implements a textual renderable Panel to display current statistics for a single ZPool
     """
-    # zpool_data is a reactive member variable. watch_zpool_data() will be automatically called when zpool_data is updated
-    zpool_data: reactive[ZPool | None] = reactive(None, layout=True)
+    # zpool_data is a reactive member variable. watch_zpool_data() will be automatically called when zpool_data is updated. The Monitor updates ZPool
+    # instances in place, so the watch is triggered even when the same instance is assigned. The panel itself is neither repainted nor laid out when
+    # zpool_data changes, each section refreshes itself only if it changed
+    zpool_data: reactive[ZPool | None] = reactive(None, layout=False, repaint=False, always_update=True)
 
     def __init__(self, zpool_data: ZPool, *, id: str | None = None) -> None:
         """
@@ -33,11 +44,22 @@ class ZPoolPanel(Static):
         # Update zpool_data without triggering a reactive watch()
         self.set_reactive(ZPoolPanel.zpool_data, zpool_data)
 
+        # Latest throughput for each VDEV (mapping VDEV name to VDEVIOStat) if an IOStatCollector is in use, applied to every new ZPool instance
+        self._iostats: dict[str, Any] | None = None
+
         # Child widgets set in compose()
         self._status_table: Static | None = None
-        self._vdevs_table: Static | None = None
+        self._vdevs_table: VDEVTable | None = None
         self._scan_table: Static | None = None
 
+        # (ZPool instance, content version) last displayed by each section ('summary', 'vdevs', 'scan'), and the number of rows last displayed by the
+        # summary and scan Static Widgets
+        self._versions: dict[str, tuple[ZPool, int]] = {}
+        self._row_counts: dict[str, int] = {}
+
+        # Time the displayed data was last refreshed if it is stale (the last refresh of the pool failed), None if the displayed data is current
+        self._stale_since: float | None = None
+
     # ---------- Internal Methods ----------
     def _refresh_panel(self) -> None:
         """
@@ -46,20 +68,51 @@ class ZPoolPanel(Static):
         # If panel is still building, just return as we have no data yet
         if not self.zpool_data: return
 
-        # Update panel title
-        self.border_title = f'ZPool: {self.zpool_data.poolname}'
+        # Update panel title, pools of remote hosts are titled with the host name
+        host, poolname = split_poolname(self.zpool_data.poolname)
+        self.border_title = f'🖥️ {host} ─ ZPool: {poolname}' if host else f'ZPool: {poolname}'
+
+        # Apply VDEV throughput to the (possibly new) ZPool instance before rendering
+        if self._iostats is not None: self.zpool_data.iostats = self._iostats
+
+        # Retrieve rich Table display from ZPool instance and update the sections that changed, the VDEVTable only updates cells that changed
+        if self._changed('summary', self.zpool_data.summary_version): self._update_static(self._status_table, 'summary', self.zpool_data.summary)
+        if self._changed('vdevs', self.zpool_data.vdevs_version): self._vdevs_table.update_vdevs(self.zpool_data.vdev_tree)
+        if self._changed('scan', self.zpool_data.scan_version): self._update_static(self._scan_table, 'scan', self.zpool_data.scan_stats)
+
+    def _changed(self, section: str, version: int) -> bool:
+        """
+        Check (and record) whether a section of the panel needs to be updated
+
+        :param section: Name of the section ('summary', 'vdevs' or 'scan').
+        :param version: Content version of the section from the current ZPool instance.
+        :return: True if the ZPool instance or the content version changed since the section was last displayed
+        """
+        shown = (self.zpool_data, version)
+        if self._versions.get(section) == shown: return False
+
+        self._versions[section] = shown
+        return True
+
+    def _update_static(self, widget: Static, section: str, table: Table) -> None:
+        """
+        Update a Static Widget with a new rich Table, requesting a layout pass only if the number of rows changed
 
-        # Retrieve rich Table display from ZPool instance and update the three Static Widgets
-        self._status_table.update(self.zpool_data.summary)
-        self._vdevs_table.update(self.zpool_data.vdevs)
-        self._scan_table.update(self.zpool_data.scan_stats)
+        :param widget: The Static Widget to update.
+        :param section: Name of the section displayed by the widget.
+        :param table: The new rich Table to display.
+        """
+        layout = self._row_counts.get(section) != table.row_count
+        self._row_counts[section] = table.row_count
+        widget.update(table, layout=layout)
 
     # ---------- UI Composition ----------
     def compose(self) -> ComposeResult:
         """
         Construct the panel for display by textual.
 
-        Create a scrollable panel (in case we have many ZPools or problems). The panel contains the three tables that will be returned by ZPool for display.
+        Create a scrollable panel (in case we have many ZPools or problems). The panel contains the three tables that will be returned by ZPool for display,
+        the VDEVs table is preceded by its title as a DataTable has no title.
 
         :return: A ComposeResult iterable that will yield the sub-widgets for the panel.
         """
@@ -67,7 +120,9 @@ class ZPoolPanel(Static):
             self._status_table = Static(Table(), id='status_table')
             yield self._status_table
 
-            self._vdevs_table = Static(Table(), id='vdevs_table')
+            yield Static(Text(' 🔍 Details', style='bold yellow'), classes='vdevs_title')
+
+            self._vdevs_table = VDEVTable(id='vdevs_table')
             yield self._vdevs_table
 
             self._scan_table = Static(Table(), id='scan_table')
@@ -97,3 +152,27 @@ class ZPoolPanel(Static):
         """
         self.zpool_data = new_zpool_data
 
+    def set_stale(self, since: float | None) -> None:
+        """
+        Mark the data displayed by this panel as stale (the last refresh of the pool failed) in the panel border, or clear the marker.
+
+        :param since: Time (seconds since the epoch) the displayed data was last refreshed, or None if the displayed data is current.
+        """
+        # Setting the border subtitle always refreshes the panel, so it is only set if the marker changed
+        if since == self._stale_since: return
+        self._stale_since = since
+
+        self.border_subtitle = f'⚠️ stale since {datetime.fromtimestamp(since).strftime('%H:%M:%S')}' if since is not None else ''
+        self.set_class(since is not None, 'stale')
+
+    def update_iostats(self, iostats: dict[str, Any]) -> None:
+        """
+        Update the VDEV throughput displayed in this panel and the throughput cells of the VDEVs table.
+
+        :param iostats: Dictionary mapping VDEV name to VDEVIOStat containing the latest throughput for each VDEV in the pool
+        """
+        self._iostats = iostats
+
+        if self.zpool_data and self._vdevs_table:
+            self.zpool_data.iostats = iostats
+            self._vdevs_table.update_vdevs(self.zpool_data.vdev_tree)
@@ -0,0 +1,136 @@
+"""
+This module provides the ChangeWatcher class used by 'zpool_status --watch' to follow the status of the pools on a plain terminal without a dashboard.
+
+The first refresh is displayed in full, exactly as by 'zpool_status'. After that, each refresh only prints a timestamped line for each change: pool and VDEV
+state transitions, error count changes, and scans and trims starting or finishing (the change events generated by the Monitor), and progress ticks of scans
+and trims in progress. A progress tick is only printed when the percentage complete (to 0.1%) changes, so nothing is printed while the pools are idle and
+the output stays small over slow or flaky consoles (eg. a serial or IPMI console).
+"""
+
+# Import System Libraries
+from datetime import datetime, timedelta
+from typing import Any
+from rich.markup import escape
+import rich.console
+import time
+
+# Import zpool_monitor.Monitor class, and zpool.ZPool class and formatting functions
+from .monitor import Monitor, ChangeSet
+from .zpool import humanise, ZPool
+
+
+class ChangeWatcher:
+    """
+    Refreshes a Monitor every interval and prints the changes, see the module documentation.
+    """
+    def __init__(self, monitor: Monitor, console: rich.console.Console, interval: float):
+        """
+        Construct the watcher
+
+        :param monitor: Instance of Monitor used to fetch the ZPool status.
+        :param console: The application instance of the Rich Console class to use to output data
+        :param interval: Period (seconds) between refreshes.
+        """
+        self.__monitor = monitor
+        self.__console = console
+        self.__interval = interval
+        self.__monitor.sample_period = interval
+
+        # Percentage complete last printed for each scan or trim in progress (keyed by pool name and 'scan' or 'trim'), and the error message last printed
+        # for each pool whose status could not be obtained
+        self.__progress: dict[tuple[str, str], str] = {}
+        self.__errors: dict[str, str] = {}
+
+    def __print(self, line: str) -> None:
+        """
+        Print a single line of output, prefixed by the time the status was obtained.
+
+        :param line: Text to print (not interpreted as console markup).
+        """
+        timestamp = datetime.fromtimestamp(self.__monitor.snapshot_time or time.time()).strftime('%Y-%m-%d %H:%M:%S')
+        self.__console.print(f'[dim]{timestamp}[/] {escape(line)}', highlight=False, soft_wrap=True)
+
+    @staticmethod
+    def __progress_ticks(pool: ZPool) -> dict[tuple[str, str], tuple[str, str]]:
+        """
+        :param pool: Instance of ZPool.
+        :return: Dictionary mapping (pool name, 'scan' or 'trim') to (percentage complete, progress line) for each scan or trim of the pool in progress.
+        """
+        ticks: dict[tuple[str, str], tuple[str, str]] = {}
+
+        if pool.scan is not None and (progress := pool.scan.progress) is not None and progress.to_scan:
+            percentage = f'{100 * progress.issued / progress.to_scan:.1f}%'
+            rate = 'stalled' if progress.stalled else f'at {humanise(progress.issue_rate)}/s'
+            time_left = f', {timedelta(seconds=round(progress.time_left))} remaining' if progress.time_left is not None else ''
+            ticks[(pool.poolname, 'scan')] = (percentage, f'{pool.poolname}: {pool.scan.function.lower()} {percentage} issued {rate}{time_left}')
+
+        # Trims are reported across every device of the pool being trimmed, the start and end of each device's trim is reported by its change events
+        if (trim := pool.vdev_tree.trim_progress) is not None and trim[1]:
+            trimmed, to_trim, devices = trim
+            percentage = f'{100 * trimmed / to_trim:.1f}%'
+            ticks[(pool.poolname, 'trim')] = (percentage, f'{pool.poolname}: trim {percentage} ({humanise(trimmed)} of {humanise(to_trim)}) on '
+                                                          f'{devices} device{'s' if devices > 1 else ''}')
+
+        return ticks
+
+    def __print_changes(self, changes: ChangeSet, errors: dict[str, Exception]) -> None:
+        """
+        Print the changes made by a refresh, and the progress of the scans and trims whose percentage complete changed.
+
+        :param changes: ChangeSet returned by the refresh.
+        :param errors: Pools whose status could not be obtained by the refresh mapped to the exception raised.
+        """
+        for event in changes.events:
+            self.__print(event.description)
+
+        for poolname, error in errors.items():
+            message = str(error) or type(error).__name__
+            if self.__errors.get(poolname) != message: self.__print(f'{poolname}: status could not be obtained ({message})')
+            self.__errors[poolname] = message
+        for poolname in self.__errors.keys() - errors.keys():
+            del self.__errors[poolname]
+            if poolname in changes.pools: self.__print(f'{poolname}: status obtained again')
+
+        progress: dict[tuple[str, str], str] = {}
+        for pool in changes.pools.values():
+            for key, (percentage, line) in self.__progress_ticks(pool).items():
+                if self.__progress.get(key) != percentage: self.__print(line)
+                progress[key] = percentage
+        self.__progress = progress
+
+    def __refresh(self) -> None:
+        """
+        Refresh all pools and print the changes. If the status cannot be obtained, every pool is reported as failed and keeps its last status.
+        """
+        try:
+            changes = self.__monitor.refresh_stats()
+
+        except (TimeoutError, ConnectionError, ValueError) as error:
+            # Nothing changed, the pools keep their last status
+            unchanged = ChangeSet()
+            unchanged.pools = self.__monitor.changes.pools
+            self.__print_changes(changes=unchanged, errors=dict.fromkeys(unchanged.pools or ['zpool status'], error))
+            return
+
+        self.__print_changes(changes=changes, errors=changes.errors)
+
+    def run(self, pools_status: dict[str, Any] | None = None) -> None:
+        """
+        Display every pool in full, then refresh every interval and print the changes until interrupted. A refresh that takes longer than the interval
+        delays the next refresh rather than causing refreshes to run back to back.
+
+        :param pools_status: Optional output of 'zpool status' already obtained by the caller, used for the first refresh (see Monitor.refresh_stats()).
+        """
+        for pool in self.__monitor.iter_refresh_stats(pools_status=pools_status):
+            Monitor.display_pool(console=self.__console, pool=pool)
+
+        # Pools that could not be displayed are reported, progress ticks are only printed once the progress differs from that displayed
+        self.__print_changes(changes=ChangeSet(), errors=self.__monitor.changes.errors)
+        self.__progress = {key: percentage for pool in self.__monitor.changes.pools.values()
+                           for key, (percentage, _) in self.__progress_ticks(pool).items()}
+
+        next_refresh = time.monotonic() + self.__interval
+        while True:
+            time.sleep(max(next_refresh - time.monotonic(), 0))
+            next_refresh = max(next_refresh + self.__interval, time.monotonic())
+            self.__refresh()
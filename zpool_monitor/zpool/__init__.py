@@ -1,9 +1,14 @@
-from .formatting import humanise, warning_colour_number, create_progress_renderable
+from .formatting import humanise, warning_colour_number, create_progress_renderable, create_sparkline
+
+from .progress import DEFAULT_SAMPLE_PERIOD, RateWindow, PoolProgress
+
+from .changes import (ChangeEvent, PoolAdded, PoolRemoved, PoolStateChanged, VDEVAdded, VDEVRemoved, VDEVStateChanged, ErrorCountChanged, TrimStateChanged,
+                      ScanStateChanged)
 
 from .vdev  import VDEV
 
 from .vdevs import VDEVS
 
-from .scanstatus import ScanStatus
+from .scanstatus import ScanStatus, ScanProgress
 
 from .zpool import ZPool
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+This module provides the typed change events generated when a new 'zpool status' snapshot is applied to an existing ZPool. Events describe transitions
+that consumers (eg. the dashboard, alerting, history) care about without having to compare whole snapshots themselves.
+"""
+
+# Import System Libraries
+from typing import NamedTuple
+
+
+class PoolAdded(NamedTuple):
+    """A pool was found that was not present in the previous snapshot"""
+    poolname: str
+
+    @property
+    def description(self) -> str:
+        """
+        :return: Description of the change as a single line of text.
+        """
+        return f'{self.poolname}: pool added'
+
+
+class PoolRemoved(NamedTuple):
+    """A pool present in the previous snapshot no longer exists"""
+    poolname: str
+
+    @property
+    def description(self) -> str:
+        """
+        :return: Description of the change as a single line of text.
+        """
+        return f'{self.poolname}: pool removed'
+
+
+class PoolStateChanged(NamedTuple):
+    """The state of a pool changed (eg. ONLINE -> DEGRADED)"""
+    poolname: str
+    old: str
+    new: str
+
+    @property
+    def description(self) -> str:
+        """
+        :return: Description of the change as a single line of text.
+        """
+        return f'{self.poolname}: state {self.old} → {self.new}'
+
+
+class VDEVAdded(NamedTuple):
+    """A VDEV was added to a pool"""
+    poolname: str
+    vdev: str
+
+    @property
+    def description(self) -> str:
+        """
+        :return: Description of the change as a single line of text.
+        """
+        return f'{self.poolname}: VDEV {self.vdev} added'
+
+
+class VDEVRemoved(NamedTuple):
+    """A VDEV was removed from a pool"""
+    poolname: str
+    vdev: str
+
+    @property
+    def description(self) -> str:
+        """
+        :return: Description of the change as a single line of text.
+        """
+        return f'{self.poolname}: VDEV {self.vdev} removed'
+
+
+class VDEVStateChanged(NamedTuple):
+    """The state of a VDEV changed (eg. ONLINE -> FAULTED)"""
+    poolname: str
+    vdev: str
+    old: str
+    new: str
+
+    @property
+    def description(self) -> str:
+        """
+        :return: Description of the change as a single line of text.
+        """
+        return f'{self.poolname}: VDEV {self.vdev} state {self.old} → {self.new}'
+
+
+class ErrorCountChanged(NamedTuple):
+    """
+    An error counter changed. counter is one of 'read', 'write', 'checksum' for a VDEV, or 'data' (with vdev set to None) for the pool data error count
+    """
+    poolname: str
+    vdev: str | None
+    counter: str
+    old: int
+    new: int
+
+    @property
+    def delta(self) -> int:
+        """
+        :return: Change in the error count since the previous snapshot (negative if the counter was cleared).
+        """
+        return self.new - self.old
+
+    @property
+    def description(self) -> str:
+        """
+        :return: Description of the change as a single line of text.
+        """
+        return f'{self.poolname}: {f'VDEV {self.vdev} ' if self.vdev is not None else ''}{self.counter} errors {self.old} → {self.new}'
+
+
+class TrimStateChanged(NamedTuple):
+    """The trim state of a VDEV changed (eg. COMPLETE -> ACTIVE)"""
+    poolname: str
+    vdev: str
+    old: str | None
+    new: str | None
+
+    @property
+    def description(self) -> str:
+        """
+        :return: Description of the change as a single line of text.
+        """
+        return f'{self.poolname}: VDEV {self.vdev} trim {self.old or 'none'} → {self.new or 'none'}'
+
+
+class ScanStateChanged(NamedTuple):
+    """
+    The scan function or state of a pool changed (eg. a scrub started or finished). Function and state are None if the pool had (or has) no scan status
+    """
+    poolname: str
+    old_function: str | None
+    old_state: str | None
+    new_function: str | None
+    new_state: str | None
+
+    @property
+    def description(self) -> str:
+        """
+        :return: Description of the change as a single line of text.
+        """
+        old = f'{self.old_function} {self.old_state}' if self.old_function else 'none'
+        new = f'{self.new_function} {self.new_state}' if self.new_function else 'none'
+
+        return f'{self.poolname}: scan {old} → {new}'
+
+
+# Type of any change event
+ChangeEvent = (PoolAdded | PoolRemoved | PoolStateChanged | VDEVAdded | VDEVRemoved | VDEVStateChanged | ErrorCountChanged | TrimStateChanged |
+               ScanStateChanged)
@@ -43,3 +43,20 @@ def create_progress_renderable(pre_bar_txt: str, post_bar_txt: str, percentage:
     task = progress.add_task(total=100, description='')
     progress.update(task, completed=percentage)
     return progress
+
+
+def create_sparkline(values: list[float], width: int = 32) -> str:
+    """
+    Create a single line sparkline (eg. '▁▃▅█▆') of the most recent values, scaled so the largest value is a full block.
+
+    :param values: Values to plot, oldest first. Values should not be negative
+    :param width: Maximum number of values (characters) to plot, the most recent values are used
+
+    :return: Sparkline string, empty if there are no values
+    """
+    blocks = '▁▂▃▄▅▆▇█'
+    values = values[-width:]
+    peak = max(values, default=0)
+    if peak <= 0: return blocks[0] * len(values)
+
+    return ''.join(blocks[round(max(value, 0) / peak * (len(blocks) - 1))] for value in values)
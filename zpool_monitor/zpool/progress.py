@@ -0,0 +1,222 @@
+"""
+This module provides classes to track the progress of scrubs, resilvers and trims across refreshes, so that throughput and time remaining are estimated
+from recent progress rather than averaged over the whole pass.
+
+Each tracked quantity (bytes examined/issued by a scan, bytes trimmed on a VDEV) keeps a bounded ring buffer of (timestamp, value) samples, sized so the
+samples span the moving window at the period the pools are refreshed. From the samples a moving-window rate is calculated for display, an exponentially
+weighted moving average (EWMA) of the rate is used to estimate the time remaining, and the recent per-sample rates are kept for a sparkline. A quantity
+that made less than one unit per second of progress over the moving window is stalled, and no time remaining is estimated.
+"""
+
+# Import System Libraries
+from collections import deque
+from typing import Any
+import math
+
+
+# Default period (seconds) between samples, the default refresh period of the dashboard
+DEFAULT_SAMPLE_PERIOD: float = 10.0
+
+
+class RateWindow:
+    """
+    Bounded history of (timestamp, value) samples for a single monotonically increasing progress counter.
+    """
+    __slots__ = ('__samples', '__rates', '__ewma', '__window', '__tau')
+
+    def __init__(self, window: float = 300.0, tau: float = 120.0, sample_period: float = DEFAULT_SAMPLE_PERIOD):
+        """
+        Construct an empty rate window
+
+        :param window: Period (seconds) the moving-window rate is calculated over.
+        :param tau: Time constant (seconds) of the EWMA rate, older rates decay by a factor of e every tau seconds.
+        :param sample_period: Expected period (seconds) between samples, enough samples (and per-sample rates) are kept to span the window.
+        """
+        self.__window = window
+        self.__tau = tau
+        self.__samples: deque[tuple[float, int]] = deque(maxlen=self.__size(sample_period))
+        self.__rates: deque[float] = deque(maxlen=self.__samples.maxlen)
+        self.__ewma: float | None = None
+
+    def __size(self, sample_period: float) -> int:
+        """
+        :param sample_period: Expected period (seconds) between samples.
+        :return: Number of samples required to span the moving window (plus the sample at the start of the window).
+        """
+        return math.ceil(self.__window / max(sample_period, 0.1)) + 1
+
+    def resize(self, sample_period: float) -> None:
+        """
+        Change the number of samples kept for a new sample period, the most recent samples are kept.
+
+        :param sample_period: Expected period (seconds) between samples.
+        """
+        if (size := self.__size(sample_period)) == self.__samples.maxlen: return
+
+        self.__samples = deque(self.__samples, maxlen=size)
+        self.__rates = deque(self.__rates, maxlen=size)
+
+    def clear(self) -> None:
+        """Discard all samples (eg. when a new pass starts)"""
+        self.__samples.clear()
+        self.__rates.clear()
+        self.__ewma = None
+
+    def add(self, timestamp: float, value: int) -> None:
+        """
+        Add a sample. Samples that are not newer than the last sample are ignored, and a value lower than the last sample (the counter was reset) discards
+        the history.
+
+        :param timestamp: Time (seconds since the epoch) the value was obtained.
+        :param value: Value of the progress counter.
+        """
+        if self.__samples:
+            last_timestamp, last_value = self.__samples[-1]
+            if timestamp <= last_timestamp: return
+            if value < last_value: self.clear()
+
+        if self.__samples:
+            last_timestamp, last_value = self.__samples[-1]
+            elapsed = timestamp - last_timestamp
+            rate = (value - last_value) / elapsed
+
+            # Time-aware smoothing factor so irregular refresh periods are weighted correctly
+            alpha = 1 - math.exp(-elapsed / self.__tau)
+            self.__ewma = rate if self.__ewma is None else alpha * rate + (1 - alpha) * self.__ewma
+            self.__rates.append(rate)
+
+        self.__samples.append((timestamp, value))
+
+    @property
+    def rate(self) -> float | None:
+        """
+        :return: Average rate (units per second) over the samples within the moving window, or None if fewer than two samples are available.
+        """
+        if len(self.__samples) < 2: return None
+
+        last_timestamp, last_value = self.__samples[-1]
+        in_window = [sample for sample in self.__samples if last_timestamp - sample[0] <= self.__window]
+        first_timestamp, first_value = in_window[0] if len(in_window) >= 2 else self.__samples[-2]
+
+        return (last_value - first_value) / (last_timestamp - first_timestamp)
+
+    @property
+    def stalled(self) -> bool:
+        """
+        :return: True if less than one unit per second of progress was made over the moving window.
+        """
+        return (rate := self.rate) is not None and rate < 1
+
+    @property
+    def ewma_rate(self) -> float | None:
+        """
+        :return: Exponentially weighted moving average rate (units per second), or None if fewer than two samples are available.
+        """
+        return self.__ewma
+
+    def eta(self, remaining: float) -> float | None:
+        """
+        :param remaining: Units of work remaining.
+        :return: Estimated seconds until complete based on the EWMA rate, or None if no estimate is possible: fewer than two samples, or progress has stalled
+                 (the EWMA rate still decaying towards zero would give an ever growing, and eventually overflowing, estimate).
+        """
+        if self.__ewma is None or self.__ewma < 1 or self.stalled: return None
+
+        return max(remaining, 0) / self.__ewma
+
+    @property
+    def history(self) -> list[float]:
+        """
+        :return: Rate between each pair of consecutive samples, oldest first.
+        """
+        return list(self.__rates)
+
+
+class PoolProgress:
+    """
+    Tracks the progress of the scan of a pool, and the trim of each VDEV in the pool, across refreshes. Memory is bounded: each RateWindow holds the number
+    of samples spanning its window at the sample period, scan windows are cleared when no scan is in progress, and trim windows only exist for VDEVs that are
+    currently trimming.
+    """
+    __slots__ = ('__pass', '__sample_period', 'examined', 'issued', '__trims')
+
+    def __init__(self, sample_period: float = DEFAULT_SAMPLE_PERIOD):
+        """
+        :param sample_period: Expected period (seconds) between samples, the period the pool is refreshed at while a scan or trim is in progress.
+        """
+        # Identifies the current scan pass (function and pass start time), the windows are cleared when a new pass starts
+        self.__pass: tuple[str, int] | None = None
+        self.__sample_period = sample_period
+
+        self.examined: RateWindow = RateWindow(sample_period=sample_period)
+        self.issued: RateWindow = RateWindow(sample_period=sample_period)
+
+        # Trim windows for VDEVs currently trimming, mapping VDEV GUID (or name if there is no GUID) to RateWindow
+        self.__trims: dict[str, RateWindow] = {}
+
+    @property
+    def sample_period(self) -> float:
+        """
+        :return: Expected period (seconds) between samples.
+        """
+        return self.__sample_period
+
+    @sample_period.setter
+    def sample_period(self, sample_period: float) -> None:
+        """
+        :param sample_period: New expected period (seconds) between samples, every window is resized to span its moving window at this period.
+        """
+        self.__sample_period = sample_period
+        for window in (self.examined, self.issued, *self.__trims.values()):
+            window.resize(sample_period)
+
+    def record(self, pool_data: dict[str, Any], timestamp: float) -> None:
+        """
+        Record a sample of scan and trim progress from a 'zpool status' snapshot of the pool.
+
+        :param pool_data: JSON Status output for single ZPool from 'zpool status' mapped to a dictionary
+        :param timestamp: Time (seconds since the epoch) the snapshot was taken.
+        """
+        scan_data = pool_data.get('scan_stats', {})
+        if scan_data.get('state') == 'SCANNING':
+            scan_pass = (scan_data['function'], scan_data['pass_start'])
+            if scan_pass != self.__pass:
+                self.__pass = scan_pass
+                self.examined.clear()
+                self.issued.clear()
+
+            self.examined.add(timestamp=timestamp, value=scan_data['examined'])
+            self.issued.add(timestamp=timestamp, value=scan_data['issued'])
+
+        elif self.__pass is not None:
+            self.__pass = None
+            self.examined.clear()
+            self.issued.clear()
+
+        trimming: set[str] = set()
+        self.__record_trims(vdevs_data=pool_data['vdevs'], timestamp=timestamp, trimming=trimming)
+        for key in self.__trims.keys() - trimming:
+            del self.__trims[key]
+
+    def __record_trims(self, vdevs_data: dict[str, Any], timestamp: float, trimming: set[str]) -> None:
+        """
+        Recursively record trim progress for every VDEV that is currently trimming.
+
+        :param vdevs_data: JSON output (from 'zpool status' mapped to a dictionary) for the VDEVs within a pool or VDEV
+        :param timestamp: Time (seconds since the epoch) the snapshot was taken.
+        :param trimming: Set to add the key of each trimming VDEV to.
+        """
+        for data in vdevs_data.values():
+            if data.get('trim_state') == 'ACTIVE':
+                key = data.get('guid', data['name'])
+                trimming.add(key)
+                self.__trims.setdefault(key, RateWindow(sample_period=self.__sample_period)).add(timestamp=timestamp, value=data['trimmed'])
+
+            if 'vdevs' in data: self.__record_trims(vdevs_data=data['vdevs'], timestamp=timestamp, trimming=trimming)
+
+    def trim(self, key: str) -> RateWindow | None:
+        """
+        :param key: GUID (or name if there is no GUID) of the VDEV.
+        :return: Trim progress window for the VDEV, or None if the VDEV is not trimming.
+        """
+        return self.__trims.get(key)
@@ -1,131 +1,255 @@
 """
 This module provides the ScanStatus class which parses the 'zpool status' JSON output for the scan status a single ZPool into internal state. State
 information for the ScanStatus can then be accessed as a rich Table for display
+
+Only the raw scan fields are stored when the ScanStatus is constructed. The rich Table (including progress bars) is built the first time it is requested,
+and is memoised for the lifetime of the instance. A ScanStatus is replaced (rather than updated) when a new snapshot changes the scan status.
 """
 
 # Import System Libraries
 from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, NamedTuple
 from rich import box
 from rich.console import RenderableType
 from rich.pretty import Pretty
 from rich.table import Table
 
-# Import zpool.formatting functions
-from . import humanise, create_progress_renderable
+# Import zpool.formatting functions and zpool.PoolProgress class
+from . import humanise, create_progress_renderable, create_sparkline, PoolProgress
+
+
+class ScanProgress(NamedTuple):
+    """Progress of a scrub/resilver in progress, time_left is None if the scan has stalled"""
+    examined: int
+    issued: int
+    to_scan: int
+    issue_rate: float
+    time_left: float | None
+
+    @property
+    def stalled(self) -> bool:
+        """
+        :return: True if the scan is issuing less than one byte per second.
+        """
+        return self.issue_rate < 1
 
 
 class ScanStatus:
     """
     Maps the Scan Status for a single pool to a table for display purposes
     """
-    def __init__(self, scan_data: dict[str, Any]):
+    __slots__ = ('__now', '__function', '__state', '__start_time', '__end_time', '__pass_start', '__to_examine', '__examined', '__skipped', '__issued',
+                 '__processed', '__errors', '__debug_data', '__scan_rate', '__issue_rate', '__eta', '__history', '__status')
+
+    def __init__(self, scan_data: dict[str, Any], now: float | None = None, progress: PoolProgress | None = None):
         """
         Construct instance of class to display the scan status for a single pool
 
         :param scan_data: JSON Scan Status output for single ZPool from 'zpool status' mapped to a dictionary
+        :param now: Time (seconds since the epoch) the scan status was obtained, used to calculate scan rates. Defaults to the current time.
+        :param progress: Optional progress history of the pool. If it holds enough samples of the scan in progress, rates are calculated over the recent
+                         moving window, the time remaining from the EWMA rate, and a sparkline of recent throughput is displayed. Otherwise, rates are
+                         averaged over the whole pass until enough samples have been recorded.
         """
-        # Table title to display when rendering table
-        self.__table_title: str = ''
-
-        # Status information stored in dictionary mapping property to value. Value is stored as a list of Renderables so when a scrub/resilver is progressing
-        # the status text and progress bars are neatly organised into columns
-        self.__status: dict[str, list[RenderableType]] = {}
+        self.__now: float = datetime.now().timestamp() if now is None else now
+
+        self.__function: str = scan_data['function']
+        self.__state: str = scan_data['state']
+        self.__start_time: int = scan_data.get('start_time', 0)
+        self.__end_time: int = scan_data.get('end_time', 0)
+        self.__pass_start: int = scan_data.get('pass_start', 0)
+        self.__to_examine: int = scan_data.get('to_examine', 0)
+        self.__examined: int = scan_data.get('examined', 0)
+        self.__skipped: int = scan_data.get('skipped', 0)
+        self.__issued: int = scan_data.get('issued', 0)
+        self.__processed: int = scan_data.get('processed', 0)
+        self.__errors: int = scan_data.get('errors', 0)
+
+        # Windowed scan and issue rates, EWMA time remaining, and recent issue rates from the progress history (None/empty if not available)
+        self.__scan_rate: float | None = progress.examined.rate if progress else None
+        self.__issue_rate: float | None = progress.issued.rate if progress else None
+        self.__eta: float | None = progress.issued.eta(self.__to_examine - self.__skipped - self.__issued) if progress else None
+        self.__history: list[float] = progress.issued.history if progress else []
+
+        # The complete scan data is only kept if the function or state is not understood, so it can be displayed for debugging
+        understood = self.__function in ('SCRUB', 'RESILVER') and self.__state in ('FINISHED', 'SCANNING')
+        self.__debug_data: dict[str, Any] | None = None if understood else scan_data
+
+        # Memoised Table returned by status, built on first access
+        self.__status: Table | None = None
 
-        self.__function = scan_data['function']
-        # Different method called for each scan type to simplify code reading
-        match self.__function:
-            case 'SCRUB':
-                self.__table_title: str = ' 🧼 Scrub Status'
+    @property
+    def function(self) -> str:
+        """
+        :return: Scan function as reported by 'zpool status' (eg. 'SCRUB', 'RESILVER')
+        """
+        return self.__function
 
-                match scan_data['state']:
-                    # Table contents for a completed scrub
-                    case 'FINISHED': self.__populate_table_finished(scan_data=scan_data, finished_label='Last Scrub Finished:',
-                                                                    show_scanned=True, processed_label='Repaired:', processed_icon='🪛')
+    @property
+    def state(self) -> str:
+        """
+        :return: Scan state as reported by 'zpool status' (eg. 'SCANNING', 'FINISHED')
+        """
+        return self.__state
 
-                    # Table contents for an in-progress scrub
-                    case 'SCANNING': self.__populate_table_scanning(scan_data=scan_data, processed_label='Repaired:', processed_icon='🪛')
+    @property
+    def fields(self) -> tuple:
+        """
+        :return: Tuple of the raw scan fields (excluding the time the status was obtained), used to detect whether the scan status changed.
+        """
+        return (self.__function, self.__state, self.__start_time, self.__end_time, self.__pass_start, self.__to_examine, self.__examined, self.__skipped,
+                self.__issued, self.__processed, self.__errors, self.__debug_data)
 
-                    # Table contents for a scrub with an unknown state
-                    case _: self.__populate_table_debug(scan_data=scan_data)
+    @property
+    def errors(self) -> int:
+        """
+        :return: Number of errors encountered by the scan
+        """
+        return self.__errors
 
-            case 'RESILVER':
-                self.__table_title = ' 🥈 Resilver Status'
+    @property
+    def end_time(self) -> int:
+        """
+        :return: Time (seconds since the epoch) the scan finished, 0 if the scan has not finished
+        """
+        return self.__end_time
 
-                match scan_data['state']:
-                    # Table contents for a completed resilver
-                    case 'FINISHED': self.__populate_table_finished(scan_data=scan_data, finished_label='Last Resilver Finished:',
-                                                                    show_scanned=False, processed_label='Resilvered:', processed_icon='🚧')
+    @property
+    def window_issue_rate(self) -> float | None:
+        """
+        :return: Issue rate (bytes per second) over the recent moving window of a scan in progress (zero if nothing was issued within the window), or
+                 None if the scan is not in progress or not enough samples have been recorded.
+        """
+        return self.__issue_rate if self.__state == 'SCANNING' else None
 
-                    # Table contents for an in-progress resilver
-                    case 'SCANNING': self.__populate_table_scanning(scan_data=scan_data, processed_label='Resilvered:', processed_icon='🚧')
+    @property
+    def progress(self) -> ScanProgress | None:
+        """
+        The issue rate over the recent moving window (including zero if nothing was issued within the window) and the EWMA time remaining are used if
+        available, otherwise averages over the whole pass. No time remaining is estimated if the scan has stalled.
 
-                    # Table contents for a resilver with an unknown state
-                    case _: self.__populate_table_debug(scan_data=scan_data)
+        :return: Progress of the scan (bytes examined/issued/to scan, issue rate, and seconds remaining), or None if the scan is not in progress
+        """
+        if self.__state != 'SCANNING': return None
 
-            case _:
-                self.__table_title = '❌ Unknown Function Status'
+        to_scan: int = self.__to_examine - self.__skipped
+        issue_rate: float = self.__issue_rate if self.__issue_rate is not None else self.__issued / max(self.__now - self.__pass_start, 1)
+        time_left: float | None = None if issue_rate < 1 else self.__eta if self.__eta is not None else (to_scan - self.__issued) / issue_rate
 
-                self.__status['Unknown Function:'] = [scan_data['function']]
-                self.__populate_table_debug(scan_data=scan_data)
+        return ScanProgress(examined=self.__examined, issued=self.__issued, to_scan=to_scan, issue_rate=issue_rate, time_left=time_left)
 
-    def __populate_table_finished(self, scan_data: dict[str, Any], finished_label:str, show_scanned: bool, processed_label: str, processed_icon: str) -> None:
+    @property
+    def record(self) -> dict[str, Any]:
+        """
+        :return: The scan status as a dictionary of plain values (no renderables are built), including the percentage examined and issued, issue rate, and
+                 time remaining (seconds) of a scan in progress (None otherwise, or if the scan has stalled).
         """
-        Parse the Scan Status dictionary for data a completed scan, extract information and populate self.__status with data to display in a table when
-        retrieved.
+        progress = self.progress
+        return {'function': self.__function, 'state': self.__state, 'start_time': self.__start_time, 'end_time': self.__end_time or None,
+                'to_examine': self.__to_examine, 'examined': self.__examined, 'skipped': self.__skipped, 'issued': self.__issued,
+                'processed': self.__processed, 'errors': self.__errors,
+                'examined_percent': 100 * progress.examined / progress.to_scan if progress and progress.to_scan else None,
+                'issued_percent': 100 * progress.issued / progress.to_scan if progress and progress.to_scan else None,
+                'issue_rate': progress.issue_rate if progress else None, 'eta': progress.time_left if progress else None}
+
+    def __populate_table_finished(self, status: dict[str, list[RenderableType]], finished_label: str, show_scanned: bool, processed_label: str,
+                                  processed_icon: str) -> None:
+        """
+        Populate status with data to display in a table for a completed scan.
 
-        :param scan_data: JSON Scan Status output for single ZPool from 'zpool status' mapped to a dictionary
-        :param finished_label: Label to display as row header for scan_data['end_time']
+        :param status: Dictionary mapping property to a list of Renderables to populate
+        :param finished_label: Label to display as row header for the scan end time
         :param show_scanned: Should we add a row to show bytes examined
-        :param processed_label: Label to display as row header for scan_data['processed']
-        :param processed_icon: Icon to display as image for scan_data['processed']
+        :param processed_label: Label to display as row header for bytes processed
+        :param processed_icon: Icon to display as image for bytes processed
         """
-        self.__status[finished_label] = [f'🕓 {datetime.fromtimestamp(scan_data['end_time']).strftime('%c')}']
-        if show_scanned: self.__status['Scanned:'] = [f'🔍 {humanise(scan_data['examined'])}']
-        self.__status['Duration:'] = [f'⌛ {timedelta(seconds=scan_data['end_time'] - scan_data['start_time'])}']
-        self.__status[processed_label] = [f'{processed_icon} {humanise(scan_data['processed'])} with {scan_data['errors']} errors']
+        status[finished_label] = [f'🕓 {datetime.fromtimestamp(self.__end_time).strftime('%c')}']
+        if show_scanned: status['Scanned:'] = [f'🔍 {humanise(self.__examined)}']
+        status['Duration:'] = [f'⌛ {timedelta(seconds=self.__end_time - self.__start_time)}']
+        status[processed_label] = [f'{processed_icon} {humanise(self.__processed)} with {self.__errors} errors']
 
-    def __populate_table_scanning(self, scan_data: dict[str, Any], processed_label: str, processed_icon: str) -> None:
+    def __populate_table_scanning(self, status: dict[str, list[RenderableType]], processed_label: str, processed_icon: str) -> None:
         """
-        Parse the Scan Status dictionary for data an in-progress scan, extract information and populate self.__status with data to display in a table when
-        retrieved.
+        Populate status with data to display in a table for an in-progress scan.
 
-        :param scan_data: JSON Scan Status output for single ZPool from 'zpool status' mapped to a dictionary
-        :param processed_label: Label to display as row header for scan_data['processed']
-        :param processed_icon: Icon to display as image for scan_data['processed']
-        """
-        to_scan: int = scan_data['to_examine'] - scan_data['skipped']
-        time_elapsed: float = datetime.now().timestamp() - scan_data['pass_start']
-        issued: int = scan_data['issued']
-        scan_complete: float = 100 * scan_data['examined'] / to_scan
-        issue_complete: float = 100 * issued / to_scan
-        issue_rate: float = max(issued / time_elapsed, 1)
-        time_left: timedelta = timedelta(seconds=round((to_scan - issued) / issue_rate))
-
-        self.__status['Started:'] = [f'🕓 {datetime.fromtimestamp(scan_data['start_time']).strftime('%c')}']
-        self.__status['Scanned:'] = [f'🔍 {humanise(scan_data['examined'])} of {humanise(scan_data['to_examine'])}',
-                                     create_progress_renderable(pre_bar_txt='', post_bar_txt='', percentage=scan_complete)]
-        self.__status['Issued:'] = [f'🏁 {humanise(issued)} of {humanise(scan_data['to_examine'])} at {humanise(issue_rate)}/s',
-                                    create_progress_renderable(pre_bar_txt='', post_bar_txt=f' ⏳️ {time_left} remaining', percentage=issue_complete)]
-        self.__status[processed_label] = [f'{processed_icon} {humanise(scan_data['processed'])}']
-
-    def __populate_table_debug(self, scan_data: dict) -> None:
+        :param status: Dictionary mapping property to a list of Renderables to populate
+        :param processed_label: Label to display as row header for bytes processed
+        :param processed_icon: Icon to display as image for bytes processed
+        """
+        progress = self.progress
+        issued: int = progress.issued
+        issue_rate: str = 'stalled' if progress.stalled else f'at {humanise(progress.issue_rate)}/s'
+        scan_complete: float = 100 * progress.examined / progress.to_scan
+        issue_complete: float = 100 * issued / progress.to_scan
+        time_left: str = f'{timedelta(seconds=round(progress.time_left))} remaining' if progress.time_left is not None else '—'
+        scan_rate: str = f' at {humanise(self.__scan_rate)}/s' if self.__scan_rate is not None else ''
+
+        status['Started:'] = [f'🕓 {datetime.fromtimestamp(self.__start_time).strftime('%c')}']
+        status['Scanned:'] = [f'🔍 {humanise(self.__examined)} of {humanise(self.__to_examine)}{scan_rate}',
+                              create_progress_renderable(pre_bar_txt='', post_bar_txt='', percentage=scan_complete)]
+        status['Issued:'] = [f'🏁 {humanise(issued)} of {humanise(self.__to_examine)} {issue_rate}',
+                             create_progress_renderable(pre_bar_txt='', post_bar_txt=f' ⏳️ {time_left}', percentage=issue_complete)]
+        status[processed_label] = [f'{processed_icon} {humanise(self.__processed)}']
+        if len(self.__history) >= 2: status['Throughput:'] = [f'📈 {create_sparkline(self.__history)}']
+
+    def __populate_table_debug(self, status: dict[str, list[RenderableType]]) -> None:
         """
         Application does not understand the current status for display, add some debugging information to table for output.
 
-        :param scan_data: JSON Scan Status output for single ZPool from 'zpool status' mapped to a dictionary
+        :param status: Dictionary mapping property to a list of Renderables to populate
         """
-        self.__status['Unknown State:'] = [scan_data['state']]
-        self.__status['Debug Data:'] = [Pretty(scan_data)]
+        status['Unknown State:'] = [self.__state]
+        status['Debug Data:'] = [Pretty(self.__debug_data)]
 
     @property
     def status(self) -> Table:
         """
         :return: Return the Scan Status as a rich Table for display
         """
-        table = Table(title=self.__table_title, title_style='bold yellow', title_justify='left', show_header=False, show_lines=False, box=box.SIMPLE)
+        if self.__status is not None: return self.__status
+
+        # Status information stored in dictionary mapping property to value. Value is stored as a list of Renderables so when a scrub/resilver is progressing
+        # the status text and progress bars are neatly organised into columns
+        status: dict[str, list[RenderableType]] = {}
+
+        # Different method called for each scan type to simplify code reading
+        match self.__function:
+            case 'SCRUB':
+                table_title = ' 🧼 Scrub Status'
+
+                match self.__state:
+                    # Table contents for a completed scrub
+                    case 'FINISHED': self.__populate_table_finished(status=status, finished_label='Last Scrub Finished:',
+                                                                    show_scanned=True, processed_label='Repaired:', processed_icon='🪛')
+
+                    # Table contents for an in-progress scrub
+                    case 'SCANNING': self.__populate_table_scanning(status=status, processed_label='Repaired:', processed_icon='🪛')
+
+                    # Table contents for a scrub with an unknown state
+                    case _: self.__populate_table_debug(status=status)
+
+            case 'RESILVER':
+                table_title = ' 🥈 Resilver Status'
+
+                match self.__state:
+                    # Table contents for a completed resilver
+                    case 'FINISHED': self.__populate_table_finished(status=status, finished_label='Last Resilver Finished:',
+                                                                    show_scanned=False, processed_label='Resilvered:', processed_icon='🚧')
+
+                    # Table contents for an in-progress resilver
+                    case 'SCANNING': self.__populate_table_scanning(status=status, processed_label='Resilvered:', processed_icon='🚧')
+
+                    # Table contents for a resilver with an unknown state
+                    case _: self.__populate_table_debug(status=status)
+
+            case _:
+                table_title = '❌ Unknown Function Status'
+
+                status['Unknown Function:'] = [self.__function]
+                self.__populate_table_debug(status=status)
 
-        for key, value in self.__status.items():
-            table.add_row(key, *value)
+        self.__status = Table(title=table_title, title_style='bold yellow', title_justify='left', show_header=False, show_lines=False, box=box.SIMPLE)
+        for key, value in status.items():
+            self.__status.add_row(key, *value)
 
-        return table
+        return self.__status
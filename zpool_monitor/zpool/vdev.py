@@ -1,25 +1,35 @@
 """
 This module provides the VDEV class which parses the 'zpool status' JSON output for a single VDEV into internal state. State information for the VDEV
 can then be accessed as a list of data to insert into table cells for display
+
+Only the raw fields needed for display are stored when the VDEV is constructed. Rich renderables are built the first time the row is requested, and are
+memoised until the VDEV is updated with changed data from a new snapshot.
 """
 
 # Import System Libraries
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any
 from rich.console import RenderableType
 from rich.padding import Padding
 
-# Import zpool.formatting functions
-from . import humanise, warning_colour_number, create_progress_renderable
+# Import zpool.formatting functions, zpool.PoolProgress class and change events
+from . import humanise, warning_colour_number, create_progress_renderable, PoolProgress
+from .changes import ChangeEvent, VDEVStateChanged, ErrorCountChanged, TrimStateChanged
 
 
 class VDEV:
     """
     Extracts information for a single VDEV as returned by 'zpool status' and converts into Rich Renderables for display as a table with other VDEV instances
     """
+    __slots__ = ('__key', '__name', '__depth', '__state', '__size', '__device', '__read_errors', '__write_errors', '__checksum_errors', '__trim_notsup',
+                 '__trim_state', '__trim_time', '__trimmed', '__to_trim', '__trim_rate', '__trim_eta', '__row')
+
     state_colours: dict[str, str] = {'ONLINE': '[green]', 'OFFLINE': '[bold orange3]', 'DEGRADED': '[bold orange3]'}
 
-    def __init__(self, vdev_data: dict[str, Any], depth: int):
+    # Column labels for the VDEV table, in the same order as the cells returned by row_data
+    labels: list[str] = ['Device Name', 'Size', 'State', 'Device', 'Read', 'Write', 'Checksum', 'Last Trim']
+
+    def __init__(self, vdev_data: dict[str, Any], depth: int, progress: PoolProgress | None = None):
         """
         Construct instance of class to map status for a single VDEV
 
@@ -27,53 +37,115 @@ class VDEV:
 
         :param vdev_data: JSON output for single VDEV from 'zpool status' mapped to a dictionary
         :param depth: Count of depth of VDEV in pool, 0=top level, 1=actual device for no RAID, or RAID type, 2=actual device within RAID
+        :param progress: Optional progress history of the pool, used to display the trim rate and time remaining of an active trim
         """
+        self.__load(vdev_data=vdev_data, depth=depth, progress=progress)
+
+        # Memoised row of renderables, built on first access to row_data
+        self.__row: list[RenderableType] | None = None
+
+    def __load(self, vdev_data: dict[str, Any], depth: int, progress: PoolProgress | None) -> None:
+        """
+        Extract the raw fields used for display from the VDEV status
+
+        :param vdev_data: JSON output for single VDEV from 'zpool status' mapped to a dictionary
+        :param depth: Count of depth of VDEV in pool
+        :param progress: Optional progress history of the pool
+        """
+        self.__name: str = vdev_data['name']
+        self.__key: str = vdev_data.get('guid', self.__name)
+        self.__depth: int = depth
+        self.__state: str = vdev_data['state']
+
         # Extract VDEV size - done here as this is a number not a string
-        vdev_size = vdev_data.get('phys_space', vdev_data.get('def_space', 0))
-
-        # Extract information into dictionary mapping column headers to data as a Rich Renderable, column order is the key order listed here, special cases:
-        #   - VDEV name indented to represent depth. Name and state is coloured based on VDEV state
-        #   - Trim renderable calculated by __parse_trim_state() method due to multiple possibilities
-        self.__data: dict[str, RenderableType] = {'Device Name': Padding(f'{VDEV.state_colours.get(vdev_data['state'], '[bold red]')}{vdev_data['name']}', (0, 0, 0, depth * 2)),
-                                                  'Size': humanise(vdev_size) if vdev_size > 0 else '',
-                                                  'State': f'{VDEV.state_colours.get(vdev_data['state'], '[bold red]')}{vdev_data['state']}',
-                                                  'Device': vdev_data.get('devid', vdev_data.get('path', '')),
-                                                  'Read': warning_colour_number(vdev_data['read_errors']),
-                                                  'Write': warning_colour_number(vdev_data['write_errors']),
-                                                  'Checksum': warning_colour_number(vdev_data['checksum_errors']),
-                                                  'Last Trim': self.__parse_trim_state(vdev_data)
-                                                  }
-
-    def __parse_trim_state(self, vdev_data: dict[str, Any]) -> RenderableType:
+        self.__size: int = vdev_data.get('phys_space', vdev_data.get('def_space', 0))
+        self.__device: str = vdev_data.get('devid', vdev_data.get('path', ''))
+
+        self.__read_errors: int = vdev_data['read_errors']
+        self.__write_errors: int = vdev_data['write_errors']
+        self.__checksum_errors: int = vdev_data['checksum_errors']
+
+        # Trim state variables, trim_notsup is None if the VDEV is not a real device
+        self.__trim_notsup: int | None = vdev_data.get('trim_notsup')
+        self.__trim_state: str | None = vdev_data.get('trim_state')
+        self.__trim_time: int = vdev_data.get('trim_time', 0)
+        self.__trimmed: int = vdev_data.get('trimmed', 0)
+        self.__to_trim: int = vdev_data.get('to_trim', 0)
+
+        # Windowed trim rate and EWMA time remaining, None unless the VDEV is trimming and enough samples have been recorded
+        trim_window = progress.trim(self.__key) if progress else None
+        self.__trim_rate: float | None = trim_window.rate if trim_window else None
+        self.__trim_eta: float | None = trim_window.eta(self.__to_trim - self.__trimmed) if trim_window else None
+
+    @property
+    def fields(self) -> tuple:
         """
-        Parse trim state variables for VDEV as output by 'zpool status' and generate a rich renderable to display trim status
+        :return: Tuple of all raw fields, used to detect whether an update changed anything displayed.
+        """
+        return (self.__name, self.__depth, self.__state, self.__size, self.__device, self.__read_errors, self.__write_errors, self.__checksum_errors,
+                self.__trim_notsup, self.__trim_state, self.__trim_time, self.__trimmed, self.__to_trim, self.__trim_rate, self.__trim_eta)
+
+    def update(self, vdev_data: dict[str, Any], depth: int, poolname: str, events: list[ChangeEvent], progress: PoolProgress | None = None) -> bool:
+        """
+        Apply the status of this VDEV from a new snapshot. The memoised row is discarded only if a displayed field changed.
 
         :param vdev_data: JSON output for single VDEV from 'zpool status' mapped to a dictionary
+        :param depth: Count of depth of VDEV in pool
+        :param poolname: Name of the pool containing the VDEV, used in change events
+        :param events: List to append change events (state, error counter, and trim state changes) to
+        :param progress: Optional progress history of the pool
+        :return: True if any displayed field changed
+        """
+        before = self.fields
+        old_state, old_trim_state = self.__state, self.__trim_state
+        old_errors = (self.__read_errors, self.__write_errors, self.__checksum_errors)
+
+        self.__load(vdev_data=vdev_data, depth=depth, progress=progress)
+        if self.fields == before: return False
+
+        self.__row = None
+
+        if old_state != self.__state: events.append(VDEVStateChanged(poolname=poolname, vdev=self.__name, old=old_state, new=self.__state))
+        for counter, old, new in zip(('read', 'write', 'checksum'), old_errors, (self.__read_errors, self.__write_errors, self.__checksum_errors)):
+            if old != new: events.append(ErrorCountChanged(poolname=poolname, vdev=self.__name, counter=counter, old=old, new=new))
+        if old_trim_state != self.__trim_state:
+            events.append(TrimStateChanged(poolname=poolname, vdev=self.__name, old=old_trim_state, new=self.__trim_state))
+
+        return True
+
+    def __parse_trim_state(self) -> RenderableType:
+        """
+        Parse trim state variables for VDEV as output by 'zpool status' and generate a rich renderable to display trim status
 
         :return: Rich renderable to display current trim status
         """
         # VDEV is not a real device, return en empty string
-        if 'trim_notsup' not in vdev_data: return ''
+        if self.__trim_notsup is None: return ''
 
-        match vdev_data['trim_notsup']:
+        match self.__trim_notsup:
             case 0:
                 # Trim supported on this VDEV
-                match vdev_data['trim_state']:
+                match self.__trim_state:
                     case 'UNTRIMMED':
                         # Never trimmed, return string indicating this
                         return f'❌ Never been trimmed'
                     case 'COMPLETE':
                         # Trim not running, return time of last trim as a string
-                        return datetime.fromtimestamp(vdev_data['trim_time']).strftime('%c')
+                        return datetime.fromtimestamp(self.__trim_time).strftime('%c')
                     case 'ACTIVE':
-                        # Trim running, create and return a rich Progress Bar displaying trim progress
-                        complete = 100 * vdev_data['trimmed'] / vdev_data['to_trim']
-                        return create_progress_renderable(pre_bar_txt=f'✂️ {humanise(vdev_data['trimmed'])} of {humanise(vdev_data['to_trim'])}',
-                                                          post_bar_txt='',
+                        # Trim running, create and return a rich Progress Bar displaying trim progress. A trim that made no progress over the moving
+                        # window is displayed as stalled, with no time remaining
+                        complete = 100 * self.__trimmed / self.__to_trim
+                        stalled = self.__trim_rate is not None and self.__trim_rate < 1
+                        rate = ' stalled' if stalled else f' at {humanise(self.__trim_rate)}/s' if self.__trim_rate is not None else ''
+                        eta = f' ⏳️ {timedelta(seconds=round(self.__trim_eta))} remaining' if self.__trim_eta is not None else ''
+                        if stalled: eta = ' ⏳️ —'
+                        return create_progress_renderable(pre_bar_txt=f'✂️ {humanise(self.__trimmed)} of {humanise(self.__to_trim)}',
+                                                          post_bar_txt=f'{rate}{eta}',
                                                           percentage=complete)
                     case '_':
                         # Invalid value for trim state, should not get here
-                        raise ValueError(f'Trim state ({vdev_data['trim_state']}) returned by \'zpool status\' is invalid')
+                        raise ValueError(f'Trim state ({self.__trim_state}) returned by \'zpool status\' is invalid')
 
             case 1:
                 # Trim NOT supported on this VDEV, return empty string
@@ -81,16 +153,87 @@ class VDEV:
 
             case _:
                 # Invalid value for trim state, should not get here
-                raise ValueError(f'Unexpected value (trim_nosup={vdev_data['trim_notsup']}) returned by \'zpool status\'')
+                raise ValueError(f'Unexpected value (trim_nosup={self.__trim_notsup}) returned by \'zpool status\'')
 
         raise ValueError(f'Unexpected error parsing trim state')
 
+    @property
+    def name(self) -> str:
+        """Return the name of the VDEV as displayed by 'zpool status'"""
+        return self.__name
+
+    @property
+    def trimming(self) -> bool:
+        """Return True if a trim of the VDEV is in progress"""
+        return self.__trim_state == 'ACTIVE'
+
+    @property
+    def state(self) -> str:
+        """Return the state of the VDEV as reported by 'zpool status' (eg. 'ONLINE', 'DEGRADED')"""
+        return self.__state
+
+    @property
+    def error_counts(self) -> tuple[int, int, int]:
+        """Return the (read, write, checksum) error counters of the VDEV"""
+        return self.__read_errors, self.__write_errors, self.__checksum_errors
+
+    @property
+    def trim_progress(self) -> tuple[int, int, float | None, float | None] | None:
+        """Return (bytes trimmed, bytes to trim, windowed trim rate, EWMA time remaining) if a trim of the VDEV is in progress, otherwise None"""
+        return (self.__trimmed, self.__to_trim, self.__trim_rate, self.__trim_eta) if self.trimming else None
+
+    @property
+    def record(self) -> dict[str, Any]:
+        """
+        Return the status of the VDEV as a dictionary of plain values (no renderables are built), including the trim percentage, rate and time remaining
+        of a trim in progress (None otherwise). Trim fields are None if the VDEV is not a real device.
+        """
+        trim = self.trim_progress
+        return {'name': self.__name, 'guid': self.__key, 'depth': self.__depth, 'state': self.__state, 'size': self.__size, 'device': self.__device,
+                'read_errors': self.__read_errors, 'write_errors': self.__write_errors, 'checksum_errors': self.__checksum_errors,
+                'trim_supported': None if self.__trim_notsup is None else not self.__trim_notsup, 'trim_state': self.__trim_state,
+                'trim_time': self.__trim_time or None, 'trim_percent': 100 * self.__trimmed / self.__to_trim if trim and self.__to_trim else None,
+                'trim_rate': trim[2] if trim else None, 'trim_eta': trim[3] if trim else None}
+
+    @property
+    def key(self) -> str:
+        """Return the GUID of the VDEV (or the name if there is no GUID), used to match the VDEV across snapshots and as the row key for display"""
+        return self.__key
+
+    @property
+    def sort_values(self) -> tuple:
+        """Return a tuple of raw values, in the same order as labels, used to sort VDEVs by a column"""
+        return (self.__name, self.__size, self.__state, self.__device, self.__read_errors, self.__write_errors, self.__checksum_errors,
+                (self.__trim_state or '', self.__trim_time, self.__trimmed))
+
+    def name_cell(self, marker: str = '') -> RenderableType:
+        """
+        :param marker: Optional text displayed before the name (eg. to indicate a VDEV group is collapsed).
+        :return: Renderable for the name column, indented to represent depth and coloured based on VDEV state.
+        """
+        return Padding(f'{VDEV.state_colours.get(self.__state, '[bold red]')}{marker}{self.__name}', (0, 0, 0, self.__depth * 2))
+
     @property
     def label_data(self) -> list[str]:
         """Return a list containing VDEV column labels to set up the header of a table for display"""
-        return list(self.__data.keys())
+        return list(VDEV.labels)
 
     @property
     def row_data(self) -> list[RenderableType]:
-        """Return a list (as a table row) containing Rich renderables for each column label for display"""
-        return list(self.__data.values())
+        """
+        Return a list (as a table row) containing Rich renderables for each column label for display. Special cases:
+          - VDEV name indented to represent depth. Name and state is coloured based on VDEV state
+          - Trim renderable calculated by __parse_trim_state() method due to multiple possibilities
+        """
+        if self.__row is None:
+            state_colour = VDEV.state_colours.get(self.__state, '[bold red]')
+            self.__row = [self.name_cell(),
+                          humanise(self.__size) if self.__size > 0 else '',
+                          f'{state_colour}{self.__state}',
+                          self.__device,
+                          warning_colour_number(self.__read_errors),
+                          warning_colour_number(self.__write_errors),
+                          warning_colour_number(self.__checksum_errors),
+                          self.__parse_trim_state()]
+
+        return self.__row
@@ -4,50 +4,212 @@ can then be accessed as a rich Table for display
 """
 
 # Import System Libraries
-from typing import Any
+from typing import Any, Container
 from rich.table import Table
 from rich import box
 
-# Import zpool.VDEV class
-from . import VDEV
+# Import zpool.formatting functions, zpool.PoolProgress and zpool.VDEV classes, and change events
+from . import humanise, PoolProgress, VDEV
+from .changes import ChangeEvent, VDEVAdded, VDEVRemoved
 
 
 class VDEVS:
     """
     Maps all VDEVS within a single pool to a table for display purposes
     """
-    def __init__(self, vdevs_data:dict[str, Any]):
+    __slots__ = ('__vdevs', '__by_key', '__children', 'iostats', '__status', '__version')
+
+    # Column labels of the throughput columns displayed if iostats have been provided
+    iostat_labels: list[str] = ['Read Ops', 'Write Ops', 'Read BW', 'Write BW']
+
+    def __init__(self, vdevs_data:dict[str, Any], progress: PoolProgress | None = None):
         """
         Construct instance of class to map status for all VDEVS within a pool
 
         Calls member method to recursively traverse vdevs_data to populate self.__vdevs
 
         :param vdevs_data: JSON output for single VDEV from 'zpool status' mapped to a dictionary
+        :param progress: Optional progress history of the pool, used to display trim rates
         """
-        # __vdevs is a list of VDEV instances
+        # __vdevs is a list of VDEV instances in display order, __by_key maps the GUID (or name if there is no GUID) of each VDEV to its instance so
+        # instances can be updated in place when a new snapshot is applied
         self.__vdevs: list[VDEV] = []
+        self.__by_key: dict[str, VDEV] = {}
+
+        # Tree of VDEVs, mapping the key of each VDEV (None for the top level) to its child VDEVs in display order
+        self.__children: dict[str | None, list[VDEV]] = {}
+
+        # Optional throughput for each VDEV (mapping VDEV name to VDEVIOStat), extra columns are displayed when set
+        self.iostats: dict[str, Any] | None = None
 
-        self.__populate_table(vdevs_data=vdevs_data, depth=0)
+        # Memoised Table returned by status. Throughput values are updated in place by the IOStatCollector, so the Table is only memoised without iostats
+        self.__status: Table | None = None
 
-    def __populate_table(self, vdevs_data: dict, depth: int) -> None:
+        # Incremented whenever an update changes anything displayed, so views can cheaply skip VDEVS that have not changed since last displayed
+        self.__version: int = 0
+
+        self.__populate_table(vdevs_data=vdevs_data, depth=0, parent=None, previous={}, poolname='', events=None, progress=progress)
+
+    def __populate_table(self, vdevs_data: dict, depth: int, parent: str | None, previous: dict[str, VDEV], poolname: str,
+                         events: list[ChangeEvent] | None, progress: PoolProgress | None) -> bool:
         """
-        Recursively traverses vdevs_data to create a tree of VDEV devices which are then flattened into a list of VDEV instances in self.__vdevs
+        Recursively traverses vdevs_data to create a tree of VDEV devices which are then flattened into a list of VDEV instances in self.__vdevs. VDEVs
+        present in previous are updated in place rather than recreated.
 
         :param depth: Count of depth of VDEV in pool, 0=top level, 1=actual device for no RAID, or RAID type, 2=actual device within RAID
         :param vdevs_data: JSON output (from 'zpool status' mapped to a dictionary) for a single VDEV OR a VDEV containing multiple VDEVs
+        :param parent: Key of the VDEV containing the VDEVs in vdevs_data, None for the top level
+        :param previous: Dictionary mapping VDEV key to the instances built from the previous snapshot
+        :param poolname: Name of the pool, used in change events
+        :param events: List to append change events to, None when the VDEVS are first constructed
+        :param progress: Optional progress history of the pool
+        :return: True if any VDEV was added or changed
         """
+        changed = False
         for data in vdevs_data.values():
-            self.__vdevs.append(VDEV(vdev_data=data, depth=depth))
+            key = data.get('guid', data['name'])
+
+            if (vdev := previous.get(key)) is None:
+                vdev = VDEV(vdev_data=data, depth=depth, progress=progress)
+                changed = True
+                if events is not None: events.append(VDEVAdded(poolname=poolname, vdev=vdev.name))
+
+            elif vdev.update(vdev_data=data, depth=depth, poolname=poolname, events=events, progress=progress):
+                changed = True
+
+            self.__vdevs.append(vdev)
+            self.__by_key[key] = vdev
+            self.__children.setdefault(parent, []).append(vdev)
 
             if 'vdevs' in data:
-                self.__populate_table(vdevs_data=data['vdevs'], depth=depth + 1)
+                changed |= self.__populate_table(vdevs_data=data['vdevs'], depth=depth + 1, parent=key, previous=previous, poolname=poolname,
+                                                 events=events, progress=progress)
+
+        return changed
+
+    def update(self, vdevs_data: dict[str, Any], poolname: str, events: list[ChangeEvent], progress: PoolProgress | None = None) -> bool:
+        """
+        Apply the VDEVs from a new snapshot. VDEVs are matched by GUID and only changed VDEVs are updated, the memoised Table is discarded if any VDEV
+        was added, removed, reordered or changed.
+
+        :param vdevs_data: JSON output for the VDEVs of the pool from 'zpool status' mapped to a dictionary
+        :param poolname: Name of the pool, used in change events
+        :param events: List to append change events to
+        :param progress: Optional progress history of the pool
+        :return: True if anything displayed in the VDEVs table changed
+        """
+        previous, previous_order = self.__by_key, self.__vdevs
+        self.__vdevs, self.__by_key, self.__children = [], {}, {}
+
+        changed = self.__populate_table(vdevs_data=vdevs_data, depth=0, parent=None, previous=previous, poolname=poolname, events=events,
+                                        progress=progress)
+
+        for key in previous.keys() - self.__by_key.keys():
+            events.append(VDEVRemoved(poolname=poolname, vdev=previous[key].name))
+            changed = True
+
+        changed = changed or any(old is not new for old, new in zip(previous_order, self.__vdevs))
+        if changed:
+            self.__status = None
+            self.__version += 1
+
+        return changed
+
+    @property
+    def version(self) -> int:
+        """Return the content version of the VDEVS, incremented whenever an update changes anything displayed (throughput is not included)"""
+        return self.__version
+
+    @property
+    def trimming(self) -> bool:
+        """Return True if a trim of any VDEV is in progress"""
+        return any(vdev.trimming for vdev in self.__vdevs)
+
+    @property
+    def trim_progress(self) -> tuple[int, int, int] | None:
+        """Return (bytes trimmed, bytes to trim, number of VDEVs) across every VDEV being trimmed, or None if no trim is in progress"""
+        trims = [trim for vdev in self.__vdevs if (trim := vdev.trim_progress) is not None]
+        if not trims: return None
+
+        return sum(trim[0] for trim in trims), sum(trim[1] for trim in trims), len(trims)
+
+    @property
+    def records(self) -> list[dict[str, Any]]:
+        """Return the record (see VDEV.record) of every VDEV in tree order, each with the name of the VDEV containing it ('parent', None for the top level)"""
+        parents = {vdev.key: parent for parent, children in self.__children.items() for vdev in children}
+
+        return [vdev.record | {'parent': self.__by_key[parents[vdev.key]].name if parents[vdev.key] is not None else None} for vdev in self.__vdevs]
+
+    @property
+    def labels(self) -> list[str]:
+        """Return the column labels of the VDEVs table, including the throughput columns if iostats have been provided"""
+        return VDEV.labels + (VDEVS.iostat_labels if self.iostats is not None else [])
 
     @property
     def status(self) -> Table:
-        """Return a rich Table representing all VDEVS parsed during the constructor"""
-        table = Table(*self.__vdevs[0].label_data, title=f' 🔍 Details', title_style='bold yellow', title_justify='left', show_lines=False, box=box.HORIZONTALS)
+        """Return a rich Table representing all VDEVS parsed during the constructor, with throughput columns if iostats have been provided"""
+        if self.iostats is None and self.__status is not None: return self.__status
+
+        table = Table(*self.labels, title=f' 🔍 Details', title_style='bold yellow', title_justify='left', show_lines=False, box=box.HORIZONTALS)
 
         for vdev in self.__vdevs:
-            table.add_row(*vdev.row_data)
+            table.add_row(*vdev.row_data, *self.iostat_row(vdev.name))
+
+        if self.iostats is None: self.__status = table
 
         return table
+
+    def rows(self, collapsed: Container[str] = (), sort_column: int | None = None, reverse: bool = False) -> list[tuple[VDEV, bool]]:
+        """
+        Return the VDEVs to display as rows of a table in tree order, for views that update rows individually rather than rebuilding the whole Table.
+
+        :param collapsed: Keys of VDEVs whose child VDEVs are not displayed.
+        :param sort_column: Optional index (into labels) of the column to sort by. VDEVs are sorted amongst their siblings so the tree is preserved.
+        :param reverse: Sort in descending order.
+        :return: List of (VDEV instance, True if the VDEV contains other VDEVs)
+        """
+        rows: list[tuple[VDEV, bool]] = []
+        self.__add_rows(rows=rows, parent=None, collapsed=collapsed, sort_column=sort_column, reverse=reverse)
+
+        return rows
+
+    def __add_rows(self, rows: list[tuple[VDEV, bool]], parent: str | None, collapsed: Container[str], sort_column: int | None, reverse: bool) -> None:
+        """
+        Recursively append the children of a VDEV (and their children unless collapsed) to rows.
+
+        :param rows: List of rows to append to
+        :param parent: Key of the VDEV whose children are appended, None for the top level
+        :param collapsed: Keys of VDEVs whose child VDEVs are not displayed.
+        :param sort_column: Optional index (into labels) of the column to sort siblings by.
+        :param reverse: Sort in descending order.
+        """
+        children = self.__children.get(parent, [])
+        if sort_column is not None: children = sorted(children, key=lambda vdev: self.__sort_value(vdev, sort_column), reverse=reverse)
+
+        for vdev in children:
+            has_children = vdev.key in self.__children
+            rows.append((vdev, has_children))
+            if has_children and vdev.key not in collapsed:
+                self.__add_rows(rows=rows, parent=vdev.key, collapsed=collapsed, sort_column=sort_column, reverse=reverse)
+
+    def __sort_value(self, vdev: VDEV, column: int) -> Any:
+        """
+        :param vdev: Instance of VDEV.
+        :param column: Index (into labels) of the column.
+        :return: Raw value of the column for the VDEV (throughput columns index into the VDEVIOStat), used as the sort key.
+        """
+        if column < len(VDEV.labels): return vdev.sort_values[column]
+
+        iostat = self.iostats.get(vdev.name) if self.iostats else None
+        return iostat[column - len(VDEV.labels)] if iostat else -1
+
+    def iostat_row(self, name: str) -> list[str]:
+        """
+        :param name: Name of the VDEV.
+        :return: List of throughput cells for the VDEV, empty strings if no throughput is available, or an empty list if iostats have not been provided.
+        """
+        if self.iostats is None: return []
+        if name not in self.iostats: return [''] * 4
+
+        iostat = self.iostats[name]
+        return [str(iostat.read_ops), str(iostat.write_ops), f'{humanise(iostat.read_bw)}/s', f'{humanise(iostat.write_bw)}/s']
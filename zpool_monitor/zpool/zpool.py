@@ -1,6 +1,12 @@
 """
 This module provides the ZPool class which parses the 'zpool status' JSON output for the status of a single ZPool into internal state. State information for
 the pool can then be accessed as rich renderables for display
+
+Only the raw fields needed for display are stored when the ZPool is constructed. Rich renderables are built the first time they are requested, and the
+summary is memoised until the ZPool is updated with changed data from a new snapshot.
+
+A ZPool instance persists across refreshes. Each new snapshot is applied with update(), which updates only the VDEVs that changed and reports the changes as
+typed change events.
 """
 
 # Import System Libraries
@@ -9,29 +15,105 @@ from rich import box
 from rich.console import RenderableType
 from rich.table import Table
 
-# Import zpool.VDEV and zpool.ScanStatus classes
-from . import VDEVS, ScanStatus
+# Import zpool.formatting functions, zpool.PoolProgress, zpool.VDEV and zpool.ScanStatus classes, and change events
+from . import humanise, PoolProgress, VDEVS, ScanStatus
+from .changes import ChangeEvent, PoolStateChanged, ErrorCountChanged, ScanStateChanged
 
 
 class ZPool:
-    def __init__(self, pool_data: dict[str, Any]):
+    __slots__ = ('__name', '__state', '__status_text', '__action_text', '__error_count', '__io_stats', '__vdevs', '__scan_stats', '__progress', '__summary', '__summary_version',
+                 '__scan_version')
+
+    state_colours: dict[str, str] = {'ONLINE': '[bold green]', 'OFFLINE': '[bold orange3]⚠️ ', 'DEGRADED': '[bold orange3]⚠️ '}
+
+    def __init__(self, pool_data: dict[str, Any], now: float | None = None, progress: PoolProgress | None = None):
         """
         Construct instance of class to display the status for a single pool
 
         :param pool_data: JSON Status output for single ZPool from 'zpool status' mapped to a dictionary
+        :param now: Time (seconds since the epoch) the status was obtained (eg. when replaying a capture). Defaults to the current time.
+        :param progress: Optional progress history of the pool across refreshes (maintained by the Monitor), used to display windowed scan and trim
+                         rates and time remaining.
         """
-        self.__name: str = pool_data['name']
-        state_col = {'ONLINE': '[bold green]', 'OFFLINE': '[bold orange3]⚠️ ', 'DEGRADED': '[bold orange3]⚠️ '}
+        self.__load(pool_data=pool_data)
+        self.__progress = progress
 
-        self.__data: dict[str, RenderableType] = {'State:': f'{state_col.get(pool_data['state'], '[bold red]⚠️ ')}{pool_data['state']}'}
-        if 'status' in pool_data: self.__data['Status:'] = f'[red]🚩 {pool_data['status'].translate(str.maketrans('\n', ' ', '\t'))}'
-        if 'action' in pool_data: self.__data['Action:'] = f'[red]📝 {pool_data['action'].translate(str.maketrans('\n', ' ', '\t'))}'
-        self.__data['Errors:'] = 'No known data errors' if pool_data['error_count'] == 0 else f'[red]⚠️ Detected {pool_data['error_count']} data errors'
+        # Memoised Table returned by summary, built on first access
+        self.__summary: Table | None = None
 
-        self.__vdevs = VDEVS(vdevs_data=pool_data['vdevs'])
+        # Content versions of the summary and scan status, incremented whenever an update changes them so views can skip unchanged sections
+        self.__summary_version: int = 0
+        self.__scan_version: int = 0
+
+        self.__vdevs = VDEVS(vdevs_data=pool_data['vdevs'], progress=progress)
 
         # If the pool contains scan information, store them in __scan_stats
-        self.__scan_stats = ScanStatus(scan_data=pool_data['scan_stats']) if 'scan_stats' in pool_data else None
+        self.__scan_stats = ScanStatus(scan_data=pool_data['scan_stats'], now=now, progress=self.__progress) if 'scan_stats' in pool_data else None
+
+    def __load(self, pool_data: dict[str, Any]) -> None:
+        """
+        Extract the raw fields displayed in the summary from the pool status
+
+        :param pool_data: JSON Status output for single ZPool from 'zpool status' mapped to a dictionary
+        """
+        self.__name: str = pool_data['name']
+        self.__state: str = pool_data['state']
+        self.__status_text: str | None = pool_data.get('status')
+        self.__action_text: str | None = pool_data.get('action')
+        self.__error_count: int = pool_data['error_count']
+        self.__io_stats: dict[str, int] | None = pool_data.get('io_stats')
+
+    def __summary_fields(self) -> tuple:
+        """
+        :return: Tuple of the raw fields displayed in the summary, used to detect whether an update changed the summary.
+        """
+        return self.__state, self.__status_text, self.__action_text, self.__error_count, self.__io_stats
+
+    def update(self, pool_data: dict[str, Any], events: list[ChangeEvent], now: float | None = None) -> bool:
+        """
+        Apply the status of this pool from a new snapshot. Only the parts of the pool that changed are updated, memoised renderables are discarded only for
+        the parts that changed.
+
+        :param pool_data: JSON Status output for single ZPool from 'zpool status' mapped to a dictionary
+        :param events: List to append change events to
+        :param now: Time (seconds since the epoch) the status was obtained. Defaults to the current time.
+        :return: True if anything displayed for the pool changed
+        """
+        changed = False
+
+        # Summary: state, status/action messages, data errors, and I/O counters
+        before = self.__summary_fields()
+        old_state, old_error_count = self.__state, self.__error_count
+        self.__load(pool_data=pool_data)
+        if self.__summary_fields() != before:
+            self.__summary = None
+            self.__summary_version += 1
+            changed = True
+
+            if old_state != self.__state: events.append(PoolStateChanged(poolname=self.__name, old=old_state, new=self.__state))
+            if old_error_count != self.__error_count:
+                events.append(ErrorCountChanged(poolname=self.__name, vdev=None, counter='data', old=old_error_count, new=self.__error_count))
+
+        # VDEVs are matched by GUID and updated in place
+        changed |= self.__vdevs.update(vdevs_data=pool_data['vdevs'], poolname=self.__name, events=events, progress=self.__progress)
+
+        # Scan status is replaced if it changed, or if a scan is in progress (rate and time remaining are calculated against the current time)
+        old_scan = self.__scan_stats
+        new_scan = ScanStatus(scan_data=pool_data['scan_stats'], now=now, progress=self.__progress) if 'scan_stats' in pool_data else None
+
+        old_function, old_scan_state = (old_scan.function, old_scan.state) if old_scan else (None, None)
+        new_function, new_scan_state = (new_scan.function, new_scan.state) if new_scan else (None, None)
+        if (old_function, old_scan_state) != (new_function, new_scan_state):
+            events.append(ScanStateChanged(poolname=self.__name, old_function=old_function, old_state=old_scan_state, new_function=new_function,
+                                           new_state=new_scan_state))
+
+        if old_scan is None or new_scan is None or new_scan.state == 'SCANNING' or new_scan.fields != old_scan.fields:
+            if old_scan is not None or new_scan is not None:
+                changed = True
+                self.__scan_version += 1
+            self.__scan_stats = new_scan
+
+        return changed
 
     @property
     def poolname(self) -> str:
@@ -40,16 +122,90 @@ class ZPool:
         """
         return self.__name
 
+    @property
+    def state(self) -> str:
+        """
+        :return: Return the state of the pool as reported by 'zpool status' (eg. 'ONLINE', 'DEGRADED')
+        """
+        return self.__state
+
+    @property
+    def error_count(self) -> int:
+        """
+        :return: Return the number of data errors detected in the pool
+        """
+        return self.__error_count
+
+    @property
+    def record(self) -> dict[str, Any]:
+        """
+        :return: Return the status of the pool, its VDEVs (see VDEVS.records) and scan status (see ScanStatus.record) as a dictionary of plain values,
+                 no renderables are built
+        """
+        return {'name': self.__name, 'state': self.__state, 'status': self.__status_text, 'action': self.__action_text, 'error_count': self.__error_count,
+                'io_stats': self.__io_stats, 'scan': self.__scan_stats.record if self.__scan_stats else None, 'vdevs': self.__vdevs.records}
+
     @property
     def summary(self) -> Table:
         """
         :return: Return summary information about the pool as a rich Table for display
         """
-        table = Table('Property', 'Value', show_header=False, show_lines=False, box=box.SIMPLE)
-        for key, value in self.__data.items():
-            table.add_row(key, value)
+        if self.__summary is not None: return self.__summary
+
+        data: dict[str, RenderableType] = {'State:': f'{ZPool.state_colours.get(self.__state, '[bold red]⚠️ ')}{self.__state}'}
+        if self.__status_text is not None: data['Status:'] = f'[red]🚩 {self.__status_text.translate(str.maketrans('\n', ' ', '\t'))}'
+        if self.__action_text is not None: data['Action:'] = f'[red]📝 {self.__action_text.translate(str.maketrans('\n', ' ', '\t'))}'
+        data['Errors:'] = 'No known data errors' if self.__error_count == 0 else f'[red]⚠️ Detected {self.__error_count} data errors'
+        if self.__io_stats is not None: data['I/O:'] = (f'📊 {self.__io_stats['reads']} reads ({humanise(self.__io_stats['nread'])}), '
+                                                        f'{self.__io_stats['writes']} writes ({humanise(self.__io_stats['nwritten'])})')
+
+        self.__summary = Table('Property', 'Value', show_header=False, show_lines=False, box=box.SIMPLE)
+        for key, value in data.items():
+            self.__summary.add_row(key, value)
+
+        return self.__summary
+
+    @property
+    def active(self) -> bool:
+        """
+        :return: True if the pool needs close monitoring: the pool is not ONLINE, or a scrub/resilver or trim is in progress
+        """
+        return (self.__state != 'ONLINE' or (self.__scan_stats is not None and self.__scan_stats.state == 'SCANNING') or self.__vdevs.trimming)
+
+    @property
+    def summary_version(self) -> int:
+        """
+        :return: Content version of the summary, incremented whenever an update changes the summary
+        """
+        return self.__summary_version
+
+    @property
+    def vdevs_version(self) -> int:
+        """
+        :return: Content version of the VDEVs, incremented whenever an update changes the VDEVs (throughput is not included)
+        """
+        return self.__vdevs.version
 
-        return table
+    @property
+    def scan_version(self) -> int:
+        """
+        :return: Content version of the scan status, incremented whenever an update changes (or replaces a running) scan status
+        """
+        return self.__scan_version
+
+    @property
+    def iostats(self) -> dict[str, Any] | None:
+        """
+        :return: Return the throughput for each VDEV (mapping VDEV name to VDEVIOStat) displayed in the VDEVs table, or None if not displayed
+        """
+        return self.__vdevs.iostats
+
+    @iostats.setter
+    def iostats(self, iostats: dict[str, Any] | None) -> None:
+        """
+        :param iostats: Throughput for each VDEV (mapping VDEV name to VDEVIOStat) to display in the VDEVs table, or None to not display throughput
+        """
+        self.__vdevs.iostats = iostats
 
     @property
     def vdevs(self) -> Table:
@@ -58,6 +214,20 @@ class ZPool:
         """
         return self.__vdevs.status
 
+    @property
+    def vdev_tree(self) -> VDEVS:
+        """
+        :return: Return the VDEVS instance for the pool, used by views that display the VDEVs row by row rather than as a single Table
+        """
+        return self.__vdevs
+
+    @property
+    def scan(self) -> ScanStatus | None:
+        """
+        :return: Return the ScanStatus instance for the pool, or None if the pool has never been scanned
+        """
+        return self.__scan_stats
+
     @property
     def scan_stats(self) -> Table:
         """